@@ -0,0 +1,42 @@
+"""add_backup_chunks_table
+
+Revision ID: 4c8e2f7a9b13
+Revises: b61f0c2a9e41
+Create Date: 2025-09-16 08:41:27.530912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c8e2f7a9b13'
+down_revision = 'b61f0c2a9e41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('backup_chunks',
+    sa.Column('tenant_id', sa.UUID(), nullable=False, comment='Tenant that owns the chunk (chunks are encrypted with the tenant key)'),
+    sa.Column('chunk_hash', sa.String(length=64), nullable=False, comment='Keyed SHA-256 of the plaintext chunk content'),
+    sa.Column('size', sa.Integer(), nullable=False, comment='Plaintext chunk size in bytes'),
+    sa.Column('stored_size', sa.Integer(), nullable=False, comment='Compressed and encrypted chunk size in bytes'),
+    sa.Column('storage_key', sa.String(length=500), nullable=False, comment='Object key of the chunk in every chunk store backend'),
+    sa.Column('ref_count', sa.Integer(), nullable=False, comment='Number of backup manifest references to this chunk'),
+    sa.Column('last_referenced_at', sa.DateTime(timezone=True), nullable=True, comment='Last time a backup referenced or released this chunk'),
+    sa.Column('id', sa.UUID(), nullable=False, comment='Primary key UUID'),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False, comment='Record creation timestamp'),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False, comment='Record last update timestamp'),
+    sa.Column('is_active', sa.Boolean(), nullable=False, comment='Soft delete flag'),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_backup_chunk_tenant_hash', 'backup_chunks', ['tenant_id', 'chunk_hash'], unique=True)
+    op.create_index('idx_backup_chunk_ref_count', 'backup_chunks', ['ref_count'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_backup_chunk_ref_count', table_name='backup_chunks')
+    op.drop_index('idx_backup_chunk_tenant_hash', table_name='backup_chunks')
+    op.drop_table('backup_chunks')
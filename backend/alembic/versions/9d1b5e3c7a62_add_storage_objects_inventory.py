@@ -0,0 +1,47 @@
+"""add_storage_objects_inventory
+
+Revision ID: 9d1b5e3c7a62
+Revises: 4c8e2f7a9b13
+Create Date: 2025-09-17 11:05:48.662170
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '9d1b5e3c7a62'
+down_revision = '4c8e2f7a9b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('storage_objects',
+    sa.Column('provider', postgresql.ENUM('CLOUDFLARE_R2', 'BACKBLAZE_B2', 'LOCAL', name='storageprovider', create_type=False), nullable=False, comment='Storage provider holding the object'),
+    sa.Column('object_key', sa.String(length=1024), nullable=False, comment='Object key within the provider bucket'),
+    sa.Column('size', sa.Numeric(precision=15, scale=0), nullable=False, comment='Object size in bytes'),
+    sa.Column('etag', sa.String(length=255), nullable=True, comment='Object ETag reported by the provider'),
+    sa.Column('tenant_id', sa.UUID(), nullable=True, comment='Tenant the object belongs to, when known'),
+    sa.Column('last_modified', sa.DateTime(timezone=True), nullable=True, comment='Object last modified timestamp'),
+    sa.Column('last_seen_at', sa.DateTime(timezone=True), nullable=True, comment='Last time an upload or reconcile confirmed the object'),
+    sa.Column('id', sa.UUID(), nullable=False, comment='Primary key UUID'),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False, comment='Record creation timestamp'),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False, comment='Record last update timestamp'),
+    sa.Column('is_active', sa.Boolean(), nullable=False, comment='Soft delete flag'),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_storage_object_provider_key', 'storage_objects', ['provider', 'object_key'], unique=True)
+    op.create_index('idx_storage_object_key', 'storage_objects', ['object_key'], unique=False)
+    op.create_index('idx_storage_object_tenant', 'storage_objects', ['tenant_id'], unique=False)
+    op.create_index('idx_backup_log_restore_points', 'backup_logs', ['tenant_id', 'backup_type', 'status', 'started_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_backup_log_restore_points', table_name='backup_logs')
+    op.drop_index('idx_storage_object_tenant', table_name='storage_objects')
+    op.drop_index('idx_storage_object_key', table_name='storage_objects')
+    op.drop_index('idx_storage_object_provider_key', table_name='storage_objects')
+    op.drop_table('storage_objects')
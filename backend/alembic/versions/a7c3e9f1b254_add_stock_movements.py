@@ -0,0 +1,49 @@
+"""add_stock_movements
+
+Revision ID: a7c3e9f1b254
+Revises: d2f6b8a4c913
+Create Date: 2025-10-02 09:18:44.630157
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e9f1b254'
+down_revision = 'd2f6b8a4c913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('stock_movements',
+    sa.Column('product_id', sa.UUID(), nullable=False, comment='Product ID'),
+    sa.Column('movement_type', postgresql.ENUM('ADJUST', 'RESERVE', 'RELEASE', 'FULFILL', name='stockmovementtype'), nullable=False, comment='Kind of movement'),
+    sa.Column('quantity', sa.Integer(), nullable=False, comment='Requested quantity (signed for adjustments)'),
+    sa.Column('stock_after', sa.Integer(), nullable=False, comment='Stock quantity after the movement'),
+    sa.Column('reserved_after', sa.Integer(), nullable=False, comment='Reserved quantity after the movement'),
+    sa.Column('reason', sa.String(length=500), nullable=True, comment='Reason given for the movement'),
+    sa.Column('reference_type', sa.String(length=50), nullable=True, comment='Kind of record that caused the movement (sale, purchase, etc.)'),
+    sa.Column('reference_id', sa.UUID(), nullable=True, comment='ID of the record that caused the movement'),
+    sa.Column('id', sa.UUID(), nullable=False, comment='Primary key UUID'),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False, comment='Record creation timestamp'),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False, comment='Record last update timestamp'),
+    sa.Column('is_active', sa.Boolean(), nullable=False, comment='Soft delete flag'),
+    sa.Column('tenant_id', sa.UUID(), nullable=False, comment='Tenant ID for multi-tenant isolation'),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_stock_movements_tenant_id'), 'stock_movements', ['tenant_id'], unique=False)
+    op.create_index('idx_stock_movement_tenant_product', 'stock_movements', ['tenant_id', 'product_id', 'created_at'], unique=False)
+    op.create_index('idx_stock_movement_reference', 'stock_movements', ['reference_type', 'reference_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_stock_movement_reference', table_name='stock_movements')
+    op.drop_index('idx_stock_movement_tenant_product', table_name='stock_movements')
+    op.drop_index(op.f('ix_stock_movements_tenant_id'), table_name='stock_movements')
+    op.drop_table('stock_movements')
+    op.execute("DROP TYPE IF EXISTS stockmovementtype")
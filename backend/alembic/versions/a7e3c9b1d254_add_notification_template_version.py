@@ -0,0 +1,30 @@
+"""add_notification_template_version
+
+Revision ID: a7e3c9b1d254
+Revises: f1a4c7d2b893
+Create Date: 2025-09-24 11:08:42.517306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7e3c9b1d254'
+down_revision = 'f1a4c7d2b893'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'notification_templates',
+        sa.Column(
+            'version', sa.Integer(), server_default='1', nullable=False,
+            comment='Content version, bumped on every edit to invalidate compiled copies'
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('notification_templates', 'version')
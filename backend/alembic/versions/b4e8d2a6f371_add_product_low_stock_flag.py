@@ -0,0 +1,27 @@
+"""add_product_low_stock_flag
+
+Revision ID: b4e8d2a6f371
+Revises: a7c3e9f1b254
+Create Date: 2025-10-03 16:05:27.814590
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4e8d2a6f371'
+down_revision = 'a7c3e9f1b254'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Stored generated column; adding it rewrites the products table once
+    op.add_column('products', sa.Column('is_low_stock', sa.Boolean(), sa.Computed('track_inventory AND NOT is_service AND stock_quantity - reserved_quantity <= min_stock_level', persisted=True), nullable=True, comment='Whether the product needs restocking (includes out of stock)'))
+    op.create_index('idx_product_low_stock', 'products', ['tenant_id'], unique=False, postgresql_where=sa.text('is_low_stock'))
+
+
+def downgrade() -> None:
+    op.drop_index('idx_product_low_stock', table_name='products', postgresql_where=sa.text('is_low_stock'))
+    op.drop_column('products', 'is_low_stock')
@@ -0,0 +1,32 @@
+"""add_restore_orchestration_fields
+
+Revision ID: b61f0c2a9e41
+Revises: d0316d20450f
+Create Date: 2025-09-14 10:12:31.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b61f0c2a9e41'
+down_revision = 'd0316d20450f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('restore_logs', sa.Column('batch_id', sa.UUID(), nullable=True, comment='Restore batch ID (for orchestrated multi-tenant restores)'))
+    op.add_column('restore_logs', sa.Column('priority', sa.Integer(), nullable=True, comment='Position of this restore in the batch plan (lower runs first)'))
+    op.add_column('restore_logs', sa.Column('current_step', sa.String(length=50), nullable=True, comment='Current restore step (queued, validating, downloading, restoring, completed, failed)'))
+    op.add_column('restore_logs', sa.Column('progress_percentage', sa.Integer(), server_default='0', nullable=False, comment='Restore progress percentage'))
+    op.create_index('idx_restore_log_batch', 'restore_logs', ['batch_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_restore_log_batch', table_name='restore_logs')
+    op.drop_column('restore_logs', 'progress_percentage')
+    op.drop_column('restore_logs', 'current_step')
+    op.drop_column('restore_logs', 'priority')
+    op.drop_column('restore_logs', 'batch_id')
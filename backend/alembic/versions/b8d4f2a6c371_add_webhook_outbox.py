@@ -0,0 +1,53 @@
+"""add_webhook_outbox
+
+Revision ID: b8d4f2a6c371
+Revises: a7e3c9b1d254
+Create Date: 2025-09-25 15:32:19.604127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8d4f2a6c371'
+down_revision = 'a7e3c9b1d254'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('webhook_outbox',
+    sa.Column('webhook_endpoint_id', sa.UUID(), nullable=False, comment='Endpoint the event is delivered to'),
+    sa.Column('event_type', sa.String(length=100), nullable=False, comment="Event name (e.g. 'invoice.created')"),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False, comment='Complete webhook body as sent to the endpoint'),
+    sa.Column('status', sa.String(length=20), nullable=False, comment='Delivery status'),
+    sa.Column('attempts', sa.Integer(), nullable=False, comment='Number of delivery attempts made'),
+    sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=False, comment='Earliest time of the next attempt; lease expiry while delivering'),
+    sa.Column('last_status_code', sa.Integer(), nullable=True, comment='HTTP status of the last attempt'),
+    sa.Column('last_error', sa.Text(), nullable=True, comment='Error from the last failed attempt'),
+    sa.Column('delivered_at', sa.DateTime(timezone=True), nullable=True, comment='Successful delivery timestamp'),
+    sa.Column('tenant_id', sa.UUID(), nullable=False, comment='Tenant ID for multi-tenant data isolation'),
+    sa.Column('id', sa.UUID(), nullable=False, comment='Primary key UUID'),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False, comment='Record creation timestamp'),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False, comment='Record last update timestamp'),
+    sa.Column('is_active', sa.Boolean(), nullable=False, comment='Soft delete flag'),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.ForeignKeyConstraint(['webhook_endpoint_id'], ['webhook_endpoints.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_webhook_outbox_tenant_id'), 'webhook_outbox', ['tenant_id'], unique=False)
+    op.create_index('idx_webhook_outbox_due', 'webhook_outbox', ['status', 'next_attempt_at'], unique=False)
+    op.create_index('idx_webhook_outbox_endpoint', 'webhook_outbox', ['webhook_endpoint_id'], unique=False)
+    op.add_column('webhook_endpoints', sa.Column('consecutive_failures', sa.Integer(), server_default='0', nullable=False, comment='Failed delivery attempts since the last success'))
+    op.add_column('webhook_endpoints', sa.Column('circuit_open_until', sa.DateTime(timezone=True), nullable=True, comment='Deliveries to this endpoint are paused until this time'))
+
+
+def downgrade() -> None:
+    op.drop_column('webhook_endpoints', 'circuit_open_until')
+    op.drop_column('webhook_endpoints', 'consecutive_failures')
+    op.drop_index('idx_webhook_outbox_endpoint', table_name='webhook_outbox')
+    op.drop_index('idx_webhook_outbox_due', table_name='webhook_outbox')
+    op.drop_index(op.f('ix_webhook_outbox_tenant_id'), table_name='webhook_outbox')
+    op.drop_table('webhook_outbox')
@@ -0,0 +1,26 @@
+"""add_columnar_export_formats
+
+Revision ID: c3a7d9e2f518
+Revises: 9d1b5e3c7a62
+Create Date: 2025-09-18 09:27:14.305881
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3a7d9e2f518'
+down_revision = '9d1b5e3c7a62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TYPE exportformat ADD VALUE IF NOT EXISTS 'PARQUET'")
+    op.execute("ALTER TYPE exportformat ADD VALUE IF NOT EXISTS 'ARROW'")
+
+
+def downgrade() -> None:
+    # PostgreSQL cannot drop enum values; rows using them are moved back to JSON
+    op.execute("UPDATE data_export_logs SET export_format = 'JSON' WHERE export_format::text IN ('PARQUET', 'ARROW')")
+    op.execute("UPDATE export_schedules SET export_format = 'JSON' WHERE export_format::text IN ('PARQUET', 'ARROW')")
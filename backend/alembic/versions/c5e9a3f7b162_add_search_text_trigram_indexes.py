@@ -0,0 +1,38 @@
+"""add_search_text_trigram_indexes
+
+Revision ID: c5e9a3f7b162
+Revises: b8d4f2a6c371
+Create Date: 2025-09-26 10:14:51.883402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e9a3f7b162'
+down_revision = 'b8d4f2a6c371'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Stored generated columns; adding them rewrites each table once
+    op.add_column('customers', sa.Column('search_text', sa.Text(), sa.Computed("lower(translate(coalesce(name, '') || ' ' || coalesce(email, '') || ' ' || coalesce(phone, '') || ' ' || coalesce(mobile, '') || ' ' || coalesce(business_name, ''), '\u064a\u0649\u0643\u06c0\u0629\u0622\u0623\u0625\u0624\u06f0\u06f1\u06f2\u06f3\u06f4\u06f5\u06f6\u06f7\u06f8\u06f9\u0660\u0661\u0662\u0663\u0664\u0665\u0666\u0667\u0668\u0669\u200c\u0640\u064b\u064c\u064d\u064e\u064f\u0650\u0651\u0652', '\u06cc\u06cc\u06a9\u0647\u0647\u0627\u0627\u0627\u064801234567890123456789'))", persisted=True), nullable=True, comment='Normalized name, contact and business text for search'))
+    op.add_column('products', sa.Column('search_text', sa.Text(), sa.Computed("lower(translate(coalesce(name, '') || ' ' || coalesce(description, '') || ' ' || coalesce(sku, '') || ' ' || coalesce(barcode, '') || ' ' || coalesce(manufacturer, '') || ' ' || coalesce(brand, '') || ' ' || coalesce(model, ''), '\u064a\u0649\u0643\u06c0\u0629\u0622\u0623\u0625\u0624\u06f0\u06f1\u06f2\u06f3\u06f4\u06f5\u06f6\u06f7\u06f8\u06f9\u0660\u0661\u0662\u0663\u0664\u0665\u0666\u0667\u0668\u0669\u200c\u0640\u064b\u064c\u064d\u064e\u064f\u0650\u0651\u0652', '\u06cc\u06cc\u06a9\u0647\u0647\u0627\u0627\u0627\u064801234567890123456789'))", persisted=True), nullable=True, comment='Normalized name, code and maker text for search'))
+    op.add_column('invoices', sa.Column('search_text', sa.Text(), sa.Computed("lower(translate(coalesce(invoice_number, '') || ' ' || coalesce(notes, ''), '\u064a\u0649\u0643\u06c0\u0629\u0622\u0623\u0625\u0624\u06f0\u06f1\u06f2\u06f3\u06f4\u06f5\u06f6\u06f7\u06f8\u06f9\u0660\u0661\u0662\u0663\u0664\u0665\u0666\u0667\u0668\u0669\u200c\u0640\u064b\u064c\u064d\u064e\u064f\u0650\u0651\u0652', '\u06cc\u06cc\u06a9\u0647\u0647\u0627\u0627\u0627\u064801234567890123456789'))", persisted=True), nullable=True, comment='Normalized invoice number and notes for search'))
+
+    op.create_index('idx_customer_search_trgm', 'customers', ['search_text'], unique=False, postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'})
+    op.create_index('idx_product_search_trgm', 'products', ['search_text'], unique=False, postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'})
+    op.create_index('idx_invoice_search_trgm', 'invoices', ['search_text'], unique=False, postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('idx_invoice_search_trgm', table_name='invoices', postgresql_using='gin')
+    op.drop_index('idx_product_search_trgm', table_name='products', postgresql_using='gin')
+    op.drop_index('idx_customer_search_trgm', table_name='customers', postgresql_using='gin')
+    op.drop_column('invoices', 'search_text')
+    op.drop_column('products', 'search_text')
+    op.drop_column('customers', 'search_text')
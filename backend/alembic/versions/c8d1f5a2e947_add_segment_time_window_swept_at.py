@@ -0,0 +1,25 @@
+"""add_segment_time_window_swept_at
+
+Revision ID: c8d1f5a2e947
+Revises: b4e8d2a6f371
+Create Date: 2025-10-04 09:12:41.306118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8d1f5a2e947'
+down_revision = 'b4e8d2a6f371'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Left empty: the first sweep after upgrading re-checks every window since the segment was created
+    op.add_column('customer_segments', sa.Column('time_window_swept_at', sa.DateTime(timezone=True), nullable=True, comment='When purchase-window membership was last swept'))
+
+
+def downgrade() -> None:
+    op.drop_column('customer_segments', 'time_window_swept_at')
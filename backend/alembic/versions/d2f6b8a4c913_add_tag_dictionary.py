@@ -0,0 +1,62 @@
+"""add_tag_dictionary
+
+Revision ID: d2f6b8a4c913
+Revises: c5e9a3f7b162
+Create Date: 2025-09-29 11:37:05.206418
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f6b8a4c913'
+down_revision = 'c5e9a3f7b162'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('tags',
+    sa.Column('entity_type', postgresql.ENUM('CUSTOMER', 'PRODUCT', name='tagentitytype'), nullable=False, comment='Kind of record the tag is used on'),
+    sa.Column('name', sa.String(length=255), nullable=False, comment='Tag text'),
+    sa.Column('usage_count', sa.Integer(), nullable=False, comment='Number of active records carrying the tag'),
+    sa.Column('id', sa.UUID(), nullable=False, comment='Primary key UUID'),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False, comment='Record creation timestamp'),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False, comment='Record last update timestamp'),
+    sa.Column('is_active', sa.Boolean(), nullable=False, comment='Soft delete flag'),
+    sa.Column('tenant_id', sa.UUID(), nullable=False, comment='Tenant ID for multi-tenant isolation'),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tags_tenant_id'), 'tags', ['tenant_id'], unique=False)
+    op.create_index('uq_tag_tenant_entity_name', 'tags', ['tenant_id', 'entity_type', 'name'], unique=True)
+    op.create_index('idx_tag_name_prefix', 'tags', ['tenant_id', 'entity_type', 'name'], unique=False, postgresql_ops={'name': 'text_pattern_ops'})
+
+    op.create_index('idx_customer_tags', 'customers', ['tags'], unique=False, postgresql_using='gin')
+    op.create_index('idx_product_tags', 'products', ['tags'], unique=False, postgresql_using='gin')
+
+    # Seed counts from the active records' existing tags
+    for table, entity_type in (('customers', 'CUSTOMER'), ('products', 'PRODUCT')):
+        op.execute(f"""
+            INSERT INTO tags (id, tenant_id, entity_type, name, usage_count, is_active, created_at, updated_at)
+            SELECT gen_random_uuid(), tenant_id, '{entity_type}', tag, count(*), true, now(), now()
+            FROM (
+                SELECT DISTINCT id, tenant_id, jsonb_array_elements_text(tags) AS tag
+                FROM {table}
+                WHERE is_active AND jsonb_typeof(tags) = 'array'
+            ) AS record_tags
+            WHERE tag <> '' AND length(tag) <= 255
+            GROUP BY tenant_id, tag
+        """)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_product_tags', table_name='products', postgresql_using='gin')
+    op.drop_index('idx_customer_tags', table_name='customers', postgresql_using='gin')
+    op.drop_index('idx_tag_name_prefix', table_name='tags', postgresql_ops={'name': 'text_pattern_ops'})
+    op.drop_index('uq_tag_tenant_entity_name', table_name='tags')
+    op.drop_index(op.f('ix_tags_tenant_id'), table_name='tags')
+    op.drop_table('tags')
+    op.execute("DROP TYPE IF EXISTS tagentitytype")
@@ -0,0 +1,49 @@
+"""add_data_export_slices
+
+Revision ID: e5b2c8f41a76
+Revises: c3a7d9e2f518
+Create Date: 2025-09-19 14:12:37.519204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b2c8f41a76'
+down_revision = 'c3a7d9e2f518'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('data_export_slices',
+    sa.Column('export_id', sa.UUID(), nullable=False, comment='Data export this slice belongs to'),
+    sa.Column('table_name', sa.String(length=50), nullable=False, comment="Exported sub-table (e.g. 'invoices', 'journal_entries')"),
+    sa.Column('slice_index', sa.Integer(), nullable=False, comment='Position of the slice within its table'),
+    sa.Column('start_key', sa.UUID(), nullable=True, comment='Inclusive lower bound on the row primary key (null for the first slice)'),
+    sa.Column('end_key', sa.UUID(), nullable=True, comment='Exclusive upper bound on the row primary key (null for the last slice)'),
+    sa.Column('status', postgresql.ENUM('PENDING', 'IN_PROGRESS', 'COMPLETED', 'FAILED', 'CANCELLED', name='exportstatus', create_type=False), nullable=False, comment='Slice status'),
+    sa.Column('estimated_records', sa.Integer(), nullable=False, comment='Rows in the key range when the export was planned'),
+    sa.Column('exported_records', sa.Integer(), nullable=False, comment='Rows written by the completed slice'),
+    sa.Column('attempts', sa.Integer(), nullable=False, comment='Number of times the slice was started'),
+    sa.Column('part_file_path', sa.String(length=500), nullable=True, comment='Local part file written by the slice'),
+    sa.Column('part_file_size', sa.Numeric(precision=15, scale=0), nullable=True, comment='Part file size in bytes'),
+    sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True, comment='Slice completion time'),
+    sa.Column('error_message', sa.Text(), nullable=True, comment='Error message from the last failed attempt'),
+    sa.Column('id', sa.UUID(), nullable=False, comment='Primary key UUID'),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False, comment='Record creation timestamp'),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False, comment='Record last update timestamp'),
+    sa.Column('is_active', sa.Boolean(), nullable=False, comment='Soft delete flag'),
+    sa.ForeignKeyConstraint(['export_id'], ['data_export_logs.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_data_export_slice_position', 'data_export_slices', ['export_id', 'table_name', 'slice_index'], unique=True)
+    op.create_index('idx_data_export_slice_status', 'data_export_slices', ['export_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_data_export_slice_status', table_name='data_export_slices')
+    op.drop_index('idx_data_export_slice_position', table_name='data_export_slices')
+    op.drop_table('data_export_slices')
@@ -0,0 +1,23 @@
+"""add_campaign_recipient_keyset_index
+
+Revision ID: f1a4c7d2b893
+Revises: e5b2c8f41a76
+Create Date: 2025-09-22 10:41:08.226174
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a4c7d2b893'
+down_revision = 'e5b2c8f41a76'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_campaign_recipient_campaign_status', 'campaign_recipients', ['campaign_id', 'status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_campaign_recipient_campaign_status', table_name='campaign_recipients')
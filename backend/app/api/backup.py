@@ -12,7 +12,7 @@ from app.core.database import get_db
 from app.core.auth import get_super_admin_user
 from app.services.backup_service import BackupService
 from app.services.cloud_storage_service import CloudStorageService
-from app.tasks.backup_tasks import backup_tenant_data, verify_backup_integrity
+from app.tasks.backup_tasks import backup_tenant_data, verify_backup_integrity, reconcile_storage_inventory
 from app.schemas.backup import (
     BackupResponse, BackupListResponse, BackupInfoResponse,
     StorageUsageResponse, ConnectivityTestResponse
@@ -126,10 +126,11 @@ async def verify_backup(
     backup_id: str,
     background_tasks: BackgroundTasks,
     storage_provider: str = Query(default="backblaze_b2", pattern="^(backblaze_b2|cloudflare_r2)$"),
+    mode: str = Query(default="sampled", pattern="^(metadata|sampled|full)$"),
     db: Session = Depends(get_db),
     current_admin=Depends(get_super_admin_user)
 ):
-    """Verify backup file integrity"""
+    """Verify backup file integrity without re-downloading it (use mode=full for a streamed full check)"""
     try:
         # Validate backup exists
         backup_service = BackupService(db)
@@ -138,7 +139,7 @@ async def verify_backup(
             raise HTTPException(status_code=404, detail="Backup not found")
         
         # Start verification task in background
-        task = verify_backup_integrity.delay(backup_id, storage_provider)
+        task = verify_backup_integrity.delay(backup_id, storage_provider, mode)
         
         logger.info(f"Backup verification task started for {backup_id}: {task.id}")
         
@@ -147,7 +148,8 @@ async def verify_backup(
             "message": f"Backup verification started for {backup_id}",
             "task_id": task.id,
             "backup_id": backup_id,
-            "storage_provider": storage_provider
+            "storage_provider": storage_provider,
+            "mode": mode
         }
         
     except HTTPException:
@@ -159,12 +161,13 @@ async def verify_backup(
 
 @router.get("/storage/usage", response_model=StorageUsageResponse)
 async def get_storage_usage(
+    db: Session = Depends(get_db),
     current_admin=Depends(get_super_admin_user)
 ):
     """Get storage usage statistics for both cloud providers"""
     try:
-        # Get cloud storage service
-        cloud_storage = CloudStorageService()
+        # Usage comes from the local storage inventory, not a live bucket listing
+        cloud_storage = CloudStorageService(db)
         
         # Get usage statistics
         usage_stats = cloud_storage.get_storage_usage()
@@ -247,12 +250,13 @@ async def get_storage_cost_analytics(
 
 @router.get("/storage/redundancy")
 async def get_storage_redundancy_status(
+    db: Session = Depends(get_db),
     current_admin=Depends(get_super_admin_user)
 ):
     """Get storage redundancy status across both providers"""
     try:
-        # Get cloud storage service
-        cloud_storage = CloudStorageService()
+        # Redundancy comes from the local storage inventory, not a live bucket listing
+        cloud_storage = CloudStorageService(db)
         
         # Get redundancy status
         redundancy_status = cloud_storage.get_storage_redundancy_status()
@@ -267,6 +271,27 @@ async def get_storage_redundancy_status(
         raise HTTPException(status_code=500, detail="Failed to retrieve redundancy status")
 
 
+@router.post("/storage/inventory/reconcile")
+async def reconcile_storage_inventory_now(
+    current_admin=Depends(get_super_admin_user)
+):
+    """Reconcile the local storage inventory against full bucket listings"""
+    try:
+        task = reconcile_storage_inventory.delay()
+        
+        logger.info(f"Storage inventory reconcile task started: {task.id}")
+        
+        return {
+            "status": "started",
+            "message": "Storage inventory reconcile started",
+            "task_id": task.id
+        }
+    
+    except Exception as e:
+        logger.error(f"Failed to start storage inventory reconcile: {e}")
+        raise HTTPException(status_code=500, detail="Failed to start inventory reconcile task")
+
+
 @router.post("/storage/failover-strategy")
 async def set_failover_strategy(
     strategy: str = Query(..., pattern="^(primary_only|secondary_fallback|dual_upload)$"),
@@ -12,6 +12,9 @@ from app.core.auth import get_current_user
 from app.core.permissions import require_permission
 from app.models.user import User
 from app.services.customer_service import CustomerService
+from app.services.tag_dictionary_service import TagDictionaryService
+from app.models.tag import TagEntityType
+from app.schemas.tag import TagSuggestion, TagSuggestionResponse
 from app.schemas.customer import (
     CustomerCreate, CustomerUpdate, CustomerResponse, CustomerListResponse,
     CustomerSearchRequest, CustomerInteractionCreate, CustomerInteractionResponse,
@@ -19,6 +22,7 @@ from app.schemas.customer import (
     CustomerDebtSummaryResponse, CustomerExportRequest, CustomerTagsResponse
 )
 from app.core.exceptions import NotFoundError, ValidationError
+from app.core.pagination import COUNT_MODE_PATTERN
 
 router = APIRouter(prefix="/api/customers", tags=["customers"])
 
@@ -60,12 +64,15 @@ async def list_customers(
     status: Optional[str] = Query(None, description="Filter by status"),
     customer_type: Optional[str] = Query(None, description="Filter by customer type"),
     tags: Optional[List[str]] = Query(None, description="Filter by tags"),
+    tag_match: str = Query("all", pattern="^(all|any)$", description="Require all of the tags or any of them"),
     has_debt: Optional[bool] = Query(None, description="Filter customers with debt"),
     city: Optional[str] = Query(None, description="Filter by city"),
-    sort_by: str = Query("created_at", description="Sort field"),
+    sort_by: str = Query("created_at", description="Sort field, or 'relevance' when searching"),
     sort_order: str = Query("desc", description="Sort order"),
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; overrides page"),
+    count: str = Query("exact", pattern=COUNT_MODE_PATTERN, description="Total count: exact, estimated or none"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -78,20 +85,23 @@ async def list_customers(
             status=status,
             customer_type=customer_type,
             tags=tags or [],
+            tag_match=tag_match,
             has_debt=has_debt,
             city=city,
             sort_by=sort_by,
             sort_order=sort_order,
             page=page,
-            per_page=per_page
+            per_page=per_page,
+            cursor=cursor,
+            count=count
         )
         
         service = CustomerService(db)
-        customers, total = service.search_customers(search_request, current_user.tenant_id)
+        result = service.search_customers_page(search_request, current_user.tenant_id)
         
         # Convert to response models
         customer_responses = []
-        for customer in customers:
+        for customer in result.items:
             response_data = CustomerResponse.from_orm(customer)
             response_data.display_name = customer.display_name
             response_data.primary_contact = customer.primary_contact
@@ -100,16 +110,19 @@ async def list_customers(
             response_data.has_outstanding_debt = customer.has_outstanding_debt
             customer_responses.append(response_data)
         
-        total_pages = (total + per_page - 1) // per_page
+        total_pages = (result.total + per_page - 1) // per_page if result.total is not None else None
         
         return CustomerListResponse(
             customers=customer_responses,
-            total=total,
+            total=result.total,
             page=page,
             per_page=per_page,
-            total_pages=total_pages
+            total_pages=total_pages,
+            next_cursor=result.next_cursor
         )
         
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to retrieve customers")
 
@@ -183,6 +196,28 @@ async def get_customer_tags(
         raise HTTPException(status_code=500, detail="Failed to retrieve customer tags")
 
 
+@router.get("/tags/suggest", response_model=TagSuggestionResponse)
+async def suggest_customer_tags(
+    prefix: str = Query("", description="Beginning of the tag"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of suggestions"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Autocomplete customer tags, most used first"""
+    require_permission(current_user, "customers:read")
+    
+    try:
+        suggestions = TagDictionaryService(db).suggest_tags(
+            current_user.tenant_id, TagEntityType.CUSTOMER, prefix, limit
+        )
+        return TagSuggestionResponse(
+            tags=[TagSuggestion(name=name, usage_count=usage_count) for name, usage_count in suggestions]
+        )
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Failed to suggest customer tags")
+
+
 @router.post("/export")
 async def export_customers(
     export_request: CustomerExportRequest,
@@ -105,27 +105,32 @@ async def get_backup_info(
 async def verify_backup(
     backup_id: str,
     storage_provider: str = "backblaze_b2",
+    mode: str = "sampled",
     current_admin=Depends(get_super_admin_user),
     db: Session = Depends(get_db)
 ):
     """
-    Verify disaster recovery backup integrity
+    Verify disaster recovery backup integrity (mode: metadata, sampled or full)
     """
     try:
         if storage_provider not in ["backblaze_b2", "cloudflare_r2"]:
             raise HTTPException(status_code=400, detail="Invalid storage provider")
         
+        if mode not in ["metadata", "sampled", "full"]:
+            raise HTTPException(status_code=400, detail="Invalid verification mode")
+        
         logger.info(f"Backup verification requested for {backup_id} on {storage_provider}")
         
         # Start verification task in background
-        task = verify_disaster_recovery_backup.delay(backup_id, storage_provider)
+        task = verify_disaster_recovery_backup.delay(backup_id, storage_provider, mode)
         
         return {
             "status": "accepted",
             "message": "Backup verification started",
             "task_id": task.id,
             "backup_id": backup_id,
-            "storage_provider": storage_provider
+            "storage_provider": storage_provider,
+            "mode": mode
         }
         
     except HTTPException:
@@ -4,9 +4,11 @@ These endpoints use API key authentication instead of JWT
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from ..core.database import get_db
+from ..core.exceptions import ValidationError
+from ..core.pagination import COUNT_NONE, paginate
 from ..core.api_key_auth import require_api_key_read, require_api_key_write, get_api_key_context
 from ..models.customer import Customer
 from ..models.product import Product
@@ -24,8 +26,10 @@ router = APIRouter(prefix="/v1", tags=["External API"])
 # Customer endpoints
 @router.get("/customers", response_model=List[CustomerResponse])
 async def list_customers(
+    response: Response,
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(50, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page; overrides page"),
     search: Optional[str] = Query(None, description="Search term"),
     api_context: dict = Depends(get_api_key_context),
     db: Session = Depends(get_db)
@@ -38,6 +42,7 @@ async def list_customers(
     - **page**: Page number (default: 1)
     - **limit**: Items per page (max: 100)
     - **search**: Optional search term for customer name or email
+    - **cursor**: X-Next-Cursor header of the previous page, for deep paging without offsets
     """
     tenant_id = api_context["tenant_id"]
     
@@ -52,10 +57,20 @@ async def list_customers(
             Customer.email.ilike(f"%{search}%")
         )
     
-    # Calculate offset
-    offset = (page - 1) * limit
-    
-    customers = query.offset(offset).limit(limit).all()
+    # Newest first; X-Next-Cursor continues after the last row without an offset scan
+    try:
+        result = paginate(
+            query, Customer.created_at, Customer.id, limit,
+            descending=True,
+            cursor=cursor,
+            offset=(page - 1) * limit,
+            count=COUNT_NONE
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    customers = result.items
+    if result.next_cursor:
+        response.headers["X-Next-Cursor"] = result.next_cursor
     
     return [
         CustomerResponse(
@@ -182,8 +197,10 @@ async def get_customer(
 # Product endpoints
 @router.get("/products", response_model=List[ProductResponse])
 async def list_products(
+    response: Response,
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(50, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page; overrides page"),
     category: Optional[str] = Query(None, description="Filter by category"),
     search: Optional[str] = Query(None, description="Search term"),
     api_context: dict = Depends(get_api_key_context),
@@ -210,10 +227,20 @@ async def list_products(
             Product.description.ilike(f"%{search}%")
         )
     
-    # Calculate offset
-    offset = (page - 1) * limit
-    
-    products = query.offset(offset).limit(limit).all()
+    # Newest first; X-Next-Cursor continues after the last row without an offset scan
+    try:
+        result = paginate(
+            query, Product.created_at, Product.id, limit,
+            descending=True,
+            cursor=cursor,
+            offset=(page - 1) * limit,
+            count=COUNT_NONE
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    products = result.items
+    if result.next_cursor:
+        response.headers["X-Next-Cursor"] = result.next_cursor
     
     return [
         ProductResponse(
@@ -292,8 +319,10 @@ async def create_product(
 # Invoice endpoints
 @router.get("/invoices", response_model=List[InvoiceResponse])
 async def list_invoices(
+    response: Response,
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(50, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page; overrides page"),
     status: Optional[str] = Query(None, description="Filter by status"),
     customer_id: Optional[str] = Query(None, description="Filter by customer ID"),
     api_context: dict = Depends(get_api_key_context),
@@ -317,10 +346,20 @@ async def list_invoices(
     if customer_id:
         query = query.filter(Invoice.customer_id == customer_id)
     
-    # Calculate offset
-    offset = (page - 1) * limit
-    
-    invoices = query.offset(offset).limit(limit).all()
+    # Newest first; X-Next-Cursor continues after the last row without an offset scan
+    try:
+        result = paginate(
+            query, Invoice.created_at, Invoice.id, limit,
+            descending=True,
+            cursor=cursor,
+            offset=(page - 1) * limit,
+            count=COUNT_NONE
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    invoices = result.items
+    if result.next_cursor:
+        response.headers["X-Next-Cursor"] = result.next_cursor
     
     return [
         InvoiceResponse(
@@ -405,6 +444,8 @@ async def api_info():
             "customer.updated",
             "product.created",
             "product.updated",
+            "product.low_stock",
+            "product.restocked",
             "invoice.created",
             "invoice.updated",
             "invoice.paid"
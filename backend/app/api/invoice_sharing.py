@@ -17,8 +17,10 @@ from app.models.user import User
 from app.models.invoice import Invoice
 from app.services.invoice_sharing_service import InvoiceSharingService
 from app.services.qr_service import QRCodeService
+from app.services.qr_asset_cache import qr_media_type
 from app.services.pdf_service import PDFService
-from app.tasks.pdf_tasks import generate_invoice_pdf_task, generate_qr_code_task
+from app.services.pdf_cache_service import pdf_cache_key
+from app.tasks.pdf_tasks import generate_qr_code_task
 from app.schemas.invoice import InvoiceResponse
 from app.core.exceptions import NotFoundError, ValidationError
 
@@ -186,7 +188,7 @@ async def get_invoice_qr_code_image(
         )
         
         # Return as streaming response
-        media_type = f"image/{format.lower()}"
+        media_type = qr_media_type(format)
         return StreamingResponse(
             BytesIO(qr_bytes),
             media_type=media_type,
@@ -247,7 +249,7 @@ async def update_invoice_sharing_settings(
 @router.get("/invoices/{invoice_id}/pdf")
 async def generate_invoice_pdf(
     invoice_id: uuid.UUID,
-    background_tasks: BackgroundTasks,
+    request: Request,
     include_qr: bool = True,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -267,17 +269,6 @@ async def generate_invoice_pdf(
                 detail="Invoice not found"
             )
         
-        # Generate PDF asynchronously for caching
-        background_tasks.add_task(
-            generate_invoice_pdf_task.delay,
-            str(invoice_id),
-            include_qr
-        )
-        
-        # Generate PDF synchronously for immediate download
-        qr_service = QRCodeService()
-        pdf_service = PDFService(qr_service)
-        
         # TODO: Get company info from tenant settings
         company_info = {
             'name': 'شرکت حسابداری',
@@ -285,7 +276,15 @@ async def generate_invoice_pdf(
             'phone': '021-12345678'
         }
         
-        pdf_bytes = pdf_service.generate_invoice_pdf(
+        # The cache key changes with the invoice content, so it doubles as the ETag
+        etag = f'"{pdf_cache_key(invoice, include_qr, company_info)}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        
+        # Served from the render cache, rendered only when the invoice changed
+        qr_service = QRCodeService()
+        pdf_service = PDFService(qr_service)
+        pdf = pdf_service.get_invoice_pdf(
             invoice=invoice,
             include_qr=include_qr,
             company_info=company_info
@@ -294,13 +293,17 @@ async def generate_invoice_pdf(
         # Return as streaming response
         filename = f"invoice_{invoice.invoice_number}.pdf"
         return StreamingResponse(
-            BytesIO(pdf_bytes),
+            BytesIO(pdf.content),
             media_type="application/pdf",
             headers={
-                "Content-Disposition": f"attachment; filename={filename}"
+                "Content-Disposition": f"attachment; filename={filename}",
+                "Cache-Control": "private, no-cache",
+                "ETag": etag
             }
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to generate PDF for invoice {invoice_id}: {e}")
         raise HTTPException(
@@ -485,10 +488,6 @@ async def get_public_invoice_pdf(
                 detail="Invoice not found or not shareable"
             )
         
-        # Generate PDF
-        qr_service = QRCodeService()
-        pdf_service = PDFService(qr_service)
-        
         # Use generic company info for public PDFs
         company_info = {
             'name': 'فاکتور آنلاین',
@@ -496,7 +495,13 @@ async def get_public_invoice_pdf(
             'phone': ''
         }
         
-        pdf_bytes = pdf_service.generate_invoice_pdf(
+        etag = f'"{pdf_cache_key(invoice, True, company_info)}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        
+        qr_service = QRCodeService()
+        pdf_service = PDFService(qr_service)
+        pdf = pdf_service.get_invoice_pdf(
             invoice=invoice,
             include_qr=True,
             company_info=company_info
@@ -505,11 +510,12 @@ async def get_public_invoice_pdf(
         # Return as streaming response
         filename = f"invoice_{invoice.invoice_number}.pdf"
         return StreamingResponse(
-            BytesIO(pdf_bytes),
+            BytesIO(pdf.content),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f"inline; filename={filename}",
-                "Cache-Control": "public, max-age=3600"  # Cache for 1 hour
+                "Cache-Control": "public, max-age=3600",  # Cache for 1 hour
+                "ETag": etag
             }
         )
         
@@ -17,9 +17,12 @@ from app.schemas.invoice import (
     InvoiceCreate, InvoiceUpdate, InvoiceResponse, InvoiceListResponse,
     InvoicePaginatedResponse, InvoiceFilter, InvoiceStatistics,
     PaymentCreate, InvoiceItemCreate, InvoiceItemUpdate, InvoiceItemResponse,
-    InvoiceQRResponse, PublicInvoiceResponse, InvoiceTypeEnum, InvoiceStatusEnum
+    InvoiceQRResponse, PublicInvoiceResponse, InvoiceTypeEnum, InvoiceStatusEnum,
+    InvoiceBulkCreate, InvoiceBulkCreateResponse, InvoiceBulkRowResult
 )
 from app.core.exceptions import ValidationError, NotFoundError, BusinessLogicError
+from app.core.pagination import COUNT_MODE_PATTERN
+from app.core.config import settings
 
 router = APIRouter(prefix="/api/invoices", tags=["invoices"])
 logger = logging.getLogger(__name__)
@@ -50,14 +53,57 @@ async def create_invoice(
         raise HTTPException(status_code=500, detail="Failed to create invoice")
 
 
+@router.post("/bulk", response_model=InvoiceBulkCreateResponse)
+async def create_invoices_bulk(
+    bulk_data: InvoiceBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Create many invoices in one request, with a result for every row"""
+    # Check permissions
+    require_permission(current_user, "invoices:create")
+    
+    if len(bulk_data.invoices) > settings.invoice_bulk_max_rows:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.invoice_bulk_max_rows} invoices can be created per request"
+        )
+    
+    try:
+        service = InvoiceService(db)
+        results = service.create_invoices_bulk(current_user.tenant_id, bulk_data.invoices)
+        
+        created_count = sum(1 for result in results if result.error is None)
+        return InvoiceBulkCreateResponse(
+            created_count=created_count,
+            error_count=len(results) - created_count,
+            results=[
+                InvoiceBulkRowResult(
+                    index=result.index,
+                    success=result.error is None,
+                    invoice_id=result.invoice_id,
+                    invoice_number=result.invoice_number,
+                    error=result.error
+                )
+                for result in results
+            ]
+        )
+    
+    except Exception as e:
+        logger.error(f"Failed to bulk create invoices: {e}")
+        raise HTTPException(status_code=500, detail="Failed to create invoices")
+
+
 @router.get("/", response_model=InvoicePaginatedResponse)
 async def get_invoices(
     # Pagination
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(50, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; overrides page"),
+    count: str = Query("exact", pattern=COUNT_MODE_PATTERN, description="Total count: exact, estimated or none"),
     
     # Sorting
-    sort_by: str = Query("created_at", description="Sort field"),
+    sort_by: str = Query("created_at", description="Sort field, or 'relevance' when searching"),
     sort_order: str = Query("desc", pattern="^(asc|desc)$", description="Sort order"),
     
     # Filters
@@ -90,13 +136,15 @@ async def get_invoices(
         service = InvoiceService(db)
         skip = (page - 1) * per_page
         
-        invoices, total = service.get_invoices(
+        result = service.get_invoices_page(
             tenant_id=current_user.tenant_id,
             filters=filters,
             skip=skip,
             limit=per_page,
             sort_by=sort_by,
-            sort_order=sort_order
+            sort_order=sort_order,
+            cursor=cursor,
+            count=count
         )
         
         # Convert to list response format
@@ -116,24 +164,27 @@ async def get_invoices(
                 is_overdue=inv.is_overdue,
                 created_at=inv.created_at
             )
-            for inv in invoices
+            for inv in result.items
         ]
         
         # Calculate pagination info
-        pages = (total + per_page - 1) // per_page
-        has_next = page < pages
-        has_prev = page > 1
+        pages = (result.total + per_page - 1) // per_page if result.total is not None else None
+        has_next = result.next_cursor is not None
+        has_prev = page > 1 or cursor is not None
         
         return InvoicePaginatedResponse(
             items=invoice_list,
-            total=total,
+            total=result.total,
             page=page,
             per_page=per_page,
             pages=pages,
             has_next=has_next,
-            has_prev=has_prev
+            has_prev=has_prev,
+            next_cursor=result.next_cursor
         )
         
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to get invoices: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve invoices")
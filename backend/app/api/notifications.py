@@ -111,9 +111,14 @@ def update_notification_template(
         )
     
     # Update fields
-    for field, value in template_data.dict(exclude_unset=True).items():
+    changes = template_data.dict(exclude_unset=True)
+    for field, value in changes.items():
         setattr(template, field, value)
     
+    # New content invalidates compiled copies of the template
+    if "subject" in changes or "body" in changes:
+        template.version += 1
+    
     # If setting as default, unset other defaults
     if template_data.is_default:
         db.query(NotificationTemplate).filter(
@@ -25,11 +25,17 @@ from app.schemas.product import (
     ProductSearchRequest, ProductCategoryCreate, ProductCategoryUpdate,
     ProductCategoryResponse, StockAdjustmentRequest, StockReservationRequest,
     ProductStatsResponse, LowStockAlert, ImageUploadResponse,
-    ProductImageRequest, BulkProductUpdateRequest
+    ProductImageRequest, BulkProductUpdateRequest,
+    ProductLookupRequest, ProductLookupResponse,
+    StockMovementBatchRequest, StockMovementResponse
 )
 from app.services.product_service import ProductService
+from app.services.tag_dictionary_service import TagDictionaryService
+from app.models.tag import TagEntityType
+from app.schemas.tag import TagSuggestion, TagSuggestionResponse
 from app.tasks.media_tasks import process_product_image
 from app.core.config import settings
+from app.core.pagination import COUNT_MODE_PATTERN
 
 logger = logging.getLogger(__name__)
 
@@ -64,6 +70,8 @@ async def create_product(
 async def search_products(
     query: Optional[str] = Query(None, description="Search query"),
     category_id: Optional[uuid.UUID] = Query(None, description="Filter by category"),
+    tags: Optional[List[str]] = Query(None, description="Filter by tags"),
+    tag_match: str = Query("all", pattern="^(all|any)$", description="Require all of the tags or any of them"),
     status: Optional[str] = Query(None, description="Filter by status"),
     is_gold_product: Optional[bool] = Query(None, description="Filter gold products"),
     is_service: Optional[bool] = Query(None, description="Filter services"),
@@ -72,10 +80,12 @@ async def search_products(
     max_price: Optional[float] = Query(None, ge=0, description="Maximum price"),
     manufacturer: Optional[str] = Query(None, description="Filter by manufacturer"),
     brand: Optional[str] = Query(None, description="Filter by brand"),
-    sort_by: Optional[str] = Query("name", description="Sort field"),
+    sort_by: Optional[str] = Query("name", description="Sort field, or 'relevance' when searching"),
     sort_order: Optional[str] = Query("asc", pattern="^(asc|desc)$", description="Sort order"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; overrides page"),
+    count: str = Query("exact", pattern=COUNT_MODE_PATTERN, description="Total count: exact, estimated or none"),
     current_user: User = Depends(get_current_user),
     product_service: ProductService = Depends(get_product_service)
 ):
@@ -84,6 +94,8 @@ async def search_products(
         search_request = ProductSearchRequest(
             query=query,
             category_id=category_id,
+            tags=tags,
+            tag_match=tag_match,
             status=status,
             is_gold_product=is_gold_product,
             is_service=is_service,
@@ -95,26 +107,72 @@ async def search_products(
             sort_by=sort_by,
             sort_order=sort_order,
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            cursor=cursor,
+            count=count
         )
         
-        products, total = product_service.search_products(current_user.tenant_id, search_request)
+        result = product_service.search_products_page(current_user.tenant_id, search_request)
         
         # Calculate pagination info
-        total_pages = (total + page_size - 1) // page_size
+        total_pages = (result.total + page_size - 1) // page_size if result.total is not None else None
         
         return ProductListResponse(
-            products=[ProductResponse.from_orm(product) for product in products],
-            total=total,
+            products=[ProductResponse.from_orm(product) for product in result.items],
+            total=result.total,
             page=page,
             page_size=page_size,
-            total_pages=total_pages
+            total_pages=total_pages,
+            next_cursor=result.next_cursor
         )
+    except ValidationError as e:
+        raise exception_to_http_exception(e)
     except Exception as e:
         logger.error(f"Failed to search products: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+# Tag Autocomplete
+
+@router.get("/tags/suggest", response_model=TagSuggestionResponse)
+async def suggest_product_tags(
+    prefix: str = Query("", description="Beginning of the tag"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of suggestions"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Autocomplete product tags, most used first"""
+    try:
+        suggestions = TagDictionaryService(db).suggest_tags(
+            current_user.tenant_id, TagEntityType.PRODUCT, prefix, limit
+        )
+        return TagSuggestionResponse(
+            tags=[TagSuggestion(name=name, usage_count=usage_count) for name, usage_count in suggestions]
+        )
+    except Exception as e:
+        logger.error(f"Failed to suggest product tags: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+# Stock Batch Endpoint (must be before /{product_id} route)
+
+@router.post("/stock/movements", response_model=List[ProductResponse])
+async def apply_stock_movements(
+    batch: StockMovementBatchRequest,
+    current_user: User = Depends(get_current_user),
+    product_service: ProductService = Depends(get_product_service)
+):
+    """Apply several stock movements (e.g. the lines of an invoice) all or nothing"""
+    try:
+        products = product_service.apply_stock_movements(current_user.tenant_id, batch)
+        return [ProductResponse.from_orm(product) for product in products]
+    except (ValidationError, NotFoundError, BusinessLogicError) as e:
+        raise exception_to_http_exception(e)
+    except Exception as e:
+        logger.error(f"Failed to apply stock movements: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 # Category Management Endpoints (must be before /{product_id} route)
 
 @router.post("/categories", response_model=ProductCategoryResponse)
@@ -262,6 +320,50 @@ async def bulk_delete_products(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+# Scanned Code Lookup (must be before /{product_id} route)
+
+@router.get("/lookup", response_model=ProductResponse)
+async def lookup_product(
+    code: str = Query(..., min_length=1, description="Scanned barcode or SKU"),
+    current_user: User = Depends(get_current_user),
+    product_service: ProductService = Depends(get_product_service)
+):
+    """Get the product with an exact barcode or SKU"""
+    try:
+        products = product_service.lookup_products_by_code(current_user.tenant_id, [code])
+        if not products:
+            raise NotFoundError("Product not found")
+        
+        return next(iter(products.values()))
+    except (ValidationError, NotFoundError) as e:
+        raise exception_to_http_exception(e)
+    except Exception as e:
+        logger.error(f"Failed to look up product code: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/lookup", response_model=ProductLookupResponse)
+async def lookup_products(
+    lookup_request: ProductLookupRequest,
+    current_user: User = Depends(get_current_user),
+    product_service: ProductService = Depends(get_product_service)
+):
+    """Resolve a batch of scanned barcodes or SKUs"""
+    try:
+        codes = [code.strip() for code in lookup_request.codes if code.strip()]
+        products = product_service.lookup_products_by_code(current_user.tenant_id, codes)
+        
+        return ProductLookupResponse(
+            products=products,
+            missing=[code for code in dict.fromkeys(codes) if code not in products]
+        )
+    except ValidationError as e:
+        raise exception_to_http_exception(e)
+    except Exception as e:
+        logger.error(f"Failed to look up product codes: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 @router.get("/{product_id}", response_model=ProductResponse)
 async def get_product(
     product_id: uuid.UUID,
@@ -397,6 +499,25 @@ async def fulfill_stock(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.get("/{product_id}/stock/movements", response_model=List[StockMovementResponse])
+async def get_stock_movements(
+    product_id: uuid.UUID,
+    skip: int = Query(0, ge=0, description="Number of movements to skip"),
+    limit: int = Query(50, ge=1, le=500, description="Number of movements to return"),
+    current_user: User = Depends(get_current_user),
+    product_service: ProductService = Depends(get_product_service)
+):
+    """Get the stock ledger of a product, newest first"""
+    try:
+        movements = product_service.get_stock_movements(current_user.tenant_id, product_id, skip, limit)
+        return [StockMovementResponse.from_orm(movement) for movement in movements]
+    except NotFoundError as e:
+        raise exception_to_http_exception(e)
+    except Exception as e:
+        logger.error(f"Failed to get stock movements for product {product_id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 # Image Management Endpoints
 
 @router.post("/{product_id}/images/upload", response_model=ImageUploadResponse)
@@ -6,19 +6,20 @@ from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 import logging
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from app.core.database import get_db
 from app.core.auth import get_super_admin_user
 from app.services.restore_service import RestoreService
 from app.tasks.restore_tasks import (
-    restore_single_tenant_task, restore_multiple_tenants_task, 
-    restore_all_tenants_task, validate_backup_integrity_task
+    restore_single_tenant_task, orchestrate_tenant_restores_task,
+    validate_backup_integrity_task
 )
 from app.schemas.restore import (
     RestoreResponse, RestoreHistoryResponse, RestoreInfoResponse,
     RestorePointsResponse, ValidationResponse, SingleTenantRestoreRequest,
-    MultipleTenantRestoreRequest, AllTenantsRestoreRequest
+    MultipleTenantRestoreRequest, AllTenantsRestoreRequest,
+    RestorePlanRequest, RestorePlanResponse, RestoreBatchStatusResponse
 )
 
 logger = logging.getLogger(__name__)
@@ -114,7 +115,7 @@ async def restore_multiple_tenants(
     try:
         # Validate all tenants exist
         from app.models.tenant import Tenant
-        tenant_ids = [pair["tenant_id"] for pair in request.tenant_backup_pairs]
+        tenant_ids = [pair.tenant_id for pair in request.tenant_backup_pairs]
         tenants = db.query(Tenant).filter(Tenant.id.in_(tenant_ids)).all()
         
         if len(tenants) != len(tenant_ids):
@@ -127,7 +128,7 @@ async def restore_multiple_tenants(
         
         # Validate all backups exist
         from app.models.backup import BackupLog
-        backup_ids = [pair["backup_id"] for pair in request.tenant_backup_pairs]
+        backup_ids = [pair.backup_id for pair in request.tenant_backup_pairs]
         backups = db.query(BackupLog).filter(BackupLog.id.in_(backup_ids)).all()
         
         if len(backups) != len(backup_ids):
@@ -138,22 +139,26 @@ async def restore_multiple_tenants(
                 detail=f"Backups not found: {', '.join(missing_ids)}"
             )
         
-        # Start restore task in background
-        task = restore_multiple_tenants_task.delay(
-            tenant_backup_pairs=request.tenant_backup_pairs,
+        # Fan out restores across restore workers in the background
+        batch_id = str(uuid4())
+        task = orchestrate_tenant_restores_task.delay(
+            batch_id=batch_id,
             storage_provider=request.storage_provider,
             initiated_by=str(current_admin["user_id"]),
-            skip_validation=request.skip_validation
+            tenant_backup_pairs=[pair.dict() for pair in request.tenant_backup_pairs],
+            skip_validation=request.skip_validation,
+            max_concurrency=request.max_concurrency
         )
         
-        logger.info(f"Multiple tenant restore task started: {task.id}")
+        logger.info(f"Multiple tenant restore task started: {task.id} (batch {batch_id})")
         
         return RestoreResponse(
             status="started",
             message=f"Restore task started for {len(request.tenant_backup_pairs)} tenants",
             task_id=task.id,
             storage_provider=request.storage_provider,
-            tenant_count=len(request.tenant_backup_pairs)
+            tenant_count=len(request.tenant_backup_pairs),
+            batch_id=batch_id
         )
         
     except HTTPException:
@@ -179,15 +184,18 @@ async def restore_all_tenants(
         if tenant_count == 0:
             raise HTTPException(status_code=404, detail="No active tenants found")
         
-        # Start restore task in background
-        task = restore_all_tenants_task.delay(
+        # Fan out restores across restore workers in the background
+        batch_id = str(uuid4())
+        task = orchestrate_tenant_restores_task.delay(
+            batch_id=batch_id,
             storage_provider=request.storage_provider,
             initiated_by=str(current_admin["user_id"]),
             backup_date=request.backup_date,
-            skip_validation=request.skip_validation
+            skip_validation=request.skip_validation,
+            max_concurrency=request.max_concurrency
         )
         
-        logger.info(f"All tenants restore task started: {task.id}")
+        logger.info(f"All tenants restore task started: {task.id} (batch {batch_id})")
         
         return RestoreResponse(
             status="started",
@@ -195,7 +203,8 @@ async def restore_all_tenants(
             task_id=task.id,
             storage_provider=request.storage_provider,
             tenant_count=tenant_count,
-            backup_date=request.backup_date
+            backup_date=request.backup_date,
+            batch_id=batch_id
         )
         
     except HTTPException:
@@ -205,6 +214,55 @@ async def restore_all_tenants(
         raise HTTPException(status_code=500, detail="Failed to start restore task")
 
 
+@router.post("/plan", response_model=RestorePlanResponse)
+async def plan_restore(
+    request: RestorePlanRequest,
+    db: Session = Depends(get_db),
+    current_admin=Depends(get_super_admin_user)
+):
+    """Dry run: restore order, worker lanes and duration estimate without restoring anything"""
+    try:
+        restore_service = RestoreService(db)
+        
+        if request.tenant_backup_pairs:
+            tenant_backup_pairs = [pair.dict() for pair in request.tenant_backup_pairs]
+        else:
+            tenant_backup_pairs = restore_service.get_latest_tenant_backup_pairs(request.backup_date)
+        
+        plan = restore_service.plan_tenant_restores(
+            tenant_backup_pairs, request.storage_provider, request.max_concurrency
+        )
+        
+        return RestorePlanResponse(status="success", **plan)
+    
+    except Exception as e:
+        logger.error(f"Failed to plan restore: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to plan restore: {str(e)}")
+
+
+@router.get("/batch/{batch_id}", response_model=RestoreBatchStatusResponse)
+async def get_restore_batch_status(
+    batch_id: str,
+    db: Session = Depends(get_db),
+    current_admin=Depends(get_super_admin_user)
+):
+    """Get aggregated per-tenant progress of an orchestrated restore batch"""
+    try:
+        restore_service = RestoreService(db)
+        
+        report = restore_service.get_restore_batch_status(batch_id)
+        if report["status"] == "not_found":
+            raise HTTPException(status_code=404, detail="Restore batch not found")
+        
+        return RestoreBatchStatusResponse(**report)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get restore batch status for {batch_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve restore batch status")
+
+
 @router.get("/history", response_model=RestoreHistoryResponse)
 async def get_restore_history(
     tenant_id: Optional[str] = Query(None, description="Filter by tenant ID"),
@@ -7,13 +7,15 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi import status
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from sqlalchemy import and_, or_, func, desc, asc
+from sqlalchemy import and_, or_, func, desc
 from datetime import datetime, timedelta, timezone
 import uuid
 import logging
 
 from ..core.database import get_db
 from ..core.auth import get_super_admin_user
+from ..core.exceptions import ValidationError
+from ..core.pagination import COUNT_MODE_PATTERN, paginate
 from ..models.user import User
 from ..models.tenant import Tenant, SubscriptionType, TenantStatus
 from ..schemas.super_admin import (
@@ -42,6 +44,8 @@ async def get_tenants(
     created_before: Optional[datetime] = Query(None, description="Filter tenants created before this date"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(50, ge=1, le=100, description="Maximum number of records to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; overrides skip"),
+    count: str = Query("exact", pattern=COUNT_MODE_PATTERN, description="Total count: exact, estimated or none"),
     sort_by: str = Query("created_at", description="Field to sort by"),
     sort_order: str = Query("desc", pattern="^(asc|desc)$", description="Sort order"),
     current_user: User = Depends(get_super_admin_user),
@@ -96,23 +100,19 @@ async def get_tenants(
         if created_before:
             query = query.filter(Tenant.created_at <= created_before)
         
-        # Get total count before pagination
-        total = query.count()
-        
-        # Apply sorting
-        if hasattr(Tenant, sort_by):
-            sort_column = getattr(Tenant, sort_by)
-            if sort_order == "desc":
-                query = query.order_by(desc(sort_column))
-            else:
-                query = query.order_by(asc(sort_column))
-        
-        # Apply pagination
-        tenants = query.offset(skip).limit(limit).all()
+        # Sort and paginate, continuing from the cursor when given
+        sort_column = getattr(Tenant, sort_by) if sort_by in Tenant.__table__.columns else Tenant.created_at
+        page = paginate(
+            query, sort_column, Tenant.id, limit,
+            descending=sort_order == "desc",
+            cursor=cursor,
+            offset=skip,
+            count=count
+        )
         
         # Convert to response models with usage statistics
         tenant_responses = []
-        for tenant in tenants:
+        for tenant in page.items:
             usage_stats = tenant.get_usage_stats(db)
             
             tenant_response = TenantResponse(
@@ -145,12 +145,16 @@ async def get_tenants(
         
         return TenantListResponse(
             tenants=tenant_responses,
-            total=total,
+            total=page.total,
             skip=skip,
             limit=limit,
-            has_more=(skip + limit) < total
+            has_more=page.next_cursor is not None,
+            next_cursor=page.next_cursor
         )
         
+    except ValidationError as e:
+        # The status filter shadows fastapi.status here
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to get tenants: {e}")
         raise HTTPException(
@@ -1376,6 +1380,8 @@ async def get_users(
     tenant_id: Optional[str] = Query(None, description="Filter by tenant ID"),
     role: Optional[str] = Query(None, description="Filter by user role"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
+    cursor: Optional[str] = Query(None, description="nextCursor of the previous page; overrides page"),
+    count: str = Query("exact", pattern=COUNT_MODE_PATTERN, description="Total count: exact, estimated or none"),
     current_user: User = Depends(get_super_admin_user),
     db: Session = Depends(get_db)
 ):
@@ -1409,16 +1415,19 @@ async def get_users(
             else:
                 query = query.filter(User.is_active == False)
         
-        # Get total count
-        total = query.count()
-        
-        # Apply pagination
-        skip = (page - 1) * limit
-        users_with_tenants = query.offset(skip).limit(limit).all()
+        # Newest users first, continuing from the cursor when given
+        result = paginate(
+            query, User.created_at, User.id, limit,
+            descending=True,
+            cursor=cursor,
+            offset=(page - 1) * limit,
+            count=count,
+            row_values=lambda row: (row[0].created_at, row[0].id)
+        )
         
         # Convert to response models
         users = []
-        for user, tenant_name in users_with_tenants:
+        for user, tenant_name in result.items:
             users.append({
                 "id": str(user.id),
                 "email": user.email,
@@ -1431,18 +1440,21 @@ async def get_users(
                 "created_at": user.created_at
             })
         
-        total_pages = (total + limit - 1) // limit
+        total_pages = (result.total + limit - 1) // limit if result.total is not None else None
         
         return {
             "users": users,
             "pagination": {
                 "page": page,
                 "limit": limit,
-                "total": total,
-                "totalPages": total_pages
+                "total": result.total,
+                "totalPages": total_pages,
+                "nextCursor": result.next_cursor
             }
         }
         
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to get users: {e}")
         raise HTTPException(
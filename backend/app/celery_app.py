@@ -36,6 +36,8 @@ celery_app.conf.update(
         "app.tasks.backup_tenant_data": {"queue": "backup"},
         "app.tasks.full_platform_backup": {"queue": "backup"},
         "app.tasks.validate_backup_integrity_task": {"queue": "backup"},
+        "app.tasks.expire_backup_chunks": {"queue": "backup"},
+        "app.tasks.reconcile_storage_inventory": {"queue": "maintenance"},
         # Customer backup tasks use default queue for now
         # "app.tasks.customer_backup_tasks.create_customer_backup_task": {"queue": "customer_backup"},
         # "app.tasks.customer_backup_tasks.cleanup_expired_customer_backups_task": {"queue": "maintenance"},
@@ -46,6 +48,9 @@ celery_app.conf.update(
         "app.tasks.restore_single_tenant_task": {"queue": "restore"},
         "app.tasks.restore_multiple_tenants_task": {"queue": "restore"},
         "app.tasks.restore_all_tenants_task": {"queue": "restore"},
+        "app.tasks.orchestrate_tenant_restores_task": {"queue": "restore"},
+        "app.tasks.restore_tenant_lane_task": {"queue": "restore"},
+        "app.tasks.finalize_restore_batch_task": {"queue": "restore"},
         "app.tasks.cleanup_restore_files_task": {"queue": "maintenance"},
         "app.tasks.send_email": {"queue": "notifications"},
         "app.tasks.send_sms": {"queue": "notifications"},
@@ -54,6 +59,8 @@ celery_app.conf.update(
         "app.tasks.send_overdue_notices": {"queue": "notifications"},
         "app.tasks.process_notification_queue": {"queue": "notifications"},
         "app.tasks.send_bulk_sms_campaign": {"queue": "notifications"},
+        "app.tasks.deliver_webhooks": {"queue": "webhooks"},
+        "app.tasks.purge_webhook_outbox": {"queue": "maintenance"},
         "app.tasks.process_image": {"queue": "media"},
         "app.tasks.generate_report": {"queue": "reports"},
         "app.tasks.marketing_tasks.process_marketing_campaign": {"queue": "marketing"},
@@ -115,11 +122,28 @@ celery_app.conf.update(
             "task": "app.tasks.process_notification_queue",
             "schedule": 60.0 * 5.0,  # Every 5 minutes
         },
+        "deliver-webhooks": {
+            "task": "app.tasks.deliver_webhooks",
+            "schedule": 30.0,  # Every 30 seconds, picks up retries that came due
+        },
+        "purge-webhook-outbox": {
+            "task": "app.tasks.purge_webhook_outbox",
+            "schedule": 60.0 * 60.0 * 24.0,  # Daily
+        },
         "cleanup-restore-files": {
             "task": "app.tasks.periodic_restore_cleanup",
             "schedule": 60.0 * 60.0 * 24.0,  # Daily at 3 AM
             "options": {"eta": "03:00"}
         },
+        "expire-backup-chunks": {
+            "task": "app.tasks.expire_backup_chunks",
+            "schedule": 60.0 * 60.0 * 24.0,  # Daily at 5 AM
+            "options": {"eta": "05:00"}
+        },
+        "reconcile-storage-inventory": {
+            "task": "app.tasks.reconcile_storage_inventory",
+            "schedule": 60.0 * 60.0 * 6.0,  # Every 6 hours
+        },
         "cleanup-expired-customer-backups": {
             "task": "app.tasks.customer_backup_tasks.cleanup_expired_customer_backups_task",
             "schedule": 60.0 * 60.0 * 6.0,  # Every 6 hours
@@ -148,6 +172,16 @@ celery_app.conf.task_annotations = {
         "time_limit": 1800,  # 30 minutes
         "soft_time_limit": 1500,  # 25 minutes
     },
+    "app.tasks.expire_backup_chunks": {
+        "rate_limit": "1/h",
+        "time_limit": 1800,  # 30 minutes
+        "soft_time_limit": 1500,  # 25 minutes
+    },
+    "app.tasks.reconcile_storage_inventory": {
+        "rate_limit": "4/h",
+        "time_limit": 1800,  # 30 minutes
+        "soft_time_limit": 1500,  # 25 minutes
+    },
     "app.tasks.create_disaster_recovery_backup": {
         "rate_limit": "1/h",
         "time_limit": 1800,  # 30 minutes
@@ -188,6 +222,15 @@ celery_app.conf.task_annotations = {
         "time_limit": 3600,  # 60 minutes
         "soft_time_limit": 3300,  # 55 minutes
     },
+    "app.tasks.orchestrate_tenant_restores_task": {
+        "rate_limit": "2/m",
+        "time_limit": 300,  # 5 minutes
+        "soft_time_limit": 240,  # 4 minutes
+    },
+    "app.tasks.restore_tenant_lane_task": {
+        "time_limit": 3600,  # 60 minutes
+        "soft_time_limit": 3300,  # 55 minutes
+    },
     "app.tasks.cleanup_restore_files_task": {
         "rate_limit": "1/h",
         "time_limit": 300,  # 5 minutes
@@ -228,6 +271,11 @@ celery_app.conf.task_annotations = {
         "time_limit": 120,
         "retry_kwargs": {"max_retries": 2, "countdown": 120},
     },
+    "app.tasks.deliver_webhooks": {
+        "time_limit": 300,  # 5 minutes
+        "soft_time_limit": 270,  # 4.5 minutes
+        "retry_kwargs": {"max_retries": 2, "countdown": 60},
+    },
     "app.tasks.send_bulk_sms_campaign": {
         "rate_limit": "10/h",
         "time_limit": 300,
@@ -48,6 +48,30 @@ class Settings(BaseSettings):
     backblaze_b2_secret_key: Optional[str] = Field(default="K005LzPhrovqG5Eq37oYWxIQiIKIHh8", env="BACKBLAZE_B2_SECRET_KEY")
     backblaze_b2_bucket: Optional[str] = Field(default="securesyntax", env="BACKBLAZE_B2_BUCKET")
     
+    # Cloud Storage - Transfers
+    storage_multipart_threshold: int = Field(default=64 * 1024 * 1024, env="STORAGE_MULTIPART_THRESHOLD")
+    storage_multipart_chunk_size: int = Field(default=32 * 1024 * 1024, env="STORAGE_MULTIPART_CHUNK_SIZE")
+    storage_upload_max_concurrency: int = Field(default=8, env="STORAGE_UPLOAD_MAX_CONCURRENCY")
+    storage_upload_retry_attempts: int = Field(default=2, env="STORAGE_UPLOAD_RETRY_ATTEMPTS")
+    
+    # Backup Deduplication
+    backup_dedup_enabled: bool = Field(default=False, env="BACKUP_DEDUP_ENABLED")
+    backup_chunk_min_size: int = Field(default=256 * 1024, env="BACKUP_CHUNK_MIN_SIZE")
+    backup_chunk_avg_size: int = Field(default=1024 * 1024, env="BACKUP_CHUNK_AVG_SIZE")
+    backup_chunk_max_size: int = Field(default=4 * 1024 * 1024, env="BACKUP_CHUNK_MAX_SIZE")
+    backup_chunk_local_path: Optional[str] = Field(default=None, env="BACKUP_CHUNK_LOCAL_PATH")
+    backup_retention_days: int = Field(default=30, env="BACKUP_RETENTION_DAYS")
+    backup_chunk_gc_grace_hours: int = Field(default=24, env="BACKUP_CHUNK_GC_GRACE_HOURS")
+    
+    # Restore Orchestration
+    restore_max_concurrency: int = Field(default=4, env="RESTORE_MAX_CONCURRENCY")
+    restore_throughput_bytes_per_second: int = Field(default=20 * 1024 * 1024, env="RESTORE_THROUGHPUT_BYTES_PER_SECOND")
+    restore_tenant_overhead_seconds: int = Field(default=30, env="RESTORE_TENANT_OVERHEAD_SECONDS")
+    
+    # Data Export
+    data_export_parallel_enabled: bool = Field(default=False, env="DATA_EXPORT_PARALLEL_ENABLED")
+    data_export_slice_rows: int = Field(default=100000, env="DATA_EXPORT_SLICE_ROWS")
+    
     # Email Configuration
     email_smtp_host: Optional[str] = Field(default=None, env="EMAIL_SMTP_HOST")
     email_smtp_port: int = Field(default=587, env="EMAIL_SMTP_PORT")
@@ -60,6 +84,56 @@ class Settings(BaseSettings):
     sms_api_key: Optional[str] = Field(default=None, env="SMS_API_KEY")
     sms_api_url: Optional[str] = Field(default=None, env="SMS_API_URL")
     
+    # Notification Dispatch
+    notification_email_batch_size: int = Field(default=50, env="NOTIFICATION_EMAIL_BATCH_SIZE")
+    notification_sms_batch_size: int = Field(default=100, env="NOTIFICATION_SMS_BATCH_SIZE")
+    notification_email_concurrency: int = Field(default=4, env="NOTIFICATION_EMAIL_CONCURRENCY")
+    notification_sms_concurrency: int = Field(default=8, env="NOTIFICATION_SMS_CONCURRENCY")
+    notification_email_rate_limit: float = Field(default=20.0, env="NOTIFICATION_EMAIL_RATE_LIMIT")  # Messages per second
+    notification_sms_rate_limit: float = Field(default=50.0, env="NOTIFICATION_SMS_RATE_LIMIT")  # Messages per second
+    notification_progress_interval_seconds: float = Field(default=2.0, env="NOTIFICATION_PROGRESS_INTERVAL_SECONDS")
+    
+    # Webhook Delivery
+    webhook_delivery_batch_size: int = Field(default=200, env="WEBHOOK_DELIVERY_BATCH_SIZE")
+    webhook_max_connections: int = Field(default=100, env="WEBHOOK_MAX_CONNECTIONS")
+    webhook_endpoint_concurrency: int = Field(default=4, env="WEBHOOK_ENDPOINT_CONCURRENCY")  # In-flight requests per endpoint
+    webhook_backoff_base_seconds: float = Field(default=2.0, env="WEBHOOK_BACKOFF_BASE_SECONDS")
+    webhook_backoff_max_seconds: float = Field(default=3600.0, env="WEBHOOK_BACKOFF_MAX_SECONDS")
+    webhook_circuit_failure_threshold: int = Field(default=5, env="WEBHOOK_CIRCUIT_FAILURE_THRESHOLD")
+    webhook_circuit_cooldown_seconds: int = Field(default=300, env="WEBHOOK_CIRCUIT_COOLDOWN_SECONDS")
+    webhook_delivery_lease_seconds: int = Field(default=300, env="WEBHOOK_DELIVERY_LEASE_SECONDS")
+    
+    # Customer Segments
+    segment_incremental_updates_enabled: bool = Field(default=True, env="SEGMENT_INCREMENTAL_UPDATES_ENABLED")
+    
+    # Product Lookup
+    product_code_cache_enabled: bool = Field(default=True, env="PRODUCT_CODE_CACHE_ENABLED")
+    product_code_cache_ttl_seconds: int = Field(default=300, env="PRODUCT_CODE_CACHE_TTL_SECONDS")
+    product_lookup_max_codes: int = Field(default=200, env="PRODUCT_LOOKUP_MAX_CODES")
+    
+    # Tags
+    tag_dictionary_enabled: bool = Field(default=True, env="TAG_DICTIONARY_ENABLED")
+    
+    # Bulk Invoices
+    invoice_bulk_max_rows: int = Field(default=1000, env="INVOICE_BULK_MAX_ROWS")
+    
+    # PDF Cache
+    pdf_cache_enabled: bool = Field(default=True, env="PDF_CACHE_ENABLED")
+    pdf_cache_dir: str = Field(default="/app/cache/pdf", env="PDF_CACHE_DIR")
+    pdf_cache_max_bytes: int = Field(default=512 * 1024 * 1024, env="PDF_CACHE_MAX_BYTES")
+    pdf_cache_offload_provider: Optional[str] = Field(default=None, env="PDF_CACHE_OFFLOAD_PROVIDER")  # backblaze_b2 or cloudflare_r2
+    
+    # QR Codes
+    qr_cache_enabled: bool = Field(default=True, env="QR_CACHE_ENABLED")
+    qr_cache_memory_entries: int = Field(default=1024, env="QR_CACHE_MEMORY_ENTRIES")
+    qr_cache_ttl_seconds: int = Field(default=7 * 24 * 3600, env="QR_CACHE_TTL_SECONDS")
+    
+    # PDF Batch Rendering
+    pdf_batch_workers: int = Field(default=0, env="PDF_BATCH_WORKERS")  # 0 uses one worker per CPU
+    pdf_batch_chunk_size: int = Field(default=25, env="PDF_BATCH_CHUNK_SIZE")
+    pdf_batch_output_dir: str = Field(default="/app/cache/pdf-batches", env="PDF_BATCH_OUTPUT_DIR")
+    pdf_batch_output_retention_hours: int = Field(default=24, env="PDF_BATCH_OUTPUT_RETENTION_HOURS")
+    
     # File Upload
     max_file_size: int = 10 * 1024 * 1024  # 10MB
     allowed_image_types: List[str] = ["image/jpeg", "image/png", "image/webp"]
@@ -25,6 +25,18 @@ engine = create_engine(
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Keep automatic customer segments in step with customer changes
+from app.services.segment_membership_service import track_segment_changes  # noqa: E402
+track_segment_changes(SessionLocal)
+
+# Drop cached barcode/SKU lookups when products change
+from app.services.product_code_cache import track_product_code_changes  # noqa: E402
+track_product_code_changes(SessionLocal)
+
+# Maintain per-tenant tag usage counts as customers and products change
+from app.services.tag_dictionary_service import track_tag_changes  # noqa: E402
+track_tag_changes(SessionLocal)
+
 
 def get_db() -> Session:
     """
@@ -0,0 +1,169 @@
+"""
+Keyset pagination and row counts for list endpoints
+A page is continued from an opaque cursor holding the last row's sort key and id, so deep
+pages cost the same as the first; totals can be exact, a planner estimate, or skipped
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+import base64
+import json
+import logging
+import uuid
+
+from sqlalchemy import and_, asc, desc, literal, or_, tuple_
+from sqlalchemy.orm import Query
+
+from app.core.exceptions import ValidationError
+
+logger = logging.getLogger(__name__)
+
+COUNT_EXACT = "exact"
+COUNT_ESTIMATED = "estimated"
+COUNT_NONE = "none"
+COUNT_MODES = (COUNT_EXACT, COUNT_ESTIMATED, COUNT_NONE)
+COUNT_MODE_PATTERN = "^(exact|estimated|none)$"
+
+
+class Page(NamedTuple):
+    """One page of rows with the total (if counted) and the cursor for the next page"""
+    items: List[Any]
+    total: Optional[int]
+    next_cursor: Optional[str]
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"n": str(value)}
+    if isinstance(value, uuid.UUID):
+        return {"u": str(value)}
+    if isinstance(value, Enum):
+        return value.name
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "n" in value:
+            return Decimal(value["n"])
+        if "u" in value:
+            return uuid.UUID(value["u"])
+        raise ValueError(f"Unknown cursor value {value}")
+    return value
+
+
+def encode_cursor(sort_key: str, value: Any, row_id: Any) -> str:
+    """Opaque cursor positioned after a row with the given sort value and id"""
+    payload = json.dumps({"s": sort_key, "v": [_encode_value(value), _encode_value(row_id)]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_key: str) -> Tuple[Any, Any]:
+    """Sort value and id stored in a cursor created for the same sort order"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        value, row_id = (_decode_value(item) for item in payload["v"])
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValidationError("Invalid pagination cursor") from e
+    
+    if payload.get("s") != sort_key:
+        raise ValidationError("Pagination cursor was created for a different sort order")
+    
+    return value, row_id
+
+
+def _rows_after(order_column, id_column, value, row_id, descending: bool):
+    """Rows following (value, row_id), with nulls last ascending and first descending as PostgreSQL orders them"""
+    last_id = literal(row_id, id_column.type)
+    
+    if value is None:
+        if descending:
+            return or_(order_column.isnot(None), and_(order_column.is_(None), id_column < last_id))
+        return and_(order_column.is_(None), id_column > last_id)
+    
+    key = tuple_(order_column, id_column)
+    bound = tuple_(literal(value, order_column.type), last_id)
+    if descending:
+        return key < bound
+    return or_(key > bound, order_column.is_(None))
+
+
+def estimate_rows(query: Query) -> Optional[int]:
+    """Planner row estimate for a query, or None if it cannot be explained"""
+    session = query.session
+    try:
+        statement = query.order_by(None).statement.compile(
+            dialect=session.get_bind().dialect,
+            compile_kwargs={"literal_binds": True}
+        )
+        plan = session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}").scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception as e:
+        logger.debug(f"Row estimate unavailable, counting instead: {e}")
+        return None
+
+
+def count_rows(query: Query, mode: str = COUNT_EXACT) -> Optional[int]:
+    """Total rows matched by a query according to the count mode"""
+    if mode == COUNT_NONE:
+        return None
+    
+    if mode == COUNT_ESTIMATED:
+        estimate = estimate_rows(query)
+        if estimate is not None:
+            return estimate
+    
+    return query.count()
+
+
+def paginate(
+    query: Query,
+    order_column,
+    id_column,
+    limit: int,
+    descending: bool = False,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+    count: str = COUNT_EXACT,
+    row_values: Optional[Callable[[Any], Tuple[Any, Any]]] = None
+) -> Page:
+    """
+    Order a query by (order_column, id_column) and fetch one page
+    
+    With a cursor the page continues after the cursor's row through an index-friendly
+    row comparison and offset is ignored; without one the offset is used, so page
+    numbers keep working. Every page that has a successor returns its cursor.
+    """
+    
+    sort_key = f"{order_column.key}:{'desc' if descending else 'asc'}"
+    if row_values is None:
+        row_values = lambda row: (getattr(row, order_column.key), getattr(row, id_column.key))
+    
+    total = count_rows(query, count)
+    
+    if cursor:
+        value, row_id = decode_cursor(cursor, sort_key)
+        query = query.filter(_rows_after(order_column, id_column, value, row_id, descending))
+        offset = 0
+    
+    direction = desc if descending else asc
+    rows = query.order_by(direction(order_column), direction(id_column)).offset(offset).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort_key, *row_values(rows[-1]))
+    
+    return Page(items=rows, total=total, next_cursor=next_cursor)
@@ -22,8 +22,8 @@ from .accounting import (
 )
 from .notification import NotificationTemplate, NotificationLog, NotificationStatus, NotificationQueue
 from .backup import (
-    BackupLog, BackupStatus, BackupType, RestoreLog, StorageLocation, 
-    CustomerBackupLog, DataExportLog, ExportSchedule, ExportFormat, 
+    BackupLog, BackupStatus, BackupType, RestoreLog, StorageLocation, BackupChunk, StorageObject,
+    CustomerBackupLog, DataExportLog, DataExportSlice, ExportSchedule, ExportFormat, 
     ExportType, ExportStatus
 )
 from .gold_price import GoldPrice, GoldPriceHistory
@@ -34,13 +34,15 @@ from .marketing import (
     CampaignStatus, CampaignType, SegmentationType
 )
 from .api_error_log import APIErrorLog, ErrorSeverity, ErrorCategory
-from .api_key import ApiKey, ApiKeyUsage, WebhookEndpoint, ApiKeyStatus, ApiKeyScope
+from .api_key import ApiKey, ApiKeyUsage, WebhookEndpoint, WebhookOutbox, ApiKeyStatus, ApiKeyScope, WebhookDeliveryStatus
 from .authentication_log import AuthenticationLog
 from .tenant_credentials import TenantCredentials
 from .subscription_history import SubscriptionHistory, SubscriptionChangeType
 from .error_log import ErrorLog, ErrorSeverity, ErrorStatus, ErrorCategory
 from .impersonation_session import ImpersonationSession
 from .user_online_status import UserOnlineStatus
+from .tag import Tag, TagEntityType, TagMatch
+from .stock_movement import StockMovement, StockMovementType
 
 __all__ = [
     "Base",
@@ -89,8 +91,11 @@ __all__ = [
     "BackupType",
     "RestoreLog",
     "StorageLocation",
+    "BackupChunk",
+    "StorageObject",
     "CustomerBackupLog",
     "DataExportLog",
+    "DataExportSlice",
     "ExportSchedule",
     "ExportFormat",
     "ExportType",
@@ -112,8 +117,10 @@ __all__ = [
     "ApiKey",
     "ApiKeyUsage",
     "WebhookEndpoint",
+    "WebhookOutbox",
     "ApiKeyStatus",
     "ApiKeyScope",
+    "WebhookDeliveryStatus",
     "AuthenticationLog",
     "TenantCredentials",
     "SubscriptionHistory",
@@ -124,4 +131,9 @@ __all__ = [
     "ErrorCategory",
     "ImpersonationSession",
     "UserOnlineStatus",
+    "Tag",
+    "TagEntityType",
+    "TagMatch",
+    "StockMovement",
+    "StockMovementType",
 ]
\ No newline at end of file
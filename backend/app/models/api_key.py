@@ -3,7 +3,7 @@ API Key model for external integrations
 """
 
 from sqlalchemy import Column, String, DateTime, Boolean, Integer, Text, Index, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -28,6 +28,14 @@ class ApiKeyScope(enum.Enum):
     FULL_ACCESS = "full_access"
 
 
+class WebhookDeliveryStatus(enum.Enum):
+    """Webhook outbox delivery status enumeration"""
+    PENDING = "pending"
+    DELIVERING = "delivering"
+    DELIVERED = "delivered"
+    FAILED = "failed"
+
+
 class ApiKey(BaseModel, TenantMixin):
     """
     API Key model for external integrations
@@ -382,6 +390,21 @@ class WebhookEndpoint(BaseModel, TenantMixin):
         comment="Number of failed deliveries"
     )
     
+    # Circuit Breaker
+    consecutive_failures = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        server_default="0",
+        comment="Failed delivery attempts since the last success"
+    )
+    
+    circuit_open_until = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Deliveries to this endpoint are paused until this time"
+    )
+    
     # Relationships
     api_key = relationship("ApiKey", back_populates="webhook_endpoints")
     tenant = relationship("Tenant")
@@ -409,6 +432,78 @@ class WebhookEndpoint(BaseModel, TenantMixin):
             self.failed_deliveries += 1
 
 
+class WebhookOutbox(BaseModel, TenantMixin):
+    """
+    Durable outbox of webhook events waiting to be delivered to an endpoint
+    """
+    __tablename__ = "webhook_outbox"
+    
+    webhook_endpoint_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("webhook_endpoints.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="Endpoint the event is delivered to"
+    )
+    
+    event_type = Column(
+        String(100),
+        nullable=False,
+        comment="Event name (e.g. 'invoice.created')"
+    )
+    
+    payload = Column(
+        JSONB,
+        nullable=False,
+        comment="Complete webhook body as sent to the endpoint"
+    )
+    
+    # Delivery State
+    status = Column(
+        String(20),
+        nullable=False,
+        default=WebhookDeliveryStatus.PENDING.value,
+        comment="Delivery status"
+    )
+    
+    attempts = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        comment="Number of delivery attempts made"
+    )
+    
+    next_attempt_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=func.now(),
+        comment="Earliest time of the next attempt; lease expiry while delivering"
+    )
+    
+    last_status_code = Column(
+        Integer,
+        nullable=True,
+        comment="HTTP status of the last attempt"
+    )
+    
+    last_error = Column(
+        Text,
+        nullable=True,
+        comment="Error from the last failed attempt"
+    )
+    
+    delivered_at = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Successful delivery timestamp"
+    )
+    
+    # Relationships
+    webhook_endpoint = relationship("WebhookEndpoint")
+    
+    def __repr__(self):
+        return f"<WebhookOutbox(id={self.id}, event='{self.event_type}', status='{self.status}')>"
+
+
 # Create indexes for performance optimization
 Index('idx_api_key_tenant_id', ApiKey.tenant_id)
 Index('idx_api_key_key_hash', ApiKey.key_hash)
@@ -418,4 +513,6 @@ Index('idx_api_key_usage_api_key_id', ApiKeyUsage.api_key_id)
 Index('idx_api_key_usage_date', ApiKeyUsage.usage_date)
 Index('idx_webhook_endpoint_tenant_id', WebhookEndpoint.tenant_id)
 Index('idx_webhook_endpoint_api_key_id', WebhookEndpoint.api_key_id)
-Index('idx_webhook_endpoint_is_active', WebhookEndpoint.is_active)
\ No newline at end of file
+Index('idx_webhook_endpoint_is_active', WebhookEndpoint.is_active)
+Index('idx_webhook_outbox_due', WebhookOutbox.status, WebhookOutbox.next_attempt_at)
+Index('idx_webhook_outbox_endpoint', WebhookOutbox.webhook_endpoint_id)
\ No newline at end of file
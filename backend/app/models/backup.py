@@ -8,6 +8,7 @@ from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 from datetime import datetime, timezone
+from typing import Optional
 from .base import BaseModel
 
 
@@ -185,6 +186,31 @@ class BackupLog(BaseModel):
         self.status = BackupStatus.CANCELLED
         self.completed_at = datetime.now(timezone.utc)
     
+    def get_storage_location(self, storage_provider: str) -> Optional[dict]:
+        """Get the storage location entry recorded for a provider"""
+        for location in self.storage_locations or []:
+            if location.get("provider") == storage_provider:
+                return location
+        return None
+    
+    def integrity_expectations(self, storage_provider: str) -> dict:
+        """Fingerprint recorded at upload time, used to verify the stored object"""
+        location = self.get_storage_location(storage_provider) or {}
+        integrity = (self.backup_metadata or {}).get("integrity", {})
+        
+        return {
+            "size": location.get("size", self.compressed_size),
+            "etag": location.get("etag"),
+            "checksum_sha256": location.get("checksum_sha256"),
+            "checksum": self.checksum,
+            "part_size": integrity.get("part_size"),
+            "part_checksums": integrity.get("part_checksums", [])
+        }
+    
+    def get_chunk_manifest(self) -> Optional[dict]:
+        """Chunk manifest of a deduplicated backup, or None for a single-object backup"""
+        return (self.backup_metadata or {}).get("manifest")
+    
     @property
     def compression_ratio(self) -> float:
         """Calculate compression ratio"""
@@ -274,6 +300,32 @@ class RestoreLog(BaseModel):
         comment="Snapshot of data before restore"
     )
     
+    # Orchestration Information
+    batch_id = Column(
+        UUID(as_uuid=True),
+        nullable=True,
+        comment="Restore batch ID (for orchestrated multi-tenant restores)"
+    )
+    
+    priority = Column(
+        Integer,
+        nullable=True,
+        comment="Position of this restore in the batch plan (lower runs first)"
+    )
+    
+    current_step = Column(
+        String(50),
+        nullable=True,
+        comment="Current restore step (queued, validating, downloading, restoring, completed, failed)"
+    )
+    
+    progress_percentage = Column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="Restore progress percentage"
+    )
+    
     # Relationships
     backup_log = relationship("BackupLog")
     tenant = relationship("Tenant")
@@ -281,6 +333,11 @@ class RestoreLog(BaseModel):
     def __repr__(self):
         return f"<RestoreLog(id={self.id}, backup_id={self.backup_log_id}, status='{self.status.value}')>"
     
+    def update_progress(self, step: str, percentage: int):
+        """Update restore step and progress percentage"""
+        self.current_step = step
+        self.progress_percentage = max(0, min(100, percentage))
+    
     def start_restore(self):
         """Mark restore as started"""
         self.status = BackupStatus.IN_PROGRESS
@@ -290,6 +347,7 @@ class RestoreLog(BaseModel):
         """Mark restore as completed"""
         self.status = BackupStatus.COMPLETED
         self.completed_at = datetime.now(timezone.utc)
+        self.update_progress("completed", 100)
         
         if self.started_at:
             delta = self.completed_at - self.started_at
@@ -300,6 +358,7 @@ class RestoreLog(BaseModel):
         self.status = BackupStatus.FAILED
         self.error_message = error_message
         self.completed_at = datetime.now(timezone.utc)
+        self.current_step = "failed"
         
         if self.started_at:
             delta = self.completed_at - self.started_at
@@ -390,18 +449,135 @@ class StorageLocation(BaseModel):
         return f"<StorageLocation(id={self.id}, name='{self.name}', provider='{self.provider.value}')>"
 
 
+class BackupChunk(BaseModel):
+    """
+    Content-addressed chunk shared by the deduplicated backups of a tenant
+    """
+    __tablename__ = "backup_chunks"
+    
+    tenant_id = Column(
+        UUID(as_uuid=True), 
+        ForeignKey("tenants.id"),
+        nullable=False,
+        comment="Tenant that owns the chunk (chunks are encrypted with the tenant key)"
+    )
+    
+    chunk_hash = Column(
+        String(64), 
+        nullable=False,
+        comment="Keyed SHA-256 of the plaintext chunk content"
+    )
+    
+    size = Column(
+        Integer, 
+        nullable=False,
+        comment="Plaintext chunk size in bytes"
+    )
+    
+    stored_size = Column(
+        Integer, 
+        nullable=False,
+        comment="Compressed and encrypted chunk size in bytes"
+    )
+    
+    storage_key = Column(
+        String(500), 
+        nullable=False,
+        comment="Object key of the chunk in every chunk store backend"
+    )
+    
+    ref_count = Column(
+        Integer, 
+        default=0,
+        nullable=False,
+        comment="Number of backup manifest references to this chunk"
+    )
+    
+    last_referenced_at = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Last time a backup referenced or released this chunk"
+    )
+    
+    def __repr__(self):
+        return f"<BackupChunk(id={self.id}, tenant_id={self.tenant_id}, hash='{self.chunk_hash[:12]}', refs={self.ref_count})>"
+
+
+class StorageObject(BaseModel):
+    """
+    Inventory entry for an object held by a storage provider
+    """
+    __tablename__ = "storage_objects"
+    
+    provider = Column(
+        Enum(StorageProvider), 
+        nullable=False,
+        comment="Storage provider holding the object"
+    )
+    
+    object_key = Column(
+        String(1024), 
+        nullable=False,
+        comment="Object key within the provider bucket"
+    )
+    
+    size = Column(
+        Numeric(15, 0), 
+        nullable=False,
+        default=0,
+        comment="Object size in bytes"
+    )
+    
+    etag = Column(
+        String(255), 
+        nullable=True,
+        comment="Object ETag reported by the provider"
+    )
+    
+    tenant_id = Column(
+        UUID(as_uuid=True), 
+        ForeignKey("tenants.id"),
+        nullable=True,
+        comment="Tenant the object belongs to, when known"
+    )
+    
+    last_modified = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Object last modified timestamp"
+    )
+    
+    last_seen_at = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Last time an upload or reconcile confirmed the object"
+    )
+    
+    def __repr__(self):
+        return f"<StorageObject(provider='{self.provider.value}', key='{self.object_key}', size={self.size})>"
+
+
 # Create indexes for performance optimization
 Index('idx_backup_log_type', BackupLog.backup_type)
 Index('idx_backup_log_status', BackupLog.status)
 Index('idx_backup_log_tenant', BackupLog.tenant_id)
 Index('idx_backup_log_started_at', BackupLog.started_at)
 Index('idx_backup_log_completed_at', BackupLog.completed_at)
+Index('idx_backup_log_restore_points', BackupLog.tenant_id, BackupLog.backup_type, BackupLog.status, BackupLog.started_at)
 
 Index('idx_restore_log_backup', RestoreLog.backup_log_id)
 Index('idx_restore_log_tenant', RestoreLog.tenant_id)
 Index('idx_restore_log_status', RestoreLog.status)
 Index('idx_restore_log_initiated_by', RestoreLog.initiated_by)
 Index('idx_restore_log_started_at', RestoreLog.started_at)
+Index('idx_restore_log_batch', RestoreLog.batch_id)
+
+Index('idx_backup_chunk_tenant_hash', BackupChunk.tenant_id, BackupChunk.chunk_hash, unique=True)
+Index('idx_backup_chunk_ref_count', BackupChunk.ref_count)
+
+Index('idx_storage_object_provider_key', StorageObject.provider, StorageObject.object_key, unique=True)
+Index('idx_storage_object_key', StorageObject.object_key)
+Index('idx_storage_object_tenant', StorageObject.tenant_id)
 
 class CustomerBackupLog(BaseModel):
     """
@@ -607,6 +783,8 @@ class ExportFormat(enum.Enum):
     """Export format enumeration"""
     CSV = "csv"
     JSON = "json"
+    PARQUET = "parquet"
+    ARROW = "arrow"
 
 
 class ExportType(enum.Enum):
@@ -664,7 +842,7 @@ class DataExportLog(BaseModel):
     export_format = Column(
         Enum(ExportFormat), 
         nullable=False,
-        comment="Export format (CSV or JSON)"
+        comment="Export format (CSV, JSON, Parquet or Arrow IPC)"
     )
     
     export_type = Column(
@@ -776,6 +954,7 @@ class DataExportLog(BaseModel):
     # Relationships
     tenant = relationship("Tenant")
     user = relationship("User")
+    slices = relationship("DataExportSlice", back_populates="export", cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<DataExportLog(id={self.id}, tenant_id={self.tenant_id}, format='{self.export_format.value}', status='{self.status.value}')>"
@@ -852,6 +1031,121 @@ class DataExportLog(BaseModel):
         return 0.0
 
 
+class DataExportSlice(BaseModel):
+    """
+    Checkpoint for one keyset range of one table in a parallel data export
+    """
+    __tablename__ = "data_export_slices"
+    
+    export_id = Column(
+        UUID(as_uuid=True), 
+        ForeignKey("data_export_logs.id"),
+        nullable=False,
+        comment="Data export this slice belongs to"
+    )
+    
+    table_name = Column(
+        String(50), 
+        nullable=False,
+        comment="Exported sub-table (e.g. 'invoices', 'journal_entries')"
+    )
+    
+    slice_index = Column(
+        Integer, 
+        nullable=False,
+        comment="Position of the slice within its table"
+    )
+    
+    start_key = Column(
+        UUID(as_uuid=True), 
+        nullable=True,
+        comment="Inclusive lower bound on the row primary key (null for the first slice)"
+    )
+    
+    end_key = Column(
+        UUID(as_uuid=True), 
+        nullable=True,
+        comment="Exclusive upper bound on the row primary key (null for the last slice)"
+    )
+    
+    status = Column(
+        Enum(ExportStatus), 
+        default=ExportStatus.PENDING,
+        nullable=False,
+        comment="Slice status"
+    )
+    
+    estimated_records = Column(
+        Integer, 
+        default=0,
+        nullable=False,
+        comment="Rows in the key range when the export was planned"
+    )
+    
+    exported_records = Column(
+        Integer, 
+        default=0,
+        nullable=False,
+        comment="Rows written by the completed slice"
+    )
+    
+    attempts = Column(
+        Integer, 
+        default=0,
+        nullable=False,
+        comment="Number of times the slice was started"
+    )
+    
+    part_file_path = Column(
+        String(500), 
+        nullable=True,
+        comment="Local part file written by the slice"
+    )
+    
+    part_file_size = Column(
+        Numeric(15, 0), 
+        nullable=True,
+        comment="Part file size in bytes"
+    )
+    
+    completed_at = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Slice completion time"
+    )
+    
+    error_message = Column(
+        Text, 
+        nullable=True,
+        comment="Error message from the last failed attempt"
+    )
+    
+    # Relationships
+    export = relationship("DataExportLog", back_populates="slices")
+    
+    def __repr__(self):
+        return f"<DataExportSlice(export_id={self.export_id}, table='{self.table_name}', index={self.slice_index}, status='{self.status.value}')>"
+    
+    def start_slice(self):
+        """Mark slice as started"""
+        self.status = ExportStatus.IN_PROGRESS
+        self.attempts = (self.attempts or 0) + 1
+        self.error_message = None
+    
+    def complete_slice(self, exported_records: int, part_file_path: str, part_file_size: int):
+        """Mark slice as completed"""
+        self.status = ExportStatus.COMPLETED
+        self.exported_records = exported_records
+        self.part_file_path = part_file_path
+        self.part_file_size = part_file_size
+        self.completed_at = datetime.now(timezone.utc)
+    
+    def fail_slice(self, error_message: str):
+        """Mark slice as failed"""
+        self.status = ExportStatus.FAILED
+        self.error_message = error_message
+
+
 class ExportSchedule(BaseModel):
     """
     Scheduled export configuration
@@ -882,7 +1176,7 @@ class ExportSchedule(BaseModel):
     export_format = Column(
         Enum(ExportFormat), 
         nullable=False,
-        comment="Export format (CSV or JSON)"
+        comment="Export format (CSV, JSON, Parquet or Arrow IPC)"
     )
     
     # Tables to Export
@@ -991,6 +1285,10 @@ Index('idx_data_export_started_at', DataExportLog.started_at)
 Index('idx_data_export_download_token', DataExportLog.download_token)
 Index('idx_data_export_expires_at', DataExportLog.download_expires_at)
 
+# Data export slice indexes
+Index('idx_data_export_slice_position', DataExportSlice.export_id, DataExportSlice.table_name, DataExportSlice.slice_index, unique=True)
+Index('idx_data_export_slice_status', DataExportSlice.export_id, DataExportSlice.status)
+
 # Export schedule indexes
 Index('idx_export_schedule_tenant', ExportSchedule.tenant_id)
 Index('idx_export_schedule_active', ExportSchedule.is_active)
@@ -2,7 +2,7 @@
 Customer model with multi-tenant support
 """
 
-from sqlalchemy import Column, String, DateTime, Boolean, Enum, Text, Numeric, Index
+from sqlalchemy import Column, String, DateTime, Boolean, Enum, Text, Numeric, Computed, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -10,6 +10,7 @@ import enum
 from decimal import Decimal
 from datetime import datetime
 from .base import BaseModel, TenantMixin
+from .search import search_document
 
 
 class CustomerStatus(enum.Enum):
@@ -202,6 +203,13 @@ class Customer(BaseModel, TenantMixin):
         comment="Last contact date"
     )
     
+    # Search
+    search_text = Column(
+        Text,
+        Computed(search_document("name", "email", "phone", "mobile", "business_name"), persisted=True),
+        comment="Normalized name, contact and business text for search"
+    )
+    
     # Relationships
     tenant = relationship("Tenant", back_populates="customers")
     invoices = relationship("Invoice", back_populates="customer", cascade="all, delete-orphan")
@@ -250,12 +258,13 @@ class Customer(BaseModel, TenantMixin):
             self.tags = []
         
         if tag not in self.tags:
-            self.tags.append(tag)
+            # Assign a new list so the change is flushed and tag counts follow it
+            self.tags = self.tags + [tag]
     
     def remove_tag(self, tag: str):
         """Remove a tag from customer"""
         if self.tags and tag in self.tags:
-            self.tags.remove(tag)
+            self.tags = [existing for existing in self.tags if existing != tag]
     
     def has_tag(self, tag: str) -> bool:
         """Check if customer has a specific tag"""
@@ -332,4 +341,5 @@ Index('idx_customer_tenant_type', Customer.tenant_id, Customer.customer_type)
 Index('idx_customer_total_debt', Customer.total_debt)
 Index('idx_customer_total_gold_debt', Customer.total_gold_debt)
 Index('idx_customer_last_purchase', Customer.last_purchase_at)
-# Index('idx_customer_tags', Customer.tags, postgresql_using='gin')
\ No newline at end of file
+Index('idx_customer_search_trgm', Customer.search_text, postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'})
+Index('idx_customer_tags', Customer.tags, postgresql_using='gin')
\ No newline at end of file
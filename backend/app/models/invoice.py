@@ -2,7 +2,7 @@
 Invoice models supporting both general and gold invoice types
 """
 
-from sqlalchemy import Column, String, DateTime, Boolean, Enum, Text, Numeric, Integer, Index, ForeignKey
+from sqlalchemy import Column, String, DateTime, Boolean, Enum, Text, Numeric, Computed, Integer, Index, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -11,6 +11,7 @@ from decimal import Decimal
 from datetime import datetime, timedelta
 import uuid
 from .base import BaseModel, TenantMixin
+from .search import search_document
 
 
 class InvoiceType(enum.Enum):
@@ -214,6 +215,13 @@ class Invoice(BaseModel, TenantMixin):
         comment="Invoice terms and conditions"
     )
     
+    # Search
+    search_text = Column(
+        Text,
+        Computed(search_document("invoice_number", "notes"), persisted=True),
+        comment="Normalized invoice number and notes for search"
+    )
+    
     # Relationships
     tenant = relationship("Tenant", back_populates="invoices")
     customer = relationship("Customer", back_populates="invoices")
@@ -495,6 +503,7 @@ Index('idx_invoice_tenant_date', Invoice.tenant_id, Invoice.invoice_date)
 Index('idx_invoice_due_date', Invoice.due_date)
 Index('idx_invoice_qr_token', Invoice.qr_code_token)
 Index('idx_invoice_is_installment', Invoice.is_installment)
+Index('idx_invoice_search_trgm', Invoice.search_text, postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'})
 
 Index('idx_invoice_item_invoice', InvoiceItem.invoice_id)
 Index('idx_invoice_item_product', InvoiceItem.product_id)
\ No newline at end of file
@@ -325,6 +325,12 @@ class CustomerSegment(BaseModel, TenantMixin):
         comment="Last update timestamp"
     )
     
+    time_window_swept_at = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="When purchase-window membership was last swept"
+    )
+    
     # Relationships
     tenant = relationship("Tenant")
     segment_customers = relationship("SegmentCustomer", back_populates="segment", cascade="all, delete-orphan")
@@ -548,6 +554,10 @@ Index('idx_marketing_campaign_type', MarketingCampaign.campaign_type)
 Index('idx_campaign_recipient_campaign', CampaignRecipient.campaign_id)
 Index('idx_campaign_recipient_customer', CampaignRecipient.customer_id)
 Index('idx_campaign_recipient_status', CampaignRecipient.status)
+Index(
+    'idx_campaign_recipient_campaign_status',
+    CampaignRecipient.campaign_id, CampaignRecipient.status, CampaignRecipient.id
+)
 
 Index('idx_customer_segment_tenant', CustomerSegment.tenant_id)
 Index('idx_customer_segment_type', CustomerSegment.segmentation_type)
@@ -89,6 +89,14 @@ class NotificationTemplate(BaseModel, TenantMixin):
         comment="Available template variables"
     )
     
+    version = Column(
+        Integer,
+        default=1,
+        server_default="1",
+        nullable=False,
+        comment="Content version, bumped on every edit to invalidate compiled copies"
+    )
+    
     # Relationships
     tenant = relationship("Tenant")
     
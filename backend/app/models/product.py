@@ -2,7 +2,7 @@
 Product and inventory models with multi-tenant support
 """
 
-from sqlalchemy import Column, String, DateTime, Boolean, Enum, Text, Numeric, Integer, Index, ForeignKey
+from sqlalchemy import Column, String, DateTime, Boolean, Enum, Text, Numeric, Computed, Integer, Index, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -10,6 +10,7 @@ import enum
 from decimal import Decimal
 from datetime import datetime
 from .base import BaseModel, TenantMixin
+from .search import search_document
 
 
 class ProductStatus(enum.Enum):
@@ -26,6 +27,16 @@ class StockStatus(enum.Enum):
     OUT_OF_STOCK = "out_of_stock"
 
 
+# Tracked, non-service products whose available quantity is at or below their minimum level
+LOW_STOCK_CONDITION = "track_inventory AND NOT is_service AND stock_quantity - reserved_quantity <= min_stock_level"
+
+
+def needs_restock(stock_quantity: int, reserved_quantity: int, min_stock_level: int,
+                  track_inventory: bool = True, is_service: bool = False) -> bool:
+    """LOW_STOCK_CONDITION evaluated for given levels"""
+    return bool(track_inventory and not is_service and stock_quantity - reserved_quantity <= min_stock_level)
+
+
 class ProductCategory(BaseModel, TenantMixin):
     """
     Product category model for organizing products
@@ -209,6 +220,12 @@ class Product(BaseModel, TenantMixin):
         comment="Whether this is a service (no inventory tracking)"
     )
     
+    is_low_stock = Column(
+        Boolean,
+        Computed(LOW_STOCK_CONDITION, persisted=True),
+        comment="Whether the product needs restocking (includes out of stock)"
+    )
+    
     # Media and Images
     images = Column(
         JSONB, 
@@ -267,6 +284,13 @@ class Product(BaseModel, TenantMixin):
         comment="Internal notes about product"
     )
     
+    # Search
+    search_text = Column(
+        Text,
+        Computed(search_document("name", "description", "sku", "barcode", "manufacturer", "brand", "model"), persisted=True),
+        comment="Normalized name, code and maker text for search"
+    )
+    
     # Relationships
     tenant = relationship("Tenant", back_populates="products")
     category = relationship("ProductCategory", back_populates="products")
@@ -304,11 +328,6 @@ class Product(BaseModel, TenantMixin):
         profit = self.selling_price - self.cost_price
         return (profit / self.cost_price) * 100
     
-    @property
-    def is_low_stock(self) -> bool:
-        """Check if product is low on stock"""
-        return self.stock_status == StockStatus.LOW_STOCK
-    
     @property
     def is_out_of_stock(self) -> bool:
         """Check if product is out of stock"""
@@ -320,12 +339,13 @@ class Product(BaseModel, TenantMixin):
             self.tags = []
         
         if tag not in self.tags:
-            self.tags.append(tag)
+            # Assign a new list so the change is flushed and tag counts follow it
+            self.tags = self.tags + [tag]
     
     def remove_tag(self, tag: str):
         """Remove a tag from product"""
         if self.tags and tag in self.tags:
-            self.tags.remove(tag)
+            self.tags = [existing for existing in self.tags if existing != tag]
     
     def has_tag(self, tag: str) -> bool:
         """Check if product has a specific tag"""
@@ -395,9 +415,11 @@ Index('idx_product_tenant_barcode', Product.tenant_id, Product.barcode)
 Index('idx_product_tenant_category', Product.tenant_id, Product.category_id)
 Index('idx_product_tenant_status', Product.tenant_id, Product.status)
 Index('idx_product_stock_quantity', Product.stock_quantity)
+Index('idx_product_low_stock', Product.tenant_id, postgresql_where=Product.is_low_stock)
 Index('idx_product_is_gold', Product.is_gold_product)
-# Index('idx_product_tags', Product.tags, postgresql_using='gin')
+Index('idx_product_tags', Product.tags, postgresql_using='gin')
 Index('idx_product_selling_price', Product.selling_price)
+Index('idx_product_search_trgm', Product.search_text, postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'})
 
 Index('idx_category_tenant_name', ProductCategory.tenant_id, ProductCategory.name)
 Index('idx_category_parent', ProductCategory.parent_id)
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+Search document columns with Persian/Arabic normalization
+Searchable tables keep a generated, normalized search_text column covered by a pg_trgm
+GIN index, so substring and prefix searches use the index instead of scanning the tenant
+"""
+
+from typing import List
+
+from sqlalchemy import and_, func, true
+
+# Arabic letter forms and digits folded to the forms Persian keyboards produce
+SEARCH_CHARACTER_MAP = {
+    "\u064a": "\u06cc",  # Arabic yeh -> Persian yeh
+    "\u0649": "\u06cc",  # Alef maksura -> Persian yeh
+    "\u0643": "\u06a9",  # Arabic kaf -> Persian kaf
+    "\u06c0": "\u0647",  # Heh with yeh above -> heh
+    "\u0629": "\u0647",  # Teh marbuta -> heh
+    "\u0622": "\u0627",  # Alef with madda -> alef
+    "\u0623": "\u0627",  # Alef with hamza above -> alef
+    "\u0625": "\u0627",  # Alef with hamza below -> alef
+    "\u0624": "\u0648",  # Waw with hamza -> waw
+    **{chr(0x06f0 + digit): str(digit) for digit in range(10)},  # Persian digits
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},  # Arabic-Indic digits
+}
+
+# Zero-width non-joiner, tatweel and short vowel marks are dropped
+SEARCH_REMOVED_CHARACTERS = "\u200c\u0640" + "".join(chr(code) for code in range(0x064b, 0x0653))
+
+# translate() arguments: characters past the end of the replacement string are deleted
+_TRANSLATE_FROM = "".join(SEARCH_CHARACTER_MAP) + SEARCH_REMOVED_CHARACTERS
+_TRANSLATE_TO = "".join(SEARCH_CHARACTER_MAP.values())
+_TRANSLATION_TABLE = str.maketrans(
+    "".join(SEARCH_CHARACTER_MAP),
+    _TRANSLATE_TO,
+    SEARCH_REMOVED_CHARACTERS
+)
+
+
+def normalize_search_text(text: str) -> str:
+    """Normalize text the same way search_text columns are normalized"""
+    return " ".join((text or "").translate(_TRANSLATION_TABLE).lower().split())
+
+
+def search_document(*column_names: str) -> str:
+    """
+    SQL expression for a generated search_text column over the given text columns
+    
+    Only immutable functions are used, as PostgreSQL requires for generated columns.
+    """
+    document = " || ' ' || ".join(f"coalesce({name}, '')" for name in column_names)
+    return f"lower(translate({document}, '{_TRANSLATE_FROM}', '{_TRANSLATE_TO}'))"
+
+
+def search_terms(query: str) -> List[str]:
+    """Normalized words of a search query"""
+    return normalize_search_text(query).split()
+
+
+def search_filter(column, query: str):
+    """Condition matching rows whose search text contains every word of the query"""
+    return and_(true(), *[column.contains(term, autoescape=True) for term in search_terms(query)])
+
+
+def search_rank(column, query: str):
+    """Relevance of a row to the query: closest word match first, then closest overall text"""
+    normalized = normalize_search_text(query)
+    return func.word_similarity(normalized, column) + func.similarity(normalized, column)
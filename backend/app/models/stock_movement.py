@@ -0,0 +1,87 @@
+"""
+Stock movement ledger
+Every change to a product's stock or reserved quantity appends one row recording the
+requested quantity and the resulting levels; rows are never updated
+"""
+
+from sqlalchemy import Column, String, Enum, Integer, Index, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+import enum
+
+from .base import BaseModel, TenantMixin
+
+
+class StockMovementType(enum.Enum):
+    """Kinds of stock movement"""
+    ADJUST = "adjust"
+    RESERVE = "reserve"
+    RELEASE = "release"
+    FULFILL = "fulfill"
+
+
+class StockMovement(BaseModel, TenantMixin):
+    """
+    One applied stock movement of a product
+    """
+    __tablename__ = "stock_movements"
+    
+    product_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("products.id"),
+        nullable=False,
+        comment="Product ID"
+    )
+    
+    movement_type = Column(
+        Enum(StockMovementType),
+        nullable=False,
+        comment="Kind of movement"
+    )
+    
+    quantity = Column(
+        Integer,
+        nullable=False,
+        comment="Requested quantity (signed for adjustments)"
+    )
+    
+    stock_after = Column(
+        Integer,
+        nullable=False,
+        comment="Stock quantity after the movement"
+    )
+    
+    reserved_after = Column(
+        Integer,
+        nullable=False,
+        comment="Reserved quantity after the movement"
+    )
+    
+    reason = Column(
+        String(500),
+        nullable=True,
+        comment="Reason given for the movement"
+    )
+    
+    reference_type = Column(
+        String(50),
+        nullable=True,
+        comment="Kind of record that caused the movement (sale, purchase, etc.)"
+    )
+    
+    reference_id = Column(
+        UUID(as_uuid=True),
+        nullable=True,
+        comment="ID of the record that caused the movement"
+    )
+    
+    # Relationships
+    product = relationship("Product")
+    
+    def __repr__(self):
+        return f"<StockMovement(product_id={self.product_id}, type='{self.movement_type.value}', quantity={self.quantity})>"
+
+
+# Create indexes for performance optimization
+Index('idx_stock_movement_tenant_product', StockMovement.tenant_id, StockMovement.product_id, StockMovement.created_at)
+Index('idx_stock_movement_reference', StockMovement.reference_type, StockMovement.reference_id)
@@ -0,0 +1,66 @@
+"""
+Tag dictionary models
+Customer and product tags live in GIN-indexed JSONB arrays; each tenant also keeps one row
+per distinct tag with the number of active records carrying it, maintained on write
+"""
+
+from typing import List
+
+from sqlalchemy import Column, String, Enum, Integer, Index
+from sqlalchemy.dialects.postgresql import array
+import enum
+
+from .base import BaseModel, TenantMixin
+
+
+class TagEntityType(enum.Enum):
+    """Kinds of records that carry tags"""
+    CUSTOMER = "customer"
+    PRODUCT = "product"
+
+
+class TagMatch(str, enum.Enum):
+    """How a tag filter matches a record's tags"""
+    ALL = "all"
+    ANY = "any"
+
+
+class Tag(BaseModel, TenantMixin):
+    """
+    A tenant's tag with its usage count
+    """
+    __tablename__ = "tags"
+    
+    entity_type = Column(
+        Enum(TagEntityType),
+        nullable=False,
+        comment="Kind of record the tag is used on"
+    )
+    
+    name = Column(
+        String(255),
+        nullable=False,
+        comment="Tag text"
+    )
+    
+    usage_count = Column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="Number of active records carrying the tag"
+    )
+    
+    def __repr__(self):
+        return f"<Tag(name='{self.name}', entity_type='{self.entity_type}', usage_count={self.usage_count})>"
+
+
+def tag_filter(column, tags: List[str], match: str = TagMatch.ALL):
+    """Condition on a JSONB tag array that its GIN index can serve: @> for all tags, ?| for any"""
+    if match == TagMatch.ANY:
+        return column.has_any(array(tags))
+    return column.contains(tags)
+
+
+# Create indexes for performance optimization
+Index('uq_tag_tenant_entity_name', Tag.tenant_id, Tag.entity_type, Tag.name, unique=True)
+Index('idx_tag_name_prefix', Tag.tenant_id, Tag.entity_type, Tag.name, postgresql_ops={'name': 'text_pattern_ops'})
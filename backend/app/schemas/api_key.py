@@ -152,6 +152,8 @@ class WebhookEventType(str, Enum):
     CUSTOMER_UPDATED = "customer.updated"
     PRODUCT_CREATED = "product.created"
     PRODUCT_UPDATED = "product.updated"
+    PRODUCT_LOW_STOCK = "product.low_stock"
+    PRODUCT_RESTOCKED = "product.restocked"
     PAYMENT_RECEIVED = "payment.received"
     INSTALLMENT_DUE = "installment.due"
     INSTALLMENT_OVERDUE = "installment.overdue"
@@ -192,13 +192,15 @@ class StorageUsageSchema(BaseModel):
     available: bool = Field(..., description="Whether storage provider is available")
     object_count: int = Field(..., description="Number of objects stored")
     total_size: int = Field(..., description="Total storage used in bytes")
+    last_reconciled_at: Optional[str] = Field(None, description="Oldest inventory confirmation against the bucket listing")
     
     class Config:
         json_schema_extra = {
             "example": {
                 "available": True,
                 "object_count": 150,
-                "total_size": 1073741824
+                "total_size": 1073741824,
+                "last_reconciled_at": "2024-01-01T03:00:00+00:00"
             }
         }
 
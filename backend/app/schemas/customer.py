@@ -164,10 +164,11 @@ class CustomerResponse(CustomerBase):
 class CustomerListResponse(BaseModel):
     """Schema for customer list response with pagination"""
     customers: List[CustomerResponse]
-    total: int = Field(..., description="Total number of customers")
+    total: Optional[int] = Field(..., description="Total number of customers (estimated or omitted on request)")
     page: int = Field(..., description="Current page number")
     per_page: int = Field(..., description="Items per page")
-    total_pages: int = Field(..., description="Total number of pages")
+    total_pages: Optional[int] = Field(..., description="Total number of pages")
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page, if there is one")
 
 
 class CustomerSearchRequest(BaseModel):
@@ -176,6 +177,7 @@ class CustomerSearchRequest(BaseModel):
     status: Optional[CustomerStatus] = Field(None, description="Filter by customer status")
     customer_type: Optional[CustomerType] = Field(None, description="Filter by customer type")
     tags: Optional[List[str]] = Field(None, description="Filter by tags")
+    tag_match: str = Field(default="all", pattern="^(all|any)$", description="Require all of the tags or any of them")
     has_debt: Optional[bool] = Field(None, description="Filter customers with outstanding debt")
     city: Optional[str] = Field(None, description="Filter by city")
     created_after: Optional[datetime] = Field(None, description="Filter customers created after date")
@@ -185,6 +187,8 @@ class CustomerSearchRequest(BaseModel):
     sort_order: Optional[str] = Field(default="desc", description="Sort order (asc/desc)")
     page: int = Field(default=1, ge=1, description="Page number")
     per_page: int = Field(default=20, ge=1, le=100, description="Items per page")
+    cursor: Optional[str] = Field(None, description="Cursor of the next page from a previous response (overrides page)")
+    count: str = Field(default="exact", pattern="^(exact|estimated|none)$", description="How to count the total")
 
 
 class CustomerInteractionType(str, Enum):
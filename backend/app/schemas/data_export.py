@@ -12,6 +12,8 @@ class ExportFormatEnum(str, Enum):
     """Export format enumeration"""
     CSV = "csv"
     JSON = "json"
+    PARQUET = "parquet"
+    ARROW = "arrow"
 
 
 class ExportTypeEnum(str, Enum):
@@ -32,7 +34,7 @@ class ExportStatusEnum(str, Enum):
 
 class DataExportRequest(BaseModel):
     """Request schema for creating data export"""
-    export_format: ExportFormatEnum = Field(..., description="Export format (CSV or JSON)")
+    export_format: ExportFormatEnum = Field(..., description="Export format (CSV, JSON, Parquet or Arrow IPC)")
     export_type: ExportTypeEnum = Field(default=ExportTypeEnum.MANUAL, description="Export type")
     tables: Optional[List[str]] = Field(
         default=None, 
@@ -52,7 +54,7 @@ class DataExportRequest(BaseModel):
 class BulkDataExportRequest(BaseModel):
     """Request schema for bulk data export"""
     tenant_ids: List[str] = Field(..., description="List of tenant IDs to export")
-    export_format: ExportFormatEnum = Field(..., description="Export format (CSV or JSON)")
+    export_format: ExportFormatEnum = Field(..., description="Export format (CSV, JSON, Parquet or Arrow IPC)")
     export_type: ExportTypeEnum = Field(default=ExportTypeEnum.MANUAL, description="Export type")
     tables: Optional[List[str]] = Field(
         default=None, 
@@ -141,6 +143,7 @@ class ExportStatusResponse(BaseModel):
     downloaded_at: Optional[datetime] = Field(None, description="Download time")
     is_download_expired: bool = Field(default=True, description="Whether download has expired")
     duration_seconds: Optional[int] = Field(None, description="Duration in seconds")
+    progress_percentage: Optional[int] = Field(None, description="Exported share of estimated rows for parallel exports")
     error_message: Optional[str] = Field(None, description="Error message if failed")
 
 
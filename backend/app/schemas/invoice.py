@@ -189,6 +189,28 @@ class InvoiceCreate(InvoiceBase):
         return v
 
 
+class InvoiceBulkCreate(BaseModel):
+    """Schema for creating many invoices at once"""
+    # Rows are validated one by one so a bad row is reported instead of rejecting the request
+    invoices: List[Dict[str, Any]] = Field(..., min_items=1, description="Invoices in InvoiceCreate format")
+
+
+class InvoiceBulkRowResult(BaseModel):
+    """Schema for the outcome of one bulk invoice row"""
+    index: int = Field(..., description="Position of the row in the request")
+    success: bool
+    invoice_id: Optional[uuid.UUID] = None
+    invoice_number: Optional[str] = None
+    error: Optional[str] = None
+
+
+class InvoiceBulkCreateResponse(BaseModel):
+    """Schema for bulk invoice creation results"""
+    created_count: int
+    error_count: int
+    results: List[InvoiceBulkRowResult]
+
+
 class InvoiceUpdate(BaseModel):
     """Schema for updating invoices"""
     customer_id: Optional[uuid.UUID] = None
@@ -343,12 +365,13 @@ class InvoiceFilter(BaseModel):
 class InvoicePaginatedResponse(BaseModel):
     """Schema for paginated invoice responses"""
     items: List[InvoiceListResponse]
-    total: int
+    total: Optional[int]
     page: int
     per_page: int
-    pages: int
+    pages: Optional[int]
     has_next: bool
     has_prev: bool
+    next_cursor: Optional[str] = None
 
     class Config:
         from_attributes = True
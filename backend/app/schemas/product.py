@@ -239,10 +239,11 @@ class ProductResponse(ProductBase):
 class ProductListResponse(BaseModel):
     """Schema for product list response with pagination"""
     products: List[ProductResponse]
-    total: int
+    total: Optional[int]
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int]
+    next_cursor: Optional[str] = None
 
 
 class ProductSearchRequest(BaseModel):
@@ -250,6 +251,7 @@ class ProductSearchRequest(BaseModel):
     query: Optional[str] = Field(None, description="Search query")
     category_id: Optional[uuid.UUID] = Field(None, description="Filter by category")
     tags: Optional[List[str]] = Field(None, description="Filter by tags")
+    tag_match: str = Field(default="all", pattern="^(all|any)$", description="Require all of the tags or any of them")
     status: Optional[ProductStatus] = Field(None, description="Filter by status")
     is_gold_product: Optional[bool] = Field(None, description="Filter gold products")
     is_service: Optional[bool] = Field(None, description="Filter services")
@@ -266,6 +268,8 @@ class ProductSearchRequest(BaseModel):
     # Pagination
     page: int = Field(default=1, ge=1, description="Page number")
     page_size: int = Field(default=20, ge=1, le=100, description="Page size")
+    cursor: Optional[str] = Field(None, description="Cursor of the next page from a previous response (overrides page)")
+    count: str = Field(default="exact", pattern="^(exact|estimated|none)$", description="How to count the total")
 
 
 class StockAdjustmentRequest(BaseModel):
@@ -284,6 +288,54 @@ class StockReservationRequest(BaseModel):
     reference_id: Optional[uuid.UUID] = Field(None, description="Reference ID")
 
 
+class StockMovementTypeEnum(str, Enum):
+    """Stock movement type enumeration"""
+    ADJUST = "adjust"
+    RESERVE = "reserve"
+    RELEASE = "release"
+    FULFILL = "fulfill"
+
+
+class StockMovementLineRequest(BaseModel):
+    """Schema for one line of a stock movement batch"""
+    product_id: uuid.UUID = Field(..., description="Product ID")
+    movement_type: StockMovementTypeEnum = Field(..., description="Kind of movement")
+    quantity: int = Field(..., description="Quantity (signed for adjustments, positive otherwise)")
+    reason: Optional[str] = Field(None, max_length=500, description="Reason for the movement")
+    reference_type: Optional[str] = Field(None, max_length=50, description="Reference type")
+    reference_id: Optional[uuid.UUID] = Field(None, description="Reference ID")
+
+
+class StockMovementBatchRequest(BaseModel):
+    """Schema for applying several stock movements at once"""
+    movements: List[StockMovementLineRequest] = Field(..., min_items=1, max_items=500, description="Movements to apply")
+    reason: Optional[str] = Field(None, max_length=500, description="Reason for lines that don't give one")
+    reference_type: Optional[str] = Field(None, max_length=50, description="Reference type for lines that don't give one")
+    reference_id: Optional[uuid.UUID] = Field(None, description="Reference ID for lines that don't give one")
+
+
+class StockMovementResponse(BaseModel):
+    """Schema for a recorded stock movement"""
+    id: uuid.UUID
+    product_id: uuid.UUID
+    movement_type: StockMovementTypeEnum
+    quantity: int
+    stock_after: int
+    reserved_after: int
+    reason: Optional[str] = None
+    reference_type: Optional[str] = None
+    reference_id: Optional[uuid.UUID] = None
+    created_at: datetime
+    
+    @validator('movement_type', pre=True)
+    def movement_type_value(cls, v):
+        """Accept the model enum"""
+        return getattr(v, 'value', v)
+    
+    class Config:
+        from_attributes = True
+
+
 class ImageUploadResponse(BaseModel):
     """Schema for image upload response"""
     image_url: str = Field(..., description="Uploaded image URL")
@@ -304,6 +356,17 @@ class BulkProductUpdateRequest(BaseModel):
     updates: ProductUpdate = Field(..., description="Updates to apply")
 
 
+class ProductLookupRequest(BaseModel):
+    """Schema for looking up scanned barcodes or SKUs"""
+    codes: List[str] = Field(..., min_length=1, description="Barcodes or SKUs to resolve")
+
+
+class ProductLookupResponse(BaseModel):
+    """Schema for scanned code lookup results"""
+    products: Dict[str, ProductResponse] = Field(default_factory=dict, description="Products by scanned code")
+    missing: List[str] = Field(default_factory=list, description="Codes without an active product")
+
+
 class ProductStatsResponse(BaseModel):
     """Schema for product statistics response"""
     total_products: int
@@ -49,6 +49,7 @@ class MultipleTenantRestoreRequest(BaseModel):
     tenant_backup_pairs: List[TenantBackupPair] = Field(..., description="List of tenant-backup pairs")
     storage_provider: str = Field(default="backblaze_b2", description="Storage provider to restore from")
     skip_validation: bool = Field(default=False, description="Skip backup integrity validation")
+    max_concurrency: Optional[int] = Field(None, ge=1, le=32, description="Maximum parallel tenant restores (defaults to RESTORE_MAX_CONCURRENCY)")
     
     @validator('storage_provider')
     def validate_storage_provider(cls, v):
@@ -86,6 +87,7 @@ class AllTenantsRestoreRequest(BaseModel):
     storage_provider: str = Field(default="backblaze_b2", description="Storage provider to restore from")
     backup_date: Optional[str] = Field(None, description="Restore from backups before this date (ISO format)")
     skip_validation: bool = Field(default=False, description="Skip backup integrity validation")
+    max_concurrency: Optional[int] = Field(None, ge=1, le=32, description="Maximum parallel tenant restores (defaults to RESTORE_MAX_CONCURRENCY)")
     
     @validator('storage_provider')
     def validate_storage_provider(cls, v):
@@ -112,6 +114,29 @@ class AllTenantsRestoreRequest(BaseModel):
         }
 
 
+class RestorePlanRequest(BaseModel):
+    """Request schema for a dry-run restore plan"""
+    tenant_backup_pairs: Optional[List[TenantBackupPair]] = Field(None, description="Tenant-backup pairs (all active tenants when omitted)")
+    storage_provider: str = Field(default="backblaze_b2", description="Storage provider to restore from")
+    backup_date: Optional[str] = Field(None, description="Restore from backups before this date (ISO format)")
+    max_concurrency: Optional[int] = Field(None, ge=1, le=32, description="Maximum parallel tenant restores (defaults to RESTORE_MAX_CONCURRENCY)")
+    
+    @validator('storage_provider')
+    def validate_storage_provider(cls, v):
+        if v not in ['backblaze_b2', 'cloudflare_r2']:
+            raise ValueError('storage_provider must be either backblaze_b2 or cloudflare_r2')
+        return v
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "storage_provider": "backblaze_b2",
+                "backup_date": "2024-01-01T12:00:00Z",
+                "max_concurrency": 4
+            }
+        }
+
+
 # Response Schemas
 class RestoreResponse(BaseModel):
     """Response schema for restore operations"""
@@ -123,6 +148,7 @@ class RestoreResponse(BaseModel):
     storage_provider: str = Field(..., description="Storage provider used")
     tenant_count: Optional[int] = Field(None, description="Number of tenants being restored")
     backup_date: Optional[str] = Field(None, description="Backup date filter (for all tenants restore)")
+    batch_id: Optional[str] = Field(None, description="Restore batch ID (for orchestrated multi-tenant restores)")
     
     class Config:
         json_schema_extra = {
@@ -326,4 +352,61 @@ class TaskStatusResponse(BaseModel):
                     "tenant_id": "123e4567-e89b-12d3-a456-426614174000"
                 }
             }
-        }
\ No newline at end of file
+        }
+
+
+class RestorePlanItemSchema(BaseModel):
+    """Schema for a single tenant in a restore plan"""
+    tenant_id: str = Field(..., description="Tenant ID")
+    tenant_name: str = Field(..., description="Tenant name")
+    subscription_type: Optional[str] = Field(None, description="Tenant subscription tier")
+    backup_id: str = Field(..., description="Backup ID")
+    backup_date: Optional[str] = Field(None, description="Backup creation date")
+    archive_size: int = Field(..., description="Archive size in bytes")
+    available_in_storage: bool = Field(..., description="Whether the backup exists in the selected provider")
+    priority: int = Field(..., description="Position in the restore order")
+    lane: int = Field(..., description="Worker lane the restore is assigned to")
+    estimated_seconds: int = Field(..., description="Estimated restore duration in seconds")
+    estimated_start_seconds: int = Field(..., description="Estimated start offset from batch start")
+    estimated_finish_seconds: int = Field(..., description="Estimated finish offset from batch start")
+
+
+class RestorePlanResponse(BaseModel):
+    """Response schema for a dry-run restore plan"""
+    status: str = Field(..., description="Operation status")
+    storage_provider: str = Field(..., description="Storage provider")
+    max_concurrency: int = Field(..., description="Maximum parallel tenant restores")
+    total_tenants: int = Field(..., description="Number of tenants in the plan")
+    total_archive_size: int = Field(..., description="Total archive size in bytes")
+    throughput_bytes_per_second: int = Field(..., description="Throughput used for estimates")
+    estimated_total_seconds: int = Field(..., description="Estimated wall time with bounded concurrency")
+    estimated_serial_seconds: int = Field(..., description="Estimated wall time when restoring one tenant at a time")
+    unavailable_in_storage: List[str] = Field(default_factory=list, description="Tenants whose backup is missing in the provider")
+    skipped: List[Dict[str, Any]] = Field(default_factory=list, description="Pairs skipped because tenant or backup was not found")
+    restores: List[RestorePlanItemSchema] = Field(..., description="Planned restores in priority order")
+
+
+class RestoreBatchItemSchema(BaseModel):
+    """Schema for per-tenant progress within a restore batch"""
+    restore_id: str = Field(..., description="Restore operation ID")
+    tenant_id: Optional[str] = Field(None, description="Target tenant ID")
+    backup_id: str = Field(..., description="Source backup ID")
+    priority: Optional[int] = Field(None, description="Position in the restore order")
+    status: str = Field(..., description="Restore status")
+    current_step: Optional[str] = Field(None, description="Current restore step")
+    progress_percentage: int = Field(..., description="Restore progress percentage")
+    duration_seconds: Optional[int] = Field(None, description="Restore duration in seconds")
+    error_message: Optional[str] = Field(None, description="Error message if failed")
+
+
+class RestoreBatchStatusResponse(BaseModel):
+    """Response schema for aggregated restore batch status"""
+    batch_id: str = Field(..., description="Restore batch ID")
+    status: str = Field(..., description="Batch status (in_progress, completed, partial_failure)")
+    total_tenants: int = Field(..., description="Number of tenants in the batch")
+    successful_restores: int = Field(..., description="Completed restores")
+    failed_restores: int = Field(..., description="Failed restores")
+    in_progress_restores: int = Field(..., description="Restores currently running")
+    pending_restores: int = Field(..., description="Restores waiting for a worker")
+    progress_percentage: float = Field(..., description="Average progress across the batch")
+    restore_results: List[RestoreBatchItemSchema] = Field(..., description="Per-tenant progress in priority order")
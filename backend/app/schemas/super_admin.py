@@ -120,10 +120,11 @@ class TenantResponse(BaseModel):
 class TenantListResponse(BaseModel):
     """Response model for tenant list with pagination"""
     tenants: List[TenantResponse]
-    total: int
+    total: Optional[int]
     skip: int
     limit: int
     has_more: bool
+    next_cursor: Optional[str] = None
 
 
 class TenantStatsResponse(BaseModel):
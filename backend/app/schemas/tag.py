@@ -0,0 +1,17 @@
+"""
+Tag dictionary schemas
+"""
+
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class TagSuggestion(BaseModel):
+    """Schema for one autocomplete suggestion"""
+    name: str = Field(..., description="Tag text")
+    usage_count: int = Field(..., description="Number of active records carrying the tag")
+
+
+class TagSuggestionResponse(BaseModel):
+    """Schema for tag autocomplete results"""
+    tags: List[TagSuggestion] = Field(default_factory=list, description="Matching tags, most used first")
@@ -8,11 +8,7 @@ from sqlalchemy import and_, func, extract
 from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException, status
 import secrets
-import hashlib
-import hmac
-import json
-import httpx
-import asyncio
+import logging
 from ..models.api_key import ApiKey, ApiKeyUsage, WebhookEndpoint, ApiKeyStatus, ApiKeyScope
 from ..models.tenant import Tenant, SubscriptionType
 from ..schemas.api_key import (
@@ -20,6 +16,9 @@ from ..schemas.api_key import (
     WebhookEndpointCreate, WebhookEndpointUpdate, WebhookEndpointResponse,
     RateLimitInfo, ApiKeyValidationResponse
 )
+from .webhook_delivery_service import enqueue_webhook_event, sign_payload
+
+logger = logging.getLogger(__name__)
 
 
 class ApiKeyService:
@@ -431,83 +430,25 @@ class WebhookService:
         ]
     
     async def send_webhook(self, event_type: str, payload: dict, tenant_id: str):
-        """Send webhook notifications for an event"""
-        # Get all active webhook endpoints for this tenant that subscribe to this event
-        webhooks = self.db.query(WebhookEndpoint).filter(
-            WebhookEndpoint.tenant_id == tenant_id,
-            WebhookEndpoint.is_active == True
-        ).all()
+        """
+        Queue webhook notifications for an event
         
-        # Filter webhooks that subscribe to this event
-        relevant_webhooks = [
-            webhook for webhook in webhooks
-            if webhook.is_subscribed_to_event(event_type)
-        ]
-        
-        # Send webhooks asynchronously
-        tasks = []
-        for webhook in relevant_webhooks:
-            task = asyncio.create_task(self._deliver_webhook(webhook, event_type, payload))
-            tasks.append(task)
-        
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
-    
-    async def _deliver_webhook(self, webhook: WebhookEndpoint, event_type: str, payload: dict):
-        """Deliver a single webhook with retries"""
-        webhook_payload = {
-            "event": event_type,
-            "data": payload,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "webhook_id": str(webhook.id)
-        }
-        
-        headers = {
-            "Content-Type": "application/json",
-            "User-Agent": "HesaabPlus-Webhook/1.0"
-        }
-        
-        # Add signature if secret is provided
-        if webhook.secret:
-            signature = self._generate_signature(webhook.secret, json.dumps(webhook_payload))
-            headers["X-HesaabPlus-Signature"] = signature
-        
-        success = False
-        attempt = 0
-        
-        while attempt <= webhook.retry_count and not success:
-            attempt += 1
-            
-            try:
-                async with httpx.AsyncClient(timeout=webhook.timeout_seconds) as client:
-                    response = await client.post(
-                        webhook.url,
-                        json=webhook_payload,
-                        headers=headers
-                    )
-                    
-                    if 200 <= response.status_code < 300:
-                        success = True
-                        webhook.update_delivery_stats(success=True)
-                    else:
-                        if attempt > webhook.retry_count:
-                            webhook.update_delivery_stats(success=False)
-                        
-            except Exception as e:
-                if attempt > webhook.retry_count:
-                    webhook.update_delivery_stats(success=False)
-                
-                # Wait before retry (exponential backoff)
-                if attempt <= webhook.retry_count:
-                    await asyncio.sleep(2 ** attempt)
+        The event is written to the webhook outbox and committed with the caller's session;
+        delivery workers send it, so slow endpoints never hold up the request.
+        """
+        queued = enqueue_webhook_event(self.db, tenant_id, event_type, payload)
+        if not queued:
+            return
         
         self.db.commit()
     
+        # Wake a delivery worker; the periodic delivery run picks the events up if the broker is unavailable
+        try:
+            from ..tasks.webhook_tasks import deliver_webhooks
+            deliver_webhooks.delay()
+        except Exception as e:
+            logger.warning(f"Could not schedule webhook delivery for {event_type}: {e}")
+    
     def _generate_signature(self, secret: str, payload: str) -> str:
         """Generate HMAC signature for webhook payload"""
-        signature = hmac.new(
-            secret.encode('utf-8'),
-            payload.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
-        return f"sha256={signature}"
\ No newline at end of file
+        return sign_payload(secret, payload)
@@ -7,7 +7,7 @@ import gzip
 import hashlib
 import tempfile
 import subprocess
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 import logging
@@ -22,7 +22,8 @@ from sqlalchemy import text
 from app.core.config import settings
 from app.models.backup import BackupLog, BackupType, BackupStatus, StorageProvider
 from app.models.tenant import Tenant
-from app.services.cloud_storage_service import CloudStorageService
+from app.services.cloud_storage_service import CloudStorageService, IntegrityCheckMode, calculate_file_integrity
+from app.services.chunk_store_service import ChunkStoreService
 
 logger = logging.getLogger(__name__)
 
@@ -32,9 +33,17 @@ class BackupService:
     
     def __init__(self, db: Session):
         self.db = db
-        self.cloud_storage = CloudStorageService()
+        self.cloud_storage = CloudStorageService(db)
         self.temp_dir = Path(tempfile.gettempdir()) / "hesaabplus_backups"
         self.temp_dir.mkdir(exist_ok=True)
+        self._chunk_store = None
+    
+    @property
+    def chunk_store(self) -> ChunkStoreService:
+        """Deduplicating chunk store, created on first use"""
+        if self._chunk_store is None:
+            self._chunk_store = ChunkStoreService(self.db, self.cloud_storage)
+        return self._chunk_store
     
     def generate_encryption_key(self, tenant_id: str) -> bytes:
         """Generate tenant-specific encryption key"""
@@ -221,7 +230,7 @@ class BackupService:
     
     def backup_tenant(self, tenant_id: str) -> Dict:
         """Create complete backup for a specific tenant"""
-        backup_log = None
+        backup_log_id = None
         temp_files = []
         
         try:
@@ -242,6 +251,7 @@ class BackupService:
             )
             self.db.add(backup_log)
             self.db.commit()
+            backup_log_id = backup_log.id
             
             # Start backup process
             backup_log.start_backup()
@@ -253,6 +263,10 @@ class BackupService:
             sql_dump_path = self.create_tenant_sql_dump(tenant_id)
             temp_files.append(sql_dump_path)
             
+            # Deduplicated backups chunk the plaintext dump and encrypt each chunk instead
+            if settings.backup_dedup_enabled:
+                return self._complete_chunked_backup(tenant_id, backup_log, sql_dump_path)
+            
             # Step 2: Compress the dump
             compressed_path = self.compress_file(sql_dump_path)
             temp_files.append(compressed_path)
@@ -261,8 +275,8 @@ class BackupService:
             encrypted_path = self.encrypt_file(compressed_path, tenant_id)
             temp_files.append(encrypted_path)
             
-            # Step 4: Calculate checksum
-            checksum = self.calculate_checksum(encrypted_path)
+            # Step 4: Calculate checksum and per-part checksums for sampled verification in one read
+            checksum, part_integrity = calculate_file_integrity(encrypted_path)
             
             # Step 5: Upload to both cloud storage providers
             final_filename = f"{backup_name}.sql.gz.enc"
@@ -311,15 +325,18 @@ class BackupService:
                 storage_locations.append({
                     "provider": "backblaze_b2",
                     "location": b2_location,
-                    "uploaded_at": datetime.now(timezone.utc).isoformat()
+                    "uploaded_at": datetime.now(timezone.utc).isoformat(),
+                    **self.cloud_storage.describe_uploaded_object("backblaze_b2", b2_location)
                 })
             if r2_location:
                 storage_locations.append({
                     "provider": "cloudflare_r2", 
                     "location": r2_location,
-                    "uploaded_at": datetime.now(timezone.utc).isoformat()
+                    "uploaded_at": datetime.now(timezone.utc).isoformat(),
+                    **self.cloud_storage.describe_uploaded_object("cloudflare_r2", r2_location)
                 })
             
+            backup_log.backup_metadata = {"integrity": part_integrity}
             backup_log.complete_backup(
                 file_size=sql_dump_path.stat().st_size,
                 compressed_size=encrypted_path.stat().st_size,
@@ -345,9 +362,14 @@ class BackupService:
         except Exception as e:
             logger.error(f"Backup failed for tenant {tenant_id}: {e}")
             
-            if backup_log:
-                backup_log.fail_backup(str(e))
-                self.db.commit()
+            # Discard the partial work (including chunk rows and reference counts) and record
+            # the failure in a fresh transaction
+            self.db.rollback()
+            if backup_log_id:
+                backup_log = self.db.query(BackupLog).filter(BackupLog.id == backup_log_id).first()
+                if backup_log:
+                    backup_log.fail_backup(str(e))
+                    self.db.commit()
             
             raise
         
@@ -361,6 +383,82 @@ class BackupService:
                 except Exception as e:
                     logger.warning(f"Failed to clean up {temp_file}: {e}")
     
+    def _complete_chunked_backup(self, tenant_id: str, backup_log: BackupLog, sql_dump_path: Path) -> Dict:
+        """Store a tenant dump in the chunk store and record its manifest on the backup log"""
+        checksum = self.calculate_checksum(sql_dump_path)
+        manifest = self.chunk_store.store_file(tenant_id, sql_dump_path, self.generate_encryption_key(tenant_id))
+        
+        uploaded_at = datetime.now(timezone.utc).isoformat()
+        storage_locations = [
+            {
+                "provider": provider,
+                "location": self.chunk_store.tenant_prefix(tenant_id),
+                "format": "chunked",
+                "uploaded_at": uploaded_at
+            }
+            for provider in manifest["providers"]
+        ]
+        
+        backup_log.backup_metadata = {"format": "chunked", "manifest": manifest}
+        backup_log.complete_backup(
+            file_size=manifest["total_size"],
+            compressed_size=manifest["stored_size"],
+            checksum=checksum,
+            storage_locations=storage_locations
+        )
+        self.db.commit()
+        
+        logger.info(f"Chunked backup completed for tenant {tenant_id}: {manifest['bytes_uploaded']} new bytes uploaded")
+        
+        return {
+            "status": "success",
+            "backup_id": str(backup_log.id),
+            "tenant_id": tenant_id,
+            "backup_name": backup_log.backup_name,
+            "file_size": manifest["total_size"],
+            "compressed_size": manifest["stored_size"],
+            "checksum": checksum,
+            "storage_locations": storage_locations,
+            "duration_seconds": backup_log.duration_seconds,
+            "dedup": {
+                "chunk_count": manifest["chunk_count"],
+                "new_chunks": manifest["new_chunks"],
+                "reused_chunks": manifest["reused_chunks"],
+                "bytes_uploaded": manifest["bytes_uploaded"]
+            }
+        }
+    
+    def expire_chunked_backups(self, retention_days: Optional[int] = None) -> Dict:
+        """Release the chunk references held by deduplicated tenant backups past retention"""
+        retention_days = settings.backup_retention_days if retention_days is None else retention_days
+        cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+        
+        backups = (
+            self.db.query(BackupLog)
+            .filter(
+                BackupLog.backup_type == BackupType.TENANT_DAILY,
+                BackupLog.status == BackupStatus.COMPLETED,
+                BackupLog.completed_at < cutoff,
+                BackupLog.backup_metadata.has_key("manifest")
+            )
+            .all()
+        )
+        
+        released_chunks = 0
+        for backup in backups:
+            metadata = dict(backup.backup_metadata)
+            released_chunks += self.chunk_store.release_manifest(str(backup.tenant_id), metadata.pop("manifest"))
+            
+            metadata["expired_at"] = datetime.now(timezone.utc).isoformat()
+            backup.backup_metadata = metadata
+            backup.storage_locations = []
+            backup.is_active = False
+        
+        self.db.commit()
+        
+        logger.info(f"Expired {len(backups)} chunked backups, {released_chunks} chunks now unreferenced")
+        return {"expired_backups": len(backups), "released_chunks": released_chunks}
+    
     def list_tenant_backups(self, tenant_id: str, limit: int = 50) -> List[Dict]:
         """List available backups for a specific tenant"""
         try:
@@ -369,7 +467,8 @@ class BackupService:
                 .filter(
                     BackupLog.tenant_id == tenant_id,
                     BackupLog.backup_type == BackupType.TENANT_DAILY,
-                    BackupLog.status == BackupStatus.COMPLETED
+                    BackupLog.status == BackupStatus.COMPLETED,
+                    BackupLog.is_active == True
                 )
                 .order_by(BackupLog.created_at.desc())
                 .limit(limit)
@@ -423,45 +522,52 @@ class BackupService:
             logger.error(f"Failed to get backup info for {backup_id}: {e}")
             raise
     
-    def verify_backup_integrity(self, backup_id: str, storage_provider: str = "backblaze_b2") -> bool:
-        """Verify backup file integrity by downloading and checking checksum"""
+    def verify_backup_integrity(self, backup_id: str, storage_provider: str = "backblaze_b2",
+                                mode: IntegrityCheckMode = IntegrityCheckMode.FULL) -> bool:
+        """Verify backup file integrity against the fingerprint recorded at upload time.
+        
+        METADATA and SAMPLED modes use HEAD and range requests; FULL streams the object
+        and hashes it without writing a temporary file.
+        """
         try:
             backup = self.db.query(BackupLog).filter(BackupLog.id == backup_id).first()
             if not backup:
                 raise Exception(f"Backup {backup_id} not found")
             
             # Find storage location for specified provider
-            storage_location = None
-            for location in backup.storage_locations or []:
-                if location.get("provider") == storage_provider:
-                    storage_location = location["location"]
-                    break
-            
+            storage_location = backup.get_storage_location(storage_provider)
             if not storage_location:
                 raise Exception(f"Backup not found in {storage_provider}")
             
-            # Download file to temporary location
-            temp_file = self.temp_dir / f"verify_{backup_id}.tmp"
-            
-            if storage_provider == "backblaze_b2":
-                self.cloud_storage.download_from_b2(storage_location, temp_file)
-            elif storage_provider == "cloudflare_r2":
-                self.cloud_storage.download_from_r2(storage_location, temp_file)
-            else:
-                raise Exception(f"Unsupported storage provider: {storage_provider}")
-            
-            # Calculate checksum and compare
-            actual_checksum = self.calculate_checksum(temp_file)
-            expected_checksum = backup.checksum
+            result = self.verify_stored_backup(backup, storage_provider, storage_location, mode)
             
-            # Clean up temporary file
-            temp_file.unlink()
-            
-            is_valid = actual_checksum == expected_checksum
-            logger.info(f"Backup {backup_id} integrity check: {'PASSED' if is_valid else 'FAILED'}")
+            is_valid = result["is_valid"]
+            logger.info(f"Backup {backup_id} integrity check ({result['mode']}): {'PASSED' if is_valid else 'FAILED'}")
             
             return is_valid
             
         except Exception as e:
             logger.error(f"Backup integrity verification failed for {backup_id}: {e}")
-            raise
\ No newline at end of file
+            raise
+    
+    def verify_stored_backup(self, backup: BackupLog, storage_provider: str, storage_location: Dict,
+                             mode: IntegrityCheckMode = IntegrityCheckMode.FULL) -> Dict:
+        """Verify a stored backup, whether it is a single object or a chunk manifest"""
+        manifest = backup.get_chunk_manifest()
+        if manifest:
+            tenant_id = str(backup.tenant_id)
+            return self.chunk_store.verify_manifest(
+                tenant_id,
+                manifest,
+                self.generate_encryption_key(tenant_id),
+                storage_provider,
+                expected_checksum=backup.checksum,
+                mode=mode
+            )
+        
+        return self.cloud_storage.verify_object_integrity(
+            storage_provider,
+            storage_location["location"],
+            backup.integrity_expectations(storage_provider),
+            mode=mode
+        )
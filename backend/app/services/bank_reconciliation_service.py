@@ -6,11 +6,12 @@ import csv
 import io
 import json
 import re
-from typing import List, Dict, Tuple, Optional, Any
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Tuple, Optional, Any, NamedTuple
 from decimal import Decimal, InvalidOperation
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc, text
+from sqlalchemy import and_, or_, func, desc, text, insert
 import pandas as pd
 from uuid import UUID
 import logging
@@ -19,6 +20,7 @@ from app.models.accounting import (
     BankAccount, BankStatement, BankTransaction, BankReconciliation,
     BankReconciliationItem, Transaction, Account
 )
+from app.models.customer import Customer
 from app.schemas.bank_reconciliation import (
     BankStatementImportRequest, BankTransactionCreate, 
     TransactionMatchSuggestion, BankReconciliationCreate,
@@ -28,6 +30,83 @@ from app.core.exceptions import ValidationError, NotFoundError
 
 logger = logging.getLogger(__name__)
 
+STATEMENT_DATE_FORMATS = [
+    '%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y',
+    '%Y/%m/%d', '%d.%m.%Y', '%Y.%m.%d'
+]
+STATEMENT_INSERT_BATCH_SIZE = 1000  # Transactions per multi-row INSERT
+
+# Widest windows that still earn amount (within 10%) and date (within a week) points
+MATCH_AMOUNT_UPPER_FACTOR = Decimal('1.1')
+MATCH_AMOUNT_LOWER_FACTOR = Decimal('0.9')
+MATCH_DATE_WINDOW_DAYS = 7
+
+# Substring length used to index references and names for partial matches
+MATCH_TEXT_GRAM_SIZE = 3
+
+
+class _MatchRecord(NamedTuple):
+    """Transaction fields normalized once for match scoring"""
+    id: UUID
+    amount: Decimal
+    day: int  # Date ordinal
+    reference: Optional[str]  # Lowercased reference number
+    name: Optional[str]  # Lowercased bank counterparty or book customer name
+    is_credit: bool
+    is_debit: bool
+    transaction_type: Optional[str]
+
+
+class _ContainmentIndex:
+    """
+    Finds the texts that contain a query string or are contained in it
+    
+    Every text is indexed under each of its substrings up to MATCH_TEXT_GRAM_SIZE
+    long, for "contains" lookups through the query's rarest gram, and once under its
+    own rarest gram, for "contained in" lookups through the grams of the query.
+    """
+    
+    def __init__(self, texts: List[Optional[str]]):
+        self.texts = texts
+        self.containing: Dict[str, List[int]] = {}
+        for position, value in enumerate(texts):
+            if value:
+                for gram in self._substrings(value):
+                    self.containing.setdefault(gram, []).append(position)
+        
+        self.by_rarest_gram: Dict[str, List[int]] = {}
+        for position, value in enumerate(texts):
+            if value:
+                self.by_rarest_gram.setdefault(self._rarest_gram(value), []).append(position)
+    
+    @staticmethod
+    def _grams(value: str) -> set:
+        size = min(MATCH_TEXT_GRAM_SIZE, len(value))
+        return {value[start:start + size] for start in range(len(value) - size + 1)}
+    
+    @staticmethod
+    def _substrings(value: str) -> set:
+        return {
+            value[start:start + size]
+            for size in range(1, min(MATCH_TEXT_GRAM_SIZE, len(value)) + 1)
+            for start in range(len(value) - size + 1)
+        }
+    
+    def _rarest_gram(self, value: str) -> str:
+        return min(sorted(self._grams(value)), key=lambda gram: len(self.containing.get(gram, ())))
+    
+    def related(self, query: str) -> set:
+        """Positions of the texts that contain the query or are contained in it"""
+        positions = {
+            position for position in self.containing.get(self._rarest_gram(query), ())
+            if query in self.texts[position]
+        }
+        for gram in self._substrings(query):
+            for position in self.by_rarest_gram.get(gram, ()):
+                if self.texts[position] in query:
+                    positions.add(position)
+        return positions
+
 
 class BankReconciliationService:
     """Service for bank reconciliation operations"""
@@ -43,6 +122,9 @@ class BankReconciliationService:
     ) -> Dict[str, Any]:
         """
         Import bank statement from CSV or Excel file
+        
+        Dates and amounts are normalized with column-wide pandas operations, rows that
+        fail to parse are collected through a mask, and transactions are bulk inserted
         """
         try:
             # Validate bank account exists and belongs to tenant
@@ -77,29 +159,25 @@ class BankReconciliationService:
             self.db.add(statement)
             self.db.flush()  # Get statement ID
             
-            # Process transactions
-            processed_count = 0
-            failed_count = 0
-            errors = []
+            transactions, errors = self._build_statement_transactions(
+                df, import_request.column_mapping, import_request.date_format
+            )
             
-            for index, row in df.iterrows():
-                try:
-                    transaction = self._create_bank_transaction_from_row(
-                        row, 
-                        bank_account.id, 
-                        statement.id, 
-                        tenant_id,
-                        import_request.column_mapping
-                    )
-                    
-                    if transaction:
-                        self.db.add(transaction)
-                        processed_count += 1
+            failed_count = len(errors)
+            processed_count = len(transactions)
                     
-                except Exception as e:
-                    failed_count += 1
-                    errors.append(f"Row {index + 1}: {str(e)}")
-                    logger.error(f"Failed to process transaction row {index + 1}: {e}")
+            for start in range(0, processed_count, STATEMENT_INSERT_BATCH_SIZE):
+                batch = transactions.iloc[start:start + STATEMENT_INSERT_BATCH_SIZE]
+                rows = [
+                    {
+                        "tenant_id": tenant_id,
+                        "bank_account_id": bank_account.id,
+                        "statement_id": statement.id,
+                        **record
+                    }
+                    for record in batch.to_dict('records')
+                ]
+                self.db.execute(insert(BankTransaction), rows)
             
             # Update statement totals
             statement.processed_transactions = processed_count
@@ -108,25 +186,19 @@ class BankReconciliationService:
             if errors:
                 statement.processing_errors = "\n".join(errors[:10])  # Limit error log 
            
-            # Calculate opening and closing balances from transactions
+            # Opening and closing balances come from the first and last transactions by date
             if processed_count > 0:
-                transactions = self.db.query(BankTransaction).filter(
-                    BankTransaction.statement_id == statement.id
-                ).order_by(BankTransaction.transaction_date).all()
+                ordered = transactions.sort_values('transaction_date', kind='stable')
+                first_transaction = ordered.iloc[0]
+                if first_transaction['balance_after'] is not None:
+                    statement.opening_balance = (
+                        first_transaction['balance_after'] - 
+                        (first_transaction['credit_amount'] - first_transaction['debit_amount'])
+                    )
                 
-                if transactions:
-                    # Assume first transaction has balance_after as opening + first transaction
-                    first_transaction = transactions[0]
-                    if first_transaction.balance_after is not None:
-                        statement.opening_balance = (
-                            first_transaction.balance_after - 
-                            (first_transaction.credit_amount - first_transaction.debit_amount)
-                        )
-                    
-                    # Last transaction balance is closing balance
-                    last_transaction = transactions[-1]
-                    if last_transaction.balance_after is not None:
-                        statement.closing_balance = last_transaction.balance_after
+                last_transaction = ordered.iloc[-1]
+                if last_transaction['balance_after'] is not None:
+                    statement.closing_balance = last_transaction['balance_after']
             
             self.db.commit()
             
@@ -145,6 +217,174 @@ class BankReconciliationService:
             logger.error(f"Bank statement import failed: {e}")
             raise ValidationError(f"Import failed: {str(e)}")
     
+    def _build_statement_transactions(
+        self,
+        df: pd.DataFrame,
+        column_mapping: Dict[str, Any],
+        date_format: Optional[str] = None
+    ) -> Tuple[pd.DataFrame, List[str]]:
+        """
+        Normalize a statement frame into bank transaction columns
+        
+        Returns the transactions to import (rows without any amount are dropped, as before)
+        and one error message per row that could not be parsed.
+        """
+        date_values = self._mapped_column(df, column_mapping, 'date_column')
+        transaction_dates, invalid_dates = self._parse_date_column(date_values, date_format)
+        
+        debit_amounts, invalid_debits = self._parse_amount_column(
+            self._mapped_column(df, column_mapping, 'debit_column')
+        )
+        credit_amounts, invalid_credits = self._parse_amount_column(
+            self._mapped_column(df, column_mapping, 'credit_column')
+        )
+        
+        # If single amount column, determine debit/credit based on sign
+        if 'amount_column' in column_mapping:
+            amounts, invalid_amounts = self._parse_amount_column(
+                self._mapped_column(df, column_mapping, 'amount_column')
+            )
+            is_credit = amounts.map(lambda amount: amount > 0).astype(bool)
+            credit_amounts = amounts.where(is_credit, Decimal('0'))
+            debit_amounts = amounts.where(~is_credit, Decimal('0')).map(abs)
+            invalid_debits = invalid_debits | invalid_amounts
+        
+        balances, invalid_balances = self._parse_amount_column(
+            self._mapped_column(df, column_mapping, 'balance_column'), missing=None
+        )
+        
+        transactions = pd.DataFrame({
+            'transaction_date': transaction_dates,
+            'description': self._text_column(
+                self._mapped_column(df, column_mapping, 'description_column', default=0)
+            ),
+            'reference_number': self._text_column(self._mapped_column(df, column_mapping, 'reference_column')),
+            'debit_amount': debit_amounts,
+            'credit_amount': credit_amounts,
+            'balance_after': balances,
+            'counterparty': self._text_column(self._mapped_column(df, column_mapping, 'counterparty_column'))
+        }, index=df.index)
+        
+        # Per-row errors are collected as masks instead of exceptions
+        error_checks = [
+            (invalid_dates, "unrecognized date", date_values),
+            (invalid_debits | invalid_credits, "invalid amount", None),
+            (invalid_balances, "invalid balance", None)
+        ]
+        failed = pd.Series(False, index=df.index)
+        errors = []
+        for mask, message, values in error_checks:
+            new_failures = mask & ~failed
+            for index in new_failures[new_failures].index:
+                detail = f" '{values[index]}'" if values is not None else ""
+                errors.append((index, f"Row {index + 1}: {message}{detail}"))
+            failed |= mask
+        
+        errors = [message for _, message in sorted(errors)]
+        
+        has_amount = transactions['debit_amount'].map(bool) | transactions['credit_amount'].map(bool)
+        transactions = transactions[~failed & has_amount.astype(bool)]
+        
+        return transactions, errors
+    
+    def _mapped_column(
+        self,
+        df: pd.DataFrame,
+        column_mapping: Dict[str, Any],
+        key: str,
+        default: Optional[int] = None
+    ) -> Optional[pd.Series]:
+        """Get the statement column a mapping key points to"""
+        column_index = column_mapping.get(key, default)
+        if column_index is None:
+            return None
+        
+        if not isinstance(column_index, int) or not 0 <= column_index < len(df.columns):
+            raise ValidationError(
+                f"Column mapping '{key}' points to column {column_index}, but the file has {len(df.columns)} columns"
+            )
+        
+        return df.iloc[:, column_index]
+    
+    def _parse_date_column(
+        self,
+        values: Optional[pd.Series],
+        date_format: Optional[str] = None
+    ) -> Tuple[pd.Series, pd.Series]:
+        """
+        Parse a date column, trying each supported format across the whole column
+        
+        Returns the dates and a mask of non-empty values that no format recognized.
+        Empty dates, or no date column at all, fall back to the import time.
+        """
+        now = datetime.now()
+        if values is None:
+            return now, False
+        
+        missing = values.isna() | (values.astype(str).str.strip() == '')
+        
+        if pd.api.types.is_datetime64_any_dtype(values):
+            dates = values.copy()
+        else:
+            dates = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+            
+            # Excel cells already holding datetimes are taken as they are
+            is_datetime = values.map(lambda value: isinstance(value, datetime)).astype(bool)
+            if is_datetime.any():
+                dates[is_datetime] = pd.to_datetime(values[is_datetime])
+            
+            date_strings = values.astype(str).str.strip()
+            formats = [date_format] + [fmt for fmt in STATEMENT_DATE_FORMATS if fmt != date_format]
+            for fmt in filter(None, formats):
+                pending = dates.isna() & ~missing
+                if not pending.any():
+                    break
+                dates[pending] = pd.to_datetime(date_strings[pending], format=fmt, errors='coerce')
+            
+            # Whatever is left goes through the general pandas parser, one distinct value at a time
+            pending = dates.isna() & ~missing
+            if pending.any():
+                parsed = {
+                    value: pd.to_datetime(value, errors='coerce')
+                    for value in date_strings[pending].unique()
+                }
+                dates[pending] = date_strings[pending].map(parsed)
+        
+        invalid = dates.isna() & ~missing
+        dates = dates.astype(object).where(dates.notna(), now)
+        dates[missing] = now
+        return dates, invalid
+    
+    def _parse_amount_column(
+        self,
+        values: Optional[pd.Series],
+        missing: Optional[Decimal] = Decimal('0')
+    ) -> Tuple[pd.Series, pd.Series]:
+        """
+        Parse an amount column with the same cleaning rules as _parse_amount
+        
+        Returns Decimal amounts and a mask of values that contain digits but are not
+        a valid number. Empty or non-numeric values, or no column at all, become `missing`.
+        """
+        if values is None:
+            return missing, False
+        
+        # Remove common currency symbols and separators
+        cleaned = values.astype(str).str.strip().str.replace(r'[^\d\.\-\+]', '', regex=True)
+        cleaned[values.isna()] = ''
+        
+        valid = pd.to_numeric(cleaned, errors='coerce').notna() & (cleaned != '')
+        invalid = ~valid & cleaned.str.contains(r'\d', regex=True)
+        
+        amounts = cleaned.where(valid).map(lambda amount: Decimal(amount) if isinstance(amount, str) else missing)
+        return amounts.astype(object), invalid
+    
+    def _text_column(self, values: Optional[pd.Series]) -> Optional[pd.Series]:
+        """Strip a text column"""
+        if values is None:
+            return None
+        return values.astype(str).str.strip()
+    
     def _parse_csv_file(self, file_content: bytes, import_request: BankStatementImportRequest) -> pd.DataFrame:
         """Parse CSV file content"""
         try:
@@ -158,11 +398,12 @@ class BankReconciliationService:
             else:
                 raise ValidationError("Unable to decode file with supported encodings")        
     
-            # Parse CSV
+            # Parse CSV, keeping cells as text so amounts convert to Decimal exactly
             df = pd.read_csv(
                 io.StringIO(content_str),
                 header=0 if import_request.has_header else None,
-                encoding=None
+                encoding=None,
+                dtype=str
             )
             
             return df
@@ -183,69 +424,6 @@ class BankReconciliationService:
         except Exception as e:
             raise ValidationError(f"Failed to parse Excel file: {str(e)}")
     
-    def _create_bank_transaction_from_row(
-        self, 
-        row: pd.Series, 
-        bank_account_id: UUID, 
-        statement_id: UUID, 
-        tenant_id: UUID,
-        column_mapping: Dict[str, Any]
-    ) -> Optional[BankTransaction]:
-        """Create bank transaction from CSV/Excel row"""
-        try:
-            # Extract data based on column mapping
-            transaction_date = self._parse_date(row, column_mapping.get('date_column'))
-            description = str(row.iloc[column_mapping.get('description_column', 0)]).strip()
-            
-            # Parse amounts
-            debit_amount = self._parse_amount(row, column_mapping.get('debit_column'))
-            credit_amount = self._parse_amount(row, column_mapping.get('credit_column'))
-            
-            # If single amount column, determine debit/credit based on sign or separate indicator
-            if 'amount_column' in column_mapping:
-                amount = self._parse_amount(row, column_mapping['amount_column'])
-                if amount > 0:
-                    credit_amount = amount
-                    debit_amount = Decimal('0')
-                else:
-                    debit_amount = abs(amount)
-                    credit_amount = Decimal('0')     
-       
-            # Skip if no amount
-            if debit_amount == 0 and credit_amount == 0:
-                return None
-            
-            # Extract optional fields
-            reference_number = None
-            if 'reference_column' in column_mapping:
-                reference_number = str(row.iloc[column_mapping['reference_column']]).strip()
-            
-            balance_after = None
-            if 'balance_column' in column_mapping:
-                balance_after = self._parse_amount(row, column_mapping['balance_column'])
-            
-            counterparty = None
-            if 'counterparty_column' in column_mapping:
-                counterparty = str(row.iloc[column_mapping['counterparty_column']]).strip()
-            
-            transaction = BankTransaction(
-                tenant_id=tenant_id,
-                bank_account_id=bank_account_id,
-                statement_id=statement_id,
-                transaction_date=transaction_date,
-                description=description,
-                reference_number=reference_number,
-                debit_amount=debit_amount,
-                credit_amount=credit_amount,
-                balance_after=balance_after,
-                counterparty=counterparty
-            )
-            
-            return transaction
-            
-        except Exception as e:
-            raise ValidationError(f"Failed to parse transaction row: {str(e)}")
-    
     def _parse_date(self, row: pd.Series, column_index: Optional[int]) -> datetime:
         """Parse date from row"""
         if column_index is None:
@@ -263,13 +441,7 @@ class BankReconciliationService:
             # Try to parse string date
             date_str = str(date_value).strip()
             
-            # Common date formats
-            date_formats = [
-                '%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y',
-                '%Y/%m/%d', '%d.%m.%Y', '%Y.%m.%d'
-            ]
-            
-            for fmt in date_formats:
+            for fmt in STATEMENT_DATE_FORMATS:
                 try:
                     return datetime.strptime(date_str, fmt)
                 except ValueError:
@@ -318,7 +490,14 @@ class BankReconciliationService:
         """
         try:
             # Get unmatched bank transactions
-            bank_transactions = self.db.query(BankTransaction).filter(
+            bank_rows = self.db.query(
+                BankTransaction.id,
+                BankTransaction.transaction_date,
+                BankTransaction.debit_amount,
+                BankTransaction.credit_amount,
+                BankTransaction.reference_number,
+                BankTransaction.counterparty
+            ).filter(
                 and_(
                     BankTransaction.tenant_id == tenant_id,
                     BankTransaction.bank_account_id == bank_account_id,
@@ -326,8 +505,17 @@ class BankReconciliationService:
                 )
             ).all()
             
-            # Get unmatched book transactions (payments and receipts)
-            book_transactions = self.db.query(Transaction).filter(
+            # Get unmatched book transactions (payments and receipts), with customer names joined in
+            book_rows = self.db.query(
+                Transaction.id,
+                Transaction.transaction_date,
+                Transaction.amount,
+                Transaction.transaction_type,
+                Transaction.reference_number,
+                Customer.name
+            ).outerjoin(
+                Customer, Transaction.customer_id == Customer.id
+            ).filter(
                 and_(
                     Transaction.tenant_id == tenant_id,
                     Transaction.transaction_type.in_(['payment', 'receipt']),
@@ -339,42 +527,117 @@ class BankReconciliationService:
                 )
             ).all()
             
-            suggestions = []
-            
-            for bank_tx in bank_transactions:
-                bank_amount = bank_tx.absolute_amount
-                
-                for book_tx in book_transactions:
-                    # Calculate match score
-                    match_score, reasons = self._calculate_match_score(
-                        bank_tx, book_tx, amount_tolerance, date_tolerance_days
-                    )
-                    
-                    if match_score >= 0.5:  # Minimum threshold
-                        suggestion = TransactionMatchSuggestion(
-                            bank_transaction_id=bank_tx.id,
-                            book_transaction_id=book_tx.id,
-                            confidence_score=Decimal(str(match_score)),
-                            match_reasons=reasons,
-                            amount_difference=abs(bank_amount - book_tx.amount),
-                            date_difference_days=abs((bank_tx.transaction_date.date() - book_tx.transaction_date.date()).days)
-                        )
-                        suggestions.append(suggestion)
-            
-            # Sort by confidence score descending
-            suggestions.sort(key=lambda x: x.confidence_score, reverse=True)
+            bank_records = [
+                _MatchRecord(
+                    id=row.id,
+                    amount=row.credit_amount or row.debit_amount,
+                    day=row.transaction_date.date().toordinal(),
+                    reference=row.reference_number.lower() if row.reference_number else None,
+                    name=row.counterparty.lower() if row.counterparty else None,
+                    is_credit=row.credit_amount > 0,
+                    is_debit=row.debit_amount > 0,
+                    transaction_type=None
+                )
+                for row in bank_rows
+            ]
+            book_records = [
+                _MatchRecord(
+                    id=row.id,
+                    amount=row.amount,
+                    day=row.transaction_date.date().toordinal(),
+                    reference=row.reference_number.lower() if row.reference_number else None,
+                    name=row.name.lower() if row.name else None,
+                    is_credit=False,
+                    is_debit=False,
+                    transaction_type=row.transaction_type
+                )
+                for row in book_rows
+            ]
             
-            return suggestions
+            return self._match_records(bank_records, book_records, amount_tolerance, date_tolerance_days)
             
         except Exception as e:
             logger.error(f"Failed to find transaction matches: {e}")
             return []  
   
+    def _match_records(
+        self,
+        bank_records: List["_MatchRecord"],
+        book_records: List["_MatchRecord"],
+        amount_tolerance: float,
+        date_tolerance_days: int
+    ) -> List[TransactionMatchSuggestion]:
+        """
+        Score bank transactions against indexed book transaction candidates
+        
+        A pair can only reach the 0.5 threshold if the book earns amount points (within
+        10%) or date points (within a week), and pairs with only one of the two also need
+        a reference or name containment match. So each bank transaction scores the books
+        inside both windows, found through day buckets sorted by amount, plus the books
+        whose reference or name contains or is contained in its own. This gives the same
+        suggestions, in the same order, as scoring every pair.
+        """
+        tolerance = Decimal(str(amount_tolerance))
+        date_window = max(MATCH_DATE_WINDOW_DAYS, date_tolerance_days)
+        
+        books_by_day: Dict[int, List[int]] = {}
+        for position, book in enumerate(book_records):
+            books_by_day.setdefault(book.day, []).append(position)
+        
+        day_index = {}
+        for day, positions in books_by_day.items():
+            positions.sort(key=lambda position: book_records[position].amount)
+            day_index[day] = ([book_records[position].amount for position in positions], positions)
+        
+        reference_index = _ContainmentIndex([book.reference for book in book_records])
+        name_index = _ContainmentIndex([book.name for book in book_records])
+        
+        suggestions = []
+        
+        for bank in bank_records:
+            # Books earn amount points between A / 1.1 and A / 0.9, or within the absolute tolerance
+            low = min(bank.amount - tolerance, bank.amount / MATCH_AMOUNT_UPPER_FACTOR)
+            high = max(bank.amount + tolerance, bank.amount / MATCH_AMOUNT_LOWER_FACTOR)
+            
+            candidates = set()
+            for day in range(bank.day - date_window, bank.day + date_window + 1):
+                bucket = day_index.get(day)
+                if bucket is None:
+                    continue
+                amounts, positions = bucket
+                candidates.update(positions[bisect_left(amounts, low):bisect_right(amounts, high)])
+            
+            if bank.reference:
+                candidates |= reference_index.related(bank.reference)
+            if bank.name:
+                candidates |= name_index.related(bank.name)
+            
+            # Book order keeps ties in the same order as an exhaustive scan
+            for book in (book_records[position] for position in sorted(candidates)):
+                match_score, reasons = self._calculate_match_score(
+                    bank, book, tolerance, date_tolerance_days
+                )
+                
+                if match_score >= 0.5:  # Minimum threshold
+                    suggestions.append(TransactionMatchSuggestion(
+                        bank_transaction_id=bank.id,
+                        book_transaction_id=book.id,
+                        confidence_score=Decimal(str(match_score)),
+                        match_reasons=reasons,
+                        amount_difference=abs(bank.amount - book.amount),
+                        date_difference_days=abs(bank.day - book.day)
+                    ))
+        
+        # Sort by confidence score descending
+        suggestions.sort(key=lambda x: x.confidence_score, reverse=True)
+        
+        return suggestions
+    
     def _calculate_match_score(
         self, 
-        bank_tx: BankTransaction, 
-        book_tx: Transaction,
-        amount_tolerance: float,
+        bank_tx: "_MatchRecord", 
+        book_tx: "_MatchRecord",
+        amount_tolerance: Decimal,
         date_tolerance_days: int
     ) -> Tuple[float, List[str]]:
         """Calculate match score between bank and book transactions"""
@@ -382,11 +645,10 @@ class BankReconciliationService:
         reasons = []
         
         # Amount matching (40% weight)
-        bank_amount = bank_tx.absolute_amount
-        amount_diff = abs(bank_amount - book_tx.amount)
+        amount_diff = abs(bank_tx.amount - book_tx.amount)
         amount_diff_pct = float(amount_diff / book_tx.amount) if book_tx.amount > 0 else 1.0
         
-        if amount_diff <= Decimal(str(amount_tolerance)):
+        if amount_diff <= amount_tolerance:
             score += 0.4
             reasons.append("Exact amount match")
         elif amount_diff_pct <= 0.05:  # 5% tolerance
@@ -397,7 +659,7 @@ class BankReconciliationService:
             reasons.append("Approximate amount match (within 10%)")
         
         # Date matching (30% weight)
-        date_diff = abs((bank_tx.transaction_date.date() - book_tx.transaction_date.date()).days)
+        date_diff = abs(bank_tx.day - book_tx.day)
         
         if date_diff == 0:
             score += 0.3
@@ -413,32 +675,54 @@ class BankReconciliationService:
             reasons.append("Within a week")
         
         # Reference number matching (20% weight)
-        if bank_tx.reference_number and book_tx.reference_number:
-            if bank_tx.reference_number.lower() == book_tx.reference_number.lower():
+        if bank_tx.reference and book_tx.reference:
+            if bank_tx.reference == book_tx.reference:
                 score += 0.2
                 reasons.append("Reference number match")
-            elif bank_tx.reference_number.lower() in book_tx.reference_number.lower() or \
-                 book_tx.reference_number.lower() in bank_tx.reference_number.lower():
+            elif bank_tx.reference in book_tx.reference or book_tx.reference in bank_tx.reference:
                 score += 0.1
                 reasons.append("Partial reference match")   
      
-        # Description/counterparty matching (10% weight)
-        if bank_tx.counterparty and hasattr(book_tx, 'customer') and book_tx.customer:
-            if bank_tx.counterparty.lower() in book_tx.customer.name.lower() or \
-               book_tx.customer.name.lower() in bank_tx.counterparty.lower():
+        # Description/counterparty matching against the book customer name (10% weight)
+        if bank_tx.name and book_tx.name:
+            if bank_tx.name in book_tx.name or book_tx.name in bank_tx.name:
                 score += 0.1
                 reasons.append("Counterparty name match")
         
         # Transaction type consistency check
-        if bank_tx.credit_amount > 0 and book_tx.transaction_type == 'receipt':
+        if bank_tx.is_credit and book_tx.transaction_type == 'receipt':
             score += 0.05
             reasons.append("Transaction type consistent (receipt)")
-        elif bank_tx.debit_amount > 0 and book_tx.transaction_type == 'payment':
+        elif bank_tx.is_debit and book_tx.transaction_type == 'payment':
             score += 0.05
             reasons.append("Transaction type consistent (payment)")
         
         return min(score, 1.0), reasons
     
+    def _assign_matches(self, suggestions: List[TransactionMatchSuggestion]) -> List[TransactionMatchSuggestion]:
+        """
+        Pick one-to-one matches from scored suggestions
+        
+        Suggestions are taken greedily by score, then smallest amount and date
+        difference, and each bank or book transaction is used at most once.
+        """
+        ranked = sorted(
+            suggestions,
+            key=lambda s: (-s.confidence_score, s.amount_difference, s.date_difference_days)
+        )
+        
+        used_bank_ids = set()
+        used_book_ids = set()
+        assigned = []
+        for suggestion in ranked:
+            if suggestion.bank_transaction_id in used_bank_ids or suggestion.book_transaction_id in used_book_ids:
+                continue
+            used_bank_ids.add(suggestion.bank_transaction_id)
+            used_book_ids.add(suggestion.book_transaction_id)
+            assigned.append(suggestion)
+        
+        return assigned
+    
     def match_transactions(
         self, 
         tenant_id: UUID, 
@@ -562,36 +846,37 @@ class BankReconciliationService:
             medium_confidence_matches = [s for s in suggestions if 0.7 <= float(s.confidence_score) < min_confidence]
             low_confidence_matches = [s for s in suggestions if float(s.confidence_score) < 0.7]
             
-            matched_count = 0
+            # One-to-one assignment so no bank or book transaction is matched twice
+            assigned_matches = self._assign_matches(high_confidence_matches)
             
-            # Auto-match high confidence suggestions
-            for suggestion in high_confidence_matches:
-                try:
-                    # Check if transactions are still available for matching
-                    bank_tx = self.db.query(BankTransaction).filter(
+            bank_transactions = {}
+            if assigned_matches:
+                bank_transactions = {
+                    bank_tx.id: bank_tx
+                    for bank_tx in self.db.query(BankTransaction).filter(
                         and_(
-                            BankTransaction.id == suggestion.bank_transaction_id,
+                            BankTransaction.id.in_([s.bank_transaction_id for s in assigned_matches]),
                             BankTransaction.is_matched == False
                         )
-                    ).first()      
+                    )
+                }
               
-                    book_tx_available = not self.db.query(BankTransaction).filter(
-                        BankTransaction.matched_transaction_id == suggestion.book_transaction_id
-                    ).first()
+            matched_count = 0
+            matched_at = datetime.utcnow()
                     
-                    if bank_tx and book_tx_available:
-                        # Perform automatic matching
-                        bank_tx.is_matched = True
-                        bank_tx.matched_transaction_id = suggestion.book_transaction_id
-                        bank_tx.matched_date = datetime.utcnow()
-                        bank_tx.match_confidence = suggestion.confidence_score
-                        bank_tx.notes = f"Auto-matched with {suggestion.confidence_score:.2%} confidence"
+            # Auto-match the assigned suggestions still available for matching
+            for suggestion in assigned_matches:
+                bank_tx = bank_transactions.get(suggestion.bank_transaction_id)
+                if not bank_tx:
+                    continue
                         
-                        matched_count += 1
+                bank_tx.is_matched = True
+                bank_tx.matched_transaction_id = suggestion.book_transaction_id
+                bank_tx.matched_date = matched_at
+                bank_tx.match_confidence = suggestion.confidence_score
+                bank_tx.notes = f"Auto-matched with {suggestion.confidence_score:.2%} confidence"
                         
-                except Exception as e:
-                    logger.error(f"Failed to auto-match suggestion: {e}")
-                    continue
+                matched_count += 1
             
             self.db.commit()
             
@@ -624,7 +909,7 @@ class BankReconciliationService:
                 low_confidence_matches=len(low_confidence_matches),
                 unmatched_transactions=total_bank_transactions - matched_count,
                 processing_time_seconds=processing_time,
-                matches=high_confidence_matches[:10]  # Return first 10 matches
+                matches=assigned_matches[:10]  # Return first 10 matches
             )    
         
             logger.info(f"Auto-matching completed: {matched_count} transactions matched in {processing_time:.2f}s")
@@ -703,9 +703,9 @@ class BusinessIntelligenceService:
         
         low_stock_products = self.db.query(Product).filter(
             Product.tenant_id == tenant_id,
-            Product.track_inventory == True,
-            Product.stock_quantity <= Product.min_stock_level,
-            Product.stock_quantity > 0
+            Product.is_low_stock == True,
+            Product.is_active == True,
+            (Product.stock_quantity - Product.reserved_quantity) > 0
         ).all()
         
         if low_stock_products:
@@ -0,0 +1,475 @@
+"""
+Content-defined chunking and deduplicating chunk store for tenant backups
+Backups are split on content boundaries, each unique chunk is stored once per tenant,
+and a per-backup manifest lists the chunks needed to reassemble the dump
+"""
+
+import gzip
+import hashlib
+import hmac
+import os
+import random
+import tempfile
+from collections import Counter
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Optional
+import logging
+
+import numpy as np
+from botocore.exceptions import ClientError
+from cryptography.fernet import Fernet
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.backup import BackupChunk, StorageProvider
+from app.services.cloud_storage_service import (
+    CloudStorageService, IntegrityCheckMode, StorageProvider as CloudProvider
+)
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+CHUNK_KEY_PREFIX = "chunks"
+
+# Gear table for the rolling hash; derived from SHA-256 so boundaries are stable across processes
+GEAR_TABLE = tuple(
+    int.from_bytes(hashlib.sha256(bytes([value])).digest()[:8], "big") for value in range(256)
+)
+GEAR_ARRAY = np.array(GEAR_TABLE, dtype=np.uint64)
+
+# The 64-bit hash is shifted once per byte, so it only depends on the last 64 bytes
+HASH_WINDOW = 64
+# Bytes hashed per vectorised pass while looking for a boundary
+SCAN_BLOCK_SIZE = 64 * 1024
+
+
+def _gear_hashes(gears: np.ndarray) -> np.ndarray:
+    """Rolling hash at every position of a run of gear values, as if hashing started at its first byte.
+    
+    The hash at i is the sum of gears[i - k] << k for k < 64, built by doubling the
+    span covered by each position (1, 2, 4 ... 64 bytes) instead of a per-byte loop.
+    """
+    hashes = gears
+    span = 1
+    while span < HASH_WINDOW:
+        hashes[span:] += hashes[:-span] << np.uint64(span)
+        span *= 2
+    return hashes
+
+
+def _find_cut_point(data: bytearray, min_size: int, max_size: int, boundary_mask: int) -> int:
+    """Return the length of the next chunk at the start of data"""
+    length = min(len(data), max_size)
+    if length <= min_size:
+        return length
+    
+    view = np.frombuffer(data, dtype=np.uint8, count=length)
+    mask = np.uint64(boundary_mask)
+    
+    # Bytes before min_size can never end a chunk, so hashing starts there; each block
+    # re-hashes the 63 bytes before it so hashes match a single pass over the data
+    start = min_size
+    while start < length:
+        end = min(start + SCAN_BLOCK_SIZE, length)
+        lead = min(HASH_WINDOW - 1, start - min_size)
+        hashes = _gear_hashes(GEAR_ARRAY[view[start - lead:end]])[lead:]
+        boundaries = np.flatnonzero((hashes & mask) == 0)
+        if boundaries.size:
+            return start + int(boundaries[0]) + 1
+        start = end
+    return length
+
+
+def content_defined_chunks(stream: BinaryIO, min_size: int, avg_size: int, max_size: int) -> Iterator[bytes]:
+    """Split a binary stream into content-defined chunks using a gear rolling hash.
+    
+    A boundary is declared where the top log2(avg_size) bits of the hash are zero, so
+    an insertion in the dump only changes the chunks around it instead of shifting
+    every following chunk as fixed-size blocks would.
+    """
+    if not 0 < min_size <= avg_size <= max_size:
+        raise ValueError("Chunk sizes must satisfy 0 < min_size <= avg_size <= max_size")
+    
+    mask_bits = max(avg_size.bit_length() - 1, 1)
+    boundary_mask = ((1 << mask_bits) - 1) << (64 - mask_bits)
+    
+    buffer = bytearray()
+    eof = False
+    while True:
+        while not eof and len(buffer) < max_size:
+            block = stream.read(max_size)
+            if not block:
+                eof = True
+                break
+            buffer.extend(block)
+        
+        if not buffer:
+            return
+        
+        cut = _find_cut_point(buffer, min_size, max_size, boundary_mask)
+        yield bytes(buffer[:cut])
+        del buffer[:cut]
+
+
+class LocalChunkBackend:
+    """Chunk backend on the local filesystem, used for development and tests"""
+    
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+    
+    def _path(self, key: str) -> Path:
+        return self.root / key
+    
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so a crashed backup never leaves a truncated chunk behind
+        fd, temp_name = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "wb") as temp_file:
+            temp_file.write(data)
+        os.replace(temp_name, path)
+    
+    def get(self, key: str) -> bytes:
+        return self._path(key).read_bytes()
+    
+    def exists(self, key: str) -> bool:
+        return self._path(key).exists()
+    
+    def delete(self, key: str):
+        path = self._path(key)
+        if path.exists():
+            path.unlink()
+
+
+class S3ChunkBackend:
+    """Chunk backend on an S3-compatible bucket (Backblaze B2, Cloudflare R2 or MinIO)"""
+    
+    def __init__(self, client, bucket: str, cloud_storage: Optional[CloudStorageService] = None,
+                 provider: Optional[CloudProvider] = None):
+        self.client = client
+        self.bucket = bucket
+        # Used to keep the storage inventory in step with chunk uploads and deletes
+        self.cloud_storage = cloud_storage
+        self.provider = provider
+    
+    def put(self, key: str, data: bytes):
+        response = self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+        if self.cloud_storage:
+            self.cloud_storage._record_upload(self.provider, key, len(data), etag=response.get("ETag"))
+    
+    def get(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+    
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+    
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+        if self.cloud_storage:
+            self.cloud_storage._record_delete(self.provider, key)
+
+
+class ChunkStoreService:
+    """Deduplicating chunk store for tenant backups.
+    
+    Chunks are identified by an HMAC of their plaintext under the tenant backup key,
+    then gzip-compressed and Fernet-encrypted before upload. Deduplication is therefore
+    scoped to a tenant: day-over-day backups share chunks, but one tenant's data can
+    never be referenced from, or confirmed by, another tenant's backup.
+    """
+    
+    def __init__(self, db: Session, cloud_storage: Optional[CloudStorageService] = None,
+                 backends: Optional[Dict[str, object]] = None):
+        self.db = db
+        self.backends = backends if backends is not None else self._default_backends(cloud_storage)
+        self.min_size = settings.backup_chunk_min_size
+        self.avg_size = settings.backup_chunk_avg_size
+        self.max_size = settings.backup_chunk_max_size
+    
+    @staticmethod
+    def _default_backends(cloud_storage: Optional[CloudStorageService]) -> Dict[str, object]:
+        """Use the local stand-in when configured, otherwise every initialized cloud provider"""
+        if settings.backup_chunk_local_path:
+            return {StorageProvider.LOCAL.value: LocalChunkBackend(Path(settings.backup_chunk_local_path))}
+        
+        cloud_storage = cloud_storage or CloudStorageService()
+        backends = {}
+        for provider in (CloudProvider.BACKBLAZE_B2, CloudProvider.CLOUDFLARE_R2):
+            try:
+                client, bucket = cloud_storage._get_provider_client(provider.value)
+                backends[provider.value] = S3ChunkBackend(client, bucket, cloud_storage, provider)
+            except Exception as e:
+                logger.warning(f"Chunk store backend {provider.value} unavailable: {e}")
+        return backends
+    
+    @staticmethod
+    def tenant_prefix(tenant_id: str) -> str:
+        return f"{CHUNK_KEY_PREFIX}/{tenant_id}/"
+    
+    def _chunk_key(self, tenant_id: str, chunk_hash: str) -> str:
+        return f"{self.tenant_prefix(tenant_id)}{chunk_hash[:2]}/{chunk_hash}"
+    
+    @staticmethod
+    def _chunk_hash(data: bytes, encryption_key: bytes) -> str:
+        return hmac.new(encryption_key, data, hashlib.sha256).hexdigest()
+    
+    def _get_backend(self, storage_provider: str):
+        backend = self.backends.get(storage_provider)
+        if backend is None:
+            raise Exception(f"Chunk store backend not available for {storage_provider}")
+        return backend
+    
+    def store_file(self, tenant_id: str, file_path: Path, encryption_key: bytes) -> Dict:
+        """Chunk a plaintext dump, upload the chunks not stored yet and return its manifest.
+        
+        Reference counts are updated in the caller's session; the caller commits them
+        together with the backup log that owns the manifest. If storing fails, the
+        chunks uploaded by this call are deleted again and the caller rolls back.
+        """
+        if not self.backends:
+            raise Exception("No chunk store backend available")
+        
+        fernet = Fernet(encryption_key)
+        now = datetime.now(timezone.utc)
+        
+        # Lock the tenant's chunk rows so garbage collection cannot delete a chunk this backup reuses
+        known_chunks = {
+            chunk.chunk_hash: chunk
+            for chunk in self.db.query(BackupChunk)
+            .filter(BackupChunk.tenant_id == tenant_id)
+            .with_for_update()
+            .all()
+        }
+        
+        manifest_chunks = []
+        total_size = 0
+        stored_size = 0
+        new_chunks = 0
+        reused_chunks = 0
+        bytes_uploaded = 0
+        
+        uploaded_keys = []
+        try:
+            with open(file_path, "rb") as source:
+                for data in content_defined_chunks(source, self.min_size, self.avg_size, self.max_size):
+                    chunk_hash = self._chunk_hash(data, encryption_key)
+                    chunk = known_chunks.get(chunk_hash)
+                    
+                    if chunk is None:
+                        payload = fernet.encrypt(gzip.compress(data))
+                        storage_key = self._chunk_key(tenant_id, chunk_hash)
+                        uploaded_keys.append(storage_key)
+                        for provider, backend in self.backends.items():
+                            try:
+                                backend.put(storage_key, payload)
+                            except Exception as e:
+                                raise Exception(f"Failed to store chunk {chunk_hash[:12]} in {provider}: {e}")
+                        
+                        chunk = BackupChunk(
+                            tenant_id=tenant_id,
+                            chunk_hash=chunk_hash,
+                            size=len(data),
+                            stored_size=len(payload),
+                            storage_key=storage_key,
+                            ref_count=0
+                        )
+                        self.db.add(chunk)
+                        known_chunks[chunk_hash] = chunk
+                        new_chunks += 1
+                        bytes_uploaded += len(payload)
+                    else:
+                        reused_chunks += 1
+                    
+                    chunk.ref_count = (chunk.ref_count or 0) + 1
+                    chunk.last_referenced_at = now
+                    manifest_chunks.append([chunk_hash, len(data)])
+                    total_size += len(data)
+                    stored_size += chunk.stored_size
+            
+            self.db.flush()
+        
+        except Exception:
+            self._delete_uploaded_chunks(uploaded_keys)
+            raise
+        
+        logger.info(
+            f"Chunked backup for tenant {tenant_id}: {len(manifest_chunks)} chunks, "
+            f"{new_chunks} new, {reused_chunks} reused, {bytes_uploaded} bytes uploaded"
+        )
+        
+        return {
+            "version": MANIFEST_VERSION,
+            "chunks": manifest_chunks,
+            "chunk_count": len(manifest_chunks),
+            "total_size": total_size,
+            "stored_size": stored_size,
+            "new_chunks": new_chunks,
+            "reused_chunks": reused_chunks,
+            "bytes_uploaded": bytes_uploaded,
+            "providers": list(self.backends.keys())
+        }
+    
+    def _delete_uploaded_chunks(self, storage_keys):
+        """Best-effort removal of chunks a failed backup uploaded before any row referenced them"""
+        for storage_key in storage_keys:
+            for provider, backend in self.backends.items():
+                try:
+                    backend.delete(storage_key)
+                except Exception as e:
+                    logger.warning(f"Failed to delete orphaned chunk {storage_key} from {provider}: {e}")
+    
+    def _read_chunk(self, backend, tenant_id: str, chunk_hash: str, size: int, fernet: Fernet,
+                    encryption_key: bytes) -> bytes:
+        """Download, decrypt and check a single chunk against its manifest entry"""
+        data = gzip.decompress(fernet.decrypt(backend.get(self._chunk_key(tenant_id, chunk_hash))))
+        if len(data) != size or not hmac.compare_digest(self._chunk_hash(data, encryption_key), chunk_hash):
+            raise Exception(f"Chunk {chunk_hash[:12]} failed integrity check")
+        return data
+    
+    def restore_file(self, tenant_id: str, manifest: Dict, encryption_key: bytes, output_path: Path,
+                     storage_provider: str) -> Path:
+        """Reassemble a plaintext dump from its manifest"""
+        backend = self._get_backend(storage_provider)
+        fernet = Fernet(encryption_key)
+        
+        with open(output_path, "wb") as output:
+            for chunk_hash, size in manifest["chunks"]:
+                output.write(self._read_chunk(backend, tenant_id, chunk_hash, size, fernet, encryption_key))
+        
+        logger.info(f"Reassembled {manifest['chunk_count']} chunks for tenant {tenant_id} into {output_path}")
+        return output_path
+    
+    def verify_manifest(self, tenant_id: str, manifest: Dict, encryption_key: bytes, storage_provider: str,
+                        expected_checksum: Optional[str] = None,
+                        mode: IntegrityCheckMode = IntegrityCheckMode.FULL,
+                        sample_chunks: int = 3) -> Dict:
+        """Verify a chunked backup in the shape returned by CloudStorageService.verify_object_integrity.
+        
+        METADATA checks every unique chunk exists, SAMPLED additionally decrypts a few
+        random chunks, and FULL decrypts every chunk and compares the dump checksum.
+        """
+        mode = IntegrityCheckMode(mode)
+        backend = self._get_backend(storage_provider)
+        fernet = Fernet(encryption_key)
+        unique_chunks = dict((chunk_hash, size) for chunk_hash, size in manifest["chunks"])
+        checks = []
+        requests = 0
+        bytes_transferred = 0
+        actual_checksum = None
+        
+        if mode == IntegrityCheckMode.FULL:
+            digest = hashlib.sha256()
+            cache = {}
+            try:
+                for chunk_hash, size in manifest["chunks"]:
+                    data = cache.get(chunk_hash)
+                    if data is None:
+                        data = self._read_chunk(backend, tenant_id, chunk_hash, size, fernet, encryption_key)
+                        requests += 1
+                        bytes_transferred += size
+                        # Repeated chunks inside one dump are usually small, so keep them for reuse
+                        if size <= self.min_size:
+                            cache[chunk_hash] = data
+                    digest.update(data)
+                actual_checksum = digest.hexdigest()
+                chunks_valid = True
+            except Exception as e:
+                logger.error(f"Full chunk verification failed for tenant {tenant_id}: {e}")
+                chunks_valid = False
+            checks.append({"check": "chunks", "passed": chunks_valid, "chunks": len(unique_chunks)})
+            if chunks_valid and expected_checksum:
+                checks.append({"check": "checksum", "passed": actual_checksum == expected_checksum})
+        else:
+            missing = [chunk_hash for chunk_hash in unique_chunks
+                       if not backend.exists(self._chunk_key(tenant_id, chunk_hash))]
+            requests += len(unique_chunks)
+            checks.append({"check": "chunks_exist", "passed": not missing, "missing": len(missing)})
+            
+            if mode == IntegrityCheckMode.SAMPLED and not missing:
+                sampled = random.sample(list(unique_chunks.items()), min(sample_chunks, len(unique_chunks)))
+                sample_valid = True
+                for chunk_hash, size in sampled:
+                    try:
+                        self._read_chunk(backend, tenant_id, chunk_hash, size, fernet, encryption_key)
+                    except Exception as e:
+                        logger.error(f"Sampled chunk verification failed for tenant {tenant_id}: {e}")
+                        sample_valid = False
+                    requests += 1
+                    bytes_transferred += size
+                checks.append({"check": "sampled_chunks", "passed": sample_valid, "sampled": len(sampled)})
+        
+        return {
+            "mode": mode.value,
+            "is_valid": all(check["passed"] for check in checks),
+            "checks": checks,
+            "requests": requests,
+            "bytes_transferred": bytes_transferred,
+            "actual_checksum": actual_checksum,
+            "file_size": manifest["total_size"]
+        }
+    
+    def release_manifest(self, tenant_id: str, manifest: Dict) -> int:
+        """Drop the references a manifest holds; returns how many chunks became unreferenced"""
+        counts = Counter(chunk_hash for chunk_hash, _ in manifest["chunks"])
+        if not counts:
+            return 0
+        
+        now = datetime.now(timezone.utc)
+        released = 0
+        chunks = (
+            self.db.query(BackupChunk)
+            .filter(BackupChunk.tenant_id == tenant_id, BackupChunk.chunk_hash.in_(list(counts)))
+            .with_for_update()
+            .all()
+        )
+        for chunk in chunks:
+            chunk.ref_count = max((chunk.ref_count or 0) - counts[chunk.chunk_hash], 0)
+            chunk.last_referenced_at = now
+            if chunk.ref_count == 0:
+                released += 1
+        
+        self.db.flush()
+        return released
+    
+    def garbage_collect(self, grace_hours: Optional[int] = None, limit: int = 1000) -> Dict:
+        """Delete unreferenced chunks whose last reference is older than the grace period"""
+        grace_hours = settings.backup_chunk_gc_grace_hours if grace_hours is None else grace_hours
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=grace_hours)
+        
+        # Rows locked by an in-flight backup are skipped and picked up by a later run
+        chunks = (
+            self.db.query(BackupChunk)
+            .filter(BackupChunk.ref_count <= 0, BackupChunk.last_referenced_at < cutoff)
+            .with_for_update(skip_locked=True)
+            .limit(limit)
+            .all()
+        )
+        
+        deleted = 0
+        freed_bytes = 0
+        failed = 0
+        for chunk in chunks:
+            try:
+                for backend in self.backends.values():
+                    backend.delete(chunk.storage_key)
+            except Exception as e:
+                logger.warning(f"Failed to delete chunk {chunk.storage_key}: {e}")
+                failed += 1
+                continue
+            
+            freed_bytes += chunk.stored_size
+            self.db.delete(chunk)
+            deleted += 1
+        
+        self.db.commit()
+        
+        logger.info(f"Chunk garbage collection deleted {deleted} chunks ({freed_bytes} bytes), {failed} failed")
+        return {"deleted_chunks": deleted, "freed_bytes": freed_bytes, "failed_chunks": failed}
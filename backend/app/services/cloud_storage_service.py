@@ -5,16 +5,26 @@ Includes health monitoring, failover management, and cost tracking
 """
 
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
 from botocore.exceptions import ClientError, NoCredentialsError
 from pathlib import Path
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Iterator, Optional, List, Tuple
 import logging
 from datetime import datetime, timezone, timedelta
 import time
 import json
+import hashlib
+import random
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 
+from sqlalchemy.orm import Session
+
 from app.core.config import settings
+from app.services.storage_inventory_service import StorageInventoryService
 
 logger = logging.getLogger(__name__)
 
@@ -39,10 +49,41 @@ class StorageFailoverStrategy(Enum):
     DUAL_UPLOAD = "dual_upload"
 
 
+class IntegrityCheckMode(Enum):
+    """Backup integrity verification mode"""
+    METADATA = "metadata"  # HEAD only: size, ETag and provider checksum recorded at upload
+    SAMPLED = "sampled"    # METADATA plus range-GET spot checks against recorded part checksums
+    FULL = "full"          # Stream the whole object and hash it on the fly (no temp file)
+
+
+# Part size used for the per-part SHA-256 checksums recorded at upload time
+INTEGRITY_PART_SIZE = 8 * 1024 * 1024
+INTEGRITY_SAMPLE_PARTS = 3
+
+# S3-compatible multipart limits
+MULTIPART_MIN_PART_SIZE = 5 * 1024 * 1024
+MULTIPART_MAX_PARTS = 10000
+
+
+def calculate_file_integrity(file_path: Path, part_size: int = INTEGRITY_PART_SIZE) -> Tuple[str, Dict]:
+    """SHA-256 of a file plus its per-part SHA-256s, computed in a single read.
+    
+    The part checksums are recorded with the backup for sampled range verification.
+    """
+    file_hash = hashlib.sha256()
+    part_checksums = []
+    with open(file_path, "rb") as f:
+        for part in iter(lambda: f.read(part_size), b""):
+            file_hash.update(part)
+            part_checksums.append(hashlib.sha256(part).hexdigest())
+    
+    return file_hash.hexdigest(), {"part_size": part_size, "part_checksums": part_checksums}
+
+
 class CloudStorageService:
     """Service for managing dual-cloud storage operations with health monitoring and failover"""
     
-    def __init__(self):
+    def __init__(self, db: Optional[Session] = None):
         self.b2_client = None
         self.r2_client = None
         self.health_status = {
@@ -55,8 +96,30 @@ class CloudStorageService:
             StorageProvider.BACKBLAZE_B2: {"operations": 0, "storage_gb": 0, "bandwidth_gb": 0},
             StorageProvider.CLOUDFLARE_R2: {"operations": 0, "storage_gb": 0, "bandwidth_gb": 0}
         }
+        self.transfer_metrics = {
+            StorageProvider.BACKBLAZE_B2: {"uploads": 0, "bytes": 0, "seconds": 0.0, "last_throughput_mbps": None},
+            StorageProvider.CLOUDFLARE_R2: {"uploads": 0, "bytes": 0, "seconds": 0.0, "last_throughput_mbps": None}
+        }
+        self._metrics_lock = threading.Lock()
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.storage_multipart_threshold,
+            multipart_chunksize=settings.storage_multipart_chunk_size,
+            max_concurrency=settings.storage_upload_max_concurrency,
+            use_threads=True
+        )
+        self.upload_state_dir = Path(tempfile.gettempdir()) / "hesaabplus_uploads"
+        # Local object inventory; only kept up to date when a database session is provided
+        self.inventory = StorageInventoryService(db) if db is not None else None
+        self._inventory_lock = threading.Lock()
         self._initialize_clients()
     
+    def _client_config(self) -> BotoConfig:
+        """Client config with a connection pool large enough for concurrent part uploads"""
+        return BotoConfig(
+            max_pool_connections=settings.storage_upload_max_concurrency + 10,
+            retries={"max_attempts": 5, "mode": "standard"}
+        )
+    
     def _initialize_clients(self):
         """Initialize cloud storage clients"""
         # Initialize Backblaze B2 client
@@ -71,7 +134,8 @@ class CloudStorageService:
                     endpoint_url='https://s3.us-east-005.backblazeb2.com',
                     aws_access_key_id=settings.backblaze_b2_access_key,
                     aws_secret_access_key=settings.backblaze_b2_secret_key,
-                    region_name='us-east-005'
+                    region_name='us-east-005',
+                    config=self._client_config()
                 )
                 logger.info(f"Backblaze B2 client initialized successfully with bucket: {settings.backblaze_b2_bucket}")
             except Exception as e:
@@ -92,7 +156,8 @@ class CloudStorageService:
                     endpoint_url=settings.cloudflare_r2_endpoint,
                     aws_access_key_id=settings.cloudflare_r2_access_key,
                     aws_secret_access_key=settings.cloudflare_r2_secret_key,
-                    region_name='auto'
+                    region_name='auto',
+                    config=self._client_config()
                 )
                 logger.info("Cloudflare R2 client initialized successfully")
             except Exception as e:
@@ -122,6 +187,7 @@ class CloudStorageService:
             # Upload file
             logger.info(f"Uploading {file_path} to Backblaze B2 as {object_key}")
             
+            started = time.monotonic()
             with open(file_path, 'rb') as file_data:
                 self.b2_client.upload_fileobj(
                     file_data,
@@ -130,8 +196,13 @@ class CloudStorageService:
                     ExtraArgs={
                         'Metadata': s3_metadata,
                         'ServerSideEncryption': 'AES256'
-                    }
+                    },
+                    Config=self.transfer_config
                 )
+            self._track_transfer(
+                StorageProvider.BACKBLAZE_B2, file_path.stat().st_size, time.monotonic() - started
+            )
+            self._record_upload(StorageProvider.BACKBLAZE_B2, object_key, file_path.stat().st_size, metadata)
             
             # Return the object location
             location = f"s3://{settings.backblaze_b2_bucket}/{object_key}"
@@ -168,6 +239,7 @@ class CloudStorageService:
             # Upload file
             logger.info(f"Uploading {file_path} to Cloudflare R2 as {object_key}")
             
+            started = time.monotonic()
             with open(file_path, 'rb') as file_data:
                 self.r2_client.upload_fileobj(
                     file_data,
@@ -175,8 +247,13 @@ class CloudStorageService:
                     object_key,
                     ExtraArgs={
                         'Metadata': s3_metadata
-                    }
+                    },
+                    Config=self.transfer_config
                 )
+            self._track_transfer(
+                StorageProvider.CLOUDFLARE_R2, file_path.stat().st_size, time.monotonic() - started
+            )
+            self._record_upload(StorageProvider.CLOUDFLARE_R2, object_key, file_path.stat().st_size, metadata)
             
             # Return the object location
             location = f"s3://{settings.cloudflare_r2_bucket}/{object_key}"
@@ -251,27 +328,209 @@ class CloudStorageService:
             logger.error(f"Cloudflare R2 download failed: {e}")
             raise
     
-    def list_b2_objects(self, prefix: str = "") -> list:
-        """List objects in Backblaze B2 bucket"""
-        if not self.b2_client:
-            raise Exception("Backblaze B2 client not initialized")
+    def _get_provider_client(self, storage_provider: str) -> Tuple[object, str]:
+        """Get the boto3 client and bucket for a storage provider value"""
+        if storage_provider == StorageProvider.BACKBLAZE_B2.value:
+            if not self.b2_client:
+                raise Exception("Backblaze B2 client not initialized")
+            return self.b2_client, settings.backblaze_b2_bucket
+        
+        if storage_provider == StorageProvider.CLOUDFLARE_R2.value:
+            if not self.r2_client:
+                raise Exception("Cloudflare R2 client not initialized")
+            return self.r2_client, settings.cloudflare_r2_bucket
+        
+        raise Exception(f"Unsupported storage provider: {storage_provider}")
+    
+    @staticmethod
+    def _object_key_from_location(object_key: str) -> str:
+        """Extract object key from S3 URL if needed"""
+        if object_key.startswith("s3://"):
+            return object_key.split("/", 3)[-1]
+        return object_key
+    
+    def head_object(self, storage_provider: str, object_key: str) -> Dict:
+        """Get object size, ETag and provider-side SHA-256 checksum with a single HEAD request"""
+        client, bucket = self._get_provider_client(storage_provider)
+        object_key = self._object_key_from_location(object_key)
         
         try:
-            response = self.b2_client.list_objects_v2(
-                Bucket=settings.backblaze_b2_bucket,
-                Prefix=prefix
-            )
+            response = client.head_object(Bucket=bucket, Key=object_key, ChecksumMode='ENABLED')
+            self._track_operation_cost(StorageProvider(storage_provider), "head")
+            
+            return {
+                "size": response["ContentLength"],
+                "etag": response["ETag"].strip('"'),
+                "checksum_sha256": response.get("ChecksumSHA256"),
+                "metadata": response.get("Metadata", {})
+            }
+        
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            logger.error(f"HEAD {object_key} on {storage_provider} failed ({error_code}): {e}")
+            raise Exception(f"{storage_provider} head failed: {error_code}")
+    
+    def describe_uploaded_object(self, storage_provider: str, object_key: str) -> Dict:
+        """Fingerprint of an uploaded object to record alongside its storage location"""
+        try:
+            head = self.head_object(storage_provider, object_key)
+            return {
+                "size": head["size"],
+                "etag": head["etag"],
+                "checksum_sha256": head["checksum_sha256"]
+            }
+        except Exception as e:
+            logger.warning(f"Could not record upload fingerprint for {object_key} on {storage_provider}: {e}")
+            return {}
+    
+    def get_object_range(self, storage_provider: str, object_key: str, start: int, end: int) -> bytes:
+        """Read an inclusive byte range of an object"""
+        client, bucket = self._get_provider_client(storage_provider)
+        object_key = self._object_key_from_location(object_key)
+        
+        response = client.get_object(Bucket=bucket, Key=object_key, Range=f"bytes={start}-{end}")
+        data = response["Body"].read()
+        
+        provider = StorageProvider(storage_provider)
+        self._track_operation_cost(provider, "download")
+        self._track_bandwidth_cost(provider, len(data) / (1024 ** 3))
+        return data
+    
+    def stream_object_checksum(self, storage_provider: str, object_key: str,
+                               chunk_size: int = 1024 * 1024) -> Tuple[str, int]:
+        """Calculate SHA-256 of a stored object while streaming it, without writing to disk"""
+        client, bucket = self._get_provider_client(storage_provider)
+        object_key = self._object_key_from_location(object_key)
+        
+        response = client.get_object(Bucket=bucket, Key=object_key)
+        
+        sha256_hash = hashlib.sha256()
+        total_size = 0
+        for chunk in response["Body"].iter_chunks(chunk_size):
+            sha256_hash.update(chunk)
+            total_size += len(chunk)
+        
+        provider = StorageProvider(storage_provider)
+        self._track_operation_cost(provider, "download")
+        self._track_bandwidth_cost(provider, total_size / (1024 ** 3))
+        return sha256_hash.hexdigest(), total_size
+    
+    def verify_object_integrity(self, storage_provider: str, object_key: str, expected: Dict,
+                                mode: IntegrityCheckMode = IntegrityCheckMode.SAMPLED,
+                                sample_parts: int = INTEGRITY_SAMPLE_PARTS) -> Dict:
+        """Verify a stored object against the fingerprint recorded at upload time.
+        
+        Expected keys: size, etag, checksum_sha256 (provider checksum), checksum (SHA-256 of
+        the whole object), part_size and part_checksums. Backups uploaded before part
+        checksums were recorded fall back to FULL verification.
+        """
+        mode = IntegrityCheckMode(mode)
+        part_checksums = expected.get("part_checksums") or []
+        if mode == IntegrityCheckMode.SAMPLED and not part_checksums:
+            logger.info(f"No part checksums recorded for {object_key}, falling back to full verification")
+            mode = IntegrityCheckMode.FULL
+        
+        has_metadata = any(expected.get(key) for key in ("size", "etag", "checksum_sha256"))
+        if mode == IntegrityCheckMode.METADATA and not has_metadata:
+            logger.info(f"No upload metadata recorded for {object_key}, falling back to full verification")
+            mode = IntegrityCheckMode.FULL
+        
+        result = {
+            "mode": mode.value,
+            "is_valid": False,
+            "checks": [],
+            "requests": 0,
+            "bytes_transferred": 0,
+            "actual_checksum": None,
+            "file_size": None
+        }
+        
+        def add_check(name: str, expected_value, actual_value):
+            result["checks"].append({
+                "check": name,
+                "expected": expected_value,
+                "actual": actual_value,
+                "passed": expected_value == actual_value
+            })
+        
+        if mode in (IntegrityCheckMode.METADATA, IntegrityCheckMode.SAMPLED):
+            head = self.head_object(storage_provider, object_key)
+            result["requests"] += 1
+            result["file_size"] = head["size"]
+            
+            if expected.get("size") is not None:
+                add_check("size", int(expected["size"]), head["size"])
+            if expected.get("etag"):
+                add_check("etag", expected["etag"], head["etag"])
+            if expected.get("checksum_sha256") and head["checksum_sha256"]:
+                add_check("checksum_sha256", expected["checksum_sha256"], head["checksum_sha256"])
+        
+        if mode == IntegrityCheckMode.SAMPLED:
+            part_size = expected.get("part_size") or INTEGRITY_PART_SIZE
+            part_count = len(part_checksums)
+            
+            # Always include the last part so truncation is caught, plus random others
+            sampled = random.sample(range(part_count - 1), min(max(sample_parts - 1, 0), part_count - 1))
+            sampled = sorted(sampled + [part_count - 1])
+            
+            for index in sampled:
+                start = index * part_size
+                end = start + part_size - 1
+                if result["file_size"] is not None:
+                    end = min(end, result["file_size"] - 1)
+                if result["file_size"] is not None and start > end:
+                    add_check(f"part_{index}", part_checksums[index], None)
+                    continue
+                
+                data = self.get_object_range(storage_provider, object_key, start, end)
+                result["requests"] += 1
+                result["bytes_transferred"] += len(data)
+                add_check(f"part_{index}", part_checksums[index], hashlib.sha256(data).hexdigest())
             
-            objects = []
-            for obj in response.get('Contents', []):
-                objects.append({
+            result["sampled_parts"] = sampled
+            result["total_parts"] = part_count
+        
+        if mode == IntegrityCheckMode.FULL:
+            actual_checksum, file_size = self.stream_object_checksum(storage_provider, object_key)
+            result["requests"] += 1
+            result["bytes_transferred"] += file_size
+            result["actual_checksum"] = actual_checksum
+            result["file_size"] = file_size
+            add_check("checksum", expected.get("checksum"), actual_checksum)
+        
+        result["is_valid"] = bool(result["checks"]) and all(check["passed"] for check in result["checks"])
+        
+        logger.info(
+            f"Integrity check ({mode.value}) for {object_key} on {storage_provider}: "
+            f"{'PASSED' if result['is_valid'] else 'FAILED'} "
+            f"({result['requests']} requests, {result['bytes_transferred']} bytes)"
+        )
+        return result
+    
+    def iter_objects(self, storage_provider: str, prefix: str = "") -> Iterator[Dict]:
+        """Yield every object under a prefix, following list pagination"""
+        client, bucket = self._get_provider_client(storage_provider)
+        
+        paginator = client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                yield {
                     'key': obj['Key'],
                     'size': obj['Size'],
-                    'last_modified': obj['LastModified'].isoformat(),
+                    'last_modified': obj['LastModified'],
                     'etag': obj['ETag'].strip('"')
-                })
-            
-            return objects
+                }
+    
+    def list_b2_objects(self, prefix: str = "") -> list:
+        """List objects in Backblaze B2 bucket"""
+        if not self.b2_client:
+            raise Exception("Backblaze B2 client not initialized")
+        
+        try:
+            return [
+                {**obj, 'last_modified': obj['last_modified'].isoformat()}
+                for obj in self.iter_objects(StorageProvider.BACKBLAZE_B2.value, prefix)
+            ]
             
         except ClientError as e:
             logger.error(f"Failed to list B2 objects: {e}")
@@ -283,21 +542,10 @@ class CloudStorageService:
             raise Exception("Cloudflare R2 client not initialized")
         
         try:
-            response = self.r2_client.list_objects_v2(
-                Bucket=settings.cloudflare_r2_bucket,
-                Prefix=prefix
-            )
-            
-            objects = []
-            for obj in response.get('Contents', []):
-                objects.append({
-                    'key': obj['Key'],
-                    'size': obj['Size'],
-                    'last_modified': obj['LastModified'].isoformat(),
-                    'etag': obj['ETag'].strip('"')
-                })
-            
-            return objects
+            return [
+                {**obj, 'last_modified': obj['last_modified'].isoformat()}
+                for obj in self.iter_objects(StorageProvider.CLOUDFLARE_R2.value, prefix)
+            ]
             
         except ClientError as e:
             logger.error(f"Failed to list R2 objects: {e}")
@@ -318,6 +566,7 @@ class CloudStorageService:
                 Key=object_key
             )
             
+            self._record_delete(StorageProvider.BACKBLAZE_B2, object_key)
             logger.info(f"Successfully deleted from Backblaze B2: {object_key}")
             return True
             
@@ -340,6 +589,7 @@ class CloudStorageService:
                 Key=object_key
             )
             
+            self._record_delete(StorageProvider.CLOUDFLARE_R2, object_key)
             logger.info(f"Successfully deleted from Cloudflare R2: {object_key}")
             return True
             
@@ -349,6 +599,12 @@ class CloudStorageService:
     
     def get_storage_usage(self) -> Dict:
         """Get storage usage statistics for both providers"""
+        if self.inventory:
+            usage_stats = self.inventory.get_usage()
+            usage_stats["backblaze_b2"]["available"] = self.b2_client is not None
+            usage_stats["cloudflare_r2"]["available"] = self.r2_client is not None
+            return usage_stats
+        
         usage_stats = {
             "backblaze_b2": {"available": False, "object_count": 0, "total_size": 0},
             "cloudflare_r2": {"available": False, "object_count": 0, "total_size": 0}
@@ -484,6 +740,324 @@ class CloudStorageService:
         self.failover_strategy = strategy
         logger.info(f"Failover strategy set to: {strategy.value}")
     
+    def _build_upload_metadata(self, file_path: Path, metadata: Dict = None) -> Dict:
+        """Object metadata in the same shape upload_to_b2 and upload_to_r2 send"""
+        s3_metadata = {}
+        if metadata:
+            for key, value in metadata.items():
+                s3_metadata[f"x-amz-meta-{key}"] = str(value)
+        
+        s3_metadata.update({
+            "x-amz-meta-uploaded-at": datetime.now(timezone.utc).isoformat(),
+            "x-amz-meta-service": "hesaabplus-backup",
+            "x-amz-meta-file-size": str(file_path.stat().st_size)
+        })
+        return s3_metadata
+    
+    def _multipart_part_size(self, file_size: int) -> int:
+        """Part size for a file, grown when needed to stay within the provider part limit"""
+        part_size = max(settings.storage_multipart_chunk_size, MULTIPART_MIN_PART_SIZE)
+        return max(part_size, -(-file_size // MULTIPART_MAX_PARTS))
+    
+    def _upload_state_path(self, object_key: str) -> Path:
+        """Local file tracking completed parts of an in-progress multipart upload"""
+        return self.upload_state_dir / f"{hashlib.sha256(object_key.encode()).hexdigest()}.json"
+    
+    def _load_upload_state(self, file_path: Path, object_key: str, part_size: int) -> Dict:
+        """Load resumable multipart state, discarding it if the source file has changed"""
+        stat = file_path.stat()
+        state = {
+            "object_key": object_key,
+            "file_size": stat.st_size,
+            "file_mtime": stat.st_mtime,
+            "part_size": part_size,
+            "providers": {},
+            "completed": {}
+        }
+        
+        state_path = self._upload_state_path(object_key)
+        if not state_path.exists():
+            return state
+        
+        try:
+            saved_state = json.loads(state_path.read_text())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable upload state {state_path}: {e}")
+            return state
+        
+        fingerprint = ("object_key", "file_size", "file_mtime", "part_size")
+        if any(saved_state.get(key) != state[key] for key in fingerprint):
+            # The parts uploaded so far belong to another version of the file
+            for provider_value, provider_state in saved_state.get("providers", {}).items():
+                self._abort_multipart_upload(StorageProvider(provider_value), object_key, provider_state["upload_id"])
+            state_path.unlink(missing_ok=True)
+            return state
+        
+        return saved_state
+    
+    def _save_upload_state(self, state: Dict):
+        """Persist multipart state atomically so a crashed upload can resume"""
+        self.upload_state_dir.mkdir(exist_ok=True)
+        state_path = self._upload_state_path(state["object_key"])
+        temp_path = state_path.with_suffix(".tmp")
+        temp_path.write_text(json.dumps(state))
+        temp_path.replace(state_path)
+    
+    def _start_or_resume_multipart_upload(self, provider: StorageProvider, object_key: str,
+                                          provider_state: Dict, s3_metadata: Dict) -> Dict:
+        """Reuse an interrupted multipart upload, keeping only parts the provider still has"""
+        client, bucket = self._get_provider_client(provider.value)
+        
+        upload_id = provider_state.get("upload_id")
+        if upload_id:
+            try:
+                stored_parts = {}
+                paginator = client.get_paginator("list_parts")
+                for page in paginator.paginate(Bucket=bucket, Key=object_key, UploadId=upload_id):
+                    for part in page.get("Parts", []):
+                        stored_parts[str(part["PartNumber"])] = part["ETag"]
+                
+                completed_parts = {
+                    number: etag for number, etag in provider_state.get("parts", {}).items()
+                    if stored_parts.get(number) == etag
+                }
+                logger.info(
+                    f"Resuming {provider.value} multipart upload of {object_key}: "
+                    f"{len(completed_parts)} parts already uploaded"
+                )
+                return {"upload_id": upload_id, "parts": completed_parts}
+            
+            except ClientError as e:
+                logger.warning(f"Cannot resume {provider.value} upload {upload_id} for {object_key}: {e}")
+                self._abort_multipart_upload(provider, object_key, upload_id)
+        
+        extra_args = {"Metadata": s3_metadata}
+        if provider == StorageProvider.BACKBLAZE_B2:
+            extra_args["ServerSideEncryption"] = "AES256"
+        
+        response = client.create_multipart_upload(Bucket=bucket, Key=object_key, **extra_args)
+        return {"upload_id": response["UploadId"], "parts": {}}
+    
+    def _abort_multipart_upload(self, provider: StorageProvider, object_key: str, upload_id: str):
+        """Abort an unfinished multipart upload so the provider discards (and stops billing) its parts"""
+        client, bucket = self._get_provider_client(provider.value)
+        try:
+            client.abort_multipart_upload(Bucket=bucket, Key=object_key, UploadId=upload_id)
+        except Exception as e:
+            logger.warning(f"Aborting {provider.value} multipart upload {upload_id} for {object_key} failed: {e}")
+    
+    def upload_to_both(self, file_path: Path, object_key: str, metadata: Dict = None) -> Dict:
+        """Upload a file to Backblaze B2 and Cloudflare R2 concurrently.
+        
+        Returns a result per provider value with the object location (or the error),
+        the upload duration and the achieved throughput.
+        """
+        file_size = file_path.stat().st_size
+        if file_size >= settings.storage_multipart_threshold and self.b2_client and self.r2_client:
+            return self._upload_to_both_shared_reader(file_path, object_key, metadata)
+        
+        uploaders = {
+            StorageProvider.BACKBLAZE_B2: self.upload_to_b2,
+            StorageProvider.CLOUDFLARE_R2: self.upload_to_r2
+        }
+        
+        def timed_upload(upload) -> Tuple[str, float]:
+            started = time.monotonic()
+            location = upload(file_path, object_key, metadata)
+            return location, time.monotonic() - started
+        
+        with ThreadPoolExecutor(max_workers=len(uploaders)) as executor:
+            futures = {
+                provider: executor.submit(timed_upload, upload)
+                for provider, upload in uploaders.items()
+            }
+        
+        results = {}
+        for provider, future in futures.items():
+            try:
+                location, seconds = future.result()
+                results[provider.value] = self._upload_result(location, file_size, seconds)
+            except Exception as e:
+                results[provider.value] = self._upload_result(None, 0, 0.0, str(e))
+        
+        return results
+    
+    @staticmethod
+    def _upload_result(location: Optional[str], size_bytes: int, seconds: float, error: str = None) -> Dict:
+        """Per-provider upload outcome"""
+        return {
+            "location": location,
+            "error": error,
+            "bytes": size_bytes,
+            "seconds": round(seconds, 2),
+            "throughput_mbps": round(size_bytes / (1024 ** 2) / seconds, 2) if seconds > 0 else None
+        }
+    
+    def _upload_to_both_shared_reader(self, file_path: Path, object_key: str, metadata: Dict = None) -> Dict:
+        """Multipart upload that reads each part from disk once and sends it to both providers.
+        
+        Completed parts are recorded after every part. A provider whose parts fail is retried
+        up to storage_upload_retry_attempts times, resuming its multipart upload from the parts
+        the provider holds; one that still fails keeps its upload and state, so the next upload
+        of the same file resumes it while skipping providers that already finished.
+        """
+        providers = [StorageProvider.BACKBLAZE_B2, StorageProvider.CLOUDFLARE_R2]
+        file_size = file_path.stat().st_size
+        part_size = self._multipart_part_size(file_size)
+        part_count = -(-file_size // part_size)
+        s3_metadata = self._build_upload_metadata(file_path, metadata)
+        
+        state = self._load_upload_state(file_path, object_key, part_size)
+        state_lock = threading.Lock()
+        errors = {}
+        
+        # Providers that already finished this file on a previous attempt are not re-uploaded
+        results = {
+            provider_value: self._upload_result(location, 0, 0.0)
+            for provider_value, location in state.setdefault("completed", {}).items()
+        }
+        providers = [provider for provider in providers if provider.value not in results]
+        
+        for provider in providers:
+            try:
+                state["providers"][provider.value] = self._start_or_resume_multipart_upload(
+                    provider, object_key, state["providers"].get(provider.value, {}), s3_metadata
+                )
+            except Exception as e:
+                errors[provider] = str(e)
+                logger.error(f"Could not start {provider.value} multipart upload for {object_key}: {e}")
+        self._save_upload_state(state)
+        
+        active_providers = [provider for provider in providers if provider not in errors]
+        started = {provider: time.monotonic() for provider in active_providers}
+        uploaded_bytes = {provider: 0 for provider in active_providers}
+        
+        # Bounds the parts held in memory; a part is released once every provider has sent it
+        in_flight = threading.BoundedSemaphore(settings.storage_upload_max_concurrency)
+        
+        def upload_part(provider: StorageProvider, part_number: int, data: bytes):
+            client, bucket = self._get_provider_client(provider.value)
+            provider_state = state["providers"][provider.value]
+            try:
+                response = client.upload_part(
+                    Bucket=bucket,
+                    Key=object_key,
+                    UploadId=provider_state["upload_id"],
+                    PartNumber=part_number,
+                    Body=data
+                )
+            except Exception as e:
+                with state_lock:
+                    errors.setdefault(provider, f"part {part_number} failed: {e}")
+                raise
+            
+            with state_lock:
+                provider_state["parts"][str(part_number)] = response["ETag"]
+                uploaded_bytes[provider] += len(data)
+                self._save_upload_state(state)
+        
+        def send_missing_parts(senders: List[StorageProvider]):
+            max_workers = settings.storage_upload_max_concurrency * max(len(senders), 1)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor, open(file_path, "rb") as source:
+                for part_number in range(1, part_count + 1):
+                    with state_lock:
+                        pending = [
+                            provider for provider in senders
+                            if provider not in errors
+                            and str(part_number) not in state["providers"][provider.value]["parts"]
+                        ]
+                    if not pending:
+                        continue
+                    
+                    in_flight.acquire()
+                    source.seek((part_number - 1) * part_size)
+                    data = source.read(part_size)
+                    
+                    remaining = [len(pending)]
+                    
+                    def release_part(_future, remaining=remaining):
+                        with state_lock:
+                            remaining[0] -= 1
+                            finished = remaining[0] == 0
+                        if finished:
+                            in_flight.release()
+                    
+                    for provider in pending:
+                        executor.submit(upload_part, provider, part_number, data).add_done_callback(release_part)
+        
+        logger.info(
+            f"Uploading {file_path} to B2 and R2 as {object_key}: "
+            f"{part_count} parts of {part_size} bytes"
+        )
+        
+        send_missing_parts(active_providers)
+        
+        for attempt in range(1, settings.storage_upload_retry_attempts + 1):
+            retrying = []
+            for provider in active_providers:
+                if provider not in errors:
+                    continue
+                try:
+                    # Resume from the parts the provider reports, whatever the failed attempt left
+                    state["providers"][provider.value] = self._start_or_resume_multipart_upload(
+                        provider, object_key, state["providers"][provider.value], s3_metadata
+                    )
+                except Exception as e:
+                    logger.error(f"Could not resume {provider.value} multipart upload for {object_key}: {e}")
+                    continue
+                logger.warning(
+                    f"Retrying {provider.value} upload of {object_key} (attempt {attempt}): {errors.pop(provider)}"
+                )
+                retrying.append(provider)
+            
+            if not retrying:
+                break
+            self._save_upload_state(state)
+            send_missing_parts(retrying)
+        
+        for provider in providers:
+            if provider in errors:
+                results[provider.value] = self._upload_result(None, 0, 0.0, errors[provider])
+                continue
+            
+            client, bucket = self._get_provider_client(provider.value)
+            provider_state = state["providers"][provider.value]
+            try:
+                parts = sorted(
+                    ({"PartNumber": int(number), "ETag": etag} for number, etag in provider_state["parts"].items()),
+                    key=lambda part: part["PartNumber"]
+                )
+                if len(parts) != part_count:
+                    raise Exception(f"only {len(parts)} of {part_count} parts uploaded")
+                
+                response = client.complete_multipart_upload(
+                    Bucket=bucket,
+                    Key=object_key,
+                    UploadId=provider_state["upload_id"],
+                    MultipartUpload={"Parts": parts}
+                )
+            except Exception as e:
+                logger.error(f"Completing {provider.value} multipart upload for {object_key} failed: {e}")
+                results[provider.value] = self._upload_result(None, 0, 0.0, str(e))
+                continue
+            
+            seconds = time.monotonic() - started[provider]
+            location = f"s3://{bucket}/{object_key}"
+            state["providers"].pop(provider.value)
+            state["completed"][provider.value] = location
+            results[provider.value] = self._upload_result(location, uploaded_bytes[provider], seconds)
+            self._track_transfer(provider, uploaded_bytes[provider], seconds)
+            # The upload is finished; missing response fields must not fail it
+            self._record_upload(provider, object_key, file_size, metadata, etag=(response or {}).get("ETag"))
+        
+        # Keep state only while a provider still has an unfinished upload to resume
+        if len(state["completed"]) < len(StorageProvider):
+            self._save_upload_state(state)
+        else:
+            self._upload_state_path(object_key).unlink(missing_ok=True)
+        
+        return results
+    
     def upload_with_failover(self, file_path: Path, object_key: str, metadata: Dict = None) -> Dict:
         """Upload file with automatic failover based on strategy"""
         results = {
@@ -525,28 +1099,24 @@ class CloudStorageService:
                     results["errors"].append(f"R2 fallback failed: {str(r2_error)}")
                     
         elif self.failover_strategy == StorageFailoverStrategy.DUAL_UPLOAD:
-            # Upload to both providers
-            b2_success = False
-            r2_success = False
+            # Upload to both providers concurrently
+            self._track_operation_cost(StorageProvider.CLOUDFLARE_R2, "upload")
+            upload_results = self.upload_to_both(file_path, object_key, metadata)
             
-            # Upload to B2
-            try:
-                location = self.upload_to_b2(file_path, object_key, metadata)
-                results["primary_upload"] = location
-                b2_success = True
-            except Exception as e:
-                results["errors"].append(f"B2 upload failed: {str(e)}")
+            b2_result = upload_results[StorageProvider.BACKBLAZE_B2.value]
+            if b2_result["location"]:
+                results["primary_upload"] = b2_result["location"]
+            else:
+                results["errors"].append(f"B2 upload failed: {b2_result['error']}")
             
-            # Upload to R2
-            try:
-                self._track_operation_cost(StorageProvider.CLOUDFLARE_R2, "upload")
-                location = self.upload_to_r2(file_path, object_key, metadata)
-                results["secondary_upload"] = location
-                r2_success = True
-            except Exception as e:
-                results["errors"].append(f"R2 upload failed: {str(e)}")
+            r2_result = upload_results[StorageProvider.CLOUDFLARE_R2.value]
+            if r2_result["location"]:
+                results["secondary_upload"] = r2_result["location"]
+            else:
+                results["errors"].append(f"R2 upload failed: {r2_result['error']}")
             
-            results["success"] = b2_success or r2_success
+            results["success"] = bool(results["primary_upload"] or results["secondary_upload"])
+            results["transfer_metrics"] = self.get_transfer_metrics()
         
         # Track storage usage
         if results["success"]:
@@ -628,6 +1198,88 @@ class CloudStorageService:
         if provider in self.cost_tracking:
             self.cost_tracking[provider]["bandwidth_gb"] += size_gb
     
+    def _track_transfer(self, provider: StorageProvider, size_bytes: int, seconds: float):
+        """Track upload throughput"""
+        with self._metrics_lock:
+            metrics = self.transfer_metrics[provider]
+            metrics["uploads"] += 1
+            metrics["bytes"] += size_bytes
+            metrics["seconds"] += seconds
+            if seconds > 0:
+                metrics["last_throughput_mbps"] = round(size_bytes / (1024 ** 2) / seconds, 2)
+        
+        logger.info(f"Uploaded {size_bytes} bytes to {provider.value} in {seconds:.1f}s")
+    
+    def _record_upload(self, provider: StorageProvider, object_key: str, size_bytes: int,
+                       metadata: Dict = None, etag: Optional[str] = None):
+        """Keep the local object inventory in step with an upload"""
+        if not self.inventory:
+            return
+        
+        try:
+            with self._inventory_lock:
+                self.inventory.record_upload(
+                    provider.value,
+                    self._object_key_from_location(object_key),
+                    size_bytes,
+                    etag=etag.strip('"') if etag else None,
+                    tenant_id=(metadata or {}).get("tenant_id")
+                )
+        except Exception as e:
+            # The periodic reconcile picks up objects the inventory missed
+            logger.warning(f"Failed to record {object_key} in storage inventory: {e}")
+    
+    def _record_delete(self, provider: StorageProvider, object_key: str):
+        """Keep the local object inventory in step with a delete"""
+        if not self.inventory:
+            return
+        
+        try:
+            with self._inventory_lock:
+                self.inventory.record_delete(provider.value, self._object_key_from_location(object_key))
+        except Exception as e:
+            logger.warning(f"Failed to remove {object_key} from storage inventory: {e}")
+    
+    def reconcile_inventory(self) -> Dict:
+        """Reconcile the local object inventory against full listings of both buckets"""
+        if not self.inventory:
+            raise Exception("Storage inventory requires a database session")
+        
+        results = {}
+        for provider, client in ((StorageProvider.BACKBLAZE_B2, self.b2_client),
+                                 (StorageProvider.CLOUDFLARE_R2, self.r2_client)):
+            if not client:
+                results[provider.value] = {"status": "skipped", "reason": "client not initialized"}
+                continue
+            
+            try:
+                results[provider.value] = {
+                    "status": "success",
+                    **self.inventory.reconcile(self, provider.value)
+                }
+            except Exception as e:
+                logger.error(f"Storage inventory reconcile failed for {provider.value}: {e}")
+                self.inventory.db.rollback()
+                results[provider.value] = {"status": "failed", "error": str(e)}
+        
+        return results
+    
+    def get_transfer_metrics(self) -> Dict:
+        """Get per-provider upload throughput metrics"""
+        metrics = {}
+        with self._metrics_lock:
+            for provider, values in self.transfer_metrics.items():
+                metrics[provider.value] = {
+                    "uploads": values["uploads"],
+                    "bytes_uploaded": values["bytes"],
+                    "upload_seconds": round(values["seconds"], 2),
+                    "average_throughput_mbps": (
+                        round(values["bytes"] / (1024 ** 2) / values["seconds"], 2) if values["seconds"] > 0 else None
+                    ),
+                    "last_throughput_mbps": values["last_throughput_mbps"]
+                }
+        return metrics
+    
     def get_cost_analytics(self) -> Dict:
         """Get detailed cost analytics for both providers"""
         # Pricing information (approximate, as of 2024)
@@ -696,6 +1348,12 @@ class CloudStorageService:
     
     def get_storage_redundancy_status(self) -> Dict:
         """Get redundancy status across both providers"""
+        if self.inventory:
+            redundancy = self.inventory.get_redundancy()
+            return self._redundancy_report(
+                set(redundancy["redundant"]), set(redundancy["b2_only"]), set(redundancy["r2_only"])
+            )
+        
         b2_objects = []
         r2_objects = []
         
@@ -716,20 +1374,23 @@ class CloudStorageService:
         r2_keys = {obj["key"] for obj in r2_objects}
         
         # Find objects that exist in both, only in B2, or only in R2
-        redundant_objects = b2_keys.intersection(r2_keys)
-        b2_only_objects = b2_keys - r2_keys
-        r2_only_objects = r2_keys - b2_keys
+        return self._redundancy_report(b2_keys.intersection(r2_keys), b2_keys - r2_keys, r2_keys - b2_keys)
+    
+    def _redundancy_report(self, redundant_objects: set, b2_only_objects: set, r2_only_objects: set) -> Dict:
+        """Build the redundancy status from object keys grouped by provider"""
+        b2_count = len(redundant_objects) + len(b2_only_objects)
+        r2_count = len(redundant_objects) + len(r2_only_objects)
         
         return {
             "total_objects": {
-                "backblaze_b2": len(b2_objects),
-                "cloudflare_r2": len(r2_objects)
+                "backblaze_b2": b2_count,
+                "cloudflare_r2": r2_count
             },
             "redundancy": {
                 "fully_redundant": len(redundant_objects),
                 "b2_only": len(b2_only_objects),
                 "r2_only": len(r2_only_objects),
-                "redundancy_percentage": (len(redundant_objects) / max(len(b2_keys), 1)) * 100
+                "redundancy_percentage": (len(redundant_objects) / max(b2_count, 1)) * 100
             },
             "objects": {
                 "redundant": list(redundant_objects),
@@ -0,0 +1,260 @@
+"""
+Columnar Parquet and Arrow IPC writers for tenant data exports
+Export records are converted to typed Arrow columns (decimal128 money and weights,
+UUIDs and UTC timestamps) and written in streaming batches, one row group per batch
+"""
+
+import json
+import uuid
+from decimal import Decimal
+from functools import lru_cache
+from typing import BinaryIO, Callable, Dict, Iterable, List
+import logging
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only needed for columnar exports
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+PARQUET = "parquet"
+ARROW = "arrow"
+COLUMNAR_COMPRESSION = "zstd"
+
+
+def columnar_export_available() -> bool:
+    """Whether pyarrow is installed with the UUID extension type used by export schemas"""
+    return pa is not None and hasattr(pa, "uuid")
+
+
+@lru_cache(maxsize=None)
+def export_schemas() -> Dict[str, "pa.Schema"]:
+    """Arrow schema for every export sub-table"""
+    money = pa.decimal128(15, 2)
+    weight = pa.decimal128(10, 3)
+    timestamp = pa.timestamp("us", tz="UTC")
+    
+    invoice_item = pa.struct([
+        ("id", pa.uuid()),
+        ("product_id", pa.uuid()),
+        ("description", pa.string()),
+        ("quantity", weight),
+        ("unit_price", money),
+        ("line_total", money),
+        ("weight", weight),
+        ("labor_fee", money),
+        ("profit", money),
+        ("vat_amount", money),
+        ("created_at", timestamp)
+    ])
+    
+    journal_line = pa.struct([
+        ("id", pa.uuid()),
+        ("account_id", pa.uuid()),
+        ("description", pa.string()),
+        ("debit_amount", money),
+        ("credit_amount", money)
+    ])
+    
+    payment_fields = [
+        ("amount", money),
+        ("payment_date", timestamp),
+        ("payment_method", pa.string()),
+        ("reference_number", pa.string()),
+        ("notes", pa.string()),
+        ("created_at", timestamp)
+    ]
+    
+    return {
+        "customers": pa.schema([
+            ("id", pa.uuid()),
+            ("name", pa.string()),
+            ("email", pa.string()),
+            ("phone", pa.string()),
+            ("address", pa.string()),
+            ("tags", pa.string()),  # JSON-encoded
+            ("total_debt", money),
+            ("created_at", timestamp),
+            ("updated_at", timestamp),
+            ("is_active", pa.bool_())
+        ]),
+        "products": pa.schema([
+            ("id", pa.uuid()),
+            ("name", pa.string()),
+            ("description", pa.string()),
+            ("category", pa.string()),
+            ("selling_price", money),
+            ("cost_price", money),
+            ("stock_quantity", pa.int32()),
+            ("images", pa.string()),  # JSON-encoded
+            ("created_at", timestamp),
+            ("updated_at", timestamp),
+            ("is_active", pa.bool_())
+        ]),
+        "invoices": pa.schema([
+            ("id", pa.uuid()),
+            ("customer_id", pa.uuid()),
+            ("invoice_number", pa.string()),
+            ("invoice_type", pa.string()),
+            ("installment_type", pa.string()),
+            ("subtotal", money),
+            ("tax_amount", money),
+            ("total_amount", money),
+            ("total_gold_weight", weight),
+            ("gold_price_at_creation", money),
+            ("remaining_balance", money),
+            ("remaining_gold_weight", weight),
+            ("status", pa.string()),
+            ("due_date", timestamp),
+            ("notes", pa.string()),
+            ("qr_code_token", pa.string()),
+            ("is_shareable", pa.bool_()),
+            ("created_at", timestamp),
+            ("updated_at", timestamp),
+            ("items", pa.list_(invoice_item))
+        ]),
+        "installments": pa.schema([
+            ("id", pa.uuid()),
+            ("invoice_id", pa.uuid()),
+            ("installment_number", pa.int32()),
+            ("amount_due", money),
+            ("amount_paid", money),
+            ("gold_weight_due", weight),
+            ("gold_weight_paid", weight),
+            ("gold_price_at_payment", money),
+            ("due_date", timestamp),
+            ("paid_at", timestamp),
+            ("status", pa.string()),
+            ("notes", pa.string()),
+            ("created_at", timestamp),
+            ("updated_at", timestamp)
+        ]),
+        "journal_entries": pa.schema([
+            ("id", pa.uuid()),
+            ("entry_date", timestamp),
+            ("description", pa.string()),
+            ("total_amount", money),
+            ("reference_type", pa.string()),
+            ("reference_id", pa.uuid()),
+            ("created_at", timestamp),
+            ("lines", pa.list_(journal_line))
+        ]),
+        "customer_payments": pa.schema([
+            ("id", pa.uuid()),
+            ("customer_id", pa.uuid()),
+            ("invoice_id", pa.uuid())
+        ] + payment_fields),
+        "supplier_payments": pa.schema([
+            ("id", pa.uuid()),
+            ("supplier_id", pa.uuid()),
+            ("bill_id", pa.uuid())
+        ] + payment_fields)
+    }
+
+
+def _storage_type(arrow_type):
+    """Arrow type with extension types replaced by their storage types"""
+    if isinstance(arrow_type, pa.BaseExtensionType):
+        return arrow_type.storage_type
+    if pa.types.is_list(arrow_type):
+        return pa.list_(_storage_type(arrow_type.value_type))
+    if pa.types.is_struct(arrow_type):
+        return pa.struct([
+            arrow_type.field(index).with_type(_storage_type(arrow_type.field(index).type))
+            for index in range(arrow_type.num_fields)
+        ])
+    return arrow_type
+
+
+def _value_converter(arrow_type) -> Callable:
+    """Build a function converting export record values to Python values for an Arrow type"""
+    if pa.types.is_decimal(arrow_type):
+        quantum = Decimal(1).scaleb(-arrow_type.scale)
+        # Records carry amounts as floats; repr() gives the shortest exact digits back
+        return lambda value: None if value is None else Decimal(
+            repr(value) if isinstance(value, float) else str(value)
+        ).quantize(quantum)
+    
+    if isinstance(arrow_type, pa.BaseExtensionType):
+        return lambda value: None if value is None else uuid.UUID(str(value)).bytes
+    
+    if pa.types.is_list(arrow_type):
+        convert_item = _value_converter(arrow_type.value_type)
+        return lambda value: None if value is None else [convert_item(item) for item in value]
+    
+    if pa.types.is_struct(arrow_type):
+        convert_fields = [
+            (arrow_type.field(index).name, _value_converter(arrow_type.field(index).type))
+            for index in range(arrow_type.num_fields)
+        ]
+        return lambda value: None if value is None else {
+            name: convert(value.get(name)) for name, convert in convert_fields
+        }
+    
+    if pa.types.is_string(arrow_type):
+        return lambda value: None if value is None else (
+            json.dumps(value, default=str) if isinstance(value, (dict, list)) else str(value)
+        )
+    
+    return lambda value: value
+
+
+class ColumnarExportWriter:
+    """Streams export records for one sub-table into a Parquet or Arrow IPC file"""
+    
+    def __init__(self, table_name: str, sink: BinaryIO, file_format: str, batch_size: int = 1000):
+        if not columnar_export_available():
+            raise Exception("Parquet and Arrow exports require pyarrow 18 or newer")
+        
+        schemas = export_schemas()
+        if table_name not in schemas:
+            raise Exception(f"No columnar schema defined for table {table_name}")
+        if file_format not in (PARQUET, ARROW):
+            raise Exception(f"Unsupported columnar format: {file_format}")
+        
+        self.table_name = table_name
+        self.sink = sink
+        self.file_format = file_format
+        self.batch_size = batch_size
+        self.schema = schemas[table_name]
+        # UUID extension values are built from their 16-byte storage and cast per batch
+        self.storage_schema = pa.schema([field.with_type(_storage_type(field.type)) for field in self.schema])
+        self.converters = [(field.name, _value_converter(field.type)) for field in self.schema]
+    
+    def _open_writer(self):
+        if self.file_format == PARQUET:
+            return pq.ParquetWriter(self.sink, self.schema, compression=COLUMNAR_COMPRESSION)
+        return pa.ipc.new_file(
+            self.sink, self.schema,
+            options=pa.ipc.IpcWriteOptions(compression=COLUMNAR_COMPRESSION)
+        )
+    
+    def _record_batch(self, rows: List[Dict]):
+        batch = pa.RecordBatch.from_pylist(rows, schema=self.storage_schema)
+        return batch.cast(self.schema)
+    
+    def write(self, records: Iterable[Dict]) -> int:
+        """Write all records in batches and close the file, returning the record count"""
+        writer = self._open_writer()
+        count = 0
+        
+        try:
+            rows = []
+            for record in records:
+                rows.append({name: convert(record.get(name)) for name, convert in self.converters})
+                if len(rows) >= self.batch_size:
+                    writer.write_batch(self._record_batch(rows))
+                    count += len(rows)
+                    rows = []
+            
+            if rows:
+                writer.write_batch(self._record_batch(rows))
+                count += len(rows)
+        finally:
+            writer.close()
+        
+        logger.debug(f"{self.file_format} export of {self.table_name} wrote {count} records")
+        return count
@@ -4,7 +4,7 @@ Customer service layer for business logic
 
 from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func, desc, asc, text
+from sqlalchemy import and_, or_, func, desc, text
 from decimal import Decimal
 from datetime import datetime, timedelta
 import uuid
@@ -13,6 +13,8 @@ import json
 import io
 
 from app.models.customer import Customer, CustomerStatus, CustomerType
+from app.models.search import search_filter, search_rank
+from app.models.tag import TagEntityType, tag_filter
 from app.models.customer_interaction import CustomerInteraction, InteractionType
 from app.models.invoice import Invoice
 from app.models.installment import Installment
@@ -23,6 +25,8 @@ from app.schemas.customer import (
     CustomerDebtSummaryResponse
 )
 from app.core.exceptions import NotFoundError, ValidationError, PermissionError
+from app.core.pagination import Page, count_rows, paginate
+from app.services.tag_dictionary_service import TagDictionaryService
 
 
 class CustomerService:
@@ -175,6 +179,11 @@ class CustomerService:
     
     def search_customers(self, search_request: CustomerSearchRequest, tenant_id: uuid.UUID) -> Tuple[List[Customer], int]:
         """Search customers with filters and pagination"""
+        page = self.search_customers_page(search_request, tenant_id)
+        return page.items, page.total
+    
+    def search_customers_page(self, search_request: CustomerSearchRequest, tenant_id: uuid.UUID) -> Page:
+        """Search customers with filters, returning one page and the cursor of the next"""
         query = self.db.query(Customer).filter(
             and_(
                 Customer.tenant_id == tenant_id,
@@ -184,16 +193,8 @@ class CustomerService:
         
         # Apply filters
         if search_request.query:
-            search_term = f"%{search_request.query}%"
-            query = query.filter(
-                or_(
-                    Customer.name.ilike(search_term),
-                    Customer.email.ilike(search_term),
-                    Customer.phone.ilike(search_term),
-                    Customer.mobile.ilike(search_term),
-                    Customer.business_name.ilike(search_term)
-                )
-            )
+            # Every word must appear in the normalized name/contact text (trigram indexed)
+            query = query.filter(search_filter(Customer.search_text, search_request.query))
         
         if search_request.status:
             query = query.filter(Customer.status == search_request.status)
@@ -202,8 +203,8 @@ class CustomerService:
             query = query.filter(Customer.customer_type == search_request.customer_type)
         
         if search_request.tags:
-            for tag in search_request.tags:
-                query = query.filter(Customer.tags.contains([tag]))
+            # One containment (all) or ?| (any) test, served by the tags GIN index
+            query = query.filter(tag_filter(Customer.tags, search_request.tags, search_request.tag_match))
         
         if search_request.has_debt is not None:
             if search_request.has_debt:
@@ -233,21 +234,31 @@ class CustomerService:
         if search_request.last_purchase_after:
             query = query.filter(Customer.last_purchase_at >= search_request.last_purchase_after)
         
-        # Get total count before pagination
-        total = query.count()
-        
-        # Apply sorting
-        sort_field = getattr(Customer, search_request.sort_by, Customer.created_at)
-        if search_request.sort_order == "asc":
-            query = query.order_by(asc(sort_field))
-        else:
-            query = query.order_by(desc(sort_field))
-        
-        # Apply pagination
         offset = (search_request.page - 1) * search_request.per_page
-        customers = query.offset(offset).limit(search_request.per_page).all()
         
-        return customers, total
+        # Relevance is not a stable key, so relevance pages stay offset based
+        if search_request.query and search_request.sort_by == "relevance":
+            if search_request.cursor:
+                raise ValidationError("Cursor pagination is not available when sorting by relevance")
+            
+            total = count_rows(query, search_request.count)
+            customers = query.order_by(
+                desc(search_rank(Customer.search_text, search_request.query)), Customer.name, Customer.id
+            ).offset(offset).limit(search_request.per_page).all()
+            return Page(items=customers, total=total, next_cursor=None)
+        
+        if search_request.sort_by in Customer.__table__.columns:
+            sort_field = getattr(Customer, search_request.sort_by)
+        else:
+            sort_field = Customer.created_at
+        
+        return paginate(
+            query, sort_field, Customer.id, search_request.per_page,
+            descending=search_request.sort_order != "asc",
+            cursor=search_request.cursor,
+            offset=offset,
+            count=search_request.count
+        )
     
     def get_customer_stats(self, tenant_id: uuid.UUID) -> CustomerStatsResponse:
         """Get customer statistics for dashboard"""
@@ -410,28 +421,12 @@ class CustomerService:
     
     def get_all_tags(self, tenant_id: uuid.UUID) -> Dict[str, Any]:
         """Get all customer tags with usage counts"""
-        # Get all customers with tags
-        customers_with_tags = self.db.query(Customer.tags).filter(
-            and_(
-                Customer.tenant_id == tenant_id,
-                Customer.is_active == True,
-                Customer.tags.isnot(None)
-            )
-        ).all()
-        
-        # Count tag usage
-        tag_counts = {}
-        all_tags = set()
-        
-        for (tags,) in customers_with_tags:
-            if tags:
-                for tag in tags:
-                    all_tags.add(tag)
-                    tag_counts[tag] = tag_counts.get(tag, 0) + 1
+        # Counts are kept in the tenant tag dictionary as customers change
+        tag_counts = TagDictionaryService(self.db).get_tag_counts(tenant_id, TagEntityType.CUSTOMER)
         
         return {
-            "tags": sorted(list(all_tags)),
-            "tag_counts": tag_counts
+            "tags": [name for name, _ in tag_counts],
+            "tag_counts": dict(tag_counts)
         }
     
     def export_customers(self, export_request: CustomerExportRequest, tenant_id: uuid.UUID) -> str:
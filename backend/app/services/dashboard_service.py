@@ -298,9 +298,9 @@ class DashboardService:
                 func.count(Product.id)
             ).filter(
                 Product.tenant_id == tenant_id,
-                Product.track_inventory == True,
-                Product.stock_quantity <= Product.min_stock_level,
-                Product.stock_quantity > 0
+                Product.is_low_stock == True,
+                Product.is_active == True,
+                (Product.stock_quantity - Product.reserved_quantity) > 0
             ).scalar()
             
             if low_stock_products and low_stock_products > 0:
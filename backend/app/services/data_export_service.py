@@ -1,21 +1,27 @@
 """
-Tenant data export service for CSV/JSON exports with progress tracking
+Tenant data export service for CSV/JSON/Parquet/Arrow exports with progress tracking
+Records are streamed from server-side cursors straight into the export archive,
+so memory stays flat regardless of tenant size
 """
 
+import io
 import os
 import csv
 import json
 import gzip
 import hashlib
+import itertools
 import tempfile
+import time
 import zipfile
 import secrets
+import shutil
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Optional, Any, Union
+from typing import List, Dict, Optional, Any, Union, Callable, Iterable, Iterator, TextIO, BinaryIO, NamedTuple
 from pathlib import Path
 import logging
-from sqlalchemy.orm import Session
-from sqlalchemy import text, and_
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import text, and_, func
 
 from app.core.config import settings
 from app.models.base import TenantMixin
@@ -26,19 +32,68 @@ from app.models.product import Product
 from app.models.invoice import Invoice, InvoiceItem
 from app.models.installment import Installment
 from app.models.accounting import JournalEntry, JournalEntryLine, CustomerPayment, SupplierPayment
-from app.models.backup import DataExportLog, ExportStatus, ExportFormat, ExportType
+from app.models.backup import DataExportLog, DataExportSlice, ExportStatus, ExportFormat, ExportType
+from app.services.columnar_export_service import ColumnarExportWriter, columnar_export_available
 
 logger = logging.getLogger(__name__)
 
+EXPORT_BATCH_SIZE = 1000  # Rows fetched per server-side cursor round trip
+
+EXPORT_FILE_EXTENSIONS = {
+    ExportFormat.CSV: "csv",
+    ExportFormat.JSON: "json",
+    ExportFormat.PARQUET: "parquet",
+    ExportFormat.ARROW: "arrow"
+}
+
+COLUMNAR_EXPORT_FORMATS = (ExportFormat.PARQUET, ExportFormat.ARROW)
+
+DEFAULT_EXPORT_TABLES = ["customers", "products", "invoices", "installments", "accounting"]
+
+
+class _ExportSource(NamedTuple):
+    """Tenant-filtered query and record serializer behind one export sub-table"""
+    model: Any
+    query: Any
+    order_by: Any
+    options: tuple
+    serialize: Callable[[Any], Dict]
+
+
+class _HashingWriter:
+    """Write-only file wrapper that hashes archive bytes as they are written
+    
+    It has no seek(), so zipfile streams each entry with a trailing data descriptor
+    instead of rewinding to patch its header, and the checksum is ready when the
+    archive is closed.
+    """
+    
+    def __init__(self, raw):
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+        self.position = 0
+    
+    def write(self, data: bytes) -> int:
+        self.sha256.update(data)
+        self.position += len(data)
+        return self.raw.write(data)
+    
+    def tell(self) -> int:
+        return self.position
+    
+    def flush(self):
+        self.raw.flush()
+
 
 class DataExportService:
-    """Service for handling tenant data exports in CSV/JSON formats"""
+    """Service for handling tenant data exports in CSV, JSON, Parquet and Arrow IPC formats"""
     
     def __init__(self, db: Session):
         self.db = db
         self.temp_dir = Path(tempfile.gettempdir()) / "hesaabplus_exports"
         self.temp_dir.mkdir(exist_ok=True)
         self.download_expiry_hours = 48  # Download links expire after 48 hours
+        self.batch_size = EXPORT_BATCH_SIZE
     
     def generate_export_token(self) -> str:
         """Generate secure export download token"""
@@ -78,44 +133,144 @@ class DataExportService:
             logger.error(f"Archive creation failed: {e}")
             raise
     
+    @staticmethod
+    def _csv_value(value: Any) -> str:
+        """Convert a record value to CSV cell text"""
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, default=str)
+        elif isinstance(value, datetime):
+            return value.isoformat()
+        elif value is None:
+            return ""
+        return str(value)
+    
+    @staticmethod
+    def _json_record(record: Dict) -> Dict:
+        """Convert datetime objects and other non-serializable values in a record"""
+        clean_record = {}
+        for key, value in record.items():
+            if isinstance(value, datetime):
+                clean_record[key] = value.isoformat()
+            elif hasattr(value, '__dict__'):
+                # Convert SQLAlchemy objects to dict
+                clean_record[key] = str(value)
+            else:
+                clean_record[key] = value
+        return clean_record
+    
+    def write_csv_stream(
+        self,
+        table_name: str,
+        records: Iterable[Dict],
+        stream: TextIO,
+        fieldnames: Optional[List[str]] = None
+    ) -> int:
+        """Write records to a text stream as CSV one row at a time
+        
+        Columns are taken from the first record unless fieldnames are given.
+        """
+        records = iter(records)
+        first = next(records, None)
+        
+        if first is None:
+            # Placeholder row so empty tables still produce a readable file
+            csv.writer(stream).writerow([f"No data available for {table_name}"])
+            return 0
+        
+        writer = csv.DictWriter(stream, fieldnames=fieldnames or sorted(first.keys()))
+        writer.writeheader()
+        
+        count = 0
+        for record in itertools.chain([first], records):
+            writer.writerow({key: self._csv_value(value) for key, value in record.items()})
+            count += 1
+        
+        return count
+    
+    def write_json_stream(self, table_name: str, records: Iterable[Dict], stream: TextIO) -> int:
+        """Write records to a text stream as a JSON export document
+        
+        The data array is written one record per line as records arrive and
+        record_count follows it, so the document is never held in memory.
+        """
+        stream.write(self._json_document_start(table_name))
+        count = self._write_json_records(records, stream)
+        stream.write(self._json_document_end(count))
+        return count
+        
+    @staticmethod
+    def _json_document_start(table_name: str) -> str:
+        return (
+            "{\n"
+            f'  "table": {json.dumps(table_name)},\n'
+            f'  "exported_at": {json.dumps(datetime.now(timezone.utc).isoformat())},\n'
+            '  "data": ['
+        )
+    
+    @staticmethod
+    def _json_document_end(record_count: int) -> str:
+        return ("\n  ],\n" if record_count else "],\n") + f'  "record_count": {record_count}\n}}\n'
+    
+    def _write_json_records(self, records: Iterable[Dict], stream: TextIO) -> int:
+        """Write records as the body of a JSON array, one record per line"""
+        count = 0
+        for record in records:
+            stream.write(",\n    " if count else "\n    ")
+            stream.write(json.dumps(self._json_record(record), ensure_ascii=False, default=str))
+            count += 1
+        return count
+    
+    def write_columnar_stream(
+        self,
+        table_name: str,
+        records: Iterable[Dict],
+        sink: BinaryIO,
+        export_format: ExportFormat
+    ) -> int:
+        """Write records to a binary stream as a typed Parquet or Arrow IPC file
+        
+        Each batch of records becomes one zstd-compressed row group or record batch.
+        """
+        writer = ColumnarExportWriter(table_name, sink, export_format.value, batch_size=self.batch_size)
+        return writer.write(records)
+    
+    def _write_archive_entry(
+        self,
+        archive: zipfile.ZipFile,
+        entry_name: str,
+        table_name: str,
+        records: Iterable[Dict],
+        export_format: ExportFormat
+    ) -> int:
+        """Stream one sub-table into a new archive entry in the requested format"""
+        entry_info = zipfile.ZipInfo(entry_name, date_time=time.localtime()[:6])
+        
+        if export_format in COLUMNAR_EXPORT_FORMATS:
+            # Columnar files are already zstd-compressed, so deflating them again only costs CPU
+            entry_info.compress_type = zipfile.ZIP_STORED
+            with archive.open(entry_info, 'w', force_zip64=True) as entry:
+                return self.write_columnar_stream(table_name, records, entry, export_format)
+        
+        entry_info.compress_type = zipfile.ZIP_DEFLATED
+        with archive.open(entry_info, 'w', force_zip64=True) as entry, \
+             io.TextIOWrapper(entry, encoding='utf-8', newline='') as entry_stream:
+            if export_format == ExportFormat.CSV:
+                return self.write_csv_stream(table_name, records, entry_stream)
+            return self.write_json_stream(table_name, records, entry_stream)
+    
     def export_table_to_csv(self, table_name: str, data: List[Dict], file_path: Path) -> int:
         """Export table data to CSV format"""
         try:
-            if not data:
-                # Create empty CSV with headers if no data
-                with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
-                    writer = csv.writer(csvfile)
-                    writer.writerow([f"No data available for {table_name}"])
-                return 0
-            
             # Get all unique keys from all records
             all_keys = set()
             for record in data:
                 all_keys.update(record.keys())
             
-            fieldnames = sorted(list(all_keys))
-            
             with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                
-                for record in data:
-                    # Convert complex types to strings
-                    clean_record = {}
-                    for key, value in record.items():
-                        if isinstance(value, (dict, list)):
-                            clean_record[key] = json.dumps(value, default=str)
-                        elif isinstance(value, datetime):
-                            clean_record[key] = value.isoformat()
-                        elif value is None:
-                            clean_record[key] = ""
-                        else:
-                            clean_record[key] = str(value)
-                    
-                    writer.writerow(clean_record)
+                records = self.write_csv_stream(table_name, data, csvfile, fieldnames=sorted(all_keys))
             
-            logger.info(f"CSV export completed: {file_path} ({len(data)} records)")
-            return len(data)
+            logger.info(f"CSV export completed: {file_path} ({records} records)")
+            return records
             
         except Exception as e:
             logger.error(f"CSV export failed for {table_name}: {e}")
@@ -124,62 +279,297 @@ class DataExportService:
     def export_table_to_json(self, table_name: str, data: List[Dict], file_path: Path) -> int:
         """Export table data to JSON format"""
         try:
-            # Convert datetime objects and other non-serializable types
-            clean_data = []
-            for record in data:
-                clean_record = {}
-                for key, value in record.items():
-                    if isinstance(value, datetime):
-                        clean_record[key] = value.isoformat()
-                    elif hasattr(value, '__dict__'):
-                        # Convert SQLAlchemy objects to dict
-                        clean_record[key] = str(value)
-                    else:
-                        clean_record[key] = value
-                clean_data.append(clean_record)
-            
-            export_data = {
-                "table": table_name,
-                "exported_at": datetime.now(timezone.utc).isoformat(),
-                "record_count": len(clean_data),
-                "data": clean_data
-            }
-            
             with open(file_path, 'w', encoding='utf-8') as jsonfile:
-                json.dump(export_data, jsonfile, indent=2, ensure_ascii=False, default=str)
+                records = self.write_json_stream(table_name, data, jsonfile)
             
-            logger.info(f"JSON export completed: {file_path} ({len(data)} records)")
-            return len(data)
+            logger.info(f"JSON export completed: {file_path} ({records} records)")
+            return records
             
         except Exception as e:
             logger.error(f"JSON export failed for {table_name}: {e}")
             raise
     
+    def _stream_query(self, query) -> Iterator:
+        """Iterate query results through a server-side cursor in fixed-size batches"""
+        return query.yield_per(self.batch_size)
+    
+    def _customer_record(self, customer: Customer) -> Dict:
+        return {
+            "id": str(customer.id),
+            "name": customer.name,
+            "email": customer.email,
+            "phone": customer.phone,
+            "address": customer.address,
+            "tags": customer.tags,
+            "total_debt": float(customer.total_debt) if customer.total_debt else 0,
+            "created_at": customer.created_at,
+            "updated_at": customer.updated_at,
+            "is_active": customer.is_active
+        }
+    
+    def _product_record(self, product: Product) -> Dict:
+        return {
+            "id": str(product.id),
+            "name": product.name,
+            "description": product.description,
+            "category": product.category.name if product.category else None,
+            "selling_price": float(product.selling_price) if product.selling_price else 0,
+            "cost_price": float(product.cost_price) if product.cost_price else 0,
+            "stock_quantity": product.stock_quantity,
+            "images": product.images,
+            "created_at": product.created_at,
+            "updated_at": product.updated_at,
+            "is_active": product.is_active
+        }
+    
+    def _invoice_item_record(self, item: InvoiceItem) -> Dict:
+        return {
+            "id": str(item.id),
+            "product_id": str(item.product_id) if item.product_id else None,
+            "description": item.description,
+            "quantity": float(item.quantity) if item.quantity else 0,
+            "unit_price": float(item.unit_price) if item.unit_price else 0,
+            "line_total": float(item.line_total) if item.line_total else 0,
+            "weight": float(item.weight) if item.weight else None,
+            "labor_fee": float(item.labor_fee) if item.labor_fee else None,
+            "profit": float(item.profit) if item.profit else None,
+            "vat_amount": float(item.vat_amount) if item.vat_amount else None,
+            "created_at": item.created_at
+        }
+    
+    def _invoice_record(self, invoice: Invoice) -> Dict:
+        return {
+            "id": str(invoice.id),
+            "customer_id": str(invoice.customer_id),
+            "invoice_number": invoice.invoice_number,
+            "invoice_type": invoice.invoice_type.value if invoice.invoice_type else None,
+            "installment_type": invoice.installment_type.value if invoice.installment_type else None,
+            "subtotal": float(invoice.subtotal) if invoice.subtotal else 0,
+            "tax_amount": float(invoice.tax_amount) if invoice.tax_amount else 0,
+            "total_amount": float(invoice.total_amount) if invoice.total_amount else 0,
+            "total_gold_weight": float(invoice.total_gold_weight) if invoice.total_gold_weight else None,
+            "gold_price_at_creation": float(invoice.gold_price_at_creation) if invoice.gold_price_at_creation else None,
+            "remaining_balance": float(invoice.remaining_balance) if invoice.remaining_balance else None,
+            "remaining_gold_weight": float(invoice.remaining_gold_weight) if invoice.remaining_gold_weight else None,
+            "status": invoice.status.value if invoice.status else None,
+            "due_date": invoice.due_date,
+            "notes": invoice.notes,
+            "qr_code_token": invoice.qr_code_token,
+            "is_shareable": invoice.is_shareable,
+            "created_at": invoice.created_at,
+            "updated_at": invoice.updated_at,
+            "items": [self._invoice_item_record(item) for item in invoice.items]
+        }
+    
+    def _installment_record(self, installment: Installment) -> Dict:
+        return {
+            "id": str(installment.id),
+            "invoice_id": str(installment.invoice_id),
+            "installment_number": installment.installment_number,
+            "amount_due": float(installment.amount_due) if installment.amount_due else None,
+            "amount_paid": float(installment.amount_paid) if installment.amount_paid else 0,
+            "gold_weight_due": float(installment.gold_weight_due) if installment.gold_weight_due else None,
+            "gold_weight_paid": float(installment.gold_weight_paid) if installment.gold_weight_paid else 0,
+            "gold_price_at_payment": float(installment.gold_price_at_payment) if installment.gold_price_at_payment else None,
+            "due_date": installment.due_date,
+            "paid_at": installment.paid_at,
+            "status": installment.status.value if installment.status else None,
+            "notes": installment.notes,
+            "created_at": installment.created_at,
+            "updated_at": installment.updated_at
+        }
+    
+    def _journal_entry_record(self, entry: JournalEntry) -> Dict:
+        return {
+            "id": str(entry.id),
+            "entry_date": entry.entry_date,
+            "description": entry.description,
+            "total_amount": float(entry.total_amount) if entry.total_amount else 0,
+            "reference_type": entry.reference_type,
+            "reference_id": str(entry.reference_id) if entry.reference_id else None,
+            "created_at": entry.created_at,
+            "lines": [
+                {
+                    "id": str(line.id),
+                    "account_id": str(line.account_id),
+                    "description": line.description,
+                    "debit_amount": float(line.debit_amount) if line.debit_amount else 0,
+                    "credit_amount": float(line.credit_amount) if line.credit_amount else 0
+                }
+                for line in entry.lines
+            ]
+        }
+    
+    def _customer_payment_record(self, payment: CustomerPayment) -> Dict:
+        return {
+            "id": str(payment.id),
+            "customer_id": str(payment.customer_id),
+            "invoice_id": str(payment.invoice_id) if payment.invoice_id else None,
+            "amount": float(payment.amount) if payment.amount else 0,
+            "payment_date": payment.payment_date,
+            "payment_method": payment.payment_method.value if payment.payment_method else None,
+            "reference_number": payment.reference_number,
+            "notes": payment.notes,
+            "created_at": payment.created_at
+        }
+    
+    def _supplier_payment_record(self, payment: SupplierPayment) -> Dict:
+        return {
+            "id": str(payment.id),
+            "supplier_id": str(payment.supplier_id),
+            "bill_id": str(payment.bill_id) if payment.bill_id else None,
+            "amount": float(payment.amount) if payment.amount else 0,
+            "payment_date": payment.payment_date,
+            "payment_method": payment.payment_method.value if payment.payment_method else None,
+            "reference_number": payment.reference_number,
+            "notes": payment.notes,
+            "created_at": payment.created_at
+        }
+    
+    def _export_source(self, sub_table: str, tenant_id: str) -> _ExportSource:
+        """Query, default ordering, loader options and serializer for an export sub-table"""
+        if sub_table == "customers":
+            return _ExportSource(
+                Customer,
+                self.db.query(Customer).filter(Customer.tenant_id == tenant_id),
+                Customer.created_at, (), self._customer_record
+            )
+        if sub_table == "products":
+            # Categories are joined in rather than loaded per product
+            return _ExportSource(
+                Product,
+                self.db.query(Product).filter(Product.tenant_id == tenant_id),
+                Product.created_at, (joinedload(Product.category),), self._product_record
+            )
+        if sub_table == "invoices":
+            # Items are loaded with one IN query per batch of invoices
+            return _ExportSource(
+                Invoice,
+                self.db.query(Invoice).filter(Invoice.tenant_id == tenant_id),
+                Invoice.created_at, (selectinload(Invoice.items),), self._invoice_record
+            )
+        if sub_table == "installments":
+            # Join with invoices to filter by tenant
+            return _ExportSource(
+                Installment,
+                self.db.query(Installment)
+                .join(Invoice, Installment.invoice_id == Invoice.id)
+                .filter(Invoice.tenant_id == tenant_id),
+                Installment.created_at, (), self._installment_record
+            )
+        if sub_table == "journal_entries":
+            return _ExportSource(
+                JournalEntry,
+                self.db.query(JournalEntry).filter(JournalEntry.tenant_id == tenant_id),
+                JournalEntry.entry_date, (selectinload(JournalEntry.lines),), self._journal_entry_record
+            )
+        if sub_table == "customer_payments":
+            return _ExportSource(
+                CustomerPayment,
+                self.db.query(CustomerPayment).filter(CustomerPayment.tenant_id == tenant_id),
+                CustomerPayment.payment_date, (), self._customer_payment_record
+            )
+        if sub_table == "supplier_payments":
+            return _ExportSource(
+                SupplierPayment,
+                self.db.query(SupplierPayment).filter(SupplierPayment.tenant_id == tenant_id),
+                SupplierPayment.payment_date, (), self._supplier_payment_record
+            )
+        raise ValueError(f"Unknown export table: {sub_table}")
+    
+    def _iter_source(self, source: _ExportSource, start_key=None, end_key=None, order_by=None) -> Iterator[Dict]:
+        """Stream serialized records from an export source, optionally within a primary key range"""
+        query = source.query.options(*source.options)
+        if start_key is not None:
+            query = query.filter(source.model.id >= start_key)
+        if end_key is not None:
+            query = query.filter(source.model.id < end_key)
+        
+        query = query.order_by(source.order_by if order_by is None else order_by)
+        for row in self._stream_query(query):
+            yield source.serialize(row)
+    
+    def iter_customers_data(self, tenant_id: str) -> Iterator[Dict]:
+        """Stream customer records for tenant"""
+        return self._iter_source(self._export_source("customers", tenant_id))
+    
+    def iter_products_data(self, tenant_id: str) -> Iterator[Dict]:
+        """Stream product records for tenant with categories joined in"""
+        return self._iter_source(self._export_source("products", tenant_id))
+    
+    def iter_invoices_data(self, tenant_id: str) -> Iterator[Dict]:
+        """Stream invoice records for tenant, loading items once per batch"""
+        return self._iter_source(self._export_source("invoices", tenant_id))
+    
+    def iter_installments_data(self, tenant_id: str) -> Iterator[Dict]:
+        """Stream installment records for tenant"""
+        return self._iter_source(self._export_source("installments", tenant_id))
+    
+    def iter_journal_entries_data(self, tenant_id: str) -> Iterator[Dict]:
+        """Stream journal entry records for tenant, loading lines once per batch"""
+        return self._iter_source(self._export_source("journal_entries", tenant_id))
+    
+    def iter_customer_payments_data(self, tenant_id: str) -> Iterator[Dict]:
+        """Stream customer payment records for tenant"""
+        return self._iter_source(self._export_source("customer_payments", tenant_id))
+    
+    def iter_supplier_payments_data(self, tenant_id: str) -> Iterator[Dict]:
+        """Stream supplier payment records for tenant"""
+        return self._iter_source(self._export_source("supplier_payments", tenant_id))
+    
+    def iter_slice_data(self, sub_table: str, tenant_id: str, start_key=None, end_key=None) -> Iterator[Dict]:
+        """Stream the records of one keyset slice of a sub-table in primary key order"""
+        source = self._export_source(sub_table, tenant_id)
+        return self._iter_source(source, start_key, end_key, order_by=source.model.id)
+    
+    def plan_table_slices(self, sub_table: str, tenant_id: str, slice_rows: int) -> List[Dict]:
+        """Split a sub-table into primary key ranges of about slice_rows rows each"""
+        source = self._export_source(sub_table, tenant_id)
+        total_rows = source.query.count()
+        if total_rows <= slice_rows:
+            return [{"start_key": None, "end_key": None, "estimated_records": total_rows}]
+        
+        # Every slice_rows-th key starts a new slice; numbering happens in the database
+        row_number = func.row_number().over(order_by=source.model.id)
+        numbered = source.query.with_entities(
+            source.model.id.label("row_id"), row_number.label("row_number")
+        ).subquery()
+        boundaries = [
+            row.row_id
+            for row in self.db.query(numbered.c.row_id)
+            .filter(numbered.c.row_number > 1, (numbered.c.row_number - 1) % slice_rows == 0)
+            .order_by(numbered.c.row_id)
+        ]
+        
+        keys = [None] + boundaries + [None]
+        return [
+            {
+                "start_key": keys[index],
+                "end_key": keys[index + 1],
+                "estimated_records": min(slice_rows, total_rows - index * slice_rows)
+            }
+            for index in range(len(keys) - 1)
+        ]
+    
+    def get_table_streams(self, table: str) -> Optional[Dict[str, Callable[[str], Iterator[Dict]]]]:
+        """Record stream factories for each file an export table produces, None if unknown"""
+        streams = {
+            "customers": {"customers": self.iter_customers_data},
+            "products": {"products": self.iter_products_data},
+            "invoices": {"invoices": self.iter_invoices_data},
+            "installments": {"installments": self.iter_installments_data},
+            "accounting": {
+                "journal_entries": self.iter_journal_entries_data,
+                "customer_payments": self.iter_customer_payments_data,
+                "supplier_payments": self.iter_supplier_payments_data
+            }
+        }
+        return streams.get(table)
+    
     def get_customers_data(self, tenant_id: str) -> List[Dict]:
         """Get all customer data for tenant"""
         try:
-            customers = (
-                self.db.query(Customer)
-                .filter(Customer.tenant_id == tenant_id)
-                .order_by(Customer.created_at)
-                .all()
-            )
-            
-            data = []
-            for customer in customers:
-                customer_dict = {
-                    "id": str(customer.id),
-                    "name": customer.name,
-                    "email": customer.email,
-                    "phone": customer.phone,
-                    "address": customer.address,
-                    "tags": customer.tags,
-                    "total_debt": float(customer.total_debt) if customer.total_debt else 0,
-                    "created_at": customer.created_at,
-                    "updated_at": customer.updated_at,
-                    "is_active": customer.is_active
-                }
-                data.append(customer_dict)
+            data = list(self.iter_customers_data(tenant_id))
             
             logger.info(f"Retrieved {len(data)} customers for tenant {tenant_id}")
             return data
@@ -191,29 +581,7 @@ class DataExportService:
     def get_products_data(self, tenant_id: str) -> List[Dict]:
         """Get all product data for tenant"""
         try:
-            products = (
-                self.db.query(Product)
-                .filter(Product.tenant_id == tenant_id)
-                .order_by(Product.created_at)
-                .all()
-            )
-            
-            data = []
-            for product in products:
-                product_dict = {
-                    "id": str(product.id),
-                    "name": product.name,
-                    "description": product.description,
-                    "category": product.category.name if product.category else None,
-                    "selling_price": float(product.selling_price) if product.selling_price else 0,
-                    "cost_price": float(product.cost_price) if product.cost_price else 0,
-                    "stock_quantity": product.stock_quantity,
-                    "images": product.images,
-                    "created_at": product.created_at,
-                    "updated_at": product.updated_at,
-                    "is_active": product.is_active
-                }
-                data.append(product_dict)
+            data = list(self.iter_products_data(tenant_id))
             
             logger.info(f"Retrieved {len(data)} products for tenant {tenant_id}")
             return data
@@ -225,56 +593,7 @@ class DataExportService:
     def get_invoices_data(self, tenant_id: str) -> List[Dict]:
         """Get all invoice data for tenant including items"""
         try:
-            invoices = (
-                self.db.query(Invoice)
-                .filter(Invoice.tenant_id == tenant_id)
-                .order_by(Invoice.created_at)
-                .all()
-            )
-            
-            data = []
-            for invoice in invoices:
-                # Get invoice items
-                items = []
-                for item in invoice.items:
-                    item_dict = {
-                        "id": str(item.id),
-                        "product_id": str(item.product_id) if item.product_id else None,
-                        "description": item.description,
-                        "quantity": float(item.quantity) if item.quantity else 0,
-                        "unit_price": float(item.unit_price) if item.unit_price else 0,
-                        "line_total": float(item.line_total) if item.line_total else 0,
-                        "weight": float(item.weight) if item.weight else None,
-                        "labor_fee": float(item.labor_fee) if item.labor_fee else None,
-                        "profit": float(item.profit) if item.profit else None,
-                        "vat_amount": float(item.vat_amount) if item.vat_amount else None,
-                        "created_at": item.created_at
-                    }
-                    items.append(item_dict)
-                
-                invoice_dict = {
-                    "id": str(invoice.id),
-                    "customer_id": str(invoice.customer_id),
-                    "invoice_number": invoice.invoice_number,
-                    "invoice_type": invoice.invoice_type.value if invoice.invoice_type else None,
-                    "installment_type": invoice.installment_type.value if invoice.installment_type else None,
-                    "subtotal": float(invoice.subtotal) if invoice.subtotal else 0,
-                    "tax_amount": float(invoice.tax_amount) if invoice.tax_amount else 0,
-                    "total_amount": float(invoice.total_amount) if invoice.total_amount else 0,
-                    "total_gold_weight": float(invoice.total_gold_weight) if invoice.total_gold_weight else None,
-                    "gold_price_at_creation": float(invoice.gold_price_at_creation) if invoice.gold_price_at_creation else None,
-                    "remaining_balance": float(invoice.remaining_balance) if invoice.remaining_balance else None,
-                    "remaining_gold_weight": float(invoice.remaining_gold_weight) if invoice.remaining_gold_weight else None,
-                    "status": invoice.status.value if invoice.status else None,
-                    "due_date": invoice.due_date,
-                    "notes": invoice.notes,
-                    "qr_code_token": invoice.qr_code_token,
-                    "is_shareable": invoice.is_shareable,
-                    "created_at": invoice.created_at,
-                    "updated_at": invoice.updated_at,
-                    "items": items
-                }
-                data.append(invoice_dict)
+            data = list(self.iter_invoices_data(tenant_id))
             
             logger.info(f"Retrieved {len(data)} invoices for tenant {tenant_id}")
             return data
@@ -286,34 +605,7 @@ class DataExportService:
     def get_installments_data(self, tenant_id: str) -> List[Dict]:
         """Get all installment data for tenant"""
         try:
-            # Join with invoices to filter by tenant
-            installments = (
-                self.db.query(Installment)
-                .join(Invoice, Installment.invoice_id == Invoice.id)
-                .filter(Invoice.tenant_id == tenant_id)
-                .order_by(Installment.created_at)
-                .all()
-            )
-            
-            data = []
-            for installment in installments:
-                installment_dict = {
-                    "id": str(installment.id),
-                    "invoice_id": str(installment.invoice_id),
-                    "installment_number": installment.installment_number,
-                    "amount_due": float(installment.amount_due) if installment.amount_due else None,
-                    "amount_paid": float(installment.amount_paid) if installment.amount_paid else 0,
-                    "gold_weight_due": float(installment.gold_weight_due) if installment.gold_weight_due else None,
-                    "gold_weight_paid": float(installment.gold_weight_paid) if installment.gold_weight_paid else 0,
-                    "gold_price_at_payment": float(installment.gold_price_at_payment) if installment.gold_price_at_payment else None,
-                    "due_date": installment.due_date,
-                    "paid_at": installment.paid_at,
-                    "status": installment.status.value if installment.status else None,
-                    "notes": installment.notes,
-                    "created_at": installment.created_at,
-                    "updated_at": installment.updated_at
-                }
-                data.append(installment_dict)
+            data = list(self.iter_installments_data(tenant_id))
             
             logger.info(f"Retrieved {len(data)} installments for tenant {tenant_id}")
             return data
@@ -325,93 +617,12 @@ class DataExportService:
     def get_accounting_data(self, tenant_id: str) -> Dict[str, List[Dict]]:
         """Get all accounting data for tenant"""
         try:
-            # Journal Entries
-            journal_entries = (
-                self.db.query(JournalEntry)
-                .filter(JournalEntry.tenant_id == tenant_id)
-                .order_by(JournalEntry.entry_date)
-                .all()
-            )
-            
-            je_data = []
-            for entry in journal_entries:
-                # Get journal entry lines
-                lines = []
-                for line in entry.lines:
-                    line_dict = {
-                        "id": str(line.id),
-                        "account_id": str(line.account_id),
-                        "description": line.description,
-                        "debit_amount": float(line.debit_amount) if line.debit_amount else 0,
-                        "credit_amount": float(line.credit_amount) if line.credit_amount else 0
-                    }
-                    lines.append(line_dict)
-                
-                entry_dict = {
-                    "id": str(entry.id),
-                    "entry_date": entry.entry_date,
-                    "description": entry.description,
-                    "total_amount": float(entry.total_amount) if entry.total_amount else 0,
-                    "reference_type": entry.reference_type,
-                    "reference_id": str(entry.reference_id) if entry.reference_id else None,
-                    "created_at": entry.created_at,
-                    "lines": lines
-                }
-                je_data.append(entry_dict)
-            
-            # Customer Payments
-            customer_payments = (
-                self.db.query(CustomerPayment)
-                .filter(CustomerPayment.tenant_id == tenant_id)
-                .order_by(CustomerPayment.payment_date)
-                .all()
-            )
-            
-            cp_data = []
-            for payment in customer_payments:
-                payment_dict = {
-                    "id": str(payment.id),
-                    "customer_id": str(payment.customer_id),
-                    "invoice_id": str(payment.invoice_id) if payment.invoice_id else None,
-                    "amount": float(payment.amount) if payment.amount else 0,
-                    "payment_date": payment.payment_date,
-                    "payment_method": payment.payment_method.value if payment.payment_method else None,
-                    "reference_number": payment.reference_number,
-                    "notes": payment.notes,
-                    "created_at": payment.created_at
-                }
-                cp_data.append(payment_dict)
-            
-            # Supplier Payments
-            supplier_payments = (
-                self.db.query(SupplierPayment)
-                .filter(SupplierPayment.tenant_id == tenant_id)
-                .order_by(SupplierPayment.payment_date)
-                .all()
-            )
-            
-            sp_data = []
-            for payment in supplier_payments:
-                payment_dict = {
-                    "id": str(payment.id),
-                    "supplier_id": str(payment.supplier_id),
-                    "bill_id": str(payment.bill_id) if payment.bill_id else None,
-                    "amount": float(payment.amount) if payment.amount else 0,
-                    "payment_date": payment.payment_date,
-                    "payment_method": payment.payment_method.value if payment.payment_method else None,
-                    "reference_number": payment.reference_number,
-                    "notes": payment.notes,
-                    "created_at": payment.created_at
-                }
-                sp_data.append(payment_dict)
-            
             accounting_data = {
-                "journal_entries": je_data,
-                "customer_payments": cp_data,
-                "supplier_payments": sp_data
+                sub_table: list(stream(tenant_id))
+                for sub_table, stream in self.get_table_streams("accounting").items()
             }
             
-            total_records = len(je_data) + len(cp_data) + len(sp_data)
+            total_records = sum(len(records) for records in accounting_data.values())
             logger.info(f"Retrieved {total_records} accounting records for tenant {tenant_id}")
             return accounting_data
             
@@ -419,6 +630,52 @@ class DataExportService:
             logger.error(f"Failed to get accounting data for tenant {tenant_id}: {e}")
             raise
     
+    def _begin_export(
+        self,
+        tenant_id: str,
+        user_id: str,
+        export_format: ExportFormat,
+        export_type: ExportType,
+        task_id: Optional[str]
+    ) -> DataExportLog:
+        """Validate the request and create a started export log"""
+        if export_format in COLUMNAR_EXPORT_FORMATS and not columnar_export_available():
+            raise Exception(f"{export_format.value} exports require pyarrow 18 or newer")
+        
+        # Verify tenant and user exist
+        tenant = self.db.query(Tenant).filter(Tenant.id == tenant_id).first()
+        if not tenant:
+            raise Exception(f"Tenant {tenant_id} not found")
+        
+        user = self.db.query(User).filter(
+            and_(User.id == user_id, User.tenant_id == tenant_id)
+        ).first()
+        if not user:
+            raise Exception(f"User {user_id} not found or not authorized for tenant {tenant_id}")
+        
+        # Create export log entry
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+        export_name = f"data_export_{tenant_id}_{timestamp}"
+        
+        export_log = DataExportLog(
+            tenant_id=tenant_id,
+            initiated_by=user_id,
+            export_name=export_name,
+            export_format=export_format,
+            export_type=export_type,
+            status=ExportStatus.PENDING,
+            task_id=task_id
+        )
+        self.db.add(export_log)
+        self.db.commit()
+        
+        # Start export process
+        export_log.start_export()
+        self.db.commit()
+        
+        logger.info(f"Starting data export for tenant {tenant_id}")
+        return export_log
+    
     def create_data_export(
         self, 
         tenant_id: str, 
@@ -428,105 +685,77 @@ class DataExportService:
         tables: Optional[List[str]] = None,
         task_id: str = None
     ) -> Dict:
-        """Create comprehensive data export for tenant"""
+        """Create comprehensive data export for tenant
+        
+        Each table is streamed from the database straight into its archive entry,
+        and the archive checksum is computed while it is written.
+        """
         export_log = None
-        temp_files = []
+        archive_path = None
         
         try:
-            # Verify tenant and user exist
-            tenant = self.db.query(Tenant).filter(Tenant.id == tenant_id).first()
-            if not tenant:
-                raise Exception(f"Tenant {tenant_id} not found")
-            
-            user = self.db.query(User).filter(
-                and_(User.id == user_id, User.tenant_id == tenant_id)
-            ).first()
-            if not user:
-                raise Exception(f"User {user_id} not found or not authorized for tenant {tenant_id}")
-            
-            # Create export log entry
-            timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-            export_name = f"data_export_{tenant_id}_{timestamp}"
-            
-            export_log = DataExportLog(
-                tenant_id=tenant_id,
-                initiated_by=user_id,
-                export_name=export_name,
-                export_format=export_format,
-                export_type=export_type,
-                status=ExportStatus.PENDING,
-                task_id=task_id
-            )
-            self.db.add(export_log)
-            self.db.commit()
-            
-            # Start export process
-            export_log.start_export()
-            self.db.commit()
-            
-            logger.info(f"Starting data export for tenant {tenant_id}")
+            export_log = self._begin_export(tenant_id, user_id, export_format, export_type, task_id)
+            export_name = export_log.export_name
             
             # Define default tables if not specified
             if not tables:
-                tables = ["customers", "products", "invoices", "installments", "accounting"]
+                tables = DEFAULT_EXPORT_TABLES
             
+            extension = EXPORT_FILE_EXTENSIONS[export_format]
             exported_files = []
             total_records = 0
+            file_size = 0
+            archive_path = self.temp_dir / f"{export_name}.zip"
             
-            # Export each table
-            for table in tables:
-                try:
-                    logger.info(f"Exporting table: {table}")
+            with open(archive_path, 'wb') as archive_file:
+                archive_writer = _HashingWriter(archive_file)
                     
-                    # Get data for table
-                    if table == "customers":
-                        data = self.get_customers_data(tenant_id)
-                        table_data = {table: data}
-                    elif table == "products":
-                        data = self.get_products_data(tenant_id)
-                        table_data = {table: data}
-                    elif table == "invoices":
-                        data = self.get_invoices_data(tenant_id)
-                        table_data = {table: data}
-                    elif table == "installments":
-                        data = self.get_installments_data(tenant_id)
-                        table_data = {table: data}
-                    elif table == "accounting":
-                        table_data = self.get_accounting_data(tenant_id)
-                    else:
-                        logger.warning(f"Unknown table: {table}")
-                        continue
+                with zipfile.ZipFile(archive_writer, 'w', zipfile.ZIP_DEFLATED) as archive:
+                    # Export each table
+                    for table in tables:
+                        table_streams = self.get_table_streams(table)
+                        if table_streams is None:
+                            logger.warning(f"Unknown table: {table}")
+                            continue
                     
-                    # Export each sub-table
-                    for sub_table, sub_data in table_data.items():
-                        if export_format == ExportFormat.CSV:
-                            file_path = self.temp_dir / f"{export_name}_{sub_table}.csv"
-                            records = self.export_table_to_csv(sub_table, sub_data, file_path)
-                        else:  # JSON
-                            file_path = self.temp_dir / f"{export_name}_{sub_table}.json"
-                            records = self.export_table_to_json(sub_table, sub_data, file_path)
+                        logger.info(f"Exporting table: {table}")
                         
-                        temp_files.append(file_path)
-                        exported_files.append({
-                            "table": sub_table,
-                            "file": file_path.name,
-                            "records": records
-                        })
-                        total_records += records
+                        # Export each sub-table
+                        for sub_table, stream in table_streams.items():
+                            try:
+                                # Run the query before opening the entry, so a failing table
+                                # is skipped instead of leaving a truncated file in the archive
+                                records = stream(tenant_id)
+                                first = next(records, None)
+                            except Exception as e:
+                                logger.error(f"Failed to export table {sub_table}: {e}")
+                                self.db.rollback()
+                                # Continue with other tables
+                                continue
                         
-                except Exception as e:
-                    logger.error(f"Failed to export table {table}: {e}")
-                    # Continue with other tables
-                    continue
+                            if first is not None:
+                                records = itertools.chain([first], records)
+                            
+                            entry_name = f"{export_name}_{sub_table}.{extension}"
+                            record_count = self._write_archive_entry(
+                                archive, entry_name, sub_table, records, export_format
+                            )
+                            
+                            file_size += archive.getinfo(entry_name).file_size
+                            exported_files.append({
+                                "table": sub_table,
+                                "file": entry_name,
+                                "records": record_count
+                            })
+                            total_records += record_count
+                            logger.info(f"Exported {record_count} {sub_table} records for tenant {tenant_id}")
             
             if not exported_files:
                 raise Exception("No data was exported")
             
-            # Create compressed archive
-            archive_path = self.compress_archive(temp_files, export_name)
-            
-            # Calculate checksum
-            checksum = self.calculate_checksum(archive_path)
+            checksum = archive_writer.sha256.hexdigest()
+            compressed_size = archive_path.stat().st_size
+            logger.info(f"Archive created successfully: {archive_path} ({compressed_size} bytes, checksum {checksum})")
             
             # Generate download token and set expiry
             download_token = self.generate_export_token()
@@ -535,8 +764,8 @@ class DataExportService:
             # Update export log with success
             export_log.local_file_path = str(archive_path)
             export_log.complete_export(
-                file_size=sum(f.stat().st_size for f in temp_files if f.exists()),
-                compressed_size=archive_path.stat().st_size,
+                file_size=file_size,
+                compressed_size=compressed_size,
                 checksum=checksum,
                 download_token=download_token,
                 download_expires_at=download_expires_at,
@@ -556,8 +785,8 @@ class DataExportService:
                 "export_type": export_type.value,
                 "exported_files": exported_files,
                 "total_records": total_records,
-                "file_size": sum(f.stat().st_size for f in temp_files if f.exists()),
-                "compressed_size": archive_path.stat().st_size,
+                "file_size": file_size,
+                "compressed_size": compressed_size,
                 "checksum": checksum,
                 "download_token": download_token,
                 "download_expires_at": download_expires_at.isoformat(),
@@ -571,17 +800,387 @@ class DataExportService:
                 export_log.fail_export(str(e))
                 self.db.commit()
             
+            # Remove the partial archive
+            if archive_path is not None:
+                try:
+                    if archive_path.exists():
+                        archive_path.unlink()
+                        logger.debug(f"Cleaned up partial archive: {archive_path}")
+                except Exception as cleanup_error:
+                    logger.warning(f"Failed to clean up {archive_path}: {cleanup_error}")
+            
             raise
+    
+    def _parts_dir(self, export_log: DataExportLog) -> Path:
+        return self.temp_dir / f"{export_log.export_name}_parts"
+    
+    def create_parallel_export(
+        self,
+        tenant_id: str,
+        user_id: str,
+        export_format: ExportFormat,
+        export_type: ExportType,
+        tables: Optional[List[str]] = None,
+        task_id: str = None,
+        slice_rows: Optional[int] = None
+    ) -> Dict:
+        """Plan a data export as independently exported keyset slices
         
-        finally:
-            # Clean up temporary files (except the final archive)
-            for temp_file in temp_files:
-                try:
-                    if temp_file.exists() and temp_file != Path(export_log.local_file_path if export_log else ""):
-                        temp_file.unlink()
-                        logger.debug(f"Cleaned up temporary file: {temp_file}")
-                except Exception as e:
-                    logger.warning(f"Failed to clean up {temp_file}: {e}")
+        One checkpoint row is created per slice. Slices are exported by
+        export_slice, and assemble_parallel_export builds the archive once all
+        of them have completed.
+        """
+        export_log = None
+        
+        try:
+            export_log = self._begin_export(tenant_id, user_id, export_format, export_type, task_id)
+            
+            if not tables:
+                tables = DEFAULT_EXPORT_TABLES
+            slice_rows = slice_rows or settings.data_export_slice_rows
+            
+            sub_tables = []
+            slices = []
+            for table in tables:
+                table_streams = self.get_table_streams(table)
+                if table_streams is None:
+                    logger.warning(f"Unknown table: {table}")
+                    continue
+                
+                for sub_table in table_streams:
+                    sub_tables.append(sub_table)
+                    for index, planned in enumerate(self.plan_table_slices(sub_table, tenant_id, slice_rows)):
+                        slices.append(DataExportSlice(
+                            export_id=export_log.id,
+                            table_name=sub_table,
+                            slice_index=index,
+                            start_key=planned["start_key"],
+                            end_key=planned["end_key"],
+                            estimated_records=planned["estimated_records"],
+                            status=ExportStatus.PENDING
+                        ))
+            
+            if not slices:
+                raise Exception("No data was exported")
+            
+            parts_dir = self._parts_dir(export_log)
+            parts_dir.mkdir(parents=True, exist_ok=True)
+            
+            self.db.add_all(slices)
+            export_log.exported_tables = tables
+            export_log.export_metadata = {
+                "parallel": True,
+                "sub_tables": sub_tables,
+                "slice_rows": slice_rows,
+                "parts_dir": str(parts_dir)
+            }
+            self.db.commit()
+            
+            estimated_records = sum(export_slice.estimated_records for export_slice in slices)
+            logger.info(
+                f"Planned parallel export {export_log.id} for tenant {tenant_id}: "
+                f"{len(slices)} slices, ~{estimated_records} records"
+            )
+            
+            return {
+                "status": "planned",
+                "export_id": str(export_log.id),
+                "tenant_id": tenant_id,
+                "export_name": export_log.export_name,
+                "export_format": export_format.value,
+                "slice_ids": [str(export_slice.id) for export_slice in slices],
+                "estimated_records": estimated_records
+            }
+        
+        except Exception as e:
+            logger.error(f"Parallel export planning failed for tenant {tenant_id}: {e}")
+            
+            if export_log:
+                self.db.rollback()
+                export_log.fail_export(str(e))
+                self.db.commit()
+            
+            raise
+    
+    def _write_slice_part(self, export_format: ExportFormat, table_name: str, records: Iterable[Dict], part_file: BinaryIO) -> int:
+        """Write one slice as a part file that assemble_parallel_export can stitch together"""
+        if export_format in COLUMNAR_EXPORT_FORMATS:
+            return self.write_columnar_stream(table_name, records, part_file, export_format)
+        
+        with io.TextIOWrapper(part_file, encoding='utf-8', newline='') as part_stream:
+            if export_format == ExportFormat.CSV:
+                return self.write_csv_stream(table_name, records, part_stream)
+            # JSON parts hold only the array body; the document wrapper is added on assembly
+            return self._write_json_records(records, part_stream)
+    
+    def export_slice(self, slice_id: str) -> Dict:
+        """Export one slice to its part file, skipping slices already checkpointed as completed"""
+        export_slice = self.db.query(DataExportSlice).filter(DataExportSlice.id == slice_id).first()
+        if not export_slice:
+            raise Exception(f"Export slice {slice_id} not found")
+        
+        export_log = export_slice.export
+        summary = {
+            "slice_id": str(export_slice.id),
+            "export_id": str(export_log.id),
+            "table": export_slice.table_name,
+            "slice_index": export_slice.slice_index
+        }
+        
+        if export_slice.status == ExportStatus.COMPLETED and export_slice.part_file_path and Path(export_slice.part_file_path).exists():
+            return {**summary, "status": "completed", "records": export_slice.exported_records, "resumed": True}
+        
+        if export_log.status != ExportStatus.IN_PROGRESS:
+            return {**summary, "status": "skipped", "records": 0}
+        
+        export_slice.start_slice()
+        self.db.commit()
+        
+        extension = EXPORT_FILE_EXTENSIONS[export_log.export_format]
+        part_path = self._parts_dir(export_log) / f"{export_slice.table_name}_{export_slice.slice_index:05d}.{extension}"
+        partial_path = part_path.with_name(part_path.name + ".partial")
+        
+        try:
+            part_path.parent.mkdir(parents=True, exist_ok=True)
+            records = self.iter_slice_data(
+                export_slice.table_name, str(export_log.tenant_id), export_slice.start_key, export_slice.end_key
+            )
+            with open(partial_path, 'wb') as part_file:
+                record_count = self._write_slice_part(export_log.export_format, export_slice.table_name, records, part_file)
+            
+            # The checkpoint only ever points at a fully written part file
+            os.replace(partial_path, part_path)
+            export_slice.complete_slice(record_count, str(part_path), part_path.stat().st_size)
+            self.db.commit()
+            
+            logger.info(
+                f"Exported slice {export_slice.table_name}#{export_slice.slice_index} "
+                f"of export {export_log.id}: {record_count} records"
+            )
+            return {**summary, "status": "completed", "records": record_count, "resumed": False}
+        
+        except Exception as e:
+            logger.error(f"Export slice {slice_id} failed: {e}")
+            self.db.rollback()
+            export_slice.fail_slice(str(e))
+            self.db.commit()
+            
+            if partial_path.exists():
+                partial_path.unlink()
+            raise
+    
+    def _assemble_table(
+        self,
+        archive: zipfile.ZipFile,
+        export_log: DataExportLog,
+        table_name: str,
+        table_slices: List[DataExportSlice]
+    ) -> List[Dict]:
+        """Copy the part files of one sub-table into the archive, returning the entries written"""
+        export_format = export_log.export_format
+        extension = EXPORT_FILE_EXTENSIONS[export_format]
+        entry_name = f"{export_log.export_name}_{table_name}.{extension}"
+        parts = [export_slice for export_slice in table_slices if export_slice.exported_records]
+        
+        if export_format in COLUMNAR_EXPORT_FORMATS:
+            # Columnar parts cannot be concatenated, so a sliced table becomes a dataset directory
+            parts = parts or table_slices[:1]
+            entries = []
+            for export_slice in parts:
+                part_entry_name = entry_name if len(parts) == 1 else (
+                    f"{export_log.export_name}_{table_name}/part-{export_slice.slice_index:05d}.{extension}"
+                )
+                entry_info = zipfile.ZipInfo(part_entry_name, date_time=time.localtime()[:6])
+                entry_info.compress_type = zipfile.ZIP_STORED
+                with archive.open(entry_info, 'w', force_zip64=True) as entry, open(export_slice.part_file_path, 'rb') as part_file:
+                    shutil.copyfileobj(part_file, entry)
+                entries.append({"table": table_name, "file": part_entry_name, "records": export_slice.exported_records})
+            return entries
+        
+        entry_info = zipfile.ZipInfo(entry_name, date_time=time.localtime()[:6])
+        entry_info.compress_type = zipfile.ZIP_DEFLATED
+        record_count = sum(export_slice.exported_records for export_slice in parts)
+        
+        with archive.open(entry_info, 'w', force_zip64=True) as entry:
+            if not parts:
+                # Empty table, written the same way a single-pass export writes it
+                with io.TextIOWrapper(entry, encoding='utf-8', newline='') as entry_stream:
+                    if export_format == ExportFormat.CSV:
+                        self.write_csv_stream(table_name, [], entry_stream)
+                    else:
+                        self.write_json_stream(table_name, [], entry_stream)
+                return [{"table": table_name, "file": entry_name, "records": 0}]
+            
+            if export_format == ExportFormat.JSON:
+                entry.write(self._json_document_start(table_name).encode('utf-8'))
+            
+            for position, export_slice in enumerate(parts):
+                with open(export_slice.part_file_path, 'rb') as part_file:
+                    if position and export_format == ExportFormat.CSV:
+                        part_file.readline()  # Header is only kept from the first part
+                    elif position:
+                        entry.write(b",")
+                    shutil.copyfileobj(part_file, entry)
+            
+            if export_format == ExportFormat.JSON:
+                entry.write(self._json_document_end(record_count).encode('utf-8'))
+        
+        return [{"table": table_name, "file": entry_name, "records": record_count}]
+    
+    def assemble_parallel_export(self, export_id: str) -> Dict:
+        """Build the archive of a parallel export from its completed slices"""
+        export_log = self.db.query(DataExportLog).filter(DataExportLog.id == export_id).first()
+        if not export_log:
+            raise Exception(f"Data export {export_id} not found")
+        
+        if export_log.status == ExportStatus.COMPLETED:
+            return {"status": "success", "export_id": str(export_log.id), "already_assembled": True}
+        
+        archive_path = None
+        
+        try:
+            slices = (
+                self.db.query(DataExportSlice)
+                .filter(DataExportSlice.export_id == export_log.id)
+                .order_by(DataExportSlice.table_name, DataExportSlice.slice_index)
+                .all()
+            )
+            
+            incomplete = [export_slice for export_slice in slices if export_slice.status != ExportStatus.COMPLETED]
+            if incomplete:
+                names = ", ".join(f"{export_slice.table_name}#{export_slice.slice_index}" for export_slice in incomplete[:10])
+                raise Exception(f"{len(incomplete)} export slices did not complete: {names}")
+            
+            slices_by_table = {}
+            for export_slice in slices:
+                slices_by_table.setdefault(export_slice.table_name, []).append(export_slice)
+            
+            sub_tables = (export_log.export_metadata or {}).get("sub_tables") or list(slices_by_table)
+            
+            exported_files = []
+            file_size = 0
+            archive_path = self.temp_dir / f"{export_log.export_name}.zip"
+            
+            with open(archive_path, 'wb') as archive_file:
+                archive_writer = _HashingWriter(archive_file)
+                
+                with zipfile.ZipFile(archive_writer, 'w', zipfile.ZIP_DEFLATED) as archive:
+                    for sub_table in sub_tables:
+                        entries = self._assemble_table(archive, export_log, sub_table, slices_by_table.get(sub_table, []))
+                        for exported_file in entries:
+                            file_size += archive.getinfo(exported_file["file"]).file_size
+                        exported_files.extend(entries)
+            
+            checksum = archive_writer.sha256.hexdigest()
+            compressed_size = archive_path.stat().st_size
+            total_records = sum(exported_file["records"] for exported_file in exported_files)
+            
+            download_token = self.generate_export_token()
+            download_expires_at = datetime.now(timezone.utc) + timedelta(hours=self.download_expiry_hours)
+            
+            export_log.local_file_path = str(archive_path)
+            export_log.complete_export(
+                file_size=file_size,
+                compressed_size=compressed_size,
+                checksum=checksum,
+                download_token=download_token,
+                download_expires_at=download_expires_at,
+                exported_tables=export_log.exported_tables,
+                total_records=total_records
+            )
+            self.db.commit()
+            
+            # Part files are only needed until the archive exists
+            shutil.rmtree(self._parts_dir(export_log), ignore_errors=True)
+            
+            logger.info(f"Parallel export {export_log.id} assembled from {len(slices)} slices")
+            
+            return {
+                "status": "success",
+                "export_id": str(export_log.id),
+                "tenant_id": str(export_log.tenant_id),
+                "export_name": export_log.export_name,
+                "export_format": export_log.export_format.value,
+                "export_type": export_log.export_type.value,
+                "exported_files": exported_files,
+                "total_records": total_records,
+                "file_size": file_size,
+                "compressed_size": compressed_size,
+                "checksum": checksum,
+                "download_token": download_token,
+                "download_expires_at": download_expires_at.isoformat(),
+                "duration_seconds": export_log.duration_seconds
+            }
+        
+        except Exception as e:
+            logger.error(f"Parallel export assembly failed for {export_id}: {e}")
+            
+            # Part files are kept so the export can be resumed
+            self.db.rollback()
+            export_log.fail_export(str(e))
+            self.db.commit()
+            
+            if archive_path is not None and archive_path.exists():
+                archive_path.unlink()
+            
+            raise
+    
+    def resume_parallel_export(self, export_id: str) -> List[str]:
+        """Reopen a failed parallel export and return the slices that still need exporting"""
+        export_log = self.db.query(DataExportLog).filter(DataExportLog.id == export_id).first()
+        if not export_log or not export_log.slices:
+            raise Exception(f"Parallel data export {export_id} not found")
+        
+        if export_log.status == ExportStatus.COMPLETED:
+            return []
+        
+        export_log.status = ExportStatus.IN_PROGRESS
+        export_log.error_message = None
+        export_log.completed_at = None
+        
+        pending_ids = []
+        for export_slice in export_log.slices:
+            part_missing = not export_slice.part_file_path or not Path(export_slice.part_file_path).exists()
+            if export_slice.status != ExportStatus.COMPLETED or part_missing:
+                export_slice.status = ExportStatus.PENDING
+                pending_ids.append(str(export_slice.id))
+        
+        self.db.commit()
+        
+        logger.info(f"Resuming parallel export {export_id}: {len(pending_ids)} of {len(export_log.slices)} slices pending")
+        return pending_ids
+    
+    def get_export_progress(self, export_id: str) -> Optional[Dict]:
+        """Rows exported over rows estimated for a parallel export"""
+        rows = (
+            self.db.query(
+                DataExportSlice.status,
+                func.count(DataExportSlice.id),
+                func.coalesce(func.sum(DataExportSlice.estimated_records), 0),
+                func.coalesce(func.sum(DataExportSlice.exported_records), 0)
+            )
+            .filter(DataExportSlice.export_id == export_id)
+            .group_by(DataExportSlice.status)
+            .all()
+        )
+        if not rows:
+            return None
+        
+        slices_by_status = {status.value: count for status, count, _, _ in rows}
+        estimated_records = sum(int(estimated) for _, _, estimated, _ in rows)
+        exported_records = sum(int(exported) for status, _, _, exported in rows if status == ExportStatus.COMPLETED)
+        
+        progress = 100 if not estimated_records else min(100, int(exported_records * 100 / estimated_records))
+        if slices_by_status.get(ExportStatus.COMPLETED.value, 0) < sum(slices_by_status.values()):
+            # Assembly is still ahead even when row estimates were low
+            progress = min(progress, 99)
+        
+        return {
+            "estimated_records": estimated_records,
+            "exported_records": exported_records,
+            "progress_percentage": progress,
+            "slices": slices_by_status
+        }
     
     def get_export_file_path(self, download_token: str) -> Optional[Path]:
         """Get export file path by download token"""
@@ -687,6 +1286,12 @@ class DataExportService:
             if not export:
                 return None
             
+            if export.status == ExportStatus.COMPLETED:
+                progress_percentage = 100
+            else:
+                progress = self.get_export_progress(str(export.id))
+                progress_percentage = progress["progress_percentage"] if progress else None
+            
             return {
                 "export_id": str(export.id),
                 "export_name": export.export_name,
@@ -705,6 +1310,7 @@ class DataExportService:
                 "downloaded_at": export.downloaded_at.isoformat() if export.downloaded_at else None,
                 "is_download_expired": export.is_download_expired,
                 "duration_seconds": export.duration_seconds,
+                "progress_percentage": progress_percentage,
                 "error_message": export.error_message
             }
             
@@ -742,6 +1348,24 @@ class DataExportService:
                 except Exception as e:
                     logger.error(f"Failed to clean up export file {export.local_file_path}: {e}")
             
+            # Part files of parallel exports that failed and were never resumed
+            stale_parallel_exports = (
+                self.db.query(DataExportLog)
+                .filter(
+                    and_(
+                        DataExportLog.status == ExportStatus.FAILED,
+                        DataExportLog.created_at < datetime.now(timezone.utc) - timedelta(hours=self.download_expiry_hours)
+                    )
+                )
+                .all()
+            )
+            for export in stale_parallel_exports:
+                parts_dir = (export.export_metadata or {}).get("parts_dir")
+                if parts_dir and Path(parts_dir).exists():
+                    shutil.rmtree(parts_dir, ignore_errors=True)
+                    logger.info(f"Cleaned up parts of failed parallel export: {parts_dir}")
+                    cleaned_count += 1
+            
             if cleaned_count > 0:
                 self.db.commit()
                 logger.info(f"Cleaned up {cleaned_count} expired export files")
@@ -23,7 +23,7 @@ from sqlalchemy import text
 
 from app.core.config import settings
 from app.models.backup import BackupLog, BackupType, BackupStatus, StorageProvider
-from app.services.cloud_storage_service import CloudStorageService
+from app.services.cloud_storage_service import CloudStorageService, IntegrityCheckMode, calculate_file_integrity
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +33,7 @@ class DisasterRecoveryService:
     
     def __init__(self, db: Session):
         self.db = db
-        self.cloud_storage = CloudStorageService()
+        self.cloud_storage = CloudStorageService(db)
         self.temp_dir = Path(tempfile.gettempdir()) / "hesaabplus_disaster_recovery"
         self.temp_dir.mkdir(exist_ok=True)
     
@@ -384,49 +384,36 @@ class DisasterRecoveryService:
             encrypted_path = self.encrypt_file(compressed_path)
             temp_files.append(encrypted_path)
             
-            # Step 6: Calculate checksum
-            checksum = self.calculate_checksum(encrypted_path)
+            # Step 6: Calculate checksum and per-part checksums for sampled verification in one read
+            checksum, part_integrity = calculate_file_integrity(encrypted_path)
             
-            # Step 7: Upload to both cloud storage providers
+            # Step 7: Upload to both cloud storage providers concurrently
             final_filename = f"{backup_name}.tar.gz.enc"
             
-            # Upload to Backblaze B2 (primary)
-            b2_location = None
-            try:
-                b2_location = self.cloud_storage.upload_to_b2(
-                    encrypted_path, 
-                    f"disaster_recovery/{final_filename}",
-                    metadata={
-                        "backup_type": "disaster_recovery",
-                        "checksum": checksum,
-                        "created_at": datetime.now(timezone.utc).isoformat(),
-                        "platform_version": settings.app_version,
-                        "database_size": db_dump_path.stat().st_size,
-                        "config_size": config_backup_path.stat().st_size
-                    }
-                )
+            upload_results = self.cloud_storage.upload_to_both(
+                encrypted_path,
+                f"disaster_recovery/{final_filename}",
+                metadata={
+                    "backup_type": "disaster_recovery",
+                    "checksum": checksum,
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "platform_version": settings.app_version,
+                    "database_size": db_dump_path.stat().st_size,
+                    "config_size": config_backup_path.stat().st_size
+                }
+            )
+            
+            b2_location = upload_results["backblaze_b2"]["location"]
+            if b2_location:
                 logger.info(f"Uploaded to Backblaze B2: {b2_location}")
-            except Exception as e:
-                logger.error(f"Backblaze B2 upload failed: {e}")
-            
-            # Upload to Cloudflare R2 (secondary)
-            r2_location = None
-            try:
-                r2_location = self.cloud_storage.upload_to_r2(
-                    encrypted_path, 
-                    f"disaster_recovery/{final_filename}",
-                    metadata={
-                        "backup_type": "disaster_recovery",
-                        "checksum": checksum,
-                        "created_at": datetime.now(timezone.utc).isoformat(),
-                        "platform_version": settings.app_version,
-                        "database_size": db_dump_path.stat().st_size,
-                        "config_size": config_backup_path.stat().st_size
-                    }
-                )
+            else:
+                logger.error(f"Backblaze B2 upload failed: {upload_results['backblaze_b2']['error']}")
+            
+            r2_location = upload_results["cloudflare_r2"]["location"]
+            if r2_location:
                 logger.info(f"Uploaded to Cloudflare R2: {r2_location}")
-            except Exception as e:
-                logger.error(f"Cloudflare R2 upload failed: {e}")
+            else:
+                logger.error(f"Cloudflare R2 upload failed: {upload_results['cloudflare_r2']['error']}")
             
             # Verify at least one upload succeeded
             if not b2_location and not r2_location:
@@ -438,13 +425,15 @@ class DisasterRecoveryService:
                 storage_locations.append({
                     "provider": "backblaze_b2",
                     "location": b2_location,
-                    "uploaded_at": datetime.now(timezone.utc).isoformat()
+                    "uploaded_at": datetime.now(timezone.utc).isoformat(),
+                    **self.cloud_storage.describe_uploaded_object("backblaze_b2", b2_location)
                 })
             if r2_location:
                 storage_locations.append({
                     "provider": "cloudflare_r2", 
                     "location": r2_location,
-                    "uploaded_at": datetime.now(timezone.utc).isoformat()
+                    "uploaded_at": datetime.now(timezone.utc).isoformat(),
+                    **self.cloud_storage.describe_uploaded_object("cloudflare_r2", r2_location)
                 })
             
             # Calculate total original size
@@ -466,7 +455,11 @@ class DisasterRecoveryService:
                 "encrypted_size": encrypted_path.stat().st_size,
                 "platform_version": settings.app_version,
                 "git_commit": self._get_git_commit_hash(),
-                "backup_components": ["database", "configuration"]
+                "backup_components": ["database", "configuration"],
+                "integrity": part_integrity,
+                "upload_throughput_mbps": {
+                    provider: result["throughput_mbps"] for provider, result in upload_results.items()
+                }
             }
             
             self.db.commit()
@@ -544,8 +537,9 @@ class DisasterRecoveryService:
             logger.error(f"Failed to list disaster recovery backups: {e}")
             raise
     
-    def verify_disaster_recovery_backup(self, backup_id: str, storage_provider: str = "backblaze_b2") -> bool:
-        """Verify disaster recovery backup integrity"""
+    def verify_disaster_recovery_backup(self, backup_id: str, storage_provider: str = "backblaze_b2",
+                                        mode: IntegrityCheckMode = IntegrityCheckMode.FULL) -> bool:
+        """Verify disaster recovery backup integrity without writing it to disk"""
         try:
             backup = self.db.query(BackupLog).filter(BackupLog.id == backup_id).first()
             if not backup:
@@ -555,34 +549,22 @@ class DisasterRecoveryService:
                 raise Exception(f"Backup {backup_id} is not a disaster recovery backup")
             
             # Find storage location for specified provider
-            storage_location = None
-            for location in backup.storage_locations or []:
-                if location.get("provider") == storage_provider:
-                    storage_location = location["location"]
-                    break
-            
+            storage_location = backup.get_storage_location(storage_provider)
             if not storage_location:
                 raise Exception(f"Backup not found in {storage_provider}")
             
-            # Download file to temporary location
-            temp_file = self.temp_dir / f"verify_dr_{backup_id}.tmp"
-            
-            if storage_provider == "backblaze_b2":
-                self.cloud_storage.download_from_b2(storage_location, temp_file)
-            elif storage_provider == "cloudflare_r2":
-                self.cloud_storage.download_from_r2(storage_location, temp_file)
-            else:
-                raise Exception(f"Unsupported storage provider: {storage_provider}")
-            
-            # Calculate checksum and compare
-            actual_checksum = self.calculate_checksum(temp_file)
-            expected_checksum = backup.checksum
-            
-            # Clean up temporary file
-            temp_file.unlink()
+            result = self.cloud_storage.verify_object_integrity(
+                storage_provider,
+                storage_location["location"],
+                backup.integrity_expectations(storage_provider),
+                mode=mode
+            )
             
-            is_valid = actual_checksum == expected_checksum
-            logger.info(f"Disaster recovery backup {backup_id} integrity check: {'PASSED' if is_valid else 'FAILED'}")
+            is_valid = result["is_valid"]
+            logger.info(
+                f"Disaster recovery backup {backup_id} integrity check ({result['mode']}): "
+                f"{'PASSED' if is_valid else 'FAILED'}"
+            )
             
             return is_valid
             
@@ -3,15 +3,18 @@ Invoice service for dual invoice system (General and Gold)
 """
 
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func, desc, asc
-from typing import List, Optional, Dict, Any, Tuple
+from sqlalchemy import and_, or_, func, desc, insert, select, Integer
+from typing import List, Optional, Dict, Any, NamedTuple, Tuple
 from decimal import Decimal
 from datetime import datetime, timedelta
 import uuid
 import logging
 
+from pydantic import ValidationError as SchemaValidationError
+
 from app.models.invoice import Invoice, InvoiceItem, InvoiceType, InvoiceStatus
 from app.models.customer import Customer
+from app.models.search import search_filter, search_rank
 from app.models.product import Product
 from app.models.tenant import Tenant
 from app.schemas.invoice import (
@@ -21,10 +24,50 @@ from app.schemas.invoice import (
 from app.core.exceptions import (
     ValidationError, NotFoundError, PermissionError, BusinessLogicError
 )
+from app.core.pagination import COUNT_EXACT, Page, count_rows, paginate
 
 logger = logging.getLogger(__name__)
 
 
+class BulkInvoiceResult(NamedTuple):
+    """Outcome of one row of a bulk invoice creation"""
+    index: int
+    invoice_id: Optional[uuid.UUID] = None
+    invoice_number: Optional[str] = None
+    error: Optional[str] = None
+
+
+def _insert_values(instance, now: datetime) -> Dict[str, Any]:
+    """
+    Column values of an unsaved model for a Core insert, with every column's default filled in
+    
+    Rows of one executemany insert must share the same keys, so unset columns get their
+    default here rather than being left to the database. The SQL defaults of invoices and
+    items are all now(), for which the transaction's timestamp is passed in.
+    """
+    values = {}
+    for column in instance.__table__.columns:
+        if column.computed is not None:
+            continue
+        value = getattr(instance, column.key)
+        if value is None:
+            if column.default is not None and column.default.is_scalar:
+                value = column.default.arg
+            elif column.default is not None and column.default.is_callable:
+                value = column.default.arg(None)
+            elif column.default is not None or column.server_default is not None:
+                value = now
+        values[column.key] = value
+    return values
+
+
+def _schema_error_message(error: SchemaValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}" if detail['loc'] else detail['msg']
+        for detail in error.errors()
+    )
+
+
 class InvoiceService:
     """Service class for invoice operations"""
     
@@ -33,17 +76,19 @@ class InvoiceService:
     
     def generate_invoice_number(self, tenant_id: uuid.UUID, invoice_type: InvoiceType) -> str:
         """Generate unique invoice number for tenant"""
+        return self.allocate_invoice_numbers(tenant_id, invoice_type, 1)[0]
+    
+    def allocate_invoice_numbers(self, tenant_id: uuid.UUID, invoice_type: InvoiceType, count: int) -> List[str]:
+        """
+        Reserve a block of consecutive invoice numbers for tenant
+        
+        Numbers continue from the highest one used this month, read through the
+        (tenant_id, invoice_number) index. A transaction-level advisory lock per tenant
+        keeps concurrent allocations from handing out the same block.
+        """
+        
         # Get current year and month
         now = datetime.utcnow()
-        year = now.year
-        month = now.month
-        
-        # Get count of invoices for this tenant in current month
-        count = self.db.query(Invoice).filter(
-            Invoice.tenant_id == tenant_id,
-            func.extract('year', Invoice.created_at) == year,
-            func.extract('month', Invoice.created_at) == month
-        ).count()
         
         # Generate number based on type
         if invoice_type == InvoiceType.GENERAL:
@@ -52,17 +97,19 @@ class InvoiceService:
             prefix = "GOLD"
         
         # Format: PREFIX-YYYY-MM-NNNN
-        invoice_number = f"{prefix}-{year:04d}-{month:02d}-{count + 1:04d}"
+        stem = f"{prefix}-{now.year:04d}-{now.month:02d}-"
         
-        # Ensure uniqueness
-        while self.db.query(Invoice).filter(
+        self.db.execute(select(func.pg_advisory_xact_lock(func.hashtext(f"invoice_number:{tenant_id}"))))
+        
+        last_sequence = self.db.query(
+            func.max(func.substr(Invoice.invoice_number, len(stem) + 1).cast(Integer))
+        ).filter(
             Invoice.tenant_id == tenant_id,
-            Invoice.invoice_number == invoice_number
-        ).first():
-            count += 1
-            invoice_number = f"{prefix}-{year:04d}-{month:02d}-{count + 1:04d}"
+            Invoice.invoice_number.startswith(stem),
+            Invoice.invoice_number.op('~')(f"^{stem}[0-9]+$")
+        ).scalar() or 0
         
-        return invoice_number
+        return [f"{stem}{sequence:04d}" for sequence in range(last_sequence + 1, last_sequence + count + 1)]
     
     def create_invoice(self, tenant_id: uuid.UUID, invoice_data: InvoiceCreate) -> Invoice:
         """Create a new invoice with items"""
@@ -163,6 +210,179 @@ class InvoiceService:
         
         return item
     
+    def create_invoices_bulk(self, tenant_id: uuid.UUID, invoices: List[Any]) -> List[BulkInvoiceResult]:
+        """
+        Create many invoices at once, reporting an outcome per row
+        
+        Rows may be InvoiceCreate objects or raw dicts. Customers and products of all
+        rows are checked with one IN query each, numbers are allocated in one block per
+        invoice type, and invoices and items are written with batched inserts. Invalid
+        rows are reported without stopping the rest; if the batched insert fails, rows
+        are retried one by one so only the failing ones are rejected.
+        """
+        
+        results: List[Optional[BulkInvoiceResult]] = [None] * len(invoices)
+        parsed: Dict[int, InvoiceCreate] = {}
+        
+        for index, invoice_data in enumerate(invoices):
+            if isinstance(invoice_data, InvoiceCreate):
+                parsed[index] = invoice_data
+                continue
+            try:
+                parsed[index] = InvoiceCreate.parse_obj(invoice_data)
+            except SchemaValidationError as e:
+                results[index] = BulkInvoiceResult(index, error=_schema_error_message(e))
+        
+        try:
+            # Validate customers and products of all rows in one query each
+            customer_ids = {invoice_data.customer_id for invoice_data in parsed.values()}
+            product_ids = {
+                item.product_id
+                for invoice_data in parsed.values()
+                for item in invoice_data.items
+                if item.product_id
+            }
+            
+            known_customers = {
+                customer_id for (customer_id,) in self.db.query(Customer.id).filter(
+                    Customer.tenant_id == tenant_id,
+                    Customer.is_active == True,
+                    Customer.id.in_(customer_ids)
+                )
+            } if customer_ids else set()
+            
+            known_products = {
+                product_id for (product_id,) in self.db.query(Product.id).filter(
+                    Product.tenant_id == tenant_id,
+                    Product.is_active == True,
+                    Product.id.in_(product_ids)
+                )
+            } if product_ids else set()
+            
+            for index, invoice_data in list(parsed.items()):
+                missing_product = next(
+                    (item.product_id for item in invoice_data.items
+                     if item.product_id and item.product_id not in known_products),
+                    None
+                )
+                if invoice_data.customer_id not in known_customers:
+                    results[index] = BulkInvoiceResult(index, error="Customer not found")
+                elif missing_product:
+                    results[index] = BulkInvoiceResult(index, error=f"Product {missing_product} not found")
+                else:
+                    continue
+                del parsed[index]
+            
+            # Allocate one block of numbers per invoice type
+            rows_by_type: Dict[InvoiceType, List[int]] = {}
+            for index, invoice_data in parsed.items():
+                model_invoice_type = InvoiceType.GENERAL if invoice_data.invoice_type.value == "GENERAL" else InvoiceType.GOLD
+                rows_by_type.setdefault(model_invoice_type, []).append(index)
+            
+            numbers: Dict[int, str] = {}
+            for model_invoice_type, indexes in rows_by_type.items():
+                numbers.update(zip(indexes, self.allocate_invoice_numbers(tenant_id, model_invoice_type, len(indexes))))
+            
+            now = self.db.execute(select(func.now())).scalar()
+            built = {
+                index: self._build_invoice_rows(tenant_id, invoice_data, numbers[index], now)
+                for index, invoice_data in parsed.items()
+            }
+            
+            try:
+                with self.db.begin_nested():
+                    self._insert_invoice_rows(list(built.values()))
+            except Exception as e:
+                logger.warning(f"Batched invoice insert failed for tenant {tenant_id}, inserting rows one by one: {e}")
+                for index in list(built):
+                    try:
+                        with self.db.begin_nested():
+                            self._insert_invoice_rows([built[index]])
+                    except Exception as row_error:
+                        results[index] = BulkInvoiceResult(index, error=str(getattr(row_error, "orig", row_error)))
+                        del built[index]
+            
+            for index, (invoice_row, _) in built.items():
+                results[index] = BulkInvoiceResult(
+                    index, invoice_id=invoice_row["id"], invoice_number=invoice_row["invoice_number"]
+                )
+            
+            self.db.commit()
+            
+            logger.info(f"Bulk created {len(built)} of {len(invoices)} invoices for tenant {tenant_id}")
+            return results
+        
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Failed to bulk create invoices for tenant {tenant_id}: {e}")
+            raise
+    
+    def _build_invoice_rows(
+        self,
+        tenant_id: uuid.UUID,
+        invoice_data: InvoiceCreate,
+        invoice_number: str,
+        now: datetime
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Insert values for an invoice and its items, with totals computed by the models"""
+        
+        model_invoice_type = InvoiceType.GENERAL if invoice_data.invoice_type.value == "GENERAL" else InvoiceType.GOLD
+        
+        # Unsaved instances reuse the models' total calculations
+        invoice = Invoice(
+            id=uuid.uuid4(),
+            tenant_id=tenant_id,
+            customer_id=invoice_data.customer_id,
+            invoice_number=invoice_number,
+            invoice_type=model_invoice_type,
+            discount_amount=invoice_data.discount_amount or Decimal('0'),
+            gold_price_at_creation=invoice_data.gold_price_at_creation,
+            is_installment=invoice_data.is_installment,
+            installment_type=invoice_data.installment_type.value if invoice_data.installment_type else "none",
+            due_date=invoice_data.due_date,
+            is_shareable=invoice_data.is_shareable,
+            notes=invoice_data.notes,
+            customer_notes=invoice_data.customer_notes,
+            terms_and_conditions=invoice_data.terms_and_conditions,
+            total_amount=Decimal('0')
+        )
+        
+        for item_data in invoice_data.items:
+            item = InvoiceItem(
+                id=uuid.uuid4(),
+                invoice_id=invoice.id,
+                product_id=item_data.product_id,
+                description=item_data.description,
+                quantity=item_data.quantity,
+                unit_price=item_data.unit_price,
+                tax_rate=item_data.tax_rate or Decimal('0'),
+                discount_rate=item_data.discount_rate or Decimal('0'),
+                discount_amount=item_data.discount_amount or Decimal('0'),
+                weight=item_data.weight,
+                labor_fee=item_data.labor_fee,
+                profit=item_data.profit,
+                vat_amount=item_data.vat_amount,
+                gold_purity=item_data.gold_purity,
+                notes=item_data.notes,
+                line_total=Decimal('0')
+            )
+            item.calculate_totals()
+            invoice.items.append(item)
+        
+        invoice.calculate_totals()
+        
+        if invoice.is_shareable:
+            invoice.generate_qr_token()
+        
+        return _insert_values(invoice, now), [_insert_values(item, now) for item in invoice.items]
+    
+    def _insert_invoice_rows(self, rows: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]):
+        """Write invoices, then their items, each as one executemany insert"""
+        if not rows:
+            return
+        self.db.execute(insert(Invoice.__table__), [invoice_row for invoice_row, _ in rows])
+        self.db.execute(insert(InvoiceItem.__table__), [item_row for _, item_rows in rows for item_row in item_rows])
+    
     def get_invoice(self, tenant_id: uuid.UUID, invoice_id: uuid.UUID) -> Optional[Invoice]:
         """Get invoice by ID for tenant"""
         return self.db.query(Invoice).options(
@@ -197,6 +417,21 @@ class InvoiceService:
         sort_order: str = "desc"
     ) -> Tuple[List[Invoice], int]:
         """Get filtered and paginated invoices for tenant"""
+        page = self.get_invoices_page(tenant_id, filters, skip, limit, sort_by, sort_order)
+        return page.items, page.total
+    
+    def get_invoices_page(
+        self,
+        tenant_id: uuid.UUID,
+        filters: Optional[InvoiceFilter] = None,
+        skip: int = 0,
+        limit: int = 100,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        cursor: Optional[str] = None,
+        count: str = COUNT_EXACT
+    ) -> Page:
+        """Get one page of filtered invoices for tenant and the cursor of the next"""
         
         query = self.db.query(Invoice).options(
             joinedload(Invoice.customer)
@@ -249,29 +484,38 @@ class InvoiceService:
                 query = query.filter(Invoice.total_amount <= filters.max_amount)
             
             if filters.search:
-                search_term = f"%{filters.search}%"
-                query = query.join(Customer).filter(
+                # Invoice number/notes or the customer's searchable text; both sides are trigram indexed
+                matching_customers = self.db.query(Customer.id).filter(
+                    Customer.tenant_id == tenant_id,
+                    search_filter(Customer.search_text, filters.search)
+                )
+                query = query.filter(
                     or_(
-                        Invoice.invoice_number.ilike(search_term),
-                        Customer.name.ilike(search_term),
-                        Invoice.notes.ilike(search_term)
+                        search_filter(Invoice.search_text, filters.search),
+                        Invoice.customer_id.in_(matching_customers.scalar_subquery())
                     )
                 )
         
-        # Get total count
-        total = query.count()
-        
-        # Apply sorting
-        if hasattr(Invoice, sort_by):
-            if sort_order.lower() == "desc":
-                query = query.order_by(desc(getattr(Invoice, sort_by)))
-            else:
-                query = query.order_by(asc(getattr(Invoice, sort_by)))
-        
-        # Apply pagination
-        invoices = query.offset(skip).limit(limit).all()
-        
-        return invoices, total
+        # Relevance is not a stable key, so relevance pages stay offset based
+        if sort_by == "relevance" and filters and filters.search:
+            if cursor:
+                raise ValidationError("Cursor pagination is not available when sorting by relevance")
+        
+            total = count_rows(query, count)
+            invoices = query.order_by(
+                desc(search_rank(Invoice.search_text, filters.search)), desc(Invoice.created_at), desc(Invoice.id)
+            ).offset(skip).limit(limit).all()
+            return Page(items=invoices, total=total, next_cursor=None)
+        
+        sort_field = getattr(Invoice, sort_by) if sort_by in Invoice.__table__.columns else Invoice.created_at
+        
+        return paginate(
+            query, sort_field, Invoice.id, limit,
+            descending=sort_order.lower() == "desc",
+            cursor=cursor,
+            offset=skip,
+            count=count
+        )
     
     def update_invoice(
         self, 
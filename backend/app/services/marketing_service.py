@@ -4,7 +4,7 @@ Marketing and communication service
 
 from typing import Optional, Dict, Any, List, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, text
+from sqlalchemy import String, and_, func, text, update, insert, literal, true
 from datetime import datetime, timedelta
 import logging
 import uuid
@@ -14,13 +14,17 @@ from app.models.marketing import (
     SegmentCustomer, CommunicationPreference,
     CampaignStatus, CampaignType, SegmentationType
 )
-from app.models.customer import Customer, CustomerStatus, CustomerType
+from app.models.customer import Customer, CustomerType
 from app.models.notification import NotificationLog, NotificationType, NotificationStatus
 from app.services.notification_service import NotificationService
+from app.services.notification_dispatch_service import DispatchResult
+from app.services.segment_membership_service import segment_predicate
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+CUSTOMER_INSERT_CHUNK_SIZE = 5000  # Customers copied per INSERT ... SELECT into recipients or segments
+
 
 class MarketingService:
     """Service for marketing campaigns and customer segmentation"""
@@ -59,19 +63,20 @@ class MarketingService:
         self.db.commit()
         self.db.refresh(campaign)
         
-        # Calculate target customers
-        target_customers = self._get_filtered_customers(tenant_id, customer_filter or {})
-        campaign.target_customer_count = len(target_customers)
-        
-        # Create campaign recipients
-        for customer in target_customers:
-            recipient = CampaignRecipient(
-                campaign_id=campaign.id,
-                customer_id=customer.id,
-                recipient_email=customer.email if campaign_type in [CampaignType.EMAIL, CampaignType.MIXED] else None,
-                recipient_phone=customer.mobile or customer.phone if campaign_type in [CampaignType.SMS, CampaignType.MIXED] else None
-            )
-            self.db.add(recipient)
+        # Create campaign recipients for the target customers inside the database
+        no_address = literal(None, type_=String)
+        campaign.target_customer_count = self._insert_filtered_customers(
+            CampaignRecipient, tenant_id, customer_filter or {},
+            {
+                "campaign_id": literal(campaign.id, type_=CampaignRecipient.campaign_id.type),
+                "recipient_email": Customer.email if campaign_type in [CampaignType.EMAIL, CampaignType.MIXED] else no_address,
+                "recipient_phone": (
+                    func.coalesce(func.nullif(Customer.mobile, ''), Customer.phone)
+                    if campaign_type in [CampaignType.SMS, CampaignType.MIXED] else no_address
+                ),
+                "status": literal("pending")
+            }
+        )
         
         self.db.commit()
         
@@ -179,14 +184,6 @@ class MarketingService:
         if not campaign:
             return {}
         
-        # Get recipient statistics
-        recipient_stats = self.db.query(
-            CampaignRecipient.status,
-            func.count(CampaignRecipient.id).label('count')
-        ).filter(
-            CampaignRecipient.campaign_id == campaign_id
-        ).group_by(CampaignRecipient.status).all()
-        
         stats = {
             "campaign_id": campaign_id,
             "name": campaign.name,
@@ -200,11 +197,69 @@ class MarketingService:
             "created_at": campaign.created_at,
             "started_at": campaign.started_at,
             "completed_at": campaign.completed_at,
-            "recipient_breakdown": {stat.status: stat.count for stat in recipient_stats}
+            "recipient_breakdown": self.get_recipient_status_counts(campaign_id)
         }
         
         return stats
     
+    def get_recipient_status_counts(self, campaign_id: str) -> Dict[str, int]:
+        """Count campaign recipients by delivery status"""
+        
+        recipient_stats = self.db.query(
+            CampaignRecipient.status,
+            func.count(CampaignRecipient.id).label('count')
+        ).filter(
+            CampaignRecipient.campaign_id == campaign_id
+        ).group_by(CampaignRecipient.status).all()
+        
+        return {stat.status: stat.count for stat in recipient_stats}
+    
+    def claim_pending_recipients(
+        self,
+        campaign_id: str,
+        after_id: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[CampaignRecipient]:
+        """
+        Claim the next keyset chunk of pending recipients for sending
+        
+        Claimed rows move to 'sending' and are committed before anything is sent, so a
+        chunk re-run after a worker restart skips them instead of sending them twice.
+        """
+        
+        chunk = self.db.query(CampaignRecipient.id).filter(
+            CampaignRecipient.campaign_id == campaign_id,
+            CampaignRecipient.status == "pending"
+        )
+        if after_id:
+            chunk = chunk.filter(CampaignRecipient.id > after_id)
+        chunk = chunk.order_by(CampaignRecipient.id).limit(limit).with_for_update(skip_locked=True)
+        
+        recipients = self.db.scalars(
+            update(CampaignRecipient)
+            .where(CampaignRecipient.id.in_(chunk.scalar_subquery()))
+            .values(status="sending")
+            .returning(CampaignRecipient)
+            .execution_options(synchronize_session=False)
+        ).all()
+        self.db.commit()
+        
+        return sorted(recipients, key=lambda recipient: recipient.id)
+    
+    def fail_interrupted_recipients(self, campaign_id: str) -> int:
+        """Mark recipients left in 'sending' by an interrupted chunk as failed rather than resend them"""
+        
+        result = self.db.execute(
+            update(CampaignRecipient)
+            .where(
+                CampaignRecipient.campaign_id == campaign_id,
+                CampaignRecipient.status == "sending"
+            )
+            .values(status="failed", error_message="Sending was interrupted; delivery is unknown")
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+    
     # Customer Segmentation
     def create_segment(
         self,
@@ -343,10 +398,10 @@ class MarketingService:
         ).offset(offset).limit(limit).all()
     
     def refresh_automatic_segment(self, tenant_id: str, segment_id: str) -> bool:
-        """Refresh an automatic segment based on its criteria"""
+        """Rebuild an automatic or dynamic segment from scratch based on its criteria"""
         
         segment = self.get_segment(tenant_id, segment_id)
-        if not segment or segment.segmentation_type != SegmentationType.AUTOMATIC:
+        if not segment or segment.segmentation_type not in [SegmentationType.AUTOMATIC, SegmentationType.DYNAMIC]:
             return False
         
         # Clear existing customers
@@ -546,76 +601,69 @@ class MarketingService:
         return tracking_data
     
     # Private helper methods
-    def _get_filtered_customers(
+    def _filtered_customer_query(
         self,
         tenant_id: str,
         filter_criteria: Dict[str, Any]
-    ) -> List[Customer]:
-        """Get customers based on filter criteria"""
-        
-        query = self.db.query(Customer).filter(
-            and_(
-                Customer.tenant_id == tenant_id,
-                Customer.status == CustomerStatus.ACTIVE
-            )
-        )
-        
-        # Apply filters
-        if filter_criteria.get('customer_type'):
-            query = query.filter(Customer.customer_type == filter_criteria['customer_type'])
-        
-        if filter_criteria.get('tags'):
-            tags = filter_criteria['tags']
-            if isinstance(tags, list):
-                # Customer must have all specified tags
-                for tag in tags:
-                    query = query.filter(Customer.tags.contains([tag]))
-        
-        if filter_criteria.get('min_total_purchases'):
-            query = query.filter(Customer.total_purchases >= filter_criteria['min_total_purchases'])
-        
-        if filter_criteria.get('max_total_purchases'):
-            query = query.filter(Customer.total_purchases <= filter_criteria['max_total_purchases'])
-        
-        if filter_criteria.get('has_debt'):
-            if filter_criteria['has_debt']:
-                query = query.filter(or_(Customer.total_debt > 0, Customer.total_gold_debt > 0))
-            else:
-                query = query.filter(and_(Customer.total_debt == 0, Customer.total_gold_debt == 0))
-        
-        if filter_criteria.get('last_purchase_days'):
-            days_ago = datetime.utcnow() - timedelta(days=filter_criteria['last_purchase_days'])
-            query = query.filter(Customer.last_purchase_at >= days_ago)
+    ):
+        """Build the query for customers matching filter criteria"""
         
-        if filter_criteria.get('city'):
-            query = query.filter(Customer.city == filter_criteria['city'])
-        
-        # Exclude customers who opted out of marketing
-        query = query.outerjoin(CommunicationPreference).filter(
-            or_(
-                CommunicationPreference.id.is_(None),  # No preferences set (default allow)
-                and_(
-                    CommunicationPreference.email_marketing == True,
-                    CommunicationPreference.sms_marketing == True
-                )
-            )
+        query = self.db.query(Customer).outerjoin(CommunicationPreference).filter(
+            Customer.tenant_id == tenant_id,
+            segment_predicate(filter_criteria)
         )
         
-        return query.all()
+        return query
+    
+    def _insert_filtered_customers(
+        self,
+        model,
+        tenant_id: str,
+        filter_criteria: Dict[str, Any],
+        values: Dict[str, Any]
+    ) -> int:
+        """
+        Copy matching customers into a per-customer table with INSERT ... SELECT
+        
+        Customers are walked in keyset chunks by id, so neither the customer rows nor a
+        single long-running insert has to cover the whole tenant at once. values maps the
+        remaining target columns to SQL expressions over Customer.
+        """
+        
+        query = self._filtered_customer_query(tenant_id, filter_criteria)
+        table = model.__table__
+        columns = ["id", "customer_id", "is_active"] + list(values)
+        
+        inserted = 0
+        last_customer_id = None
+        while True:
+            chunk = query
+            if last_customer_id is not None:
+                chunk = chunk.filter(Customer.id > last_customer_id)
+            chunk = chunk.with_entities(
+                func.gen_random_uuid(), Customer.id, true(), *values.values()
+            ).order_by(Customer.id).limit(CUSTOMER_INSERT_CHUNK_SIZE)
+            
+            customer_ids = self.db.scalars(
+                insert(table).from_select(columns, chunk.statement).returning(table.c.customer_id)
+            ).all()
+            inserted += len(customer_ids)
+            
+            if len(customer_ids) < CUSTOMER_INSERT_CHUNK_SIZE:
+                return inserted
+            last_customer_id = max(customer_ids)
     
     def _populate_automatic_segment(self, segment: CustomerSegment):
         """Populate automatic segment based on criteria"""
         
-        customers = self._get_filtered_customers(segment.tenant_id, segment.filter_criteria)
-        
-        for customer in customers:
-            segment_customer = SegmentCustomer(
-                segment_id=segment.id,
-                customer_id=customer.id,
-                added_by="automatic"
-            )
-            self.db.add(segment_customer)
-        
+        self._insert_filtered_customers(
+            SegmentCustomer, segment.tenant_id, segment.filter_criteria,
+            {
+                "segment_id": literal(segment.id, type_=SegmentCustomer.segment_id.type),
+                "added_at": func.now(),
+                "added_by": literal("automatic")
+            }
+        )
         self.db.commit()
         
         # Update customer count
@@ -629,6 +677,51 @@ class MarketingService:
             CommunicationPreference.customer_id == recipient.customer_id
         ).first()
         
+        return self._preferences_allow(recipient, preferences, message_type)
+    
+    def get_sendable_recipient_ids(self, recipients: List[CampaignRecipient], message_type: str) -> set:
+        """Check a batch of recipients against their preferences with a single query"""
+        
+        customer_ids = {recipient.customer_id for recipient in recipients}
+        preferences_by_customer = {
+            preferences.customer_id: preferences
+            for preferences in self.db.query(CommunicationPreference).filter(
+                CommunicationPreference.customer_id.in_(customer_ids)
+            )
+        } if customer_ids else {}
+        
+        return {
+            recipient.id
+            for recipient in recipients
+            if self._preferences_allow(recipient, preferences_by_customer.get(recipient.customer_id), message_type)
+        }
+    
+    def record_recipient_results(self, results: List[DispatchResult]):
+        """Write campaign delivery outcomes back with bulk UPDATEs by primary key"""
+        
+        now = datetime.utcnow()
+        sent = [
+            {"id": result.key, "status": "sent", "sent_at": now, "provider_message_id": result.provider_id}
+            for result in results if result.success
+        ]
+        failed = [
+            {"id": result.key, "status": "failed", "error_message": result.error or "Sending failed"}
+            for result in results if not result.success
+        ]
+        
+        if sent:
+            self.db.execute(update(CampaignRecipient), sent)
+        if failed:
+            self.db.execute(update(CampaignRecipient), failed)
+    
+    def _preferences_allow(
+        self,
+        recipient: CampaignRecipient,
+        preferences: Optional[CommunicationPreference],
+        message_type: str
+    ) -> bool:
+        """Apply a customer's communication preferences to one recipient"""
+        
         if not preferences:
             # No preferences set, default to allow
             return True
@@ -0,0 +1,363 @@
+"""
+Batched notification dispatch
+Messages are grouped into provider-sized batches; each batch reuses one SMTP connection
+or HTTP session, and batches are sent concurrently within per-provider rate limits
+"""
+
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+import logging
+
+import requests
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+EMAIL = "email"
+SMS = "sms"
+
+# Token bucket shared through Redis: refills by elapsed server time, takes one token if
+# available and otherwise returns how long to wait for the next one
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(wait)
+"""
+RATE_LIMIT_KEY_PREFIX = "notification_rate"
+
+
+class DispatchMessage(NamedTuple):
+    """One outgoing message; key identifies the row its delivery status is written back to"""
+    key: Any
+    channel: str
+    recipient: str
+    body: str
+    subject: Optional[str] = None
+    html_body: Optional[str] = None
+
+
+class DispatchResult(NamedTuple):
+    """Outcome of sending one message"""
+    key: Any
+    success: bool
+    provider_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+def build_email_message(recipient: str, subject: str, body: str, html_body: Optional[str] = None) -> MIMEMultipart:
+    """Build a plain text email with an optional HTML alternative"""
+    msg = MIMEMultipart('alternative')
+    msg['From'] = f"{settings.email_from_name} <{settings.email_from_email}>"
+    msg['To'] = recipient
+    msg['Subject'] = subject or ""
+    
+    msg.attach(MIMEText(body, 'plain', 'utf-8'))
+    if html_body:
+        msg.attach(MIMEText(html_body, 'html', 'utf-8'))
+    
+    return msg
+
+
+class RateLimiter:
+    """Token bucket in Redis, shared by every worker and process sending through one provider.
+    
+    While Redis is unreachable each process falls back to its own in-memory bucket.
+    """
+    
+    def __init__(self, rate_per_second: float, key: str):
+        self.rate = rate_per_second
+        self.capacity = max(1.0, float(rate_per_second))
+        self.key = key
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+        self._script = None
+        self._using_local_bucket = False
+    
+    def _redis(self):
+        # Imported on first use so dispatching without a rate limit needs no Redis connection
+        from app.core.redis_client import redis_client
+        return redis_client.redis_client
+    
+    def _take_shared(self) -> float:
+        if self._script is None:
+            self._script = self._redis().register_script(TOKEN_BUCKET_SCRIPT)
+        return float(self._script(keys=[self.key], args=[self.rate, self.capacity]))
+    
+    def _take_local(self) -> float:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+    
+    def acquire(self):
+        """Block until one message may be sent"""
+        if self.rate <= 0:
+            return
+        
+        while True:
+            try:
+                wait = self._take_shared()
+                self._using_local_bucket = False
+            except Exception as e:
+                if not self._using_local_bucket:
+                    logger.warning(f"Shared rate limit {self.key} unavailable, limiting per process: {e}")
+                    self._using_local_bucket = True
+                wait = self._take_local()
+                
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+class SMTPTransport:
+    """Sends a batch of emails over one authenticated SMTP connection"""
+    
+    def __init__(self, host: str, port: int, username: Optional[str] = None, password: Optional[str] = None,
+                 use_tls: bool = True, timeout: int = 30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.server = None
+    
+    def _connect(self):
+        self.server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            self.server.starttls()
+        if self.username and self.password:
+            self.server.login(self.username, self.password)
+    
+    def __enter__(self):
+        self._connect()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.server.quit()
+        except Exception:
+            self.server.close()
+    
+    def send(self, message: DispatchMessage) -> DispatchResult:
+        email_message = build_email_message(message.recipient, message.subject, message.body, message.html_body)
+        
+        try:
+            try:
+                self.server.send_message(email_message)
+            except smtplib.SMTPServerDisconnected:
+                # Servers drop long-lived connections; reconnect once and carry on with the batch
+                self._connect()
+                self.server.send_message(email_message)
+            
+            return DispatchResult(message.key, True)
+        
+        except (smtplib.SMTPException, OSError) as e:
+            logger.error(f"Failed to send email to {message.recipient}: {e}")
+            return DispatchResult(message.key, False, error=str(e))
+
+
+class HTTPSMSTransport:
+    """Sends a batch of SMS through the gateway API over one keep-alive HTTP session"""
+    
+    def __init__(self, api_url: str, api_key: str, timeout: int = 30):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.session = None
+    
+    def __enter__(self):
+        self.session = requests.Session()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.session.close()
+    
+    def send(self, message: DispatchMessage) -> DispatchResult:
+        payload = {
+            "api_key": self.api_key,
+            "phone": message.recipient,
+            "message": message.body
+        }
+        
+        try:
+            response = self.session.post(self.api_url, json=payload, timeout=self.timeout)
+            
+            if response.status_code == 200:
+                return DispatchResult(message.key, True, provider_id=response.json().get("message_id"))
+            
+            logger.error(f"SMS API error: {response.status_code} - {response.text}")
+            return DispatchResult(message.key, False, error=f"SMS API error: {response.status_code}")
+        
+        except (requests.RequestException, ValueError) as e:
+            logger.error(f"Failed to send SMS to {message.recipient}: {e}")
+            return DispatchResult(message.key, False, error=str(e))
+
+
+class MockTransport:
+    """Logs messages instead of sending them, used when a provider is not configured"""
+    
+    def __init__(self, channel: str):
+        self.channel = channel
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+    
+    def send(self, message: DispatchMessage) -> DispatchResult:
+        logger.info(f"Mock {self.channel} sent to {message.recipient}")
+        return DispatchResult(message.key, True)
+
+
+def default_transport_factories() -> Dict[str, Callable]:
+    """Transport factories for the configured providers, falling back to mock mode"""
+    if settings.email_smtp_host and settings.email_username and settings.email_password:
+        email_factory = lambda: SMTPTransport(
+            settings.email_smtp_host, settings.email_smtp_port,
+            settings.email_username, settings.email_password
+        )
+    else:
+        email_factory = lambda: MockTransport(EMAIL)
+    
+    if settings.sms_api_key and settings.sms_api_url:
+        sms_factory = lambda: HTTPSMSTransport(settings.sms_api_url, settings.sms_api_key)
+    else:
+        sms_factory = lambda: MockTransport(SMS)
+    
+    return {EMAIL: email_factory, SMS: sms_factory}
+
+
+class NotificationDispatcher:
+    """Sends messages in provider-sized batches, concurrently and within provider rate limits"""
+    
+    def __init__(
+        self,
+        transport_factories: Optional[Dict[str, Callable]] = None,
+        batch_sizes: Optional[Dict[str, int]] = None,
+        concurrency: Optional[Dict[str, int]] = None,
+        rate_limits: Optional[Dict[str, float]] = None,
+        progress_interval: Optional[float] = None,
+        rate_limit_key_prefix: str = RATE_LIMIT_KEY_PREFIX
+    ):
+        self.transport_factories = transport_factories or default_transport_factories()
+        self.batch_sizes = batch_sizes or {
+            EMAIL: settings.notification_email_batch_size,
+            SMS: settings.notification_sms_batch_size
+        }
+        self.concurrency = concurrency or {
+            EMAIL: settings.notification_email_concurrency,
+            SMS: settings.notification_sms_concurrency
+        }
+        rate_limits = rate_limits or {
+            EMAIL: settings.notification_email_rate_limit,
+            SMS: settings.notification_sms_rate_limit
+        }
+        self.rate_limiters = {
+            channel: RateLimiter(rate, f"{rate_limit_key_prefix}:{channel}") for channel, rate in rate_limits.items()
+        }
+        self.progress_interval = (
+            settings.notification_progress_interval_seconds if progress_interval is None else progress_interval
+        )
+    
+    def _send_batch(self, channel: str, batch: List[DispatchMessage]) -> List[DispatchResult]:
+        """Send one batch over a single provider connection"""
+        results = []
+        rate_limiter = self.rate_limiters.get(channel)
+        
+        try:
+            with self.transport_factories[channel]() as transport:
+                for message in batch:
+                    if rate_limiter:
+                        rate_limiter.acquire()
+                    results.append(transport.send(message))
+        
+        except Exception as e:
+            # The connection itself failed; everything not yet sent in the batch fails with it
+            logger.error(f"{channel} batch of {len(batch)} failed: {e}")
+            results.extend(DispatchResult(message.key, False, error=str(e)) for message in batch[len(results):])
+        
+        return results
+    
+    def dispatch(
+        self,
+        messages: Iterable[DispatchMessage],
+        on_progress: Optional[Callable[[int, int], None]] = None
+    ) -> List[DispatchResult]:
+        """
+        Send all messages and return one result per message
+        
+        on_progress(done, total) is called at most once per progress interval,
+        and always after the last batch.
+        """
+        batches = []
+        pending = {}
+        for message in messages:
+            if message.channel not in self.transport_factories:
+                raise ValueError(f"Unsupported notification channel: {message.channel}")
+            
+            batch = pending.setdefault(message.channel, [])
+            batch.append(message)
+            if len(batch) >= self.batch_sizes[message.channel]:
+                batches.append((message.channel, batch))
+                pending[message.channel] = []
+        batches.extend((channel, batch) for channel, batch in pending.items() if batch)
+        
+        total = sum(len(batch) for _, batch in batches)
+        results = []
+        if not total:
+            return results
+        
+        executors = {
+            channel: ThreadPoolExecutor(max_workers=max(1, self.concurrency.get(channel, 1)))
+            for channel in {channel for channel, _ in batches}
+        }
+        
+        try:
+            futures = [executors[channel].submit(self._send_batch, channel, batch) for channel, batch in batches]
+            
+            last_progress_at = time.monotonic()
+            for future in as_completed(futures):
+                results.extend(future.result())
+                
+                now = time.monotonic()
+                if on_progress and (len(results) == total or now - last_progress_at >= self.progress_interval):
+                    on_progress(len(results), total)
+                    last_progress_at = now
+        
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True)
+        
+        sent = sum(1 for result in results if result.success)
+        logger.info(f"Dispatched {total} notifications in {len(batches)} batches: {sent} sent, {total - sent} failed")
+        return results
@@ -4,12 +4,13 @@ Notification service for email and SMS communications
 
 from typing import Optional, Dict, Any, List
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, update, delete, insert
 from datetime import datetime, timedelta
 import logging
 import smtplib
 import requests
 import json
+import uuid
 
 from app.models.notification import (
     NotificationTemplate, NotificationLog, NotificationQueue,
@@ -20,9 +21,17 @@ from app.models.installment import Installment, InstallmentStatus
 from app.models.customer import Customer
 from app.models.tenant import Tenant
 from app.core.config import settings
+from app.services.notification_dispatch_service import (
+    DispatchMessage, DispatchResult, NotificationDispatcher, EMAIL, SMS
+)
+from app.services.notification_template_cache import template_cache
 
 logger = logging.getLogger(__name__)
 
+NOTIFICATION_MAX_RETRIES = 3
+NOTICE_BATCH_SIZE = 1000  # Installment notices rendered and inserted per batch
+OVERDUE_NOTICE_DAYS = (3, 15, 30)  # Days overdue at which a notice goes out
+
 
 class NotificationService:
     """Service for managing notifications and communications"""
@@ -184,7 +193,7 @@ class NotificationService:
         
         # Render template or use default content
         if template:
-            rendered = template.render(variables)
+            rendered = template_cache.render(template, variables)
             subject = rendered["subject"]
             body = rendered["body"]
         else:
@@ -247,7 +256,7 @@ class NotificationService:
         
         # Render template or use default content
         if template:
-            rendered = template.render(variables)
+            rendered = template_cache.render(template, variables)
             subject = rendered["subject"]
             body = rendered["body"]
         else:
@@ -296,28 +305,9 @@ class NotificationService:
             trigger_event="installment_reminder"
         )
         
-        # Prepare template variables
-        variables = {
-            "customer_name": customer.name,
-            "invoice_number": invoice.invoice_number,
-            "installment_number": str(installment.installment_number),
-            "due_date": installment.due_date.strftime("%Y-%m-%d"),
-            "amount_due": str(installment.remaining_amount) if installment.installment_type.value == "general" else f"{installment.remaining_gold_weight} گرم",
-            "days_until_due": str(days_before_due),
-            "company_name": "HesaabPlus"
-        }
-        
-        # Render template or use default content
-        if template:
-            rendered = template.render(variables)
-            subject = rendered["subject"]
-            body = rendered["body"]
-        else:
-            subject = f"یادآوری قسط - فاکتور {invoice.invoice_number}"
-            if installment.installment_type.value == "general":
-                body = f"مشتری گرامی {customer.name}،\n\nقسط شماره {installment.installment_number} فاکتور {invoice.invoice_number} به مبلغ {installment.remaining_amount} تومان تا {days_before_due} روز دیگر سررسید می‌شود.\n\nتاریخ سررسید: {installment.due_date.strftime('%Y-%m-%d')}\n\nبا تشکر"
-            else:
-                body = f"مشتری گرامی {customer.name}،\n\nقسط شماره {installment.installment_number} فاکتور {invoice.invoice_number} به وزن {installment.remaining_gold_weight} گرم تا {days_before_due} روز دیگر سررسید می‌شود.\n\nتاریخ سررسید: {installment.due_date.strftime('%Y-%m-%d')}\n\nبا تشکر"
+        subject, body, variables = self._render_installment_notice(
+            "installment", template, installment, invoice, customer, invoice.tenant, days_before_due
+        )
         
         # Create notification log
         recipient_email = customer.email if notification_type == NotificationType.EMAIL else None
@@ -361,28 +351,9 @@ class NotificationService:
             trigger_event="overdue_notice"
         )
         
-        # Prepare template variables
-        variables = {
-            "customer_name": customer.name,
-            "invoice_number": invoice.invoice_number,
-            "installment_number": str(installment.installment_number),
-            "due_date": installment.due_date.strftime("%Y-%m-%d"),
-            "amount_due": str(installment.remaining_amount) if installment.installment_type.value == "general" else f"{installment.remaining_gold_weight} گرم",
-            "days_overdue": str(days_overdue),
-            "company_name": "HesaabPlus"
-        }
-        
-        # Render template or use default content
-        if template:
-            rendered = template.render(variables)
-            subject = rendered["subject"]
-            body = rendered["body"]
-        else:
-            subject = f"اخطار عدم پرداخت - فاکتور {invoice.invoice_number}"
-            if installment.installment_type.value == "general":
-                body = f"مشتری گرامی {customer.name}،\n\nقسط شماره {installment.installment_number} فاکتور {invoice.invoice_number} به مبلغ {installment.remaining_amount} تومان از تاریخ سررسید {days_overdue} روز گذشته است.\n\nلطفاً در اسرع وقت نسبت به پرداخت اقدام فرمایید.\n\nبا تشکر"
-            else:
-                body = f"مشتری گرامی {customer.name}،\n\nقسط شماره {installment.installment_number} فاکتور {invoice.invoice_number} به وزن {installment.remaining_gold_weight} گرم از تاریخ سررسید {days_overdue} روز گذشته است.\n\nلطفاً در اسرع وقت نسبت به پرداخت اقدام فرمایید.\n\nبا تشکر"
+        subject, body, variables = self._render_installment_notice(
+            "overdue", template, installment, invoice, customer, invoice.tenant, days_overdue
+        )
         
         # Create notification log
         recipient_email = customer.email if notification_type == NotificationType.EMAIL else None
@@ -403,6 +374,229 @@ class NotificationService:
             priority=2  # Higher priority for overdue notices
         )
     
+    def _render_installment_notice(
+        self,
+        reference_type: str,
+        template: Optional[NotificationTemplate],
+        installment: Installment,
+        invoice: Invoice,
+        customer: Customer,
+        tenant: Optional[Tenant],
+        days: int
+    ):
+        """Build the subject, body and variables of an installment reminder or overdue notice"""
+        
+        is_general = installment.installment_type.value == "general"
+        
+        # Prepare template variables
+        variables = {
+            "customer_name": customer.name,
+            "invoice_number": invoice.invoice_number,
+            "installment_number": str(installment.installment_number),
+            "due_date": installment.due_date.strftime("%Y-%m-%d"),
+            "amount_due": str(installment.remaining_amount) if is_general else f"{installment.remaining_gold_weight} گرم",
+            "company_name": tenant.name if tenant and tenant.name else "HesaabPlus"
+        }
+        if reference_type == "overdue":
+            variables["days_overdue"] = str(days)
+        else:
+            variables["days_until_due"] = str(days)
+        
+        # Render template or use default content
+        if template:
+            rendered = template_cache.render(template, variables)
+            return rendered["subject"], rendered["body"], variables
+        
+        if is_general:
+            amount = f"به مبلغ {installment.remaining_amount} تومان"
+        else:
+            amount = f"به وزن {installment.remaining_gold_weight} گرم"
+        
+        if reference_type == "overdue":
+            subject = f"اخطار عدم پرداخت - فاکتور {invoice.invoice_number}"
+            body = f"مشتری گرامی {customer.name}،\n\nقسط شماره {installment.installment_number} فاکتور {invoice.invoice_number} {amount} از تاریخ سررسید {days} روز گذشته است.\n\nلطفاً در اسرع وقت نسبت به پرداخت اقدام فرمایید.\n\nبا تشکر"
+        else:
+            subject = f"یادآوری قسط - فاکتور {invoice.invoice_number}"
+            body = f"مشتری گرامی {customer.name}،\n\nقسط شماره {installment.installment_number} فاکتور {invoice.invoice_number} {amount} تا {days} روز دیگر سررسید می‌شود.\n\nتاریخ سررسید: {installment.due_date.strftime('%Y-%m-%d')}\n\nبا تشکر"
+        
+        return subject, body, variables
+    
+    def get_templates_for_tenants(
+        self,
+        tenant_ids,
+        template_type: NotificationType,
+        trigger_event: str
+    ) -> Dict[Any, NotificationTemplate]:
+        """Resolve the template get_template would pick for each tenant, with one query"""
+        
+        templates = {}
+        if not tenant_ids:
+            return templates
+        
+        candidates = self.db.query(NotificationTemplate).filter(
+            NotificationTemplate.tenant_id.in_(tenant_ids),
+            NotificationTemplate.template_type == template_type,
+            NotificationTemplate.is_active == True,
+            or_(
+                NotificationTemplate.trigger_event == trigger_event,
+                NotificationTemplate.is_default == True
+            )
+        ).all()
+        
+        # A template for the trigger event wins over the tenant's default template
+        for template in sorted(candidates, key=lambda template: template.trigger_event == trigger_event):
+            templates[template.tenant_id] = template
+        
+        return templates
+    
+    def _installment_notice_query(self):
+        """Installments joined with everything a notice needs, so rendering triggers no lazy loads"""
+        
+        return (
+            self.db.query(Installment, Invoice, Customer, Tenant)
+            .join(Invoice, Installment.invoice_id == Invoice.id)
+            .join(Customer, Invoice.customer_id == Customer.id)
+            .join(Tenant, Invoice.tenant_id == Tenant.id)
+        )
+    
+    def create_installment_reminders(
+        self,
+        days_ahead: int = 3,
+        notification_type: NotificationType = NotificationType.SMS
+    ) -> int:
+        """Queue reminders for every installment falling due within days_ahead"""
+        
+        now = datetime.utcnow()
+        query = self._installment_notice_query().filter(
+            Installment.status == InstallmentStatus.PENDING,
+            Installment.due_date <= now + timedelta(days=days_ahead),
+            Installment.due_date > now
+        )
+        
+        return self._create_installment_notices(
+            query, "installment", "installment_reminder", notification_type,
+            days_for=lambda installment: days_ahead
+        )
+    
+    def create_overdue_notices(self, notification_type: NotificationType = NotificationType.SMS) -> int:
+        """Queue notices for installments exactly 3, 15 or 30 days overdue"""
+        
+        now = datetime.utcnow()
+        # Only the one-day due date windows of each milestone are read
+        query = self._installment_notice_query().filter(
+            Installment.status.in_([InstallmentStatus.PENDING, InstallmentStatus.OVERDUE]),
+            or_(*[
+                and_(
+                    Installment.due_date <= now - timedelta(days=days),
+                    Installment.due_date > now - timedelta(days=days + 1)
+                )
+                for days in OVERDUE_NOTICE_DAYS
+            ])
+        )
+        
+        return self._create_installment_notices(
+            query, "overdue", "overdue_notice", notification_type,
+            days_for=lambda installment: installment.days_overdue,
+            priority=2  # Higher priority for overdue notices
+        )
+    
+    def _create_installment_notices(
+        self,
+        query,
+        reference_type: str,
+        trigger_event: str,
+        notification_type: NotificationType,
+        days_for,
+        priority: int = 5
+    ) -> int:
+        """Render and bulk insert notices for the installments in query, skipping any noticed in the last day"""
+        
+        created = 0
+        templates = {}
+        rows = query.order_by(Installment.id).yield_per(NOTICE_BATCH_SIZE)
+        
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= NOTICE_BATCH_SIZE:
+                created += self._insert_installment_notices(
+                    batch, templates, reference_type, trigger_event, notification_type, days_for, priority
+                )
+                batch = []
+        if batch:
+            created += self._insert_installment_notices(
+                batch, templates, reference_type, trigger_event, notification_type, days_for, priority
+            )
+        
+        # One commit at the end; committing mid-stream would close the server-side cursor
+        self.db.commit()
+        
+        logger.info(f"Queued {created} {reference_type} notices")
+        return created
+    
+    def _insert_installment_notices(
+        self,
+        batch: List,
+        templates: Dict,
+        reference_type: str,
+        trigger_event: str,
+        notification_type: NotificationType,
+        days_for,
+        priority: int
+    ) -> int:
+        """Render one batch of notices and add them to the notification queue"""
+        
+        now = datetime.utcnow()
+        
+        already_noticed = {
+            reference_id for reference_id, in self.db.query(NotificationLog.reference_id).filter(
+                NotificationLog.reference_type == reference_type,
+                NotificationLog.reference_id.in_([installment.id for installment, _, _, _ in batch]),
+                NotificationLog.created_at > now - timedelta(days=1)
+            )
+        }
+        
+        # Templates are resolved once per tenant for the whole run
+        new_tenant_ids = {invoice.tenant_id for _, invoice, _, _ in batch} - set(templates)
+        if new_tenant_ids:
+            resolved = self.get_templates_for_tenants(new_tenant_ids, notification_type, trigger_event)
+            templates.update({tenant_id: resolved.get(tenant_id) for tenant_id in new_tenant_ids})
+        
+        logs = []
+        queue_items = []
+        for installment, invoice, customer, tenant in batch:
+            if installment.id in already_noticed:
+                continue
+            
+            template = templates[invoice.tenant_id]
+            subject, body, variables = self._render_installment_notice(
+                reference_type, template, installment, invoice, customer, tenant, days_for(installment)
+            )
+            
+            log_id = uuid.uuid4()
+            logs.append({
+                "id": log_id,
+                "tenant_id": invoice.tenant_id,
+                "notification_type": notification_type,
+                "recipient_email": customer.email if notification_type == NotificationType.EMAIL else None,
+                "recipient_phone": customer.phone if notification_type == NotificationType.SMS else None,
+                "customer_id": customer.id,
+                "subject": subject,
+                "body": body,
+                "template_id": template.id if template else None,
+                "template_variables": variables,
+                "reference_type": reference_type,
+                "reference_id": installment.id,
+                "status": NotificationStatus.PENDING
+            })
+            queue_items.append({"notification_log_id": log_id, "priority": priority, "scheduled_at": now})
+        
+        if logs:
+            self.db.execute(insert(NotificationLog), logs)
+            self.db.execute(insert(NotificationQueue), queue_items)
+        
+        return len(logs)
+    
     def get_pending_notifications(self, limit: int = 100) -> List[NotificationLog]:
         """Get pending notifications from queue"""
         
@@ -510,6 +704,113 @@ class NotificationService:
         
         return False
     
+    def dispatch_notifications(
+        self,
+        notifications: List[NotificationLog],
+        dispatcher: Optional[NotificationDispatcher] = None
+    ) -> Dict[str, int]:
+        """Send email and SMS notifications in batches and record the outcomes"""
+        
+        messages = []
+        results = []
+        for notification in notifications:
+            if notification.notification_type == NotificationType.EMAIL:
+                channel, recipient = EMAIL, notification.recipient_email
+            elif notification.notification_type == NotificationType.SMS:
+                channel, recipient = SMS, notification.recipient_phone
+            else:
+                continue
+            
+            if not recipient:
+                results.append(DispatchResult(notification.id, False, error="No recipient address"))
+                continue
+            
+            messages.append(DispatchMessage(
+                key=notification.id,
+                channel=channel,
+                recipient=recipient,
+                body=notification.body,
+                subject=notification.subject
+            ))
+        
+        results.extend((dispatcher or NotificationDispatcher()).dispatch(messages))
+        self.record_dispatch_results(results)
+        
+        sent = sum(1 for result in results if result.success)
+        return {"sent": sent, "failed": len(results) - sent}
+    
+    def record_dispatch_results(self, results: List[DispatchResult]):
+        """Write notification delivery outcomes back with bulk UPDATEs"""
+        
+        now = datetime.utcnow()
+        sent = [result for result in results if result.success]
+        failed = [result for result in results if not result.success]
+        
+        if sent:
+            self.db.execute(update(NotificationLog), [
+                {
+                    "id": result.key,
+                    "status": NotificationStatus.SENT,
+                    "sent_at": now,
+                    "provider_message_id": result.provider_id
+                }
+                for result in sent
+            ])
+            self.db.execute(
+                delete(NotificationQueue)
+                .where(NotificationQueue.notification_log_id.in_([result.key for result in sent]))
+                .execution_options(synchronize_session=False)
+            )
+        
+        if failed:
+            failed_ids = [result.key for result in failed]
+            self.db.execute(update(NotificationLog), [
+                {
+                    "id": result.key,
+                    "status": NotificationStatus.FAILED,
+                    "error_message": result.error or "Unknown error"
+                }
+                for result in failed
+            ])
+            self.db.execute(
+                update(NotificationLog)
+                .where(NotificationLog.id.in_(failed_ids))
+                .values(retry_count=NotificationLog.retry_count + 1)
+                .execution_options(synchronize_session=False)
+            )
+            
+            # Retryable notifications are rescheduled with the same backoff as mark_notification_failed
+            retry_groups = {}
+            exhausted_ids = []
+            for notification_id, retry_count in self.db.query(
+                NotificationLog.id, NotificationLog.retry_count
+            ).filter(NotificationLog.id.in_(failed_ids)):
+                if retry_count < NOTIFICATION_MAX_RETRIES:
+                    retry_groups.setdefault(retry_count, []).append(notification_id)
+                else:
+                    exhausted_ids.append(notification_id)
+            
+            for retry_count, notification_ids in retry_groups.items():
+                self.db.execute(
+                    update(NotificationQueue)
+                    .where(NotificationQueue.notification_log_id.in_(notification_ids))
+                    .values(
+                        attempts=NotificationQueue.attempts + 1,
+                        last_attempt_at=now,
+                        scheduled_at=now + timedelta(minutes=5 * retry_count)
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            
+            if exhausted_ids:
+                self.db.execute(
+                    delete(NotificationQueue)
+                    .where(NotificationQueue.notification_log_id.in_(exhausted_ids))
+                    .execution_options(synchronize_session=False)
+                )
+        
+        self.db.commit()
+    
     def mark_notification_failed(
         self,
         notification_id: str,
@@ -564,30 +865,30 @@ class EmailService:
         
         try:
             # Import email modules here to avoid import issues
-            from email.mime.text import MimeText
-            from email.mime.multipart import MimeMultipart
-            from email.mime.base import MimeBase
+            from email.mime.text import MIMEText
+            from email.mime.multipart import MIMEMultipart
+            from email.mime.base import MIMEBase
             from email import encoders
             
             # Create message
-            msg = MimeMultipart('alternative')
+            msg = MIMEMultipart('alternative')
             msg['From'] = f"{settings.email_from_name} <{settings.email_from_email}>"
             msg['To'] = recipient
             msg['Subject'] = subject
             
             # Add text body
-            text_part = MimeText(body, 'plain', 'utf-8')
+            text_part = MIMEText(body, 'plain', 'utf-8')
             msg.attach(text_part)
             
             # Add HTML body if provided
             if html_body:
-                html_part = MimeText(html_body, 'html', 'utf-8')
+                html_part = MIMEText(html_body, 'html', 'utf-8')
                 msg.attach(html_part)
             
             # Add attachments if provided
             if attachments:
                 for attachment in attachments:
-                    part = MimeBase('application', 'octet-stream')
+                    part = MIMEBase('application', 'octet-stream')
                     part.set_payload(attachment['content'])
                     encoders.encode_base64(part)
                     part.add_header(
@@ -0,0 +1,112 @@
+"""
+Compiled notification template cache
+Tenant templates are compiled once into sandboxed Jinja templates and reused until the
+template's version changes; the original {placeholder} syntax keeps working
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+import logging
+
+from jinja2 import Template, TemplateError, Undefined
+from jinja2.sandbox import SandboxedEnvironment
+
+from app.models.notification import NotificationTemplate
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_CACHE_MAX_TENANTS = 256
+
+# {name} placeholders that are not already part of a {{ expression }}
+LEGACY_PLACEHOLDER = re.compile(r"(?<!\{)\{(\w+)\}(?!\})")
+
+
+class PlaceholderUndefined(Undefined):
+    """Missing variables render as their placeholder, as plain placeholder replacement did"""
+    
+    def __str__(self):
+        return "{%s}" % self._undefined_name
+
+
+_environment = SandboxedEnvironment(
+    undefined=PlaceholderUndefined,
+    autoescape=False,
+    keep_trailing_newline=True
+)
+
+
+def compile_template_text(text: str) -> Template:
+    """Compile template text, accepting both {name} placeholders and Jinja syntax"""
+    return _environment.from_string(LEGACY_PLACEHOLDER.sub(r"{{ \1 }}", text))
+
+
+class CompiledTemplate(NamedTuple):
+    """Compiled subject and body of one template version"""
+    version: int
+    subject: Optional[Template]
+    body: Template
+
+
+class TemplateCache:
+    """Compiled templates grouped per tenant, least recently used tenants evicted first"""
+    
+    def __init__(self, max_tenants: int = TEMPLATE_CACHE_MAX_TENANTS):
+        self.max_tenants = max_tenants
+        self._tenants = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, template: NotificationTemplate) -> Optional[CompiledTemplate]:
+        """Compiled form of the template's current version, or None if it is not valid Jinja"""
+        with self._lock:
+            tenant_templates = self._tenants.get(template.tenant_id)
+            if tenant_templates is not None:
+                self._tenants.move_to_end(template.tenant_id)
+                compiled = tenant_templates.get(template.id)
+                if compiled is not None and compiled.version == template.version:
+                    return compiled
+        
+        try:
+            compiled = CompiledTemplate(
+                version=template.version,
+                subject=compile_template_text(template.subject) if template.subject else None,
+                body=compile_template_text(template.body)
+            )
+        except TemplateError as e:
+            logger.warning(f"Template {template.id} is not valid Jinja, using plain placeholders: {e}")
+            return None
+        
+        with self._lock:
+            self._tenants.setdefault(template.tenant_id, {})[template.id] = compiled
+            self._tenants.move_to_end(template.tenant_id)
+            while len(self._tenants) > self.max_tenants:
+                self._tenants.popitem(last=False)
+        
+        return compiled
+    
+    def invalidate(self, tenant_id=None):
+        """Drop compiled templates for one tenant, or for every tenant"""
+        with self._lock:
+            if tenant_id is None:
+                self._tenants.clear()
+            else:
+                self._tenants.pop(tenant_id, None)
+    
+    def render(self, template: NotificationTemplate, variables: Dict[str, Any]) -> Dict[str, Optional[str]]:
+        """Render a template's subject and body"""
+        compiled = self.get(template)
+        
+        if compiled is not None:
+            try:
+                return {
+                    "subject": compiled.subject.render(variables) if compiled.subject else template.subject,
+                    "body": compiled.body.render(variables)
+                }
+            except TemplateError as e:
+                logger.warning(f"Rendering template {template.id} failed, using plain placeholders: {e}")
+        
+        return template.render(variables)
+
+
+template_cache = TemplateCache()
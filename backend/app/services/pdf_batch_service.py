@@ -0,0 +1,272 @@
+"""
+Batch invoice PDF rendering
+Invoices are loaded in chunks with their items, customer, template and branding in a
+few queries, and rendered in a process pool whose workers set up their PDFService once.
+Inside daemonic processes, such as Celery's prefork pool children, the pool comes from
+billiard, which unlike multiprocessing lets them start children of their own.
+"""
+
+import multiprocessing
+import os
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence
+import logging
+
+import billiard
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.core.config import settings
+from app.models.invoice import Invoice
+from app.services.pdf_service import PDFService
+
+logger = logging.getLogger(__name__)
+
+PDF_BATCH_FORMATS = ("zip", "pdf")
+
+
+class RenderedInvoicePDF(NamedTuple):
+    """Result of rendering one invoice of a batch"""
+    invoice_id: str
+    invoice_number: Optional[str]
+    content: Optional[bytes]
+    cache_hit: bool = False
+    error: Optional[str] = None
+
+
+# Set up once in each pool worker by _init_worker
+_worker_pdf_service = None
+
+
+def _init_worker():
+    """Pool initializer: import the mappers and set up fonts and styles once per worker"""
+    global _worker_pdf_service
+    import app.models  # noqa: F401  # configure every mapper before invoices are unpickled
+    _worker_pdf_service = PDFService()
+
+
+def _render_chunk(
+    invoices: List[Invoice],
+    include_qr: bool,
+    company_info: Optional[Dict[str, Any]],
+    pdf_service: Optional[PDFService] = None
+) -> List[RenderedInvoicePDF]:
+    """Render prefetched invoices through the render cache, with the worker's service by default"""
+    pdf_service = pdf_service or _worker_pdf_service
+
+    rendered = []
+    for invoice in invoices:
+        try:
+            pdf = pdf_service.get_invoice_pdf(invoice, include_qr, company_info)
+            rendered.append(RenderedInvoicePDF(str(invoice.id), invoice.invoice_number, pdf.content, pdf.cache_hit))
+        except Exception as e:
+            logger.error(f"Batch PDF rendering failed for invoice {invoice.id}: {e}")
+            rendered.append(RenderedInvoicePDF(str(invoice.id), invoice.invoice_number, None, error=str(e)))
+    return rendered
+
+
+class PDFBatchRenderer:
+    """Renders many invoices in parallel and streams them into a zip or a combined PDF"""
+
+    def __init__(self, db: Session, workers: Optional[int] = None, chunk_size: Optional[int] = None):
+        self.db = db
+        self.workers = workers if workers is not None else (settings.pdf_batch_workers or os.cpu_count() or 1)
+        self.chunk_size = chunk_size or settings.pdf_batch_chunk_size
+
+    def prefetch_invoices(self, invoice_ids: Sequence[str], tenant_id=None) -> List[Invoice]:
+        """Load invoices with everything the PDF shows, in the order requested"""
+        query = self.db.query(Invoice).options(
+            selectinload(Invoice.items),
+            joinedload(Invoice.customer),
+            joinedload(Invoice.template),
+            joinedload(Invoice.branding)
+        ).filter(
+            Invoice.id.in_(list(invoice_ids)),
+            Invoice.is_active == True
+        )
+        if tenant_id is not None:
+            query = query.filter(Invoice.tenant_id == tenant_id)
+
+        by_id = {str(invoice.id): invoice for invoice in query.all()}
+        return [by_id[str(invoice_id)] for invoice_id in invoice_ids if str(invoice_id) in by_id]
+
+    def iter_rendered(
+        self,
+        invoice_ids: Sequence[str],
+        include_qr: bool = True,
+        company_info: Optional[Dict[str, Any]] = None,
+        tenant_id=None
+    ) -> Iterator[RenderedInvoicePDF]:
+        """
+        Yield a result per requested invoice, in request order, as chunks finish
+
+        Only a few chunks are prefetched ahead of the workers, so memory stays flat
+        however many invoices are requested.
+        """
+        chunks = self._chunks(invoice_ids, tenant_id)
+
+        if self.workers <= 1:
+            pdf_service = PDFService()
+            for chunk_ids, invoices in chunks:
+                yield from self._with_missing(chunk_ids, _render_chunk(invoices, include_qr, company_info, pdf_service))
+            return
+
+        with self._render_pool() as submit:
+            pending = deque()
+            for chunk_ids, invoices in chunks:
+                pending.append((chunk_ids, submit(invoices, include_qr, company_info)))
+                if len(pending) >= self.workers * 2:
+                    chunk_ids, result = pending.popleft()
+                    yield from self._with_missing(chunk_ids, result())
+
+            while pending:
+                chunk_ids, result = pending.popleft()
+                yield from self._with_missing(chunk_ids, result())
+
+    @contextmanager
+    def _render_pool(self) -> Iterator[Callable[..., Callable[[], List[RenderedInvoicePDF]]]]:
+        """
+        Start the worker pool and yield a function that submits a chunk for rendering
+
+        Submitting returns a callable that waits for the chunk's results. Spawned workers
+        don't inherit the parent's database connections, Redis clients or threads.
+        """
+        if not multiprocessing.current_process().daemon:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            ) as executor:
+                yield lambda *args: executor.submit(_render_chunk, *args).result
+            return
+
+        # multiprocessing refuses to start children from daemonic processes, billiard does not
+        pool = billiard.get_context("spawn").Pool(processes=self.workers, initializer=_init_worker)
+        try:
+            yield lambda *args: pool.apply_async(_render_chunk, args).get
+            pool.close()
+        except BaseException:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+
+    def render_to_cache(
+        self,
+        invoice_ids: Sequence[str],
+        include_qr: bool = True,
+        company_info: Optional[Dict[str, Any]] = None,
+        tenant_id=None
+    ) -> Dict[str, Any]:
+        """Render invoices into the PDF cache only, listing each rendered invoice"""
+        start_time = time.perf_counter()
+        summary = self._summary()
+        summary["results"] = []
+
+        for result in self.iter_rendered(invoice_ids, include_qr, company_info, tenant_id):
+            if self._record(summary, result):
+                summary["results"].append({
+                    "invoice_id": result.invoice_id,
+                    "invoice_number": result.invoice_number,
+                    "pdf_size": len(result.content),
+                    "cache_hit": result.cache_hit,
+                    "success": True
+                })
+
+        return self._finish(summary, start_time)
+
+    def render_to_zip(
+        self,
+        invoice_ids: Sequence[str],
+        output: BinaryIO,
+        include_qr: bool = True,
+        company_info: Optional[Dict[str, Any]] = None,
+        tenant_id=None
+    ) -> Dict[str, Any]:
+        """Write one PDF per invoice into a zip archive as the renders come in"""
+        start_time = time.perf_counter()
+        summary = self._summary()
+
+        with zipfile.ZipFile(output, "w") as archive:
+            for result in self.iter_rendered(invoice_ids, include_qr, company_info, tenant_id):
+                if self._record(summary, result):
+                    # PDFs are already compressed, so they are stored as they are
+                    archive.writestr(
+                        zipfile.ZipInfo(f"invoice_{result.invoice_number}.pdf", date_time=time.localtime()[:6]),
+                        result.content,
+                        compress_type=zipfile.ZIP_STORED
+                    )
+
+        return self._finish(summary, start_time)
+
+    def render_to_pdf(
+        self,
+        invoice_ids: Sequence[str],
+        output: BinaryIO,
+        include_qr: bool = True,
+        company_info: Optional[Dict[str, Any]] = None,
+        tenant_id=None
+    ) -> Dict[str, Any]:
+        """
+        Write all invoices into one PDF, each starting on a new page
+
+        The combined document is laid out by ReportLab in a single pass, so it is built
+        in this process from the prefetched chunks rather than in the pool.
+        """
+        start_time = time.perf_counter()
+        summary = self._summary()
+
+        def invoices():
+            for chunk_ids, chunk in self._chunks(invoice_ids, tenant_id):
+                found = {str(invoice.id) for invoice in chunk}
+                for invoice_id in chunk_ids:
+                    if invoice_id not in found:
+                        self._record(summary, RenderedInvoicePDF(invoice_id, None, None, error="Invoice not found"))
+                for invoice in chunk:
+                    summary["successful"] += 1
+                    yield invoice
+
+        PDFService().generate_combined_pdf(invoices(), output, include_qr, company_info)
+        return self._finish(summary, start_time)
+
+    def _chunks(self, invoice_ids: Sequence[str], tenant_id=None):
+        ids = [str(invoice_id) for invoice_id in invoice_ids]
+        for start in range(0, len(ids), self.chunk_size):
+            chunk_ids = ids[start:start + self.chunk_size]
+            yield chunk_ids, self.prefetch_invoices(chunk_ids, tenant_id)
+
+    @staticmethod
+    def _with_missing(chunk_ids: List[str], rendered: List[RenderedInvoicePDF]) -> Iterator[RenderedInvoicePDF]:
+        by_id = {result.invoice_id: result for result in rendered}
+        for invoice_id in chunk_ids:
+            yield by_id.get(invoice_id) or RenderedInvoicePDF(invoice_id, None, None, error="Invoice not found")
+
+    @staticmethod
+    def _summary() -> Dict[str, Any]:
+        return {"successful": 0, "failed": 0, "cache_hits": 0, "bytes": 0, "errors": []}
+
+    @staticmethod
+    def _record(summary: Dict[str, Any], result: RenderedInvoicePDF) -> bool:
+        if result.error:
+            summary["failed"] += 1
+            summary["errors"].append({"invoice_id": result.invoice_id, "error": result.error})
+            return False
+
+        summary["successful"] += 1
+        summary["cache_hits"] += int(result.cache_hit)
+        summary["bytes"] += len(result.content)
+        return True
+
+    def _finish(self, summary: Dict[str, Any], start_time: float) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - start_time
+        summary["elapsed_seconds"] = round(elapsed, 3)
+        summary["invoices_per_second"] = round(summary["successful"] / elapsed, 2) if elapsed > 0 else None
+        summary["workers"] = self.workers
+        logger.info(
+            f"Batch PDF rendering: {summary['successful']} rendered, {summary['failed']} failed "
+            f"in {elapsed:.1f}s with {self.workers} workers"
+        )
+        return summary
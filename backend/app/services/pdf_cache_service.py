@@ -0,0 +1,207 @@
+"""
+Content-addressed cache of rendered invoice PDFs
+A PDF is stored under a hash of everything that shapes it (invoice, items, customer,
+template and branding versions plus render options), so a cached file is served until
+one of those changes and stale renders simply stop being referenced and age out
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when the PDF layout changes so existing renders are not served any more
+PDF_RENDER_VERSION = 1
+PDF_CACHE_KEY_PREFIX = "pdf-cache"
+DEFAULT_PDF_LOCALE = "fa"
+
+# Eviction trims the local cache down to this share of its size limit
+EVICTION_LOW_WATER_RATIO = 0.9
+
+
+def _version(model) -> Optional[str]:
+    """Version marker of a row; updated_at changes on every update"""
+    if model is None:
+        return None
+    stamp = model.updated_at or model.created_at
+    return f"{model.id}@{stamp.isoformat() if stamp else ''}"
+
+
+def pdf_cache_key(
+    invoice,
+    include_qr: bool = True,
+    company_info: Optional[Dict[str, Any]] = None,
+    locale: str = DEFAULT_PDF_LOCALE
+) -> str:
+    """Hash of the invoice content version, template/branding version and render options"""
+    content = {
+        "render_version": PDF_RENDER_VERSION,
+        "invoice": _version(invoice),
+        # Items are updated on their own, so their versions are part of the invoice content
+        "items": sorted(_version(item) for item in invoice.items),
+        "customer": _version(invoice.customer),
+        "template": _version(invoice.template) if invoice.template_id else None,
+        "branding": _version(invoice.branding) if invoice.branding_id else None,
+        "qr_token": invoice.qr_code_token if include_qr else None,
+        "include_qr": bool(include_qr),
+        "company_info": company_info or {},
+        "locale": locale,
+    }
+    canonical = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def pdf_storage_key(tenant_id, cache_key: str) -> str:
+    """Object key of a cached PDF, grouped per tenant"""
+    return f"{PDF_CACHE_KEY_PREFIX}/{tenant_id}/{cache_key[:2]}/{cache_key}.pdf"
+
+
+class PDFCache:
+    """Rendered PDFs on local disk, least recently used evicted first, with an optional remote tier.
+    
+    Hits touch the file's mtime, so eviction by mtime removes the least recently served
+    PDFs once the directory grows past max_bytes. When a remote backend is configured,
+    every render is offloaded to it and local misses are filled from it, so pre-warmed
+    PDFs are shared between workers and survive local eviction.
+    """
+    
+    def __init__(self, root: Optional[Path] = None, max_bytes: Optional[int] = None, remote=None):
+        self.root = Path(root or settings.pdf_cache_dir)
+        self.max_bytes = max_bytes if max_bytes is not None else settings.pdf_cache_max_bytes
+        self.remote = remote
+        self._approx_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+    
+    def _path(self, storage_key: str) -> Path:
+        return self.root / storage_key
+    
+    def get(self, storage_key: str) -> Optional[bytes]:
+        path = self._path(storage_key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            pass
+        
+        if self.remote is None:
+            return None
+        try:
+            if not self.remote.exists(storage_key):
+                return None
+            data = self.remote.get(storage_key)
+        except Exception as e:
+            logger.warning(f"PDF cache remote read failed for {storage_key}: {e}")
+            return None
+        
+        self._write_local(storage_key, data)
+        return data
+    
+    def put(self, storage_key: str, data: bytes):
+        self._write_local(storage_key, data)
+        if self.remote is not None:
+            try:
+                self.remote.put(storage_key, data)
+            except Exception as e:
+                logger.warning(f"PDF cache offload failed for {storage_key}: {e}")
+    
+    def _write_local(self, storage_key: str, data: bytes):
+        path = self._path(storage_key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename so concurrent readers never see a partial PDF
+            fd, temp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(data)
+            os.replace(temp_name, path)
+        except OSError as e:
+            logger.warning(f"PDF cache write failed for {storage_key}: {e}")
+            return
+        
+        with self._lock:
+            if self._approx_bytes is not None:
+                self._approx_bytes += len(data)
+            if self._approx_bytes is None or self._approx_bytes > self.max_bytes:
+                self._approx_bytes = self._evict()
+    
+    def _evict(self) -> int:
+        """Remove least recently used PDFs until the cache fits; returns the remaining size"""
+        entries = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if not name.endswith(".pdf"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return total
+        
+        target = int(self.max_bytes * EVICTION_LOW_WATER_RATIO)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        
+        logger.info(f"Evicted {removed} PDFs from cache, {total} bytes remaining")
+        return total
+    
+    def clear(self):
+        """Remove every locally cached PDF"""
+        with self._lock:
+            for directory, _, names in os.walk(self.root):
+                for name in names:
+                    if name.endswith(".pdf"):
+                        Path(directory, name).unlink(missing_ok=True)
+            self._approx_bytes = 0
+
+
+def _default_remote():
+    """S3 backend for the configured offload provider, if any"""
+    provider = settings.pdf_cache_offload_provider
+    if not provider:
+        return None
+    
+    from app.services.chunk_store_service import S3ChunkBackend
+    from app.services.cloud_storage_service import CloudStorageService
+    
+    try:
+        client, bucket = CloudStorageService()._get_provider_client(provider)
+        return S3ChunkBackend(client, bucket)
+    except Exception as e:
+        logger.warning(f"PDF cache offload to {provider} unavailable: {e}")
+        return None
+
+
+_default_cache: Optional[PDFCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_pdf_cache() -> Optional[PDFCache]:
+    """Process-wide PDF cache, or None when caching is disabled"""
+    global _default_cache
+    if not settings.pdf_cache_enabled:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PDFCache(remote=_default_remote())
+        return _default_cache
@@ -6,28 +6,67 @@ from reportlab.lib.pagesizes import A4, letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch, mm
 from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageBreak
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from io import BytesIO
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, NamedTuple, BinaryIO, Iterable
 from decimal import Decimal
+from functools import lru_cache
 import logging
 import os
 from datetime import datetime
 
 from app.models.invoice import Invoice, InvoiceType
 from app.services.qr_service import QRCodeService
+from app.services.pdf_cache_service import (
+    DEFAULT_PDF_LOCALE, PDFCache, get_pdf_cache, pdf_cache_key, pdf_storage_key
+)
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
+def _shared_styles():
+    """Paragraph styles, built once per process and shared by every PDFService"""
+    styles = getSampleStyleSheet()
+    
+    # Create custom styles for Persian text
+    persian_style = ParagraphStyle(
+        'Persian',
+        parent=styles['Normal'],
+        fontName='Helvetica',
+        fontSize=12,
+        alignment=TA_RIGHT,
+        wordWrap='RTL'
+    )
+    
+    persian_title = ParagraphStyle(
+        'PersianTitle',
+        parent=styles['Title'],
+        fontName='Helvetica-Bold',
+        fontSize=16,
+        alignment=TA_CENTER,
+        wordWrap='RTL'
+    )
+    
+    return styles, persian_style, persian_title
+
+
+class CachedPDF(NamedTuple):
+    """A PDF served through the render cache"""
+    content: bytes
+    cache_key: str
+    cache_hit: bool
+
+
 class PDFService:
     """Service for generating PDF invoices with QR codes"""
     
-    def __init__(self, qr_service: Optional[QRCodeService] = None):
+    def __init__(self, qr_service: Optional[QRCodeService] = None, cache: Optional[PDFCache] = None):
         self.qr_service = qr_service or QRCodeService()
+        self.cache = cache or get_pdf_cache()
         self._setup_fonts()
     
     def _setup_fonts(self):
@@ -35,26 +74,7 @@ class PDFService:
         try:
             # Register Persian/Arabic fonts if available
             # For now, we'll use default fonts
-            self.styles = getSampleStyleSheet()
-            
-            # Create custom styles for Persian text
-            self.persian_style = ParagraphStyle(
-                'Persian',
-                parent=self.styles['Normal'],
-                fontName='Helvetica',
-                fontSize=12,
-                alignment=TA_RIGHT,
-                wordWrap='RTL'
-            )
-            
-            self.persian_title = ParagraphStyle(
-                'PersianTitle',
-                parent=self.styles['Title'],
-                fontName='Helvetica-Bold',
-                fontSize=16,
-                alignment=TA_CENTER,
-                wordWrap='RTL'
-            )
+            self.styles, self.persian_style, self.persian_title = _shared_styles()
             
         except Exception as e:
             logger.warning(f"Font setup failed, using defaults: {e}")
@@ -78,47 +98,10 @@ class PDFService:
         """
         try:
             buffer = BytesIO()
-            doc = SimpleDocTemplate(
-                buffer,
-                pagesize=A4,
-                rightMargin=20*mm,
-                leftMargin=20*mm,
-                topMargin=20*mm,
-                bottomMargin=20*mm
-            )
-            
-            # Build PDF content
-            story = []
-            
-            # Add header
-            story.extend(self._build_header(invoice, company_info))
-            story.append(Spacer(1, 20))
-            
-            # Add invoice details
-            story.extend(self._build_invoice_details(invoice))
-            story.append(Spacer(1, 20))
-            
-            # Add customer information
-            story.extend(self._build_customer_info(invoice))
-            story.append(Spacer(1, 20))
-            
-            # Add invoice items table
-            story.extend(self._build_items_table(invoice))
-            story.append(Spacer(1, 20))
-            
-            # Add totals
-            story.extend(self._build_totals(invoice))
-            story.append(Spacer(1, 20))
-            
-            # Add QR code if requested and available
-            if include_qr and invoice.qr_code_token:
-                story.extend(self._build_qr_section(invoice))
-            
-            # Add footer
-            story.extend(self._build_footer(invoice))
+            doc = self._document(buffer)
             
             # Build PDF
-            doc.build(story)
+            doc.build(self.build_invoice_story(invoice, include_qr, company_info))
             buffer.seek(0)
             
             logger.info(f"Generated PDF for invoice {invoice.invoice_number}")
@@ -128,6 +111,107 @@ class PDFService:
             logger.error(f"Failed to generate PDF for invoice {invoice.id}: {e}")
             raise
     
+    def build_invoice_story(
+        self,
+        invoice: Invoice,
+        include_qr: bool = True,
+        company_info: Optional[Dict[str, Any]] = None
+    ) -> list:
+        """Flowables of one invoice, for a document of its own or a combined one"""
+        story = []
+        
+        # Add header
+        story.extend(self._build_header(invoice, company_info))
+        story.append(Spacer(1, 20))
+        
+        # Add invoice details
+        story.extend(self._build_invoice_details(invoice))
+        story.append(Spacer(1, 20))
+        
+        # Add customer information
+        story.extend(self._build_customer_info(invoice))
+        story.append(Spacer(1, 20))
+        
+        # Add invoice items table
+        story.extend(self._build_items_table(invoice))
+        story.append(Spacer(1, 20))
+        
+        # Add totals
+        story.extend(self._build_totals(invoice))
+        story.append(Spacer(1, 20))
+        
+        # Add QR code if requested and available
+        if include_qr and invoice.qr_code_token:
+            story.extend(self._build_qr_section(invoice))
+        
+        # Add footer
+        story.extend(self._build_footer(invoice))
+        
+        return story
+    
+    def generate_combined_pdf(
+        self,
+        invoices: Iterable[Invoice],
+        output: BinaryIO,
+        include_qr: bool = True,
+        company_info: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        Write several invoices into one PDF, each starting on a new page
+        
+        Returns:
+            Number of invoices written
+        """
+        story = []
+        count = 0
+        for invoice in invoices:
+            if story:
+                story.append(PageBreak())
+            story.extend(self.build_invoice_story(invoice, include_qr, company_info))
+            count += 1
+        
+        if story:
+            self._document(output).build(story)
+        return count
+    
+    @staticmethod
+    def _document(output) -> SimpleDocTemplate:
+        return SimpleDocTemplate(
+            output,
+            pagesize=A4,
+            rightMargin=20*mm,
+            leftMargin=20*mm,
+            topMargin=20*mm,
+            bottomMargin=20*mm
+        )
+    
+    def get_invoice_pdf(
+        self,
+        invoice: Invoice,
+        include_qr: bool = True,
+        company_info: Optional[Dict[str, Any]] = None,
+        locale: str = DEFAULT_PDF_LOCALE
+    ) -> CachedPDF:
+        """
+        Get the invoice PDF from the render cache, rendering it only when the invoice,
+        its items, customer, template or branding changed since it was last rendered
+        
+        Returns:
+            CachedPDF whose cache_key identifies the content and can be used as an ETag
+        """
+        cache_key = pdf_cache_key(invoice, include_qr, company_info, locale)
+        if self.cache is None:
+            return CachedPDF(self.generate_invoice_pdf(invoice, include_qr, company_info), cache_key, False)
+        
+        storage_key = pdf_storage_key(invoice.tenant_id, cache_key)
+        pdf_bytes = self.cache.get(storage_key)
+        if pdf_bytes is not None:
+            return CachedPDF(pdf_bytes, cache_key, True)
+        
+        pdf_bytes = self.generate_invoice_pdf(invoice, include_qr, company_info)
+        self.cache.put(storage_key, pdf_bytes)
+        return CachedPDF(pdf_bytes, cache_key, False)
+    
     def _build_header(self, invoice: Invoice, company_info: Optional[Dict[str, Any]]) -> list:
         """Build PDF header section"""
         elements = []
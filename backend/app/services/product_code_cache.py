@@ -0,0 +1,136 @@
+"""
+Scanned code lookup cache
+Barcode and SKU lookups are answered from Redis, keyed per tenant and code; entries are
+dropped whenever a product carrying the code is committed, so every API worker sees the change
+"""
+
+from typing import Dict, Iterable
+import logging
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.product import Product
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_CODE_FIELDS = ("sku", "barcode")
+
+_PENDING_KEY = "product_codes_pending"
+
+
+class ProductCodeCache:
+    """Serialized product responses keyed by tenant and scanned code"""
+    
+    def __init__(self, key_prefix: str = "product_code"):
+        self.key_prefix = key_prefix
+    
+    def _redis(self):
+        # Imported on first use so sessions can be created without a Redis connection
+        from app.core.redis_client import redis_client
+        return redis_client.redis_client
+    
+    def _key(self, tenant_id, code: str) -> str:
+        return f"{self.key_prefix}:{tenant_id}:{code}"
+    
+    def get_many(self, tenant_id, codes: Iterable[str]) -> Dict[str, str]:
+        """Cached product JSON for each code found in the cache"""
+        codes = list(codes)
+        if not codes:
+            return {}
+        
+        try:
+            values = self._redis().mget([self._key(tenant_id, code) for code in codes])
+        except Exception as e:
+            logger.warning(f"Product code cache read failed for tenant {tenant_id}: {e}")
+            return {}
+        
+        return {code: value for code, value in zip(codes, values) if value is not None}
+    
+    def set_many(self, tenant_id, entries: Dict[str, str]):
+        """Cache product JSON for each code"""
+        if not entries:
+            return
+        
+        try:
+            pipeline = self._redis().pipeline(transaction=False)
+            for code, value in entries.items():
+                pipeline.set(self._key(tenant_id, code), value, ex=settings.product_code_cache_ttl_seconds)
+            pipeline.execute()
+        except Exception as e:
+            logger.warning(f"Product code cache write failed for tenant {tenant_id}: {e}")
+    
+    def invalidate(self, tenant_id, codes: Iterable[str]):
+        """Drop cached lookups for the given codes"""
+        keys = [self._key(tenant_id, code) for code in codes if code]
+        if not keys:
+            return
+        
+        try:
+            self._redis().delete(*keys)
+        except Exception as e:
+            logger.warning(f"Product code cache invalidation failed for tenant {tenant_id}: {e}")
+
+
+product_code_cache = ProductCodeCache()
+
+
+def _product_codes(product: Product) -> set:
+    """Current and previous codes of a product in this flush"""
+    codes = set()
+    state = inspect(product)
+    for field in PRODUCT_CODE_FIELDS:
+        history = state.attrs[field].history
+        codes.update(value for value in history.sum() if value)
+        current = getattr(product, field)
+        if current:
+            codes.add(current)
+    return codes
+
+
+def _collect_changed_products(session: Session, flush_context):
+    """after_flush: remember the codes of products inserted, changed or deleted"""
+    
+    pending = None
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(instance, Product):
+            continue
+        
+        codes = _product_codes(instance)
+        if not codes:
+            continue
+        
+        if pending is None:
+            pending = session.info.setdefault(_PENDING_KEY, {})
+        pending.setdefault(instance.tenant_id, set()).update(codes)
+
+
+def _invalidate_changed_products(session: Session):
+    """after_commit: drop cached lookups for the committed products"""
+    
+    pending = session.info.pop(_PENDING_KEY, None)
+    for tenant_id, codes in (pending or {}).items():
+        product_code_cache.invalidate(tenant_id, codes)
+
+
+def queue_code_invalidation(session: Session, tenant_id, codes: Iterable[str]):
+    """Drop cached lookups for codes once the session commits, for products changed outside the ORM"""
+    codes = {code for code in codes if code}
+    if codes and settings.product_code_cache_enabled:
+        session.info.setdefault(_PENDING_KEY, {}).setdefault(tenant_id, set()).update(codes)
+
+
+def _discard_changed_products(session: Session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def track_product_code_changes(session_factory):
+    """Keep the product code cache current for every session created by session_factory"""
+    
+    if not settings.product_code_cache_enabled:
+        return
+    
+    event.listen(session_factory, "after_flush", _collect_changed_products)
+    event.listen(session_factory, "after_commit", _invalidate_changed_products)
+    event.listen(session_factory, "after_rollback", _discard_changed_products)
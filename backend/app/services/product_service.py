@@ -3,7 +3,7 @@ Product and inventory management service
 """
 
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func, desc, asc
+from sqlalchemy import and_, or_, func, desc
 from sqlalchemy.orm.attributes import flag_modified
 from typing import List, Optional, Dict, Any, Tuple
 from decimal import Decimal
@@ -11,12 +11,19 @@ import uuid
 import logging
 
 from app.models.product import Product, ProductCategory, ProductStatus, StockStatus
+from app.models.search import search_filter, search_rank
+from app.models.tag import tag_filter
+from app.models.stock_movement import StockMovement, StockMovementType
 from app.schemas.product import (
     ProductCreate, ProductUpdate, ProductSearchRequest,
     ProductCategoryCreate, ProductCategoryUpdate,
-    StockAdjustmentRequest, StockReservationRequest,
-    ProductStatsResponse, LowStockAlert
+    StockAdjustmentRequest, StockReservationRequest, StockMovementBatchRequest,
+    ProductStatsResponse, LowStockAlert, ProductResponse
 )
+from app.services.product_code_cache import product_code_cache
+from app.services.stock_ledger_service import StockLedgerService, StockMovementLine, emit_low_stock_change
+from app.core.config import settings
+from app.core.pagination import Page, count_rows, paginate
 from app.core.exceptions import ValidationError, NotFoundError, BusinessLogicError
 
 logger = logging.getLogger(__name__)
@@ -135,11 +142,18 @@ class ProductService:
                 if not category:
                     raise ValidationError("Invalid category ID")
             
+            was_low_stock = product.is_low_stock
+            
             # Update product fields
             update_data = product_data.dict(exclude_unset=True)
             for field, value in update_data.items():
                 setattr(product, field, value)
             
+            # Thresholds and tracking can move the product across the low stock line
+            self.db.flush()
+            if product.is_low_stock != was_low_stock:
+                emit_low_stock_change(self.db, tenant_id, product)
+            
             self.db.commit()
             self.db.refresh(product)
             
@@ -172,6 +186,11 @@ class ProductService:
     def search_products(self, tenant_id: uuid.UUID, 
                        search_request: ProductSearchRequest) -> Tuple[List[Product], int]:
         """Search products with filters and pagination"""
+        page = self.search_products_page(tenant_id, search_request)
+        return page.items, page.total
+    
+    def search_products_page(self, tenant_id: uuid.UUID, search_request: ProductSearchRequest) -> Page:
+        """Search products with filters, returning one page and the cursor of the next"""
         try:
             query = self.db.query(Product).filter(
                 Product.tenant_id == tenant_id,
@@ -180,26 +199,15 @@ class ProductService:
             
             # Apply filters
             if search_request.query:
-                search_term = f"%{search_request.query}%"
-                query = query.filter(
-                    or_(
-                        Product.name.ilike(search_term),
-                        Product.description.ilike(search_term),
-                        Product.sku.ilike(search_term),
-                        Product.barcode.ilike(search_term),
-                        Product.manufacturer.ilike(search_term),
-                        Product.brand.ilike(search_term),
-                        Product.model.ilike(search_term)
-                    )
-                )
+                # Every word must appear in the normalized name/code/maker text (trigram indexed)
+                query = query.filter(search_filter(Product.search_text, search_request.query))
             
             if search_request.category_id:
                 query = query.filter(Product.category_id == search_request.category_id)
             
             if search_request.tags:
-                # Filter products that have any of the specified tags
-                for tag in search_request.tags:
-                    query = query.filter(Product.tags.contains([tag]))
+                # One containment (all) or ?| (any) test, served by the tags GIN index
+                query = query.filter(tag_filter(Product.tags, search_request.tags, search_request.tag_match))
             
             if search_request.status:
                 query = query.filter(Product.status == search_request.status)
@@ -222,176 +230,202 @@ class ProductService:
             if search_request.brand:
                 query = query.filter(Product.brand.ilike(f"%{search_request.brand}%"))
             
-            # Apply stock status filter
+            # Apply stock status filter; out of stock products are a subset of the low stock flag
             if search_request.stock_status:
                 if search_request.stock_status == StockStatus.OUT_OF_STOCK:
                     query = query.filter(
                         and_(
-                            Product.track_inventory == True,
-                            Product.is_service == False,
+                            Product.is_low_stock == True,
                             (Product.stock_quantity - Product.reserved_quantity) <= 0
                         )
                     )
                 elif search_request.stock_status == StockStatus.LOW_STOCK:
                     query = query.filter(
                         and_(
-                            Product.track_inventory == True,
-                            Product.is_service == False,
-                            (Product.stock_quantity - Product.reserved_quantity) > 0,
-                            (Product.stock_quantity - Product.reserved_quantity) <= Product.min_stock_level
+                            Product.is_low_stock == True,
+                            (Product.stock_quantity - Product.reserved_quantity) > 0
                         )
                     )
                 elif search_request.stock_status == StockStatus.IN_STOCK:
-                    query = query.filter(
-                        or_(
-                            Product.track_inventory == False,
-                            Product.is_service == True,
-                            (Product.stock_quantity - Product.reserved_quantity) > Product.min_stock_level
-                        )
-                    )
+                    query = query.filter(Product.is_low_stock == False)
             
-            # Get total count before pagination
-            total = query.count()
-            
-            # Apply sorting
-            if search_request.sort_by:
-                sort_field = getattr(Product, search_request.sort_by, None)
-                if sort_field:
-                    if search_request.sort_order == "desc":
-                        query = query.order_by(desc(sort_field))
-                    else:
-                        query = query.order_by(asc(sort_field))
-                else:
-                    query = query.order_by(Product.name)
-            else:
-                query = query.order_by(Product.name)
-            
-            # Apply pagination
             offset = (search_request.page - 1) * search_request.page_size
-            products = query.offset(offset).limit(search_request.page_size).all()
             
-            return products, total
+            # Relevance is not a stable key, so relevance pages stay offset based
+            if search_request.query and search_request.sort_by == "relevance":
+                if search_request.cursor:
+                    raise ValidationError("Cursor pagination is not available when sorting by relevance")
+                
+                total = count_rows(query, search_request.count)
+                products = query.order_by(
+                    desc(search_rank(Product.search_text, search_request.query)), Product.name, Product.id
+                ).offset(offset).limit(search_request.page_size).all()
+                return Page(items=products, total=total, next_cursor=None)
+            
+            if search_request.sort_by in Product.__table__.columns:
+                sort_field = getattr(Product, search_request.sort_by)
+                descending = search_request.sort_order == "desc"
+            else:
+                sort_field, descending = Product.name, False
+            
+            return paginate(
+                query, sort_field, Product.id, search_request.page_size,
+                descending=descending,
+                cursor=search_request.cursor,
+                offset=offset,
+                count=search_request.count
+            )
             
         except Exception as e:
             logger.error(f"Failed to search products for tenant {tenant_id}: {e}")
             raise
     
+    def lookup_products_by_code(self, tenant_id: uuid.UUID, codes: List[str]) -> Dict[str, ProductResponse]:
+        """
+        Resolve scanned barcodes or SKUs to products
+        
+        Codes are answered from the product code cache where possible and the rest with a
+        single query on the tenant barcode and SKU indexes; a barcode match takes precedence
+        over a SKU match. Codes without an active product are left out of the result.
+        """
+        codes = list(dict.fromkeys(code.strip() for code in codes if code and code.strip()))
+        if len(codes) > settings.product_lookup_max_codes:
+            raise ValidationError(f"At most {settings.product_lookup_max_codes} codes can be looked up at once")
+        
+        found = {}
+        if settings.product_code_cache_enabled:
+            for code, cached in product_code_cache.get_many(tenant_id, codes).items():
+                found[code] = ProductResponse.parse_raw(cached)
+        
+        missing = [code for code in codes if code not in found]
+        if missing:
+            products = self.db.query(Product).filter(
+                Product.tenant_id == tenant_id,
+                Product.is_active == True,
+                or_(Product.barcode.in_(missing), Product.sku.in_(missing))
+            ).order_by(Product.created_at).all()
+            
+            by_barcode = {}
+            by_sku = {}
+            for product in products:
+                by_barcode.setdefault(product.barcode, product)
+                by_sku.setdefault(product.sku, product)
+            
+            resolved = {}
+            for code in missing:
+                product = by_barcode.get(code) or by_sku.get(code)
+                if product is not None:
+                    resolved[code] = ProductResponse.from_orm(product)
+            
+            found.update(resolved)
+            if settings.product_code_cache_enabled:
+                product_code_cache.set_many(tenant_id, {code: response.json() for code, response in resolved.items()})
+        
+        return {code: found[code] for code in codes if code in found}
+    
     # Stock Management
     
     def adjust_stock(self, tenant_id: uuid.UUID, product_id: uuid.UUID,
                     adjustment: StockAdjustmentRequest) -> Product:
         """Adjust product stock quantity"""
-        try:
-            product = self.get_product(tenant_id, product_id)
-            if not product:
-                raise NotFoundError("Product not found")
-            
-            if not product.track_inventory:
-                raise BusinessLogicError("Cannot adjust stock for products that don't track inventory")
-            
-            if product.is_service:
-                raise BusinessLogicError("Cannot adjust stock for service products")
-            
-            # Calculate new stock quantity
-            new_quantity = product.stock_quantity + adjustment.quantity
-            
-            if new_quantity < 0:
-                raise BusinessLogicError("Stock quantity cannot be negative")
-            
-            # Check if reserved quantity would exceed new stock
-            if product.reserved_quantity > new_quantity:
-                raise BusinessLogicError("Cannot reduce stock below reserved quantity")
-            
-            product.stock_quantity = new_quantity
-            self.db.commit()
-            self.db.refresh(product)
-            
-            logger.info(f"Adjusted stock for product {product_id} by {adjustment.quantity}")
-            return product
-            
-        except Exception as e:
-            self.db.rollback()
-            logger.error(f"Failed to adjust stock for product {product_id}: {e}")
-            raise
+        product = self._apply_stock_movement(tenant_id, StockMovementLine(
+            product_id=product_id,
+            movement_type=StockMovementType.ADJUST,
+            quantity=adjustment.quantity,
+            reason=adjustment.reason,
+            reference_type=adjustment.reference_type,
+            reference_id=adjustment.reference_id
+        ))
+            
+        logger.info(f"Adjusted stock for product {product_id} by {adjustment.quantity}")
+        return product
     
     def reserve_stock(self, tenant_id: uuid.UUID, product_id: uuid.UUID,
                      reservation: StockReservationRequest) -> Product:
         """Reserve stock for a product"""
-        try:
-            product = self.get_product(tenant_id, product_id)
-            if not product:
-                raise NotFoundError("Product not found")
-            
-            if not product.track_inventory:
-                raise BusinessLogicError("Cannot reserve stock for products that don't track inventory")
-            
-            if product.is_service:
-                raise BusinessLogicError("Cannot reserve stock for service products")
-            
-            available_quantity = product.stock_quantity - product.reserved_quantity
-            
-            if available_quantity < reservation.quantity:
-                raise BusinessLogicError(f"Insufficient stock. Available: {available_quantity}, Requested: {reservation.quantity}")
-            
-            product.reserved_quantity += reservation.quantity
-            self.db.commit()
-            self.db.refresh(product)
-            
-            logger.info(f"Reserved {reservation.quantity} units for product {product_id}")
-            return product
-            
-        except Exception as e:
-            self.db.rollback()
-            logger.error(f"Failed to reserve stock for product {product_id}: {e}")
-            raise
+        product = self._apply_stock_movement(tenant_id, StockMovementLine(
+            product_id=product_id,
+            movement_type=StockMovementType.RESERVE,
+            quantity=reservation.quantity,
+            reason=reservation.reason,
+            reference_type=reservation.reference_type,
+            reference_id=reservation.reference_id
+        ))
+            
+        logger.info(f"Reserved {reservation.quantity} units for product {product_id}")
+        return product
     
     def release_stock(self, tenant_id: uuid.UUID, product_id: uuid.UUID, quantity: int) -> Product:
         """Release reserved stock"""
+        product = self._apply_stock_movement(tenant_id, StockMovementLine(
+            product_id=product_id,
+            movement_type=StockMovementType.RELEASE,
+            quantity=quantity
+        ))
+            
+        logger.info(f"Released {quantity} reserved units for product {product_id}")
+        return product
+    
+    def fulfill_stock(self, tenant_id: uuid.UUID, product_id: uuid.UUID, quantity: int) -> Product:
+        """Fulfill reserved stock (reduce both reserved and stock)"""
+        product = self._apply_stock_movement(tenant_id, StockMovementLine(
+            product_id=product_id,
+            movement_type=StockMovementType.FULFILL,
+            quantity=quantity
+        ))
+        
+        logger.info(f"Fulfilled {quantity} units for product {product_id}")
+        return product
+    
+    def apply_stock_movements(self, tenant_id: uuid.UUID, batch: StockMovementBatchRequest) -> List[Product]:
+        """Apply several stock movements (e.g. the lines of an invoice) all or nothing"""
+        movements = [
+            StockMovementLine(
+                product_id=line.product_id,
+                movement_type=StockMovementType(line.movement_type.value),
+                quantity=line.quantity,
+                reason=line.reason or batch.reason,
+                reference_type=line.reference_type or batch.reference_type,
+                reference_id=line.reference_id or batch.reference_id
+            )
+            for line in batch.movements
+        ]
+        
         try:
-            product = self.get_product(tenant_id, product_id)
-            if not product:
-                raise NotFoundError("Product not found")
-            
-            if quantity > product.reserved_quantity:
-                raise BusinessLogicError(f"Cannot release more than reserved. Reserved: {product.reserved_quantity}, Requested: {quantity}")
-            
-            product.reserved_quantity -= quantity
+            levels = StockLedgerService(self.db).apply_movements(tenant_id, movements)
             self.db.commit()
-            self.db.refresh(product)
-            
-            logger.info(f"Released {quantity} reserved units for product {product_id}")
-            return product
-            
         except Exception as e:
             self.db.rollback()
-            logger.error(f"Failed to release stock for product {product_id}: {e}")
+            logger.error(f"Failed to apply {len(movements)} stock movements for tenant {tenant_id}: {e}")
             raise
+        
+        products = {product.id: product for product in self.db.query(Product).filter(
+            Product.tenant_id == tenant_id,
+            Product.id.in_(list(levels))
+        )}
+        
+        logger.info(f"Applied {len(movements)} stock movements for tenant {tenant_id}")
+        return [products[product_id] for product_id in dict.fromkeys(line.product_id for line in movements)]
     
-    def fulfill_stock(self, tenant_id: uuid.UUID, product_id: uuid.UUID, quantity: int) -> Product:
-        """Fulfill reserved stock (reduce both reserved and stock)"""
+    def get_stock_movements(self, tenant_id: uuid.UUID, product_id: uuid.UUID,
+                            skip: int = 0, limit: int = 50) -> List[StockMovement]:
+        """Stock ledger of a product, newest first"""
+        if not self.get_product(tenant_id, product_id):
+            raise NotFoundError("Product not found")
+        
+        return StockLedgerService(self.db).get_movements(tenant_id, product_id, skip, limit)
+    
+    def _apply_stock_movement(self, tenant_id: uuid.UUID, movement: StockMovementLine) -> Product:
+        """Apply one movement through the stock ledger, commit, and return the updated product"""
         try:
-            product = self.get_product(tenant_id, product_id)
-            if not product:
-                raise NotFoundError("Product not found")
-            
-            if quantity > product.reserved_quantity:
-                raise BusinessLogicError(f"Cannot fulfill more than reserved. Reserved: {product.reserved_quantity}, Requested: {quantity}")
-            
-            if quantity > product.stock_quantity:
-                raise BusinessLogicError(f"Cannot fulfill more than available stock. Stock: {product.stock_quantity}, Requested: {quantity}")
-            
-            product.reserved_quantity -= quantity
-            product.stock_quantity -= quantity
+            StockLedgerService(self.db).apply_movements(tenant_id, [movement])
             self.db.commit()
-            self.db.refresh(product)
-            
-            logger.info(f"Fulfilled {quantity} units for product {product_id}")
-            return product
-            
         except Exception as e:
             self.db.rollback()
-            logger.error(f"Failed to fulfill stock for product {product_id}: {e}")
+            logger.error(f"Failed to {movement.movement_type.value} stock for product {movement.product_id}: {e}")
             raise
+        
+        return self.get_product(tenant_id, movement.product_id)
     
     # Product Categories
     
@@ -583,23 +617,16 @@ class ProductService:
                 Product.is_active == True
             ).count()
             
-            # Stock status counts
-            low_stock_products = self.db.query(Product).filter(
-                Product.tenant_id == tenant_id,
-                Product.track_inventory == True,
-                Product.is_service == False,
-                Product.is_active == True,
-                (Product.stock_quantity - Product.reserved_quantity) > 0,
-                (Product.stock_quantity - Product.reserved_quantity) <= Product.min_stock_level
-            ).count()
-            
-            out_of_stock_products = self.db.query(Product).filter(
+            # Stock status counts, read from the low stock partial index
+            available = Product.stock_quantity - Product.reserved_quantity
+            low_stock_products, out_of_stock_products = self.db.query(
+                func.count(Product.id).filter(available > 0),
+                func.count(Product.id).filter(available <= 0)
+            ).filter(
                 Product.tenant_id == tenant_id,
-                Product.track_inventory == True,
-                Product.is_service == False,
-                Product.is_active == True,
-                (Product.stock_quantity - Product.reserved_quantity) <= 0
-            ).count()
+                Product.is_low_stock == True,
+                Product.is_active == True
+            ).one()
             
             # Calculate total inventory value
             inventory_value_result = self.db.query(
@@ -640,18 +667,11 @@ class ProductService:
     def get_low_stock_alerts(self, tenant_id: uuid.UUID) -> List[LowStockAlert]:
         """Get low stock alerts for a tenant"""
         try:
+            # The maintained flag is served by the idx_product_low_stock partial index
             products = self.db.query(Product).filter(
                 Product.tenant_id == tenant_id,
-                Product.track_inventory == True,
-                Product.is_service == False,
-                Product.is_active == True,
-                or_(
-                    (Product.stock_quantity - Product.reserved_quantity) <= 0,
-                    and_(
-                        (Product.stock_quantity - Product.reserved_quantity) > 0,
-                        (Product.stock_quantity - Product.reserved_quantity) <= Product.min_stock_level
-                    )
-                )
+                Product.is_low_stock == True,
+                Product.is_active == True
             ).all()
             
             alerts = []
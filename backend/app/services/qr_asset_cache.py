@@ -0,0 +1,90 @@
+"""
+Encoded QR code cache
+A QR image depends only on its data and rendering options, and an invoice's share URL
+never changes for a given token, so encoded images are kept in a per-process LRU backed
+by Redis and reused by PDFs, the share page and the QR tasks
+"""
+
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QR_MEDIA_TYPES = {
+    "PNG": "image/png",
+    "JPEG": "image/jpeg",
+    "SVG": "image/svg+xml",
+}
+
+
+def qr_media_type(format: str) -> str:
+    """MIME type of an encoded QR image"""
+    return QR_MEDIA_TYPES.get(format.upper(), f"image/{format.lower()}")
+
+
+class QRAssetCache:
+    """Encoded QR images keyed by (data, size, border, format); memory first, then Redis"""
+    
+    def __init__(self, max_entries: Optional[int] = None, key_prefix: str = "qr_asset"):
+        self.max_entries = max_entries if max_entries is not None else settings.qr_cache_memory_entries
+        self.key_prefix = key_prefix
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _redis(self):
+        # Imported on first use so QR codes can be rendered without a Redis connection
+        from app.core.redis_client import redis_client
+        return redis_client.redis_client
+    
+    def key(self, data: str, size: int, border: int, format: str) -> str:
+        # Hashed so share tokens never appear in cache keys
+        digest = hashlib.sha256(data.encode("utf-8")).hexdigest()[:32]
+        return f"{self.key_prefix}:{digest}:{size}:{border}:{format.upper()}"
+    
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+        
+        try:
+            # The Redis client decodes responses, so images are stored base64-encoded
+            encoded = self._redis().get(key)
+        except Exception as e:
+            logger.warning(f"QR cache read failed for {key}: {e}")
+            return None
+        if encoded is None:
+            return None
+        
+        value = base64.b64decode(encoded)
+        self._remember(key, value)
+        return value
+    
+    def set(self, key: str, value: bytes):
+        self._remember(key, value)
+        try:
+            self._redis().set(key, base64.b64encode(value).decode("ascii"), ex=settings.qr_cache_ttl_seconds)
+        except Exception as e:
+            logger.warning(f"QR cache write failed for {key}: {e}")
+    
+    def _remember(self, key: str, value: bytes):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Drop the in-process entries"""
+        with self._lock:
+            self._entries.clear()
+
+
+qr_asset_cache = QRAssetCache()
@@ -3,19 +3,53 @@ QR Code generation service for invoice sharing
 """
 
 import qrcode
+import qrcode.image.svg
 from io import BytesIO
 import base64
 from typing import Optional
 import logging
 
+from app.core.config import settings
+from app.services.qr_asset_cache import QRAssetCache, qr_asset_cache, qr_media_type
+
 logger = logging.getLogger(__name__)
 
 
 class QRCodeService:
     """Service for generating QR codes for invoice sharing"""
     
-    def __init__(self, base_url: str = "https://app.hesaabplus.com"):
+    def __init__(self, base_url: str = "https://app.hesaabplus.com", cache: Optional[QRAssetCache] = None):
         self.base_url = base_url.rstrip('/')
+        self.cache = cache or (qr_asset_cache if settings.qr_cache_enabled else None)
+    
+    def _render(self, data: str, format: str, size: int, border: int) -> bytes:
+        """Encoded QR image for data, from the asset cache when it was rendered before"""
+        key = self.cache.key(data, size, border, format) if self.cache else None
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        qr = qrcode.QRCode(
+            version=1,  # Controls the size of the QR Code
+            error_correction=qrcode.constants.ERROR_CORRECT_L,
+            box_size=size,
+            border=border,
+        )
+        qr.add_data(data)
+        qr.make(fit=True)
+        
+        buffer = BytesIO()
+        if format.upper() == "SVG":
+            qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buffer)
+        else:
+            img = qr.make_image(fill_color="black", back_color="white")
+            img.save(buffer, format=format.upper())
+        qr_bytes = buffer.getvalue()
+        
+        if key and qr_bytes:
+            self.cache.set(key, qr_bytes)
+        return qr_bytes
     
     def generate_invoice_qr_code(
         self, 
@@ -40,31 +74,10 @@ class QRCodeService:
             # Create the public invoice URL
             invoice_url = f"{self.base_url}/public/invoice/{qr_token}"
             
-            # Create QR code instance
-            qr = qrcode.QRCode(
-                version=1,  # Controls the size of the QR Code
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=size,
-                border=border,
-            )
-            
-            # Add data to QR code
-            qr.add_data(invoice_url)
-            qr.make(fit=True)
-            
-            # Create image
-            img = qr.make_image(
-                fill_color="black",
-                back_color="white"
-            )
-            
-            # Convert to bytes
-            buffer = BytesIO()
-            img.save(buffer, format=format.upper())
-            buffer.seek(0)
+            qr_bytes = self._render(invoice_url, format, size, border)
             
             logger.info(f"Generated QR code for token {qr_token}")
-            return buffer.getvalue()
+            return qr_bytes
             
         except Exception as e:
             logger.error(f"Failed to generate QR code for token {qr_token}: {e}")
@@ -82,7 +95,7 @@ class QRCodeService:
         
         Args:
             qr_token: Unique token for the invoice
-            format: Image format (PNG, JPEG)
+            format: Image format (PNG, JPEG, SVG)
             size: Size of the QR code (1-40)
             border: Border size around QR code
             
@@ -94,7 +107,7 @@ class QRCodeService:
             base64_string = base64.b64encode(qr_bytes).decode('utf-8')
             
             # Create data URL
-            mime_type = f"image/{format.lower()}"
+            mime_type = qr_media_type(format)
             data_url = f"data:{mime_type};base64,{base64_string}"
             
             return data_url
@@ -115,23 +128,7 @@ class QRCodeService:
             QR code image as bytes
         """
         try:
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=size,
-                border=4,
-            )
-            
-            qr.add_data(data)
-            qr.make(fit=True)
-            
-            img = qr.make_image(fill_color="black", back_color="white")
-            
-            buffer = BytesIO()
-            img.save(buffer, format="PNG")
-            buffer.seek(0)
-            
-            return buffer.getvalue()
+            return self._render(data, "PNG", size, 4)
             
         except Exception as e:
             logger.error(f"Failed to generate simple QR code: {e}")
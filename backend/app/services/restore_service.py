@@ -4,6 +4,7 @@ Comprehensive restore service for flexible tenant data restoration
 
 import os
 import gzip
+import heapq
 import tempfile
 import subprocess
 from datetime import datetime, timezone
@@ -18,12 +19,19 @@ from sqlalchemy.engine import Engine
 
 from app.core.config import settings
 from app.models.backup import BackupLog, RestoreLog, BackupType, BackupStatus
-from app.models.tenant import Tenant
+from app.models.tenant import Tenant, SubscriptionType
 from app.services.backup_service import BackupService
-from app.services.cloud_storage_service import CloudStorageService
+from app.services.cloud_storage_service import CloudStorageService, IntegrityCheckMode
 
 logger = logging.getLogger(__name__)
 
+# Restore order for orchestrated batches: higher tiers come back online first
+TIER_RESTORE_PRIORITY = {
+    SubscriptionType.ENTERPRISE: 0,
+    SubscriptionType.PRO: 1,
+    SubscriptionType.FREE: 2,
+}
+
 
 class RestoreService:
     """Service for handling flexible tenant data restoration"""
@@ -31,12 +39,17 @@ class RestoreService:
     def __init__(self, db: Session):
         self.db = db
         self.backup_service = BackupService(db)
-        self.cloud_storage = CloudStorageService()
+        self.cloud_storage = CloudStorageService(db)
         self.temp_dir = Path(tempfile.gettempdir()) / "hesaabplus_restores"
         self.temp_dir.mkdir(exist_ok=True)
     
-    def validate_backup_integrity(self, backup_id: str, storage_provider: str = "backblaze_b2") -> Dict:
-        """Validate backup file integrity before restore"""
+    def validate_backup_integrity(self, backup_id: str, storage_provider: str = "backblaze_b2",
+                                  mode: IntegrityCheckMode = IntegrityCheckMode.FULL) -> Dict:
+        """Validate backup file integrity before restore.
+        
+        FULL streams the stored object through SHA-256 without writing it to disk;
+        METADATA and SAMPLED only issue HEAD and range requests.
+        """
         try:
             backup = self.db.query(BackupLog).filter(BackupLog.id == backup_id).first()
             if not backup:
@@ -46,55 +59,36 @@ class RestoreService:
                 raise Exception(f"Backup {backup_id} is not completed (status: {backup.status.value})")
             
             # Find storage location for specified provider
-            storage_location = None
-            for location in backup.storage_locations or []:
-                if location.get("provider") == storage_provider:
-                    storage_location = location["location"]
-                    break
-            
+            storage_location = backup.get_storage_location(storage_provider)
             if not storage_location:
                 raise Exception(f"Backup not found in {storage_provider}")
             
-            # Download and verify checksum
-            temp_file = self.temp_dir / f"validate_{backup_id}.tmp"
+            if backup.get_chunk_manifest():
+                result = self.backup_service.verify_stored_backup(backup, storage_provider, storage_location, mode)
+            else:
+                result = self.cloud_storage.verify_object_integrity(
+                    storage_provider,
+                    storage_location["location"],
+                    backup.integrity_expectations(storage_provider),
+                    mode=mode
+                )
             
-            try:
-                if storage_provider == "backblaze_b2":
-                    self.cloud_storage.download_from_b2(storage_location, temp_file)
-                elif storage_provider == "cloudflare_r2":
-                    self.cloud_storage.download_from_r2(storage_location, temp_file)
-                else:
-                    raise Exception(f"Unsupported storage provider: {storage_provider}")
-                
-                # Verify file was downloaded
-                if not temp_file.exists():
-                    raise Exception(f"Download failed - temporary file not created: {temp_file}")
-                
-                # Calculate and verify checksum
-                actual_checksum = self.backup_service.calculate_checksum(temp_file)
-                expected_checksum = backup.checksum
-                
-                is_valid = actual_checksum == expected_checksum
-                file_size = temp_file.stat().st_size
-                
-                validation_result = {
-                    "backup_id": backup_id,
-                    "storage_provider": storage_provider,
-                    "is_valid": is_valid,
-                    "expected_checksum": expected_checksum,
-                    "actual_checksum": actual_checksum,
-                    "file_size": file_size,
-                    "backup_date": backup.started_at.isoformat(),
-                    "tenant_id": str(backup.tenant_id) if backup.tenant_id else None
-                }
-                
-                logger.info(f"Backup validation for {backup_id}: {'PASSED' if is_valid else 'FAILED'}")
-                return validation_result
+            validation_result = {
+                "backup_id": backup_id,
+                "storage_provider": storage_provider,
+                "is_valid": result["is_valid"],
+                "verification_mode": result["mode"],
+                "expected_checksum": backup.checksum,
+                "actual_checksum": result["actual_checksum"],
+                "file_size": result["file_size"],
+                "bytes_transferred": result["bytes_transferred"],
+                "checks": result["checks"],
+                "backup_date": backup.started_at.isoformat(),
+                "tenant_id": str(backup.tenant_id) if backup.tenant_id else None
+            }
                 
-            finally:
-                # Clean up temporary file
-                if temp_file.exists():
-                    temp_file.unlink()
+            logger.info(f"Backup validation ({result['mode']}) for {backup_id}: {'PASSED' if result['is_valid'] else 'FAILED'}")
+            return validation_result
             
         except Exception as e:
             logger.error(f"Backup validation failed for {backup_id}: {e}")
@@ -157,6 +151,22 @@ class RestoreService:
             if not storage_location:
                 raise Exception(f"Backup not found in {storage_provider}")
             
+            sql_file = self.temp_dir / f"restore_{backup_id}.sql"
+            
+            # Deduplicated backups are reassembled chunk by chunk from their manifest
+            manifest = backup.get_chunk_manifest()
+            if manifest:
+                tenant_id = str(backup.tenant_id)
+                self.backup_service.chunk_store.restore_file(
+                    tenant_id,
+                    manifest,
+                    self.backup_service.generate_encryption_key(tenant_id),
+                    sql_file,
+                    storage_provider
+                )
+                logger.info(f"Backup {backup_id} prepared for restore: {sql_file}")
+                return sql_file
+            
             # Download encrypted backup file
             encrypted_file = self.temp_dir / f"restore_{backup_id}.enc"
             
@@ -172,7 +182,6 @@ class RestoreService:
             self.backup_service.decrypt_file(encrypted_file, str(backup.tenant_id), compressed_file)
             
             # Decompress the file
-            sql_file = self.temp_dir / f"restore_{backup_id}.sql"
             with gzip.open(compressed_file, 'rb') as f_in:
                 with open(sql_file, 'wb') as f_out:
                     f_out.writelines(f_in)
@@ -188,31 +197,42 @@ class RestoreService:
             logger.error(f"Failed to prepare backup {backup_id} for restore: {e}")
             raise
     
-    def execute_tenant_restore(self, tenant_id: str, sql_file: Path, initiated_by: str) -> Dict:
+    def execute_tenant_restore(self, tenant_id: str, sql_file: Path, initiated_by: str,
+                               restore_log_id: Optional[str] = None) -> Dict:
         """Execute tenant data restore with transaction safety"""
         restore_log = None
         
         try:
-            # Create restore log
-            backup = self.db.query(BackupLog).filter(
-                BackupLog.tenant_id == tenant_id
-            ).order_by(BackupLog.started_at.desc()).first()
+            if restore_log_id:
+                # Orchestrated restore: the log was queued when the batch was planned
+                restore_log = self.db.query(RestoreLog).filter(RestoreLog.id == restore_log_id).first()
+                if not restore_log:
+                    raise Exception(f"Restore log {restore_log_id} not found")
+            
+                backup = restore_log.backup_log
+                restore_log.pre_restore_snapshot = self.create_pre_restore_snapshot(tenant_id)
+            else:
+                # Create restore log
+                backup = self.db.query(BackupLog).filter(
+                    BackupLog.tenant_id == tenant_id
+                ).order_by(BackupLog.started_at.desc()).first()
             
-            if not backup:
-                raise Exception(f"No backup found for tenant {tenant_id}")
-            
-            restore_log = RestoreLog(
-                backup_log_id=backup.id,
-                tenant_id=tenant_id,
-                initiated_by=initiated_by,
-                restore_point=backup.started_at,
-                pre_restore_snapshot=self.create_pre_restore_snapshot(tenant_id)
-            )
-            self.db.add(restore_log)
-            self.db.commit()
+                if not backup:
+                    raise Exception(f"No backup found for tenant {tenant_id}")
+                
+                restore_log = RestoreLog(
+                    backup_log_id=backup.id,
+                    tenant_id=tenant_id,
+                    initiated_by=initiated_by,
+                    restore_point=backup.started_at,
+                    pre_restore_snapshot=self.create_pre_restore_snapshot(tenant_id)
+                )
+                self.db.add(restore_log)
+                self.db.commit()
             
             # Start restore
             restore_log.start_restore()
+            restore_log.update_progress("restoring", 60)
             self.db.commit()
             
             logger.info(f"Starting restore for tenant {tenant_id}")
@@ -290,7 +310,8 @@ class RestoreService:
                 sql_file.unlink()
     
     def restore_single_tenant(self, tenant_id: str, backup_id: str, storage_provider: str, 
-                            initiated_by: str, skip_validation: bool = False) -> Dict:
+                            initiated_by: str, skip_validation: bool = False,
+                            restore_log_id: Optional[str] = None) -> Dict:
         """Restore data for a single tenant"""
         try:
             # Validate tenant exists
@@ -300,25 +321,52 @@ class RestoreService:
             
             # Validate backup integrity unless skipped
             if not skip_validation:
-                validation_result = self.validate_backup_integrity(backup_id, storage_provider)
+                self._update_restore_progress(restore_log_id, "validating", 10)
+                # Spot-check the stored object; the full download below is authenticated
+                # by Fernet decryption, so a second full pass here would be redundant
+                validation_result = self.validate_backup_integrity(
+                    backup_id, storage_provider, mode=IntegrityCheckMode.SAMPLED
+                )
                 if not validation_result["is_valid"]:
                     raise Exception(f"Backup integrity validation failed for {backup_id}")
             
             # Download and prepare backup
+            self._update_restore_progress(restore_log_id, "downloading", 30)
             sql_file = self.download_and_prepare_backup(backup_id, storage_provider)
             
             # Execute restore
-            result = self.execute_tenant_restore(tenant_id, sql_file, initiated_by)
+            result = self.execute_tenant_restore(tenant_id, sql_file, initiated_by, restore_log_id)
             
             return result
             
         except Exception as e:
             logger.error(f"Single tenant restore failed for {tenant_id}: {e}")
+            
+            if restore_log_id:
+                restore_log = self.db.query(RestoreLog).filter(RestoreLog.id == restore_log_id).first()
+                if restore_log and restore_log.status != BackupStatus.FAILED:
+                    restore_log.fail_restore(str(e))
+                    self.db.commit()
+            
             raise
     
+    def _update_restore_progress(self, restore_log_id: Optional[str], step: str, percentage: int):
+        """Record progress on a queued restore log (no-op for ad-hoc restores)"""
+        if not restore_log_id:
+            return
+        
+        restore_log = self.db.query(RestoreLog).filter(RestoreLog.id == restore_log_id).first()
+        if restore_log:
+            restore_log.update_progress(step, percentage)
+            self.db.commit()
+    
     def restore_multiple_tenants(self, tenant_backup_pairs: List[Dict], storage_provider: str, 
                                 initiated_by: str, skip_validation: bool = False) -> Dict:
-        """Restore data for multiple tenants"""
+        """Restore data for multiple tenants sequentially in the calling process.
+        
+        Use plan_tenant_restores/create_restore_batch (orchestrate_tenant_restores_task)
+        to fan the restores out across restore workers instead.
+        """
         results = {
             "status": "completed",
             "total_tenants": len(tenant_backup_pairs),
@@ -363,39 +411,8 @@ class RestoreService:
                            backup_date: Optional[str] = None, skip_validation: bool = False) -> Dict:
         """Restore data for all tenants from their latest backups"""
         try:
-            # Get all active tenants
-            tenants = self.db.query(Tenant).filter(Tenant.is_active == True).all()
-            
-            if not tenants:
-                raise Exception("No active tenants found")
-            
-            # Find latest backup for each tenant
-            tenant_backup_pairs = []
-            
-            for tenant in tenants:
-                query = self.db.query(BackupLog).filter(
-                    BackupLog.tenant_id == tenant.id,
-                    BackupLog.backup_type == BackupType.TENANT_DAILY,
-                    BackupLog.status == BackupStatus.COMPLETED
-                )
-                
-                # Filter by backup date if specified
-                if backup_date:
-                    target_date = datetime.fromisoformat(backup_date.replace('Z', '+00:00'))
-                    query = query.filter(BackupLog.started_at <= target_date)
-                
-                latest_backup = query.order_by(BackupLog.started_at.desc()).first()
-                
-                if latest_backup:
-                    tenant_backup_pairs.append({
-                        "tenant_id": str(tenant.id),
-                        "backup_id": str(latest_backup.id)
-                    })
-                else:
-                    logger.warning(f"No backup found for tenant {tenant.id} ({tenant.name})")
-            
-            if not tenant_backup_pairs:
-                raise Exception("No backups found for any tenant")
+            tenant_backup_pairs = self.get_latest_tenant_backup_pairs(backup_date)
+            total_active_tenants = self.db.query(Tenant).filter(Tenant.is_active == True).count()
             
             # Restore all tenants
             result = self.restore_multiple_tenants(
@@ -403,15 +420,254 @@ class RestoreService:
             )
             
             result["backup_date"] = backup_date
-            result["total_active_tenants"] = len(tenants)
+            result["total_active_tenants"] = total_active_tenants
             
-            logger.info(f"All tenants restore completed: {result['successful_restores']}/{len(tenants)} successful")
+            logger.info(f"All tenants restore completed: {result['successful_restores']}/{total_active_tenants} successful")
             return result
             
         except Exception as e:
             logger.error(f"All tenants restore failed: {e}")
             raise
     
+    def get_latest_tenant_backup_pairs(self, backup_date: Optional[str] = None) -> List[Dict]:
+        """Find the latest completed daily backup for every active tenant"""
+        # Get all active tenants
+        tenants = self.db.query(Tenant).filter(Tenant.is_active == True).all()
+        
+        if not tenants:
+            raise Exception("No active tenants found")
+        
+        # Find latest backup for each tenant
+        tenant_backup_pairs = []
+        
+        for tenant in tenants:
+            query = self.db.query(BackupLog).filter(
+                BackupLog.tenant_id == tenant.id,
+                BackupLog.backup_type == BackupType.TENANT_DAILY,
+                BackupLog.status == BackupStatus.COMPLETED
+            )
+            
+            # Filter by backup date if specified
+            if backup_date:
+                target_date = datetime.fromisoformat(backup_date.replace('Z', '+00:00'))
+                query = query.filter(BackupLog.started_at <= target_date)
+            
+            latest_backup = query.order_by(BackupLog.started_at.desc()).first()
+            
+            if latest_backup:
+                tenant_backup_pairs.append({
+                    "tenant_id": str(tenant.id),
+                    "backup_id": str(latest_backup.id)
+                })
+            else:
+                logger.warning(f"No backup found for tenant {tenant.id} ({tenant.name})")
+        
+        if not tenant_backup_pairs:
+            raise Exception("No backups found for any tenant")
+        
+        return tenant_backup_pairs
+    
+    def estimate_restore_throughput(self) -> float:
+        """Estimate restore throughput in bytes/second from recent completed restores"""
+        try:
+            recent = (
+                self.db.query(RestoreLog.duration_seconds, BackupLog.compressed_size, BackupLog.file_size)
+                .join(BackupLog, RestoreLog.backup_log_id == BackupLog.id)
+                .filter(
+                    RestoreLog.status == BackupStatus.COMPLETED,
+                    RestoreLog.duration_seconds > 0
+                )
+                .order_by(RestoreLog.completed_at.desc())
+                .limit(50)
+                .all()
+            )
+            
+            total_bytes = sum(int(compressed or size or 0) for _, compressed, size in recent)
+            total_seconds = sum(duration for duration, _, _ in recent)
+            
+            if total_bytes > 0 and total_seconds > 0:
+                return total_bytes / total_seconds
+        
+        except Exception as e:
+            logger.warning(f"Failed to estimate restore throughput from history: {e}")
+        
+        return float(settings.restore_throughput_bytes_per_second)
+    
+    def plan_tenant_restores(self, tenant_backup_pairs: List[Dict], storage_provider: str,
+                             max_concurrency: Optional[int] = None) -> Dict:
+        """Build a prioritised, concurrency-bounded restore plan with duration estimates.
+        
+        Tenants are ordered by subscription tier (enterprise first) and then by archive
+        size (smallest first, so the most tenants come back online soonest). Each tenant
+        is assigned to the worker lane that frees up earliest; the plan doubles as the
+        dry-run report.
+        """
+        concurrency = max(1, max_concurrency or settings.restore_max_concurrency)
+        throughput = self.estimate_restore_throughput()
+        overhead = settings.restore_tenant_overhead_seconds
+        
+        tenant_ids = [pair["tenant_id"] for pair in tenant_backup_pairs]
+        backup_ids = [pair["backup_id"] for pair in tenant_backup_pairs]
+        tenants = {str(t.id): t for t in self.db.query(Tenant).filter(Tenant.id.in_(tenant_ids)).all()}
+        backups = {str(b.id): b for b in self.db.query(BackupLog).filter(BackupLog.id.in_(backup_ids)).all()}
+        
+        items = []
+        missing = []
+        for pair in tenant_backup_pairs:
+            tenant = tenants.get(str(pair["tenant_id"]))
+            backup = backups.get(str(pair["backup_id"]))
+            
+            if not tenant or not backup:
+                missing.append({
+                    "tenant_id": pair["tenant_id"],
+                    "backup_id": pair["backup_id"],
+                    "error": "Tenant not found" if not tenant else "Backup not found"
+                })
+                continue
+            
+            has_storage = any(
+                location.get("provider") == storage_provider
+                for location in backup.storage_locations or []
+            )
+            archive_size = int(backup.compressed_size or backup.file_size or 0)
+            
+            items.append({
+                "tenant_id": str(tenant.id),
+                "tenant_name": tenant.name,
+                "subscription_type": tenant.subscription_type.value if tenant.subscription_type else None,
+                "backup_id": str(backup.id),
+                "backup_date": backup.started_at.isoformat() if backup.started_at else None,
+                "archive_size": archive_size,
+                "available_in_storage": has_storage,
+                "estimated_seconds": int(overhead + archive_size / throughput),
+                "_tier_rank": TIER_RESTORE_PRIORITY.get(tenant.subscription_type, len(TIER_RESTORE_PRIORITY))
+            })
+        
+        items.sort(key=lambda item: (item["_tier_rank"], item["archive_size"]))
+        
+        # Greedy list scheduling: next tenant goes to the lane that becomes free first
+        lanes = [(0, lane_index) for lane_index in range(min(concurrency, len(items)) or 1)]
+        heapq.heapify(lanes)
+        for position, item in enumerate(items):
+            lane_finish, lane_index = heapq.heappop(lanes)
+            item.pop("_tier_rank")
+            item["priority"] = position
+            item["lane"] = lane_index
+            item["estimated_start_seconds"] = lane_finish
+            item["estimated_finish_seconds"] = lane_finish + item["estimated_seconds"]
+            heapq.heappush(lanes, (item["estimated_finish_seconds"], lane_index))
+        
+        total_archive_size = sum(item["archive_size"] for item in items)
+        
+        return {
+            "storage_provider": storage_provider,
+            "max_concurrency": concurrency,
+            "total_tenants": len(items),
+            "total_archive_size": total_archive_size,
+            "throughput_bytes_per_second": int(throughput),
+            "estimated_total_seconds": max((item["estimated_finish_seconds"] for item in items), default=0),
+            "estimated_serial_seconds": sum(item["estimated_seconds"] for item in items),
+            "unavailable_in_storage": [item["tenant_id"] for item in items if not item["available_in_storage"]],
+            "skipped": missing,
+            "restores": items
+        }
+    
+    def create_restore_batch(self, plan: Dict, initiated_by: str, batch_id: str) -> List[List[Dict]]:
+        """
+        Queue restore logs for a plan and group them into per-worker lanes
+        
+        Logs already queued for the batch by an earlier attempt are reused, so retrying
+        the orchestration does not queue a tenant twice.
+        """
+        lanes: Dict[int, List[Dict]] = {}
+        existing = {
+            (str(restore_log.tenant_id), str(restore_log.backup_log_id)): restore_log
+            for restore_log in self.db.query(RestoreLog).filter(RestoreLog.batch_id == batch_id).all()
+        }
+        
+        for item in plan["restores"]:
+            restore_log = existing.get((str(item["tenant_id"]), str(item["backup_id"])))
+            if restore_log is None:
+                backup = self.db.query(BackupLog).filter(BackupLog.id == item["backup_id"]).first()
+            
+                restore_log = RestoreLog(
+                    backup_log_id=backup.id,
+                    tenant_id=item["tenant_id"],
+                    initiated_by=initiated_by,
+                    restore_point=backup.started_at,
+                    batch_id=batch_id,
+                    priority=item["priority"]
+                )
+                restore_log.update_progress("queued", 0)
+                self.db.add(restore_log)
+                self.db.flush()
+            
+            lanes.setdefault(item["lane"], []).append({
+                "tenant_id": item["tenant_id"],
+                "backup_id": item["backup_id"],
+                "restore_log_id": str(restore_log.id)
+            })
+        
+        self.db.commit()
+        
+        logger.info(f"Restore batch {batch_id} queued: {len(plan['restores'])} tenants in {len(lanes)} lanes")
+        return [lanes[lane_index] for lane_index in sorted(lanes)]
+    
+    def get_restore_batch_status(self, batch_id: str) -> Dict:
+        """Aggregate per-tenant restore progress for an orchestrated batch"""
+        try:
+            restores = (
+                self.db.query(RestoreLog)
+                .filter(RestoreLog.batch_id == batch_id)
+                .order_by(RestoreLog.priority)
+                .all()
+            )
+            
+            status_counts = {status.value: 0 for status in BackupStatus}
+            for restore in restores:
+                status_counts[restore.status.value] += 1
+            
+            total = len(restores)
+            finished = status_counts[BackupStatus.COMPLETED.value] + status_counts[BackupStatus.FAILED.value]
+            
+            if total == 0:
+                status = "not_found"
+            elif finished < total:
+                status = "in_progress"
+            elif status_counts[BackupStatus.FAILED.value] > 0:
+                status = "partial_failure"
+            else:
+                status = "completed"
+            
+            return {
+                "batch_id": batch_id,
+                "status": status,
+                "total_tenants": total,
+                "successful_restores": status_counts[BackupStatus.COMPLETED.value],
+                "failed_restores": status_counts[BackupStatus.FAILED.value],
+                "in_progress_restores": status_counts[BackupStatus.IN_PROGRESS.value],
+                "pending_restores": status_counts[BackupStatus.PENDING.value],
+                "progress_percentage": round(sum(r.progress_percentage or 0 for r in restores) / total, 1) if total else 0.0,
+                "restore_results": [
+                    {
+                        "restore_id": str(restore.id),
+                        "tenant_id": str(restore.tenant_id) if restore.tenant_id else None,
+                        "backup_id": str(restore.backup_log_id),
+                        "priority": restore.priority,
+                        "status": restore.status.value,
+                        "current_step": restore.current_step,
+                        "progress_percentage": restore.progress_percentage,
+                        "duration_seconds": restore.duration_seconds,
+                        "error_message": restore.error_message
+                    }
+                    for restore in restores
+                ]
+            }
+        
+        except Exception as e:
+            logger.error(f"Failed to get restore batch status for {batch_id}: {e}")
+            raise
+    
     def list_restore_history(self, tenant_id: Optional[str] = None, limit: int = 50) -> List[Dict]:
         """List restore operation history"""
         try:
@@ -473,40 +729,32 @@ class RestoreService:
     def get_available_restore_points(self, tenant_id: str, storage_provider: str = "backblaze_b2") -> List[Dict]:
         """Get available restore points for a tenant"""
         try:
-            # Get all completed backups for the tenant
+            # Provider filtering happens in the database (JSONB containment) on the restore-point index
             backups = (
                 self.db.query(BackupLog)
                 .filter(
                     BackupLog.tenant_id == tenant_id,
                     BackupLog.backup_type == BackupType.TENANT_DAILY,
-                    BackupLog.status == BackupStatus.COMPLETED
+                    BackupLog.status == BackupStatus.COMPLETED,
+                    BackupLog.storage_locations.contains([{"provider": storage_provider}])
                 )
                 .order_by(BackupLog.started_at.desc())
                 .all()
             )
             
-            restore_points = []
-            for backup in backups:
-                # Check if backup is available in specified storage provider
-                has_storage = False
-                for location in backup.storage_locations or []:
-                    if location.get("provider") == storage_provider:
-                        has_storage = True
-                        break
-                
-                if has_storage:
-                    restore_points.append({
-                        "backup_id": str(backup.id),
-                        "backup_name": backup.backup_name,
-                        "backup_date": backup.started_at.isoformat(),
-                        "file_size": backup.file_size,
-                        "compressed_size": backup.compressed_size,
-                        "checksum": backup.checksum,
-                        "storage_provider": storage_provider,
-                        "duration_seconds": backup.duration_seconds
-                    })
-            
-            return restore_points
+            return [
+                {
+                    "backup_id": str(backup.id),
+                    "backup_name": backup.backup_name,
+                    "backup_date": backup.started_at.isoformat(),
+                    "file_size": backup.file_size,
+                    "compressed_size": backup.compressed_size,
+                    "checksum": backup.checksum,
+                    "storage_provider": storage_provider,
+                    "duration_seconds": backup.duration_seconds
+                }
+                for backup in backups
+            ]
             
         except Exception as e:
             logger.error(f"Failed to get restore points for tenant {tenant_id}: {e}")
@@ -0,0 +1,261 @@
+"""
+Incremental customer segment membership
+Automatic and dynamic segments are kept in step with customer changes: a customer whose
+segment-relevant fields change is re-evaluated against the tenant's compiled segment
+predicates in one query, and time-based criteria are swept daily over the boundary window
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+import logging
+
+from sqlalchemy import and_, or_, delete, insert, tuple_, update, event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.customer import Customer, CustomerStatus
+from app.models.tag import TagMatch, tag_filter
+from app.models.marketing import CustomerSegment, SegmentCustomer, CommunicationPreference, SegmentationType
+
+logger = logging.getLogger(__name__)
+
+# Customer columns read by segment criteria; changing any of them can change membership
+SEGMENT_FIELDS = (
+    "status", "customer_type", "tags", "city",
+    "total_purchases", "total_debt", "total_gold_debt", "last_purchase_at"
+)
+
+MAINTAINED_SEGMENT_TYPES = (SegmentationType.AUTOMATIC, SegmentationType.DYNAMIC)
+SEGMENT_EVALUATION_CHUNK_SIZE = 1000  # Customers evaluated per query
+
+_PENDING_KEY = "segment_membership_pending"
+
+
+def marketing_allowed():
+    """Condition excluding customers who opted out of marketing (requires an outer join to preferences)"""
+    return or_(
+        CommunicationPreference.id.is_(None),  # No preferences set (default allow)
+        and_(
+            CommunicationPreference.email_marketing == True,
+            CommunicationPreference.sms_marketing == True
+        )
+    )
+
+
+def segment_conditions(filter_criteria: Dict[str, Any], now: Optional[datetime] = None) -> List:
+    """Compile segment filter criteria into SQL conditions on Customer"""
+    
+    conditions = []
+    
+    if filter_criteria.get('customer_type'):
+        conditions.append(Customer.customer_type == filter_criteria['customer_type'])
+    
+    if filter_criteria.get('tags'):
+        tags = filter_criteria['tags']
+        if isinstance(tags, list):
+            # Customer must have all specified tags, or any of them with tag_match "any"
+            conditions.append(tag_filter(Customer.tags, tags, filter_criteria.get('tag_match', TagMatch.ALL)))
+    
+    if filter_criteria.get('min_total_purchases'):
+        conditions.append(Customer.total_purchases >= filter_criteria['min_total_purchases'])
+    
+    if filter_criteria.get('max_total_purchases'):
+        conditions.append(Customer.total_purchases <= filter_criteria['max_total_purchases'])
+    
+    if filter_criteria.get('has_debt'):
+        if filter_criteria['has_debt']:
+            conditions.append(or_(Customer.total_debt > 0, Customer.total_gold_debt > 0))
+        else:
+            conditions.append(and_(Customer.total_debt == 0, Customer.total_gold_debt == 0))
+    
+    if filter_criteria.get('last_purchase_days'):
+        days_ago = (now or datetime.utcnow()) - timedelta(days=filter_criteria['last_purchase_days'])
+        conditions.append(Customer.last_purchase_at >= days_ago)
+    
+    if filter_criteria.get('city'):
+        conditions.append(Customer.city == filter_criteria['city'])
+    
+    return conditions
+
+
+def segment_predicate(filter_criteria: Dict[str, Any], now: Optional[datetime] = None):
+    """Full membership predicate for one segment, including customer status and opt-out"""
+    return and_(
+        Customer.status == CustomerStatus.ACTIVE,
+        marketing_allowed(),
+        *segment_conditions(filter_criteria, now)
+    )
+
+
+class SegmentMembershipService:
+    """Maintains automatic segment membership for individual customers"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def _maintained_segments(self, tenant_id) -> List[CustomerSegment]:
+        return self.db.query(CustomerSegment).filter(
+            CustomerSegment.tenant_id == tenant_id,
+            CustomerSegment.segmentation_type.in_(MAINTAINED_SEGMENT_TYPES),
+            CustomerSegment.filter_criteria.isnot(None)
+        ).all()
+    
+    def update_customers(
+        self,
+        tenant_id,
+        customer_ids: Iterable,
+        segments: Optional[List[CustomerSegment]] = None
+    ) -> Dict[str, int]:
+        """
+        Re-evaluate customers against the tenant's segments and apply only the differences
+        
+        Every segment predicate is selected as a boolean column, so each chunk of customers
+        is evaluated against all segments with a single query.
+        """
+        
+        segments = [
+            segment for segment in (self._maintained_segments(tenant_id) if segments is None else segments)
+            if segment.filter_criteria
+        ]
+        customer_ids = list(customer_ids)
+        if not segments or not customer_ids:
+            return {"added": 0, "removed": 0}
+        
+        now = datetime.utcnow()
+        predicates = [
+            segment_predicate(segment.filter_criteria, now).label(f"segment_{index}")
+            for index, segment in enumerate(segments)
+        ]
+        segment_ids = [segment.id for segment in segments]
+        
+        added = []
+        removed = []
+        for start in range(0, len(customer_ids), SEGMENT_EVALUATION_CHUNK_SIZE):
+            chunk = customer_ids[start:start + SEGMENT_EVALUATION_CHUNK_SIZE]
+            
+            wanted = set()
+            for row in self.db.query(Customer.id, *predicates).outerjoin(CommunicationPreference).filter(
+                Customer.tenant_id == tenant_id,
+                Customer.id.in_(chunk)
+            ):
+                wanted.update((segment_id, row[0]) for segment_id, matches in zip(segment_ids, row[1:]) if matches)
+            
+            current = set(self.db.query(SegmentCustomer.segment_id, SegmentCustomer.customer_id).filter(
+                SegmentCustomer.segment_id.in_(segment_ids),
+                SegmentCustomer.customer_id.in_(chunk)
+            ))
+            
+            added.extend(wanted - current)
+            removed.extend(current - wanted)
+        
+        self._apply_changes(added, removed)
+        return {"added": len(added), "removed": len(removed)}
+    
+    def _apply_changes(self, added: List, removed: List):
+        """Insert and delete membership rows in bulk and adjust segment counts"""
+        
+        if added:
+            self.db.execute(insert(SegmentCustomer), [
+                {"segment_id": segment_id, "customer_id": customer_id, "added_by": "automatic"}
+                for segment_id, customer_id in added
+            ])
+        
+        if removed:
+            self.db.execute(
+                delete(SegmentCustomer)
+                .where(tuple_(SegmentCustomer.segment_id, SegmentCustomer.customer_id).in_(removed))
+                .execution_options(synchronize_session=False)
+            )
+        
+        deltas = {}
+        for segment_id, _ in added:
+            deltas[segment_id] = deltas.get(segment_id, 0) + 1
+        for segment_id, _ in removed:
+            deltas[segment_id] = deltas.get(segment_id, 0) - 1
+        
+        for segment_id, delta in deltas.items():
+            if delta:
+                self.db.execute(
+                    update(CustomerSegment)
+                    .where(CustomerSegment.id == segment_id)
+                    .values(customer_count=CustomerSegment.customer_count + delta)
+                    .execution_options(synchronize_session=False)
+                )
+    
+    def sweep_time_windows(self, segment: CustomerSegment, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Re-evaluate the customers whose last purchase aged past the segment's window since the last sweep
+        
+        Purchases move customers into a window through the change hook; leaving it only
+        depends on time, so only the boundary slice between sweeps needs checking.
+        """
+        
+        days = (segment.filter_criteria or {}).get('last_purchase_days')
+        if not days:
+            return {"added": 0, "removed": 0}
+        
+        now = now or datetime.utcnow()
+        window = timedelta(days=days)
+        # Tracked separately from last_updated_at, which manual edits and recounts also move
+        last_swept_at = segment.time_window_swept_at or segment.created_at
+        
+        boundary_ids = [
+            customer_id for customer_id, in self.db.query(SegmentCustomer.customer_id).join(
+                Customer, Customer.id == SegmentCustomer.customer_id
+            ).filter(
+                SegmentCustomer.segment_id == segment.id,
+                Customer.last_purchase_at >= last_swept_at - window,
+                Customer.last_purchase_at < now - window
+            )
+        ]
+        
+        changes = self.update_customers(segment.tenant_id, boundary_ids, segments=[segment])
+        segment.time_window_swept_at = now
+        return changes
+
+
+def _collect_changed_customers(session: Session, flush_context):
+    """after_flush: remember customers whose segment-relevant fields were inserted or changed"""
+    
+    pending = None
+    for instance in list(session.new) + list(session.dirty):
+        if not isinstance(instance, Customer):
+            continue
+        
+        if instance not in session.new:
+            state = inspect(instance)
+            if not any(state.attrs[field].history.has_changes() for field in SEGMENT_FIELDS):
+                continue
+        
+        if pending is None:
+            pending = session.info.setdefault(_PENDING_KEY, {})
+        pending.setdefault(instance.tenant_id, set()).add(instance.id)
+
+
+def _update_changed_customers(session: Session):
+    """before_commit: bring segment membership up to date within the committing transaction"""
+    
+    session.flush()
+    while session.info.get(_PENDING_KEY):
+        pending = session.info.pop(_PENDING_KEY)
+        membership = SegmentMembershipService(session)
+        for tenant_id, customer_ids in pending.items():
+            changes = membership.update_customers(tenant_id, customer_ids)
+            if changes["added"] or changes["removed"]:
+                logger.debug(f"Segment membership for tenant {tenant_id}: {changes}")
+        session.flush()
+
+
+def _discard_changed_customers(session: Session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def track_segment_changes(session_factory):
+    """Keep automatic segments current for every session created by session_factory"""
+    
+    if not settings.segment_incremental_updates_enabled:
+        return
+    
+    event.listen(session_factory, "after_flush", _collect_changed_customers)
+    event.listen(session_factory, "before_commit", _update_changed_customers)
+    event.listen(session_factory, "after_rollback", _discard_changed_customers)
@@ -0,0 +1,221 @@
+"""
+Stock ledger
+Stock and reserved quantities are changed by one conditional UPDATE per movement, so
+concurrent sales cannot oversell, and each applied movement is appended to stock_movements.
+Movements that take a product across its low stock threshold emit a webhook event.
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import logging
+import uuid
+
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import BusinessLogicError, NotFoundError, ValidationError
+from app.models.product import Product, needs_restock
+from app.models.stock_movement import StockMovement, StockMovementType
+from app.services.product_code_cache import queue_code_invalidation
+from app.services.webhook_delivery_service import enqueue_webhook_event
+
+logger = logging.getLogger(__name__)
+
+# Direction in which a movement's quantity changes (stock_quantity, reserved_quantity)
+MOVEMENT_DIRECTIONS = {
+    StockMovementType.ADJUST: (1, 0),
+    StockMovementType.RESERVE: (0, 1),
+    StockMovementType.RELEASE: (0, -1),
+    StockMovementType.FULFILL: (-1, -1),
+}
+
+# Movements refused for services and products that don't track inventory
+INVENTORY_ONLY_MOVEMENTS = (StockMovementType.ADJUST, StockMovementType.RESERVE)
+
+LOW_STOCK_EVENT = "product.low_stock"
+RESTOCKED_EVENT = "product.restocked"
+
+
+def emit_low_stock_change(db: Session, tenant_id: uuid.UUID, product) -> int:
+    """Queue the event for a product that has just crossed its low stock threshold; the caller commits"""
+    event_type = LOW_STOCK_EVENT if product.is_low_stock else RESTOCKED_EVENT
+    return enqueue_webhook_event(db, tenant_id, event_type, {
+        "product_id": str(product.id),
+        "name": product.name,
+        "sku": product.sku,
+        "stock_quantity": product.stock_quantity,
+        "reserved_quantity": product.reserved_quantity,
+        "available_quantity": product.stock_quantity - product.reserved_quantity,
+        "min_stock_level": product.min_stock_level
+    })
+
+
+class StockMovementLine(NamedTuple):
+    """A stock movement to apply"""
+    product_id: uuid.UUID
+    movement_type: StockMovementType
+    quantity: int
+    reason: Optional[str] = None
+    reference_type: Optional[str] = None
+    reference_id: Optional[uuid.UUID] = None
+
+
+class StockLedgerService:
+    """Applies stock movements atomically and records them in the ledger"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def apply_movements(
+        self,
+        tenant_id: uuid.UUID,
+        movements: List[StockMovementLine]
+    ) -> Dict[uuid.UUID, Tuple[int, int]]:
+        """
+        Apply movements in the current transaction and return (stock, reserved) per product
+        
+        Each movement is a single UPDATE whose WHERE clause only matches while stock
+        stays at or above the reserved quantity and neither goes negative, so the check
+        and the write cannot be separated by a concurrent sale. Products are updated in
+        id order to keep concurrent batches from deadlocking. If any movement cannot be
+        applied the error is raised and nothing is recorded; the caller rolls back.
+        """
+        
+        for movement in movements:
+            if movement.movement_type != StockMovementType.ADJUST and movement.quantity <= 0:
+                raise ValidationError(f"Quantity to {movement.movement_type.value} must be positive")
+        
+        levels: Dict[uuid.UUID, Tuple[int, int]] = {}
+        was_low: Dict[uuid.UUID, bool] = {}
+        crossed = {}
+        ledger_rows = []
+        for movement in sorted(movements, key=lambda line: str(line.product_id)):
+            row = self._apply(tenant_id, movement)
+            if row is None:
+                self._raise_refusal(tenant_id, movement)
+            
+            # The row held the returned levels minus this movement just before the update
+            stock_direction, reserved_direction = MOVEMENT_DIRECTIONS[movement.movement_type]
+            was_low.setdefault(movement.product_id, needs_restock(
+                row.stock_quantity - stock_direction * movement.quantity,
+                row.reserved_quantity - reserved_direction * movement.quantity,
+                row.min_stock_level,
+                row.track_inventory,
+                row.is_service
+            ))
+            if row.is_low_stock != was_low[movement.product_id]:
+                crossed[movement.product_id] = row
+            else:
+                crossed.pop(movement.product_id, None)
+            
+            levels[movement.product_id] = (row.stock_quantity, row.reserved_quantity)
+            queue_code_invalidation(self.db, tenant_id, (row.sku, row.barcode))
+            ledger_rows.append({
+                "id": uuid.uuid4(),
+                "tenant_id": tenant_id,
+                "product_id": movement.product_id,
+                "movement_type": movement.movement_type,
+                "quantity": movement.quantity,
+                "stock_after": row.stock_quantity,
+                "reserved_after": row.reserved_quantity,
+                "reason": movement.reason,
+                "reference_type": movement.reference_type,
+                "reference_id": movement.reference_id,
+                "is_active": True
+            })
+        
+        if ledger_rows:
+            self.db.execute(insert(StockMovement.__table__), ledger_rows)
+        
+        for row in crossed.values():
+            emit_low_stock_change(self.db, tenant_id, row)
+        
+        return levels
+    
+    def get_movements(
+        self,
+        tenant_id: uuid.UUID,
+        product_id: uuid.UUID,
+        skip: int = 0,
+        limit: int = 50
+    ) -> List[StockMovement]:
+        """Recorded movements of a product, newest first"""
+        return self.db.query(StockMovement).filter(
+            StockMovement.tenant_id == tenant_id,
+            StockMovement.product_id == product_id
+        ).order_by(StockMovement.created_at.desc(), StockMovement.id.desc()).offset(skip).limit(limit).all()
+    
+    def _apply(self, tenant_id: uuid.UUID, movement: StockMovementLine):
+        stock_direction, reserved_direction = MOVEMENT_DIRECTIONS[movement.movement_type]
+        new_stock = Product.stock_quantity + stock_direction * movement.quantity
+        new_reserved = Product.reserved_quantity + reserved_direction * movement.quantity
+        
+        conditions = [
+            Product.tenant_id == tenant_id,
+            Product.id == movement.product_id,
+            Product.is_active == True,
+            new_stock >= new_reserved,
+            new_reserved >= 0,
+            new_stock >= 0
+        ]
+        if movement.movement_type in INVENTORY_ONLY_MOVEMENTS:
+            conditions.extend([Product.track_inventory == True, Product.is_service == False])
+        
+        statement = (
+            update(Product)
+            .where(*conditions)
+            .values(stock_quantity=new_stock, reserved_quantity=new_reserved, updated_at=func.now())
+            .returning(
+                Product.id, Product.name, Product.sku, Product.barcode,
+                Product.stock_quantity, Product.reserved_quantity, Product.min_stock_level,
+                Product.track_inventory, Product.is_service, Product.is_low_stock
+            )
+            .execution_options(synchronize_session="fetch")
+        )
+        return self.db.execute(statement).first()
+    
+    def _raise_refusal(self, tenant_id: uuid.UUID, movement: StockMovementLine):
+        """Raise the reason a movement's UPDATE matched no row"""
+        
+        product = self.db.query(Product).filter(
+            Product.tenant_id == tenant_id,
+            Product.id == movement.product_id,
+            Product.is_active == True
+        ).populate_existing().first()
+        
+        if not product:
+            raise NotFoundError("Product not found")
+        
+        quantity = movement.quantity
+        movement_type = movement.movement_type
+        
+        if movement_type in INVENTORY_ONLY_MOVEMENTS:
+            action = movement_type.value
+            if not product.track_inventory:
+                raise BusinessLogicError(f"Cannot {action} stock for products that don't track inventory")
+            if product.is_service:
+                raise BusinessLogicError(f"Cannot {action} stock for service products")
+        
+        if movement_type == StockMovementType.ADJUST:
+            new_quantity = product.stock_quantity + quantity
+            if new_quantity < 0:
+                raise BusinessLogicError("Stock quantity cannot be negative")
+            if product.reserved_quantity > new_quantity:
+                raise BusinessLogicError("Cannot reduce stock below reserved quantity")
+        
+        elif movement_type == StockMovementType.RESERVE:
+            available_quantity = product.stock_quantity - product.reserved_quantity
+            if available_quantity < quantity:
+                raise BusinessLogicError(f"Insufficient stock. Available: {available_quantity}, Requested: {quantity}")
+        
+        elif movement_type == StockMovementType.RELEASE:
+            if quantity > product.reserved_quantity:
+                raise BusinessLogicError(f"Cannot release more than reserved. Reserved: {product.reserved_quantity}, Requested: {quantity}")
+        
+        elif movement_type == StockMovementType.FULFILL:
+            if quantity > product.reserved_quantity:
+                raise BusinessLogicError(f"Cannot fulfill more than reserved. Reserved: {product.reserved_quantity}, Requested: {quantity}")
+            if quantity > product.stock_quantity:
+                raise BusinessLogicError(f"Cannot fulfill more than available stock. Stock: {product.stock_quantity}, Requested: {quantity}")
+        
+        # The row no longer matches what refused the update; another transaction changed it
+        raise BusinessLogicError("Stock changed while the movement was applied, please retry")
@@ -0,0 +1,168 @@
+"""
+Local inventory of objects held in backup storage
+Kept current on every upload and delete, and reconciled periodically against the
+bucket listings, so usage and redundancy reports never page through whole buckets
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import logging
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.backup import StorageObject, StorageProvider
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_PROVIDERS = (StorageProvider.BACKBLAZE_B2, StorageProvider.CLOUDFLARE_R2)
+
+
+class StorageInventoryService:
+    """Service for the local storage object inventory"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def record_upload(self, storage_provider: str, object_key: str, size: int, etag: Optional[str] = None,
+                      tenant_id: Optional[str] = None, last_modified: Optional[datetime] = None):
+        """Insert or refresh the inventory row for an uploaded object"""
+        provider = StorageProvider(storage_provider)
+        now = datetime.now(timezone.utc)
+        
+        # Savepoint so a failed inventory write never rolls back the caller's work
+        with self.db.begin_nested():
+            storage_object = self.db.query(StorageObject).filter(
+                StorageObject.provider == provider,
+                StorageObject.object_key == object_key
+            ).first()
+            
+            if storage_object is None:
+                storage_object = StorageObject(provider=provider, object_key=object_key)
+                self.db.add(storage_object)
+            
+            storage_object.size = size
+            storage_object.etag = etag or storage_object.etag
+            storage_object.tenant_id = tenant_id or storage_object.tenant_id
+            storage_object.last_modified = last_modified or now
+            storage_object.last_seen_at = now
+    
+    def record_delete(self, storage_provider: str, object_key: str):
+        """Remove the inventory row for a deleted object"""
+        with self.db.begin_nested():
+            self.db.query(StorageObject).filter(
+                StorageObject.provider == StorageProvider(storage_provider),
+                StorageObject.object_key == object_key
+            ).delete(synchronize_session=False)
+    
+    def get_usage(self) -> Dict:
+        """Object count and total size per provider from the inventory"""
+        usage = {
+            provider.value: {"object_count": 0, "total_size": 0, "last_reconciled_at": None}
+            for provider in INVENTORY_PROVIDERS
+        }
+        
+        rows = (
+            self.db.query(
+                StorageObject.provider,
+                func.count(StorageObject.id),
+                func.coalesce(func.sum(StorageObject.size), 0),
+                func.min(StorageObject.last_seen_at)
+            )
+            .group_by(StorageObject.provider)
+            .all()
+        )
+        for provider, object_count, total_size, oldest_seen in rows:
+            if provider.value in usage:
+                usage[provider.value] = {
+                    "object_count": object_count,
+                    "total_size": int(total_size),
+                    "last_reconciled_at": oldest_seen.isoformat() if oldest_seen else None
+                }
+        
+        return usage
+    
+    def get_redundancy(self) -> Dict[str, List[str]]:
+        """Object keys grouped by which providers hold them"""
+        in_b2 = func.bool_or(StorageObject.provider == StorageProvider.BACKBLAZE_B2)
+        in_r2 = func.bool_or(StorageObject.provider == StorageProvider.CLOUDFLARE_R2)
+        
+        rows = (
+            self.db.query(StorageObject.object_key, in_b2, in_r2)
+            .filter(StorageObject.provider.in_(INVENTORY_PROVIDERS))
+            .group_by(StorageObject.object_key)
+            .all()
+        )
+        
+        redundancy = {"redundant": [], "b2_only": [], "r2_only": []}
+        for object_key, has_b2, has_r2 in rows:
+            if has_b2 and has_r2:
+                redundancy["redundant"].append(object_key)
+            elif has_b2:
+                redundancy["b2_only"].append(object_key)
+            else:
+                redundancy["r2_only"].append(object_key)
+        
+        return redundancy
+    
+    def reconcile(self, cloud_storage, storage_provider: str, batch_size: int = 1000) -> Dict:
+        """Bring the inventory for one provider in line with a full bucket listing"""
+        provider = StorageProvider(storage_provider)
+        started = datetime.now(timezone.utc)
+        
+        existing = {
+            storage_object.object_key: storage_object
+            for storage_object in self.db.query(StorageObject).filter(StorageObject.provider == provider).all()
+        }
+        
+        seen = set()
+        added = 0
+        updated = 0
+        for listed in cloud_storage.iter_objects(storage_provider):
+            seen.add(listed["key"])
+            storage_object = existing.get(listed["key"])
+            
+            if storage_object is None:
+                self.db.add(StorageObject(
+                    provider=provider,
+                    object_key=listed["key"],
+                    size=listed["size"],
+                    etag=listed["etag"],
+                    last_modified=listed["last_modified"],
+                    last_seen_at=started
+                ))
+                added += 1
+            elif storage_object.size != listed["size"] or storage_object.etag != listed["etag"]:
+                storage_object.size = listed["size"]
+                storage_object.etag = listed["etag"]
+                storage_object.last_modified = listed["last_modified"]
+                storage_object.last_seen_at = started
+                updated += 1
+            
+            if (added + updated) and (added + updated) % batch_size == 0:
+                self.db.flush()
+        
+        # Only rows loaded before the listing are candidates, so uploads racing the reconcile survive
+        missing_ids = [storage_object.id for key, storage_object in existing.items() if key not in seen]
+        for start in range(0, len(missing_ids), batch_size):
+            self.db.query(StorageObject).filter(
+                StorageObject.id.in_(missing_ids[start:start + batch_size])
+            ).delete(synchronize_session=False)
+        
+        # Every remaining row was just listed, so unchanged rows are stamped in one statement
+        self.db.query(StorageObject).filter(
+            StorageObject.provider == provider,
+            StorageObject.last_seen_at < started
+        ).update({StorageObject.last_seen_at: started}, synchronize_session=False)
+        
+        self.db.commit()
+        
+        result = {
+            "provider": storage_provider,
+            "listed_objects": len(seen),
+            "added": added,
+            "updated": updated,
+            "removed": len(missing_ids)
+        }
+        logger.info(f"Storage inventory reconciled for {storage_provider}: {result}")
+        return result
@@ -0,0 +1,221 @@
+"""
+Tenant tag dictionary
+Tag usage counts are adjusted from the tag and is_active changes of each flush and written
+in the committing transaction, so tag lists and autocomplete read one small indexed table
+"""
+
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import logging
+import uuid
+
+from sqlalchemy import bindparam, event, func, inspect, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.base import NO_VALUE
+
+from app.core.config import settings
+from app.models.customer import Customer
+from app.models.product import Product
+from app.models.tag import Tag, TagEntityType
+
+logger = logging.getLogger(__name__)
+
+TAGGED_MODELS = {
+    Customer: TagEntityType.CUSTOMER,
+    Product: TagEntityType.PRODUCT,
+}
+
+TAG_SUGGESTION_LIMIT = 20
+
+# Record tags are unbounded JSONB strings; longer ones don't fit the dictionary and aren't counted
+TAG_NAME_MAX_LENGTH = Tag.__table__.c.name.type.length
+
+_PENDING_KEY = "tag_usage_pending"
+_COUNTED_ATTRIBUTES = ("tags", "is_active")
+
+
+class TagDictionaryService:
+    """Reads and maintains per-tenant tag usage counts"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def get_tag_counts(self, tenant_id, entity_type: TagEntityType) -> List[Tuple[str, int]]:
+        """Tags in use with their counts, by name"""
+        return self.db.query(Tag.name, Tag.usage_count).filter(
+            Tag.tenant_id == tenant_id,
+            Tag.entity_type == entity_type,
+            Tag.usage_count > 0
+        ).order_by(Tag.name).all()
+    
+    def suggest_tags(
+        self,
+        tenant_id,
+        entity_type: TagEntityType,
+        prefix: str = "",
+        limit: int = TAG_SUGGESTION_LIMIT
+    ) -> List[Tuple[str, int]]:
+        """Tags starting with the prefix, most used first"""
+        query = self.db.query(Tag.name, Tag.usage_count).filter(
+            Tag.tenant_id == tenant_id,
+            Tag.entity_type == entity_type,
+            Tag.usage_count > 0
+        )
+        
+        if prefix:
+            query = query.filter(Tag.name.startswith(prefix, autoescape=True))
+        
+        return query.order_by(Tag.usage_count.desc(), Tag.name).limit(limit).all()
+    
+    def apply_usage_changes(self, changes: Dict[Tuple, int]):
+        """
+        Add usage deltas keyed by (tenant_id, entity_type, name)
+        
+        Increments are upserted in one statement and decrements applied in one batch, both
+        in a fixed key order so concurrent writers lock rows in the same sequence.
+        """
+        
+        ordered = sorted(
+            ((key, delta) for key, delta in changes.items() if delta),
+            key=lambda item: (str(item[0][0]), item[0][1].name, item[0][2])
+        )
+        
+        increments = [
+            {
+                "id": uuid.uuid4(),
+                "tenant_id": tenant_id,
+                "entity_type": entity_type,
+                "name": name,
+                "usage_count": delta,
+                "is_active": True
+            }
+            for (tenant_id, entity_type, name), delta in ordered if delta > 0
+        ]
+        if increments:
+            statement = insert(Tag).values(increments)
+            self.db.execute(statement.on_conflict_do_update(
+                index_elements=[Tag.tenant_id, Tag.entity_type, Tag.name],
+                set_={
+                    "usage_count": Tag.usage_count + statement.excluded.usage_count,
+                    "updated_at": func.now()
+                }
+            ))
+        
+        decrements = [
+            {"b_tenant_id": tenant_id, "b_entity_type": entity_type, "b_name": name, "b_count": -delta}
+            for (tenant_id, entity_type, name), delta in ordered if delta < 0
+        ]
+        if decrements:
+            tags = Tag.__table__
+            self.db.execute(
+                update(tags)
+                .where(
+                    tags.c.tenant_id == bindparam("b_tenant_id"),
+                    tags.c.entity_type == bindparam("b_entity_type"),
+                    tags.c.name == bindparam("b_name")
+                )
+                .values(
+                    usage_count=func.greatest(tags.c.usage_count - bindparam("b_count"), 0),
+                    updated_at=func.now()
+                ),
+                decrements
+            )
+
+
+def _counted_tags(tags, is_active) -> set:
+    """Tags that count towards usage: those of active records that fit the dictionary"""
+    if not is_active or not isinstance(tags, list):
+        return set()
+    return {tag for tag in tags if isinstance(tag, str) and tag and len(tag) <= TAG_NAME_MAX_LENGTH}
+
+
+def _previous_and_current(state, name: str, is_new: bool) -> Tuple[Optional[object], object]:
+    history = state.attrs[name].history
+    if history.added:
+        current = history.added[0]
+    elif history.unchanged:
+        current = history.unchanged[0]
+    else:
+        current = getattr(state.obj(), name)
+    
+    if is_new:
+        return None, current
+    return (history.deleted[0] if history.deleted else current), current
+
+
+def _load_deleted_tags(session: Session, flush_context, instances):
+    """before_flush: load the tags of tagged records about to be deleted while the rows still exist"""
+    
+    for instance in session.deleted:
+        if type(instance) not in TAGGED_MODELS:
+            continue
+        for name in _COUNTED_ATTRIBUTES:
+            if name in inspect(instance).unloaded:
+                getattr(instance, name)
+
+
+def _collect_tag_changes(session: Session, flush_context):
+    """after_flush: accumulate tag usage deltas of tagged records inserted, changed or deleted"""
+    
+    pending = None
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        entity_type = TAGGED_MODELS.get(type(instance))
+        if entity_type is None:
+            continue
+        
+        state = inspect(instance)
+        if instance in session.deleted:
+            # The row is already gone, so only values loaded by _load_deleted_tags can be read
+            is_active = state.attrs.is_active.loaded_value
+            before = _counted_tags(state.attrs.tags.loaded_value, True if is_active is NO_VALUE else is_active)
+            after = set()
+        else:
+            is_new = instance in session.new
+            previous_tags, tags = _previous_and_current(state, "tags", is_new)
+            previous_active, is_active = _previous_and_current(state, "is_active", is_new)
+            before = set() if is_new else _counted_tags(previous_tags, previous_active)
+            after = _counted_tags(tags, True if is_active is None else is_active)
+        
+        if before == after:
+            continue
+        
+        if pending is None:
+            pending = session.info.setdefault(_PENDING_KEY, Counter())
+        for tag in after - before:
+            pending[(instance.tenant_id, entity_type, tag)] += 1
+        for tag in before - after:
+            pending[(instance.tenant_id, entity_type, tag)] -= 1
+
+
+def _write_tag_changes(session: Session):
+    """before_commit: write accumulated tag usage deltas within the committing transaction"""
+    
+    session.flush()
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        TagDictionaryService(session).apply_usage_changes(pending)
+
+
+def _discard_tag_changes(session: Session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _load_replaced_value(target, value, oldvalue, initiator):
+    """Set listener registered with active_history so flush history holds the replaced value"""
+
+
+def track_tag_changes(session_factory):
+    """Keep tag usage counts current for every session created by session_factory"""
+    
+    if not settings.tag_dictionary_enabled:
+        return
+    
+    for model in TAGGED_MODELS:
+        event.listen(model.tags, "set", _load_replaced_value, active_history=True)
+        event.listen(model.is_active, "set", _load_replaced_value, active_history=True)
+    
+    event.listen(session_factory, "before_flush", _load_deleted_tags)
+    event.listen(session_factory, "after_flush", _collect_tag_changes)
+    event.listen(session_factory, "before_commit", _write_tag_changes)
+    event.listen(session_factory, "after_rollback", _discard_tag_changes)
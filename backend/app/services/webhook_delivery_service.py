@@ -0,0 +1,374 @@
+"""
+Webhook outbox delivery
+Events are written to the webhook outbox inside the caller's transaction and delivered by
+workers over one pooled HTTP client, with per-endpoint concurrency limits, jittered
+exponential backoff and a circuit breaker per endpoint
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+import logging
+
+import httpx
+from sqlalchemy import case, insert, update, delete, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.api_key import WebhookEndpoint, WebhookOutbox, WebhookDeliveryStatus
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "HesaabPlus-Webhook/1.0"
+SIGNATURE_HEADER = "X-HesaabPlus-Signature"
+
+
+def sign_payload(secret: str, body: str) -> str:
+    """HMAC-SHA256 signature of a webhook body"""
+    signature = hmac.new(
+        secret.encode('utf-8'),
+        body.encode('utf-8'),
+        hashlib.sha256
+    ).hexdigest()
+    return f"sha256={signature}"
+
+
+def backoff_delay(attempts: int) -> float:
+    """Seconds before the next attempt: exponential in attempts made, half of it randomised"""
+    delay = min(settings.webhook_backoff_max_seconds, settings.webhook_backoff_base_seconds * 2 ** attempts)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def enqueue_webhook_event(db: Session, tenant_id, event_type: str, payload: Dict[str, Any]) -> int:
+    """Add an event to the outbox for every subscribed endpoint of the tenant; the caller commits"""
+    
+    endpoints = [
+        endpoint for endpoint in db.query(WebhookEndpoint).filter(
+            WebhookEndpoint.tenant_id == tenant_id,
+            WebhookEndpoint.is_active == True
+        )
+        if endpoint.is_subscribed_to_event(event_type)
+    ]
+    if not endpoints:
+        return 0
+    
+    timestamp = datetime.now(timezone.utc)
+    db.execute(insert(WebhookOutbox), [
+        {
+            "tenant_id": endpoint.tenant_id,
+            "webhook_endpoint_id": endpoint.id,
+            "event_type": event_type,
+            "payload": {
+                "event": event_type,
+                "data": payload,
+                "timestamp": timestamp.isoformat(),
+                "webhook_id": str(endpoint.id)
+            },
+            "next_attempt_at": timestamp
+        }
+        for endpoint in endpoints
+    ])
+    
+    return len(endpoints)
+
+
+class ClaimedDelivery(NamedTuple):
+    """Columns of a claimed outbox row that delivery needs; plain values survive the claim's commit"""
+    id: Any
+    webhook_endpoint_id: Any
+    payload: Dict[str, Any]
+    attempts: int
+
+
+class DeliveryOutcome(NamedTuple):
+    """Result of one delivery attempt; attempted is False when the circuit breaker held it back"""
+    outbox_id: Any
+    attempted: bool
+    success: bool = False
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+
+
+class EndpointCircuit:
+    """In-flight limit and consecutive failure count for one endpoint during a delivery run"""
+    
+    def __init__(self, consecutive_failures: int, concurrency: int, threshold: int):
+        self.threshold = threshold
+        self.consecutive_failures = consecutive_failures
+        # What this run saw, written back relative to the stored count so concurrent runs add up
+        self.reset = False
+        self.new_failures = 0
+        # A tripped endpoint whose cooldown has passed gets one probe request before anything else
+        self.half_open = consecutive_failures >= threshold
+        self.probe_sent = False
+        self.semaphore = asyncio.Semaphore(1 if self.half_open else max(1, concurrency))
+    
+    @property
+    def is_open(self) -> bool:
+        return self.consecutive_failures >= self.threshold
+    
+    def allow(self) -> bool:
+        """Whether the next request may be sent"""
+        if not self.is_open:
+            return True
+        if self.half_open and not self.probe_sent:
+            self.probe_sent = True
+            return True
+        return False
+    
+    def record(self, success: bool):
+        if success:
+            self.consecutive_failures = 0
+            self.new_failures = 0
+            self.reset = True
+            self.half_open = False
+        else:
+            self.consecutive_failures += 1
+            self.new_failures += 1
+
+
+class WebhookDeliveryWorker:
+    """Claims due outbox events and delivers them"""
+    
+    def __init__(self, db: Session, batch_size: Optional[int] = None):
+        self.db = db
+        self.batch_size = batch_size or settings.webhook_delivery_batch_size
+    
+    def claim_due(self, limit: int) -> List[ClaimedDelivery]:
+        """
+        Lease the next due events for delivery
+        
+        Claimed rows move to 'delivering' with next_attempt_at set to the lease expiry and are
+        committed before anything is sent; rows left behind by a crashed worker become due
+        again once the lease runs out. Endpoints with an open circuit are skipped.
+        """
+        
+        now = datetime.now(timezone.utc)
+        due = self.db.query(WebhookOutbox.id).join(
+            WebhookEndpoint, WebhookEndpoint.id == WebhookOutbox.webhook_endpoint_id
+        ).filter(
+            WebhookOutbox.status.in_([WebhookDeliveryStatus.PENDING.value, WebhookDeliveryStatus.DELIVERING.value]),
+            WebhookOutbox.next_attempt_at <= now,
+            WebhookEndpoint.is_active == True,
+            or_(WebhookEndpoint.circuit_open_until.is_(None), WebhookEndpoint.circuit_open_until <= now)
+        ).order_by(WebhookOutbox.next_attempt_at).limit(limit).with_for_update(of=WebhookOutbox, skip_locked=True)
+        
+        rows = self.db.execute(
+            update(WebhookOutbox)
+            .where(WebhookOutbox.id.in_(due.scalar_subquery()))
+            .values(
+                status=WebhookDeliveryStatus.DELIVERING.value,
+                next_attempt_at=now + timedelta(seconds=settings.webhook_delivery_lease_seconds)
+            )
+            .returning(
+                WebhookOutbox.id,
+                WebhookOutbox.webhook_endpoint_id,
+                WebhookOutbox.payload,
+                WebhookOutbox.attempts
+            )
+            .execution_options(synchronize_session=False)
+        ).all()
+        self.db.commit()
+        
+        return [ClaimedDelivery(*row) for row in rows]
+    
+    async def _deliver_one(
+        self,
+        client: httpx.AsyncClient,
+        delivery: ClaimedDelivery,
+        endpoint: WebhookEndpoint,
+        circuit: EndpointCircuit
+    ) -> DeliveryOutcome:
+        async with circuit.semaphore:
+            if not circuit.allow():
+                return DeliveryOutcome(delivery.id, attempted=False)
+            
+            # The signature covers exactly the bytes that are sent
+            body = json.dumps(delivery.payload)
+            headers = {"Content-Type": "application/json"}
+            if endpoint.secret:
+                headers[SIGNATURE_HEADER] = sign_payload(endpoint.secret, body)
+            
+            try:
+                response = await client.post(
+                    endpoint.url,
+                    content=body,
+                    headers=headers,
+                    timeout=endpoint.timeout_seconds
+                )
+            except httpx.HTTPError as e:
+                circuit.record(False)
+                return DeliveryOutcome(delivery.id, True, False, error=str(e) or e.__class__.__name__)
+            
+            success = 200 <= response.status_code < 300
+            circuit.record(success)
+            return DeliveryOutcome(
+                delivery.id, True, success,
+                status_code=response.status_code,
+                error=None if success else f"HTTP {response.status_code}"
+            )
+    
+    async def deliver_batch(
+        self,
+        client: httpx.AsyncClient,
+        deliveries: List[ClaimedDelivery]
+    ) -> Dict[str, int]:
+        """Send one claimed batch concurrently and record the outcomes"""
+        
+        endpoint_ids = {delivery.webhook_endpoint_id for delivery in deliveries}
+        endpoints = {
+            endpoint.id: endpoint
+            for endpoint in self.db.query(WebhookEndpoint).filter(WebhookEndpoint.id.in_(endpoint_ids))
+        }
+        circuits = {
+            endpoint_id: EndpointCircuit(
+                endpoint.consecutive_failures or 0,
+                settings.webhook_endpoint_concurrency,
+                settings.webhook_circuit_failure_threshold
+            )
+            for endpoint_id, endpoint in endpoints.items()
+        }
+        
+        outcomes = await asyncio.gather(*[
+            self._deliver_one(
+                client, delivery,
+                endpoints[delivery.webhook_endpoint_id],
+                circuits[delivery.webhook_endpoint_id]
+            )
+            for delivery in deliveries
+        ])
+        
+        return self.record_outcomes(deliveries, outcomes, endpoints, circuits)
+    
+    def record_outcomes(
+        self,
+        deliveries: List[ClaimedDelivery],
+        outcomes: List[DeliveryOutcome],
+        endpoints: Dict[Any, WebhookEndpoint],
+        circuits: Dict[Any, EndpointCircuit]
+    ) -> Dict[str, int]:
+        """Write back delivery states in bulk and aggregate endpoint stats with one update per endpoint"""
+        
+        now = datetime.now(timezone.utc)
+        cooldown_until = now + timedelta(seconds=settings.webhook_circuit_cooldown_seconds)
+        counts = {"delivered": 0, "retried": 0, "failed": 0, "deferred": 0}
+        stats = {endpoint_id: {"delivered": 0, "failed": 0} for endpoint_id in endpoints}
+        
+        rows = []
+        for delivery, outcome in zip(deliveries, outcomes):
+            endpoint_id = delivery.webhook_endpoint_id
+            row = {"id": delivery.id}
+            
+            if not outcome.attempted:
+                # Held back by the circuit breaker; not counted as an attempt
+                row.update(status=WebhookDeliveryStatus.PENDING.value, next_attempt_at=cooldown_until)
+                counts["deferred"] += 1
+            elif outcome.success:
+                row.update(
+                    status=WebhookDeliveryStatus.DELIVERED.value,
+                    attempts=delivery.attempts + 1,
+                    last_status_code=outcome.status_code,
+                    last_error=None,
+                    delivered_at=now
+                )
+                counts["delivered"] += 1
+                stats[endpoint_id]["delivered"] += 1
+            else:
+                attempts = delivery.attempts + 1
+                row.update(attempts=attempts, last_status_code=outcome.status_code, last_error=outcome.error)
+                if attempts > endpoints[endpoint_id].retry_count:
+                    row.update(status=WebhookDeliveryStatus.FAILED.value)
+                    counts["failed"] += 1
+                    stats[endpoint_id]["failed"] += 1
+                else:
+                    row.update(
+                        status=WebhookDeliveryStatus.PENDING.value,
+                        next_attempt_at=now + timedelta(seconds=backoff_delay(attempts))
+                    )
+                    counts["retried"] += 1
+            
+            rows.append(row)
+        
+        if rows:
+            self.db.execute(update(WebhookOutbox), rows)
+        
+        for endpoint_id, circuit in circuits.items():
+            endpoint_stats = stats[endpoint_id]
+            if circuit.reset:
+                # A success ends the streak, so only failures after it count
+                values = {
+                    "consecutive_failures": circuit.new_failures,
+                    "circuit_open_until": cooldown_until if circuit.new_failures >= circuit.threshold else None
+                }
+            else:
+                # Add to the stored count so failures recorded by concurrent workers aren't overwritten
+                failures = WebhookEndpoint.consecutive_failures + circuit.new_failures
+                values = {
+                    "consecutive_failures": failures,
+                    "circuit_open_until": case((failures >= circuit.threshold, cooldown_until), else_=None)
+                }
+            if endpoint_stats["delivered"] or endpoint_stats["failed"]:
+                values.update(
+                    total_deliveries=WebhookEndpoint.total_deliveries + endpoint_stats["delivered"] + endpoint_stats["failed"],
+                    failed_deliveries=WebhookEndpoint.failed_deliveries + endpoint_stats["failed"]
+                )
+            if endpoint_stats["delivered"]:
+                values["last_delivery_at"] = now
+            
+            if circuit.is_open and not endpoints[endpoint_id].circuit_open_until:
+                logger.warning(f"Webhook endpoint {endpoint_id} circuit opened after {circuit.consecutive_failures} failures")
+            
+            self.db.execute(
+                update(WebhookEndpoint)
+                .where(WebhookEndpoint.id == endpoint_id)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+        
+        self.db.commit()
+        return counts
+    
+    async def deliver_due(self, max_batches: int = 50) -> Dict[str, int]:
+        """Deliver due events batch by batch until none are due or max_batches is reached"""
+        totals = {"delivered": 0, "retried": 0, "failed": 0, "deferred": 0}
+        limits = httpx.Limits(
+            max_connections=settings.webhook_max_connections,
+            max_keepalive_connections=settings.webhook_max_connections
+        )
+        
+        # One pooled client for the whole run, so connections to each endpoint are reused across batches
+        async with httpx.AsyncClient(limits=limits, headers={"User-Agent": USER_AGENT}) as client:
+            for _ in range(max_batches):
+                deliveries = self.claim_due(self.batch_size)
+                if not deliveries:
+                    break
+                
+                counts = await self.deliver_batch(client, deliveries)
+                for key, value in counts.items():
+                    totals[key] += value
+        
+        return totals
+    
+    def run(self, max_batches: int = 50) -> Dict[str, int]:
+        """Synchronous entry point for workers"""
+        totals = asyncio.run(self.deliver_due(max_batches))
+        logger.info(f"Webhook delivery run: {totals}")
+        return totals
+    
+    def purge_finished(self, older_than_days: int = 7) -> int:
+        """Delete delivered and failed outbox events older than the retention window"""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+        result = self.db.execute(
+            delete(WebhookOutbox)
+            .where(
+                WebhookOutbox.status.in_([WebhookDeliveryStatus.DELIVERED.value, WebhookDeliveryStatus.FAILED.value]),
+                WebhookOutbox.updated_at < cutoff
+            )
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        return result.rowcount
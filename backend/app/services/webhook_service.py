@@ -18,7 +18,7 @@ class WebhookService(BaseWebhookService):
     
     async def send_webhook(self, event_type: str, payload: Dict[str, Any], tenant_id: str):
         """
-        Send webhook notifications for an event
+        Queue webhook notifications for an event; delivery workers send them
         
         Args:
             event_type: Type of event (e.g., 'customer.created')
@@ -6,5 +6,6 @@ from .health_tasks import *
 from .backup_tasks import *
 from .restore_tasks import *
 from .notification_tasks import *
+from .webhook_tasks import *
 from .media_tasks import *
 from .activity_logging import *
\ No newline at end of file
@@ -6,6 +6,7 @@ from celery import current_task
 from app.celery_app import celery_app
 from app.core.database import SessionLocal
 from app.services.backup_service import BackupService
+from app.services.cloud_storage_service import CloudStorageService
 from app.models.tenant import Tenant, TenantStatus
 import logging
 
@@ -134,8 +135,8 @@ def full_platform_backup(self):
 
 
 @celery_app.task(bind=True, name="app.tasks.verify_backup_integrity")
-def verify_backup_integrity(self, backup_id: str, storage_provider: str = "backblaze_b2"):
-    """Verify backup file integrity"""
+def verify_backup_integrity(self, backup_id: str, storage_provider: str = "backblaze_b2", mode: str = "full"):
+    """Verify backup file integrity (mode: metadata, sampled or full)"""
     db = None
     try:
         logger.info(f"Starting backup integrity verification for {backup_id}")
@@ -147,12 +148,13 @@ def verify_backup_integrity(self, backup_id: str, storage_provider: str = "backb
         backup_service = BackupService(db)
         
         # Verify backup integrity
-        is_valid = backup_service.verify_backup_integrity(backup_id, storage_provider)
+        is_valid = backup_service.verify_backup_integrity(backup_id, storage_provider, mode=mode)
         
         result = {
             "status": "success",
             "backup_id": backup_id,
             "storage_provider": storage_provider,
+            "mode": mode,
             "is_valid": is_valid,
             "message": f"Backup integrity {'verified' if is_valid else 'failed'}"
         }
@@ -166,4 +168,67 @@ def verify_backup_integrity(self, backup_id: str, storage_provider: str = "backb
     
     finally:
         if db:
-            db.close()
\ No newline at end of file
+            db.close()
+
+
+@celery_app.task(bind=True, name="app.tasks.expire_backup_chunks")
+def expire_backup_chunks(self, retention_days: int = None, grace_hours: int = None):
+    """Expire deduplicated backups past retention and garbage-collect unreferenced chunks"""
+    db = None
+    try:
+        logger.info("Starting backup chunk expiry and garbage collection")
+        
+        # Create database session
+        db = SessionLocal()
+        
+        # Initialize backup service
+        backup_service = BackupService(db)
+        
+        expiry = backup_service.expire_chunked_backups(retention_days)
+        collection = backup_service.chunk_store.garbage_collect(grace_hours)
+        
+        result = {
+            "status": "success",
+            **expiry,
+            **collection
+        }
+        
+        logger.info(f"Backup chunk maintenance completed: {result}")
+        return result
+    
+    except Exception as exc:
+        logger.error(f"Backup chunk maintenance failed: {exc}")
+        raise self.retry(exc=exc, countdown=300, max_retries=2)
+    
+    finally:
+        if db:
+            db.close()
+
+
+@celery_app.task(bind=True, name="app.tasks.reconcile_storage_inventory")
+def reconcile_storage_inventory(self):
+    """Reconcile the local storage object inventory against both buckets"""
+    db = None
+    try:
+        logger.info("Starting storage inventory reconcile")
+        
+        # Create database session
+        db = SessionLocal()
+        
+        results = CloudStorageService(db).reconcile_inventory()
+        
+        result = {
+            "status": "success",
+            "providers": results
+        }
+        
+        logger.info(f"Storage inventory reconcile completed: {result}")
+        return result
+    
+    except Exception as exc:
+        logger.error(f"Storage inventory reconcile failed: {exc}")
+        raise self.retry(exc=exc, countdown=300, max_retries=2)
+    
+    finally:
+        if db:
+            db.close()
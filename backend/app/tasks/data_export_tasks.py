@@ -2,8 +2,9 @@
 Data export tasks for CSV/JSON exports with progress tracking
 """
 
-from celery import current_task
+from celery import current_task, chord, group
 from app.celery_app import celery_app
+from app.core.config import settings
 from app.core.database import SessionLocal
 from app.services.data_export_service import DataExportService
 from app.models.backup import ExportFormat, ExportType
@@ -43,6 +44,29 @@ def create_data_export(
             meta={'current': 0, 'total': 100, 'status': 'Starting export...'}
         )
         
+        if settings.data_export_parallel_enabled:
+            # Plan checkpointed slices and export them concurrently; the chord callback builds the archive
+            plan = export_service.create_parallel_export(
+                tenant_id=tenant_id,
+                user_id=user_id,
+                export_format=format_enum,
+                export_type=type_enum,
+                tables=tables,
+                task_id=self.request.id
+            )
+            dispatch_export_slices(plan["export_id"], plan["slice_ids"])
+            
+            result = {
+                "status": "dispatched",
+                "export_id": plan["export_id"],
+                "export_name": plan["export_name"],
+                "slices": len(plan["slice_ids"]),
+                "estimated_records": plan["estimated_records"]
+            }
+            
+            logger.info(f"Parallel data export dispatched: {result}")
+            return result
+        
         # Perform data export
         result = export_service.create_data_export(
             tenant_id=tenant_id,
@@ -88,6 +112,81 @@ def create_data_export(
             db.close()
 
 
+def dispatch_export_slices(export_id: str, slice_ids: list):
+    """Export slices concurrently, then assemble the archive once every slice has finished"""
+    chord(
+        group(export_data_slice.si(slice_id) for slice_id in slice_ids)
+    )(assemble_data_export.si(export_id))
+
+
+@celery_app.task(bind=True, name="app.tasks.export_data_slice", acks_late=True, max_retries=3)
+def export_data_slice(self, slice_id: str):
+    """Export one keyset slice of a parallel data export to its part file"""
+    db = None
+    try:
+        db = SessionLocal()
+        return DataExportService(db).export_slice(slice_id)
+    
+    except Exception as exc:
+        logger.error(f"Data export slice {slice_id} failed: {exc}")
+        
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=exc, countdown=30 * 2 ** self.request.retries)
+        
+        # Returning lets the chord callback run and record the failed export
+        return {"slice_id": slice_id, "status": "failed", "error": str(exc)}
+    
+    finally:
+        if db:
+            db.close()
+
+
+@celery_app.task(bind=True, name="app.tasks.assemble_data_export")
+def assemble_data_export(self, export_id: str):
+    """Chord callback that builds the archive of a parallel data export from its part files"""
+    db = None
+    try:
+        db = SessionLocal()
+        result = DataExportService(db).assemble_parallel_export(export_id)
+        
+        logger.info(f"Parallel data export assembled: {export_id}")
+        return result
+    
+    except Exception as exc:
+        # Completed part files are kept, so resume_data_export only redoes failed slices
+        logger.error(f"Parallel data export assembly failed for {export_id}: {exc}")
+        return {"status": "failed", "export_id": export_id, "error": str(exc)}
+    
+    finally:
+        if db:
+            db.close()
+
+
+@celery_app.task(bind=True, name="app.tasks.resume_data_export")
+def resume_data_export(self, export_id: str):
+    """Re-run the unfinished slices of a failed parallel data export"""
+    db = None
+    try:
+        db = SessionLocal()
+        pending_slice_ids = DataExportService(db).resume_parallel_export(export_id)
+        
+        if pending_slice_ids:
+            dispatch_export_slices(export_id, pending_slice_ids)
+        else:
+            assemble_data_export.delay(export_id)
+        
+        logger.info(f"Resumed parallel data export {export_id} with {len(pending_slice_ids)} pending slices")
+        return {"status": "dispatched", "export_id": export_id, "pending_slices": len(pending_slice_ids)}
+    
+    except Exception as exc:
+        logger.error(f"Failed to resume data export {export_id}: {exc}")
+        raise self.retry(exc=exc, countdown=60, max_retries=3)
+    
+    finally:
+        if db:
+            db.close()
+
+
 @celery_app.task(bind=True, name="app.tasks.create_bulk_data_export")
 def create_bulk_data_export(
     self,
@@ -6,29 +6,63 @@ from celery import current_task
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 import logging
+import time
 from typing import List, Dict, Any
 
 from app.celery_app import celery_app
+from app.core.config import settings
 from app.core.database import SessionLocal
 from app.services.marketing_service import MarketingService
-from app.services.notification_service import NotificationService, EmailService, SMSService
-from app.models.marketing import (
-    MarketingCampaign, CampaignRecipient, CampaignStatus,
-    CustomerSegment, SegmentationType
+from app.services.segment_membership_service import SegmentMembershipService, MAINTAINED_SEGMENT_TYPES
+from app.services.notification_service import NotificationService
+from app.services.notification_dispatch_service import (
+    DispatchMessage, DispatchResult, NotificationDispatcher, EMAIL, SMS
 )
+from app.models.marketing import MarketingCampaign, CampaignStatus, CustomerSegment
 from app.models.notification import NotificationLog, NotificationStatus, NotificationType
 
 logger = logging.getLogger(__name__)
 
+CAMPAIGN_DISPATCH_CHUNK_SIZE = 1000  # Recipients checked, sent and written back per round
 
-@celery_app.task(bind=True, max_retries=3)
-def process_marketing_campaign(self, campaign_id: str):
-    """Process a marketing campaign by sending messages to all recipients"""
+
+class CampaignProgress:
+    """Throttles task progress updates so the result backend is not written per recipient"""
+    
+    def __init__(self, task, total: int):
+        self.task = task
+        self.total = total
+        self.last_update_at = 0.0
+    
+    def update(self, current: int, force: bool = False):
+        now = time.monotonic()
+        if not self.task or (not force and now - self.last_update_at < settings.notification_progress_interval_seconds):
+            return
+        
+        self.task.update_state(
+            state='PROGRESS',
+            meta={
+                'current': current,
+                'total': self.total,
+                'status': f'Processed {current} of {self.total} recipients'
+            }
+        )
+        self.last_update_at = now
+
+
+@celery_app.task(bind=True, max_retries=3, acks_late=True)
+def process_marketing_campaign(self, campaign_id: str, after_id: str = None):
+    """
+    Process a marketing campaign one keyset chunk of recipients at a time
+    
+    Each run claims up to CAMPAIGN_DISPATCH_CHUNK_SIZE pending recipients after after_id,
+    sends them and queues the next run from the last recipient; the run that finds no
+    more recipients completes the campaign. Claimed recipients are never sent twice.
+    """
     
     db = SessionLocal()
     try:
         marketing_service = MarketingService(db)
-        notification_service = NotificationService(db)
         
         # Get campaign
         campaign = db.query(MarketingCampaign).filter(
@@ -43,118 +77,91 @@ def process_marketing_campaign(self, campaign_id: str):
             logger.error(f"Campaign {campaign_id} is not in running status")
             return {"error": "Campaign is not running"}
         
-        # Get all recipients
-        recipients = db.query(CampaignRecipient).filter(
-            CampaignRecipient.campaign_id == campaign_id,
-            CampaignRecipient.status == "pending"
-        ).all()
+        status_counts = marketing_service.get_recipient_status_counts(campaign_id)
+        total_recipients = sum(status_counts.values())
+        processed_count = total_recipients - status_counts.get("pending", 0)
         
-        total_recipients = len(recipients)
-        processed_count = 0
-        sent_count = 0
-        failed_count = 0
+        recipients = marketing_service.claim_pending_recipients(campaign_id, after_id, CAMPAIGN_DISPATCH_CHUNK_SIZE)
         
-        logger.info(f"Processing campaign {campaign.name} with {total_recipients} recipients")
+        if recipients:
+            logger.info(f"Processing {len(recipients)} recipients of campaign {campaign.name}")
         
-        for i, recipient in enumerate(recipients):
-            try:
-                # Update task progress
-                if current_task:
-                    current_task.update_state(
-                        state='PROGRESS',
-                        meta={
-                            'current': i + 1,
-                            'total': total_recipients,
-                            'status': f'Processing recipient {i + 1} of {total_recipients}'
-                        }
-                    )
+            progress = CampaignProgress(current_task, total_recipients)
+            subject = campaign.subject or f"پیام از {campaign.name}"
                 
-                # Check communication preferences
-                if not marketing_service._can_send_to_recipient(recipient, "marketing"):
-                    recipient.mark_failed("Customer opted out of marketing communications")
-                    failed_count += 1
-                    processed_count += 1
-                    continue
-                
-                # Send email if applicable
-                if campaign.campaign_type.value in ["email", "mixed"] and recipient.recipient_email:
-                    result = EmailService.send_email(
-                        recipient=recipient.recipient_email,
-                        subject=campaign.subject or f"پیام از {campaign.name}",
-                        body=campaign.message
-                    )
+            # Communication preferences for the whole chunk come from one query
+            sendable_ids = marketing_service.get_sendable_recipient_ids(recipients, "marketing")
                     
-                    if result["status"] == "success":
-                        recipient.mark_sent(result.get("provider_id"))
-                        sent_count += 1
-                    else:
-                        recipient.mark_failed(result.get("error", "Email sending failed"))
-                        failed_count += 1
-                
-                # Send SMS if applicable
+            messages = []
+            results = []
+            for recipient in recipients:
+                if recipient.id not in sendable_ids:
+                    results.append(DispatchResult(recipient.id, False, error="Customer opted out of marketing communications"))
+                elif campaign.campaign_type.value in ["email", "mixed"] and recipient.recipient_email:
+                    messages.append(DispatchMessage(recipient.id, EMAIL, recipient.recipient_email, campaign.message, subject))
                 elif campaign.campaign_type.value in ["sms", "mixed"] and recipient.recipient_phone:
-                    result = SMSService.send_sms(
-                        phone_number=recipient.recipient_phone,
-                        message=campaign.message
-                    )
-                    
-                    if result["status"] == "success":
-                        recipient.mark_sent(result.get("provider_id"))
-                        sent_count += 1
-                    else:
-                        recipient.mark_failed(result.get("error", "SMS sending failed"))
-                        failed_count += 1
-                
+                    messages.append(DispatchMessage(recipient.id, SMS, recipient.recipient_phone, campaign.message))
                 else:
-                    recipient.mark_failed("No valid contact information")
-                    failed_count += 1
+                    results.append(DispatchResult(recipient.id, False, error="No valid contact information"))
                 
-                processed_count += 1
-                
-                # Commit every 10 recipients to avoid long transactions
-                if processed_count % 10 == 0:
-                    db.commit()
+            results.extend(NotificationDispatcher().dispatch(
+                messages,
+                on_progress=lambda done, total, offset=processed_count + len(results): progress.update(offset + done)
+            ))
+                    
+            marketing_service.record_recipient_results(results)
+            db.commit()
+            progress.update(processed_count + len(recipients), force=True)
                 
-            except Exception as e:
-                logger.error(f"Error processing recipient {recipient.id}: {str(e)}")
-                recipient.mark_failed(f"Processing error: {str(e)}")
-                failed_count += 1
-                processed_count += 1
-        
-        # Final commit
-        db.commit()
+        completed = len(recipients) < CAMPAIGN_DISPATCH_CHUNK_SIZE
+        if completed:
+            # Recipients an interrupted run claimed but never recorded are not resent
+            interrupted_count = marketing_service.fail_interrupted_recipients(campaign_id)
+            if interrupted_count:
+                logger.warning(f"Campaign {campaign.name}: {interrupted_count} interrupted recipients marked failed")
         
         # Update campaign statistics
+        status_counts = marketing_service.get_recipient_status_counts(campaign_id)
+        sent_count = status_counts.get("sent", 0) + status_counts.get("delivered", 0)
+        failed_count = status_counts.get("failed", 0)
         campaign.sent_count = sent_count
         campaign.failed_count = failed_count
-        campaign.complete_campaign()
+        if completed:
+            campaign.complete_campaign()
         db.commit()
         
+        if not completed:
+            process_marketing_campaign.delay(campaign_id, str(recipients[-1].id))
+        
         result = {
             "campaign_id": campaign_id,
             "campaign_name": campaign.name,
             "total_recipients": total_recipients,
             "sent_count": sent_count,
             "failed_count": failed_count,
-            "success_rate": (sent_count / total_recipients * 100) if total_recipients > 0 else 0
+            "success_rate": (sent_count / total_recipients * 100) if total_recipients > 0 else 0,
+            "completed": completed
         }
         
-        logger.info(f"Completed campaign {campaign.name}: {sent_count} sent, {failed_count} failed")
+        if completed:
+            logger.info(f"Completed campaign {campaign.name}: {sent_count} sent, {failed_count} failed")
         return result
         
     except Exception as exc:
         logger.error(f"Campaign processing failed: {str(exc)}")
         
-        # Mark campaign as failed
-        try:
-            campaign = db.query(MarketingCampaign).filter(
-                MarketingCampaign.id == campaign_id
-            ).first()
-            if campaign:
-                campaign.fail_campaign()
-                db.commit()
-        except:
-            pass
+        # Mark campaign as failed once the chunk has run out of retries
+        if self.request.retries >= self.max_retries:
+            try:
+                db.rollback()
+                campaign = db.query(MarketingCampaign).filter(
+                    MarketingCampaign.id == campaign_id
+                ).first()
+                if campaign:
+                    campaign.fail_campaign()
+                    db.commit()
+            except:
+                pass
         
         # Retry the task
         raise self.retry(exc=exc, countdown=60)
@@ -197,36 +204,45 @@ def send_bulk_sms(self, tenant_id: str, customer_ids: List[str], message: str, c
 
 @celery_app.task(bind=True, max_retries=3)
 def refresh_dynamic_segments(self):
-    """Refresh all dynamic customer segments"""
+    """
+    Daily sweep of time-based segment criteria
+    
+    Customer changes keep segment membership current as they are committed; only members
+    whose last purchase has aged out of a last_purchase_days window since the previous
+    sweep still need re-evaluating.
+    """
     
     db = SessionLocal()
     try:
-        marketing_service = MarketingService(db)
+        membership = SegmentMembershipService(db)
         
-        # Get all dynamic segments
+        # Get all incrementally maintained segments
         segments = db.query(CustomerSegment).filter(
-            CustomerSegment.segmentation_type == SegmentationType.DYNAMIC
+            CustomerSegment.segmentation_type.in_(MAINTAINED_SEGMENT_TYPES)
         ).all()
         
         refreshed_count = 0
+        removed_count = 0
         
         for segment in segments:
             try:
-                # Check if segment needs refresh (e.g., daily)
-                if segment.last_updated_at < datetime.utcnow() - timedelta(hours=24):
-                    marketing_service.refresh_automatic_segment(
-                        tenant_id=str(segment.tenant_id),
-                        segment_id=str(segment.id)
-                    )
-                    refreshed_count += 1
+                if not (segment.filter_criteria or {}).get('last_purchase_days'):
+                    continue
+                
+                changes = membership.sweep_time_windows(segment)
+                db.commit()
+                refreshed_count += 1
+                removed_count += changes["removed"]
                     
             except Exception as e:
+                db.rollback()
                 logger.error(f"Error refreshing segment {segment.id}: {str(e)}")
         
-        logger.info(f"Refreshed {refreshed_count} dynamic segments")
+        logger.info(f"Swept {refreshed_count} time-based segments, {removed_count} memberships expired")
         
         return {
             "refreshed_count": refreshed_count,
+            "removed_count": removed_count,
             "total_segments": len(segments)
         }
         
@@ -7,7 +7,6 @@ from app.celery_app import celery_app
 from app.core.database import SessionLocal
 from app.services.notification_service import NotificationService, EmailService, SMSService
 from app.models.notification import NotificationLog, NotificationStatus, NotificationType
-from datetime import datetime, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
@@ -225,29 +224,8 @@ def send_installment_reminders(self, days_ahead: int = 3):
         db = SessionLocal()
         notification_service = NotificationService(db)
         
-        # Get installments that need reminders
-        installments = notification_service.get_due_installment_reminders(days_ahead)
-        
-        reminders_sent = 0
-        for installment in installments:
-            # Check if reminder was already sent recently
-            recent_reminder = db.query(NotificationLog).filter(
-                NotificationLog.reference_type == "installment",
-                NotificationLog.reference_id == installment.id,
-                NotificationLog.created_at > datetime.utcnow() - timedelta(days=1)
-            ).first()
-            
-            if not recent_reminder:
-                # Send reminder
-                notification = notification_service.send_installment_reminder(
-                    installment_id=str(installment.id),
-                    days_before_due=days_ahead,
-                    notification_type=NotificationType.SMS
-                )
-                
-                if notification:
-                    send_sms.delay(notification_id=str(notification.id))
-                    reminders_sent += 1
+        # Render and queue all due reminders from one joined query; the queue task sends them
+        reminders_sent = notification_service.create_installment_reminders(days_ahead)
         
         db.close()
         
@@ -272,34 +250,8 @@ def send_overdue_notices(self):
         db = SessionLocal()
         notification_service = NotificationService(db)
         
-        # Get overdue installments
-        overdue_installments = notification_service.get_overdue_installments()
-        
-        notices_sent = 0
-        for installment in overdue_installments:
-            days_overdue = installment.days_overdue
-            
-            # Send notices at 3, 15, and 30 days overdue
-            if days_overdue in [3, 15, 30]:
-                # Check if notice was already sent for this milestone
-                recent_notice = db.query(NotificationLog).filter(
-                    NotificationLog.reference_type == "overdue",
-                    NotificationLog.reference_id == installment.id,
-                    NotificationLog.created_at > datetime.utcnow() - timedelta(days=1),
-                    NotificationLog.body.contains(f"{days_overdue} روز")
-                ).first()
-                
-                if not recent_notice:
-                    # Send overdue notice
-                    notification = notification_service.send_overdue_notice(
-                        installment_id=str(installment.id),
-                        days_overdue=days_overdue,
-                        notification_type=NotificationType.SMS
-                    )
-                    
-                    if notification:
-                        send_sms.delay(notification_id=str(notification.id))
-                        notices_sent += 1
+        # Render and queue notices for installments at an overdue milestone; the queue task sends them
+        notices_sent = notification_service.create_overdue_notices()
         
         db.close()
         
@@ -327,28 +279,17 @@ def process_notification_queue(self, batch_size: int = 50):
         # Get pending notifications
         pending_notifications = notification_service.get_pending_notifications(batch_size)
         
-        processed = 0
-        for notification in pending_notifications:
-            try:
-                if notification.notification_type == NotificationType.EMAIL:
-                    send_email.delay(notification_id=str(notification.id))
-                elif notification.notification_type == NotificationType.SMS:
-                    send_sms.delay(notification_id=str(notification.id))
-                
-                processed += 1
-                
-            except Exception as e:
-                logger.error(f"Failed to queue notification {notification.id}: {e}")
-                notification_service.mark_notification_failed(
-                    str(notification.id),
-                    f"Queue processing error: {str(e)}"
-                )
+        # Send in provider batches over reused connections, then write statuses back in bulk
+        outcome = notification_service.dispatch_notifications(pending_notifications)
+        processed = outcome["sent"] + outcome["failed"]
         
         db.close()
         
         result = {
             "status": "success",
             "processed": processed,
+            "sent": outcome["sent"],
+            "failed": outcome["failed"],
             "message": f"Processed {processed} notifications"
         }
         
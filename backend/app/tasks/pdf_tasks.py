@@ -7,11 +7,15 @@ from sqlalchemy.orm import Session
 from typing import Optional, Dict, Any
 import logging
 import os
+import time
+import uuid
 from io import BytesIO
+from pathlib import Path
 
 from app.core.database import SessionLocal
 from app.models.invoice import Invoice
 from app.services.pdf_service import PDFService
+from app.services.pdf_batch_service import PDF_BATCH_FORMATS, PDFBatchRenderer
 from app.services.qr_service import QRCodeService
 from app.core.config import settings
 
@@ -33,7 +37,7 @@ def generate_invoice_pdf_task(
         invoice_id: UUID of the invoice
         include_qr: Whether to include QR code
         company_info: Company information for header
-        save_to_storage: Whether to save PDF to cloud storage
+        save_to_storage: Whether to report that the PDF was kept in the render cache
         
     Returns:
         Dict with PDF generation result
@@ -54,8 +58,8 @@ def generate_invoice_pdf_task(
         qr_service = QRCodeService()
         pdf_service = PDFService(qr_service)
         
-        # Generate PDF
-        pdf_bytes = pdf_service.generate_invoice_pdf(
+        # Render into the cache, unless this version is already there
+        pdf = pdf_service.get_invoice_pdf(
             invoice=invoice,
             include_qr=include_qr,
             company_info=company_info
@@ -64,21 +68,21 @@ def generate_invoice_pdf_task(
         result = {
             'invoice_id': str(invoice_id),
             'invoice_number': invoice.invoice_number,
-            'pdf_size': len(pdf_bytes),
+            'pdf_size': len(pdf.content),
             'generated_at': invoice.updated_at.isoformat() if invoice.updated_at else None,
-            'include_qr': include_qr
+            'include_qr': include_qr,
+            'cache_key': pdf.cache_key,
+            'cache_hit': pdf.cache_hit
         }
         
-        # Save to storage if requested
         if save_to_storage:
-            # TODO: Implement cloud storage saving
-            # For now, we'll just log the action
-            logger.info(f"PDF for invoice {invoice.invoice_number} would be saved to storage")
-            result['saved_to_storage'] = True
+            if pdf_service.cache is None:
+                logger.warning(f"PDF cache is disabled, PDF for invoice {invoice.invoice_number} was not stored")
+            result['saved_to_storage'] = pdf_service.cache is not None
         
         db.close()
         
-        logger.info(f"Generated PDF for invoice {invoice.invoice_number}, size: {len(pdf_bytes)} bytes")
+        logger.info(f"Generated PDF for invoice {invoice.invoice_number}, size: {len(pdf.content)} bytes")
         return result
         
     except Exception as exc:
@@ -167,78 +171,63 @@ def batch_generate_pdfs_task(
     self, 
     invoice_ids: list, 
     include_qr: bool = True,
-    company_info: Optional[Dict[str, Any]] = None
+    company_info: Optional[Dict[str, Any]] = None,
+    output_format: Optional[str] = None
 ):
     """
-    Generate PDFs for multiple invoices in batch
+    Generate PDFs for multiple invoices in batch, pre-warming the render cache
+    
+    Invoices are prefetched in chunks and rendered in a process pool.
     
     Args:
         invoice_ids: List of invoice UUIDs
         include_qr: Whether to include QR codes
         company_info: Company information for headers
+        output_format: "zip" for one PDF per invoice or "pdf" for a combined document
+            written to the batch output directory; None only warms the cache
         
     Returns:
         Dict with batch generation results
     """
+    output_path = None
     try:
         db = SessionLocal()
-        results = []
-        errors = []
+        renderer = PDFBatchRenderer(db)
         
-        # Initialize services
-        qr_service = QRCodeService()
-        pdf_service = PDFService(qr_service)
+        if output_format:
+            if output_format not in PDF_BATCH_FORMATS:
+                raise ValueError(f"Unsupported batch output format: {output_format}")
         
-        for invoice_id in invoice_ids:
-            try:
-                # Get invoice
-                invoice = db.query(Invoice).filter(
-                    Invoice.id == invoice_id,
-                    Invoice.is_active == True
-                ).first()
-                
-                if not invoice:
-                    errors.append({
-                        'invoice_id': str(invoice_id),
-                        'error': 'Invoice not found'
-                    })
-                    continue
-                
-                # Generate PDF
-                pdf_bytes = pdf_service.generate_invoice_pdf(
-                    invoice=invoice,
-                    include_qr=include_qr,
-                    company_info=company_info
-                )
-                
-                results.append({
-                    'invoice_id': str(invoice_id),
-                    'invoice_number': invoice.invoice_number,
-                    'pdf_size': len(pdf_bytes),
-                    'success': True
-                })
-                
-            except Exception as e:
-                errors.append({
-                    'invoice_id': str(invoice_id),
-                    'error': str(e)
-                })
+            output_dir = Path(settings.pdf_batch_output_dir)
+            output_dir.mkdir(parents=True, exist_ok=True)
+            output_path = output_dir / f"invoices_{self.request.id or uuid.uuid4().hex}.{output_format}"
+            render = renderer.render_to_zip if output_format == "zip" else renderer.render_to_pdf
+            with open(output_path, "wb") as output:
+                summary = render(invoice_ids, output, include_qr, company_info)
+        else:
+            summary = renderer.render_to_cache(invoice_ids, include_qr, company_info)
         
         db.close()
         
         result = {
             'total_requested': len(invoice_ids),
-            'successful': len(results),
-            'failed': len(errors),
-            'results': results,
-            'errors': errors
+            'successful': summary['successful'],
+            'failed': summary['failed'],
+            'cache_hits': summary['cache_hits'],
+            'results': summary.get('results', []),
+            'errors': summary['errors'],
+            'output_path': str(output_path) if output_path else None,
+            'elapsed_seconds': summary['elapsed_seconds'],
+            'invoices_per_second': summary['invoices_per_second']
         }
         
-        logger.info(f"Batch PDF generation completed: {len(results)} successful, {len(errors)} failed")
+        logger.info(f"Batch PDF generation completed: {result['successful']} successful, {result['failed']} failed")
         return result
         
     except Exception as exc:
         logger.error(f"Batch PDF generation failed: {exc}")
+        if output_path and output_path.exists():
+            output_path.unlink()
         
         # Retry with exponential backoff
         if self.request.retries < self.max_retries:
@@ -259,11 +248,19 @@ def cleanup_temp_files_task():
     Clean up temporary PDF and QR code files
     """
     try:
-        # TODO: Implement cleanup of temporary files
-        # This would clean up any temporary files created during PDF generation
+        # Batch output files are only kept long enough to be downloaded
+        output_dir = Path(settings.pdf_batch_output_dir)
+        cutoff = time.time() - settings.pdf_batch_output_retention_hours * 3600
+        cleaned_files = 0
+        
+        if output_dir.exists():
+            for path in output_dir.iterdir():
+                if path.is_file() and path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    cleaned_files += 1
         
         logger.info("Temporary file cleanup completed")
-        return {'cleaned_files': 0, 'success': True}
+        return {'cleaned_files': cleaned_files, 'success': True}
         
     except Exception as exc:
         logger.error(f"Temporary file cleanup failed: {exc}")
@@ -2,7 +2,7 @@
 Celery tasks for restore operations
 """
 
-from celery import current_task
+from celery import current_task, chord, group
 from app.celery_app import celery_app
 from app.core.database import SessionLocal
 from app.services.restore_service import RestoreService
@@ -152,6 +152,124 @@ def restore_all_tenants_task(self, storage_provider: str, initiated_by: str,
         raise self.retry(exc=exc, countdown=300)
 
 
+@celery_app.task(bind=True, max_retries=2)
+def orchestrate_tenant_restores_task(self, batch_id: str, storage_provider: str, initiated_by: str,
+                                     tenant_backup_pairs: Optional[List[Dict]] = None,
+                                     backup_date: Optional[str] = None, skip_validation: bool = False,
+                                     max_concurrency: Optional[int] = None):
+    """Celery task to fan out tenant restores across restore workers with bounded concurrency"""
+    db = SessionLocal()
+    try:
+        restore_service = RestoreService(db)
+        
+        current_task.update_state(
+            state='PROGRESS',
+            meta={'status': 'planning', 'batch_id': batch_id, 'storage_provider': storage_provider}
+        )
+        
+        # Restore every active tenant from its latest backup when no explicit pairs are given
+        if tenant_backup_pairs is None:
+            tenant_backup_pairs = restore_service.get_latest_tenant_backup_pairs(backup_date)
+        
+        plan = restore_service.plan_tenant_restores(tenant_backup_pairs, storage_provider, max_concurrency)
+        lanes = restore_service.create_restore_batch(plan, initiated_by, batch_id)
+        
+        # One lane task per concurrency slot; the chord callback builds the aggregated report
+        chord(
+            group(
+                restore_tenant_lane_task.si(lane, storage_provider, initiated_by, skip_validation)
+                for lane in lanes
+            )
+        )(finalize_restore_batch_task.s(batch_id))
+        
+        result = {
+            "status": "dispatched",
+            "batch_id": batch_id,
+            "total_tenants": plan["total_tenants"],
+            "max_concurrency": plan["max_concurrency"],
+            "lanes": len(lanes),
+            "estimated_total_seconds": plan["estimated_total_seconds"],
+            "skipped": plan["skipped"]
+        }
+        
+        logger.info(f"Restore batch {batch_id} dispatched: {plan['total_tenants']} tenants across {len(lanes)} lanes")
+        return result
+    
+    except Exception as exc:
+        logger.error(f"Restore orchestration failed for batch {batch_id}: {exc}")
+        raise self.retry(exc=exc, countdown=60)
+    
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True)
+def restore_tenant_lane_task(self, lane: List[Dict], storage_provider: str, initiated_by: str,
+                             skip_validation: bool = False):
+    """Celery task to restore one worker lane of an orchestrated batch, in priority order"""
+    from app.models.backup import RestoreLog, BackupStatus
+    
+    db = SessionLocal()
+    results = []
+    
+    try:
+        restore_service = RestoreService(db)
+        
+        for index, item in enumerate(lane):
+            # Skip tenants already finished by a previous attempt of this lane
+            restore_log = db.query(RestoreLog).filter(RestoreLog.id == item["restore_log_id"]).first()
+            if restore_log and restore_log.status in (BackupStatus.COMPLETED, BackupStatus.FAILED):
+                results.append({**item, "status": restore_log.status.value})
+                continue
+            
+            current_task.update_state(
+                state='PROGRESS',
+                meta={
+                    'status': 'restoring',
+                    'tenant_id': item["tenant_id"],
+                    'completed': index,
+                    'total': len(lane)
+                }
+            )
+            
+            try:
+                restore_service.restore_single_tenant(
+                    tenant_id=item["tenant_id"],
+                    backup_id=item["backup_id"],
+                    storage_provider=storage_provider,
+                    initiated_by=initiated_by,
+                    skip_validation=skip_validation,
+                    restore_log_id=item["restore_log_id"]
+                )
+                results.append({**item, "status": "success"})
+            
+            except Exception as e:
+                # A failed tenant must not block the rest of the lane
+                db.rollback()
+                results.append({**item, "status": "failed", "error": str(e)})
+                logger.error(f"Lane restore failed for tenant {item['tenant_id']}: {e}")
+        
+        return results
+    
+    finally:
+        db.close()
+
+
+@celery_app.task
+def finalize_restore_batch_task(lane_results: List[List[Dict]], batch_id: str):
+    """Chord callback that produces the aggregated status report for a restore batch"""
+    db = SessionLocal()
+    try:
+        report = RestoreService(db).get_restore_batch_status(batch_id)
+        logger.info(
+            f"Restore batch {batch_id} finished: {report['successful_restores']}/{report['total_tenants']} successful"
+        )
+        return report
+    
+    finally:
+        db.close()
+
+
 @celery_app.task(bind=True, max_retries=3)
 def cleanup_restore_files_task(self, days_old: int = 7):
     """Celery task to clean up old temporary restore files"""
@@ -0,0 +1,53 @@
+"""
+Webhook delivery tasks
+"""
+
+from app.celery_app import celery_app
+from app.core.database import SessionLocal
+from app.services.webhook_delivery_service import WebhookDeliveryWorker
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True, name="app.tasks.deliver_webhooks")
+def deliver_webhooks(self, max_batches: int = 50):
+    """Deliver due webhook outbox events"""
+    try:
+        db = SessionLocal()
+        
+        # Concurrent runs are safe: each claims its own events with SKIP LOCKED
+        totals = WebhookDeliveryWorker(db).run(max_batches=max_batches)
+        
+        db.close()
+        
+        result = {
+            "status": "success",
+            **totals,
+            "message": f"Delivered {totals['delivered']} webhooks"
+        }
+        
+        logger.info(f"Webhook delivery completed: {result}")
+        return result
+        
+    except Exception as exc:
+        logger.error(f"Webhook delivery failed: {exc}")
+        raise self.retry(exc=exc, countdown=60, max_retries=2)
+
+
+@celery_app.task(bind=True, name="app.tasks.purge_webhook_outbox")
+def purge_webhook_outbox(self, older_than_days: int = 7):
+    """Delete finished webhook outbox events past the retention window"""
+    try:
+        db = SessionLocal()
+        
+        purged = WebhookDeliveryWorker(db).purge_finished(older_than_days)
+        
+        db.close()
+        
+        logger.info(f"Purged {purged} webhook outbox events")
+        return {"status": "success", "purged": purged}
+        
+    except Exception as exc:
+        logger.error(f"Webhook outbox purge failed: {exc}")
+        raise self.retry(exc=exc, countdown=300, max_retries=2)
@@ -15,6 +15,11 @@ import os
 # This ensures we're using the Docker database connection
 TestingSessionLocal = SessionLocal
 
+# Benchmarks build large datasets, so they only run on request: RUN_BENCHMARKS=1 pytest -m slow
+benchmark = pytest.mark.skipif(
+    not os.environ.get("RUN_BENCHMARKS"), reason="benchmarks only run with RUN_BENCHMARKS=1"
+)
+
 
 class TestDatabase:
     """Test database helper class"""
@@ -19,11 +19,13 @@ from app.main import app
 from app.core.database import get_db
 from app.models.tenant import Tenant, SubscriptionType, TenantStatus
 from app.models.user import User, UserRole, UserStatus
-from app.models.api_key import ApiKey, ApiKeyUsage, WebhookEndpoint, ApiKeyStatus, ApiKeyScope
+from app.models.api_key import ApiKey, ApiKeyUsage, WebhookEndpoint, WebhookOutbox, ApiKeyStatus, ApiKeyScope, WebhookDeliveryStatus
 from app.models.customer import Customer
 from app.models.product import Product
 from app.models.invoice import Invoice, InvoiceType, InvoiceStatus
 from app.services.api_key_service import ApiKeyService, WebhookService
+from app.services.webhook_delivery_service import WebhookDeliveryWorker, EndpointCircuit
+from app.core.config import settings
 from app.schemas.api_key import ApiKeyCreate, WebhookEndpointCreate, WebhookEventType
 from app.core.auth import create_user_tokens
 
@@ -390,20 +392,35 @@ class TestWebhookSystem:
         service = WebhookService(db_session)
         
         # Mock successful webhook delivery
-        with patch('httpx.AsyncClient.post') as mock_post:
+        with patch('httpx.AsyncClient.post') as mock_post, \
+             patch('app.tasks.webhook_tasks.deliver_webhooks.delay') as mock_delay:
             mock_response = AsyncMock()
             mock_response.status_code = 200
             mock_post.return_value = mock_response
             
-            # Send webhook
+            # Send webhook: the event is only queued
             await service.send_webhook(
                 "invoice.created",
                 {"invoice_id": "123", "amount": 1000.00},
                 str(self.tenant.id)
             )
             
+            mock_post.assert_not_called()
+            mock_delay.assert_called_once()
+            outbox = db_session.query(WebhookOutbox).filter(
+                WebhookOutbox.webhook_endpoint_id == webhook.id
+            ).one()
+            assert outbox.status == WebhookDeliveryStatus.PENDING.value
+            assert outbox.payload["data"]["invoice_id"] == "123"
+            
+            # Deliver from the outbox
+            totals = await WebhookDeliveryWorker(db_session).deliver_due()
+            
             # Verify webhook was called
             mock_post.assert_called_once()
+            assert totals["delivered"] >= 1
+            db_session.refresh(outbox)
+            assert outbox.status == WebhookDeliveryStatus.DELIVERED.value
             
             # Check delivery stats
             db_session.refresh(webhook)
@@ -433,8 +450,10 @@ class TestWebhookSystem:
         
         service = WebhookService(db_session)
         
-        # Mock failed webhook delivery
-        with patch('httpx.AsyncClient.post') as mock_post:
+        # Mock failed webhook delivery; retries come due immediately
+        with patch('httpx.AsyncClient.post') as mock_post, \
+             patch('app.tasks.webhook_tasks.deliver_webhooks.delay'), \
+             patch('app.services.webhook_delivery_service.backoff_delay', return_value=0):
             mock_response = AsyncMock()
             mock_response.status_code = 500
             mock_post.return_value = mock_response
@@ -445,6 +464,7 @@ class TestWebhookSystem:
                 {"invoice_id": "123", "amount": 1000.00},
                 str(self.tenant.id)
             )
+            await WebhookDeliveryWorker(db_session).deliver_due()
             
             # Verify webhook was retried (1 initial + 2 retries = 3 calls)
             assert mock_post.call_count == 3
@@ -455,6 +475,94 @@ class TestWebhookSystem:
             assert webhook.failed_deliveries == 1
             assert webhook.last_delivery_at is None  # No successful delivery
     
+    @pytest.fixture
+    def failing_webhook(self, db_session: Session):
+        """Webhook endpoint whose outbox events are removed again after the test"""
+        db_session.add(self.tenant)
+        db_session.add(self.api_key)
+        
+        webhook = WebhookEndpoint(
+            tenant_id=self.tenant.id,
+            api_key_id=self.api_key.id,
+            name="Test Webhook",
+            url="https://httpbin.org/status/503",
+            events="invoice.created",
+            is_active=True,
+            retry_count=5,
+            timeout_seconds=5
+        )
+        db_session.add(webhook)
+        db_session.commit()
+        
+        yield webhook
+        
+        # Paused events would otherwise be picked up by later delivery runs
+        db_session.rollback()
+        db_session.query(WebhookOutbox).filter(
+            WebhookOutbox.webhook_endpoint_id == webhook.id
+        ).delete(synchronize_session=False)
+        db_session.delete(webhook)
+        db_session.commit()
+    
+    @pytest.mark.asyncio
+    async def test_webhook_circuit_breaker(self, db_session: Session, failing_webhook: WebhookEndpoint):
+        """Test failing endpoints are paused instead of retried in a tight loop"""
+        webhook = failing_webhook
+        service = WebhookService(db_session)
+        
+        with patch('httpx.AsyncClient.post') as mock_post, \
+             patch('app.tasks.webhook_tasks.deliver_webhooks.delay'), \
+             patch('app.services.webhook_delivery_service.backoff_delay', return_value=0), \
+             patch.object(settings, 'webhook_circuit_failure_threshold', 2):
+            mock_response = AsyncMock()
+            mock_response.status_code = 503
+            mock_post.return_value = mock_response
+            
+            for i in range(3):
+                await service.send_webhook("invoice.created", {"invoice_id": str(i)}, str(self.tenant.id))
+            
+            totals = await WebhookDeliveryWorker(db_session).deliver_due()
+            
+            # The circuit opens after two failures; the third event waits for the cooldown
+            assert mock_post.call_count == 2
+            assert totals["deferred"] == 1
+            
+            db_session.refresh(webhook)
+            assert webhook.consecutive_failures == 2
+            assert webhook.circuit_open_until > datetime.now(timezone.utc)
+            
+            pending = db_session.query(WebhookOutbox).filter(
+                WebhookOutbox.webhook_endpoint_id == webhook.id,
+                WebhookOutbox.status == WebhookDeliveryStatus.PENDING.value
+            ).all()
+            assert len(pending) == 3
+            assert sum(outbox.attempts for outbox in pending) == 2
+    
+    def test_concurrent_runs_add_failures(self, db_session: Session, failing_webhook: WebhookEndpoint):
+        """Test failures recorded by two overlapping delivery runs are both counted"""
+        webhook = failing_webhook
+        circuits = [EndpointCircuit(consecutive_failures=0, concurrency=1, threshold=5) for _ in range(2)]
+        for circuit in circuits:
+            circuit.record(False)
+        
+        for circuit in circuits:
+            WebhookDeliveryWorker(db_session).record_outcomes([], [], {webhook.id: webhook}, {webhook.id: circuit})
+        
+        db_session.refresh(webhook)
+        assert webhook.consecutive_failures == 2
+        assert webhook.circuit_open_until is None
+    
+    def test_half_open_circuit_sends_one_probe(self):
+        """Test a tripped endpoint gets a single probe once its cooldown has passed"""
+        circuit = EndpointCircuit(consecutive_failures=5, concurrency=4, threshold=5)
+        
+        assert circuit.allow()
+        assert not circuit.allow()
+        
+        circuit.record(True)
+        assert circuit.allow()
+        assert circuit.consecutive_failures == 0
+    
     def test_webhook_signature_generation(self, db_session: Session):
         """Test webhook signature generation"""
         service = WebhookService(db_session)
@@ -0,0 +1,246 @@
+"""
+Tests for the content-defined chunking dedup store used by tenant backups
+Chunks are written to a local filesystem backend instead of cloud storage
+"""
+
+import io
+import random
+import pytest
+from pathlib import Path
+from datetime import datetime, timezone, timedelta
+from unittest.mock import patch
+
+from app.models.backup import BackupChunk, BackupLog, BackupStatus
+from app.services.backup_service import BackupService
+from app.services.chunk_store_service import (
+    GEAR_TABLE, ChunkStoreService, LocalChunkBackend, _find_cut_point, content_defined_chunks
+)
+from app.services.cloud_storage_service import IntegrityCheckMode
+
+
+MIN_SIZE = 1024
+AVG_SIZE = 4096
+MAX_SIZE = 16384
+
+
+def make_dump(seed: int, size: int = 256 * 1024) -> bytes:
+    return random.Random(seed).randbytes(size)
+
+
+def scalar_cut_point(data: bytes, min_size: int, max_size: int, boundary_mask: int) -> int:
+    """Byte-at-a-time gear hash the vectorised cut point search must agree with"""
+    length = min(len(data), max_size)
+    rolling_hash = 0
+    for index in range(min_size, length):
+        rolling_hash = ((rolling_hash << 1) + GEAR_TABLE[data[index]]) & ((1 << 64) - 1)
+        if not rolling_hash & boundary_mask:
+            return index + 1
+    return length
+
+
+class FailingChunkBackend(LocalChunkBackend):
+    """Local backend whose uploads start failing after a number of chunks"""
+    
+    def __init__(self, root: Path, fail_after: int):
+        super().__init__(root)
+        self.fail_after = fail_after
+    
+    def put(self, key: str, data: bytes):
+        if self.fail_after <= 0:
+            raise Exception("connection reset")
+        self.fail_after -= 1
+        super().put(key, data)
+
+
+class TestContentDefinedChunking:
+    """Test cases for the rolling-hash chunker"""
+    
+    def test_chunks_reassemble_input(self):
+        data = make_dump(1)
+        chunks = list(content_defined_chunks(io.BytesIO(data), MIN_SIZE, AVG_SIZE, MAX_SIZE))
+        
+        assert b"".join(chunks) == data
+        assert all(len(chunk) <= MAX_SIZE for chunk in chunks)
+        assert all(len(chunk) >= MIN_SIZE for chunk in chunks[:-1])
+    
+    def test_insertion_only_changes_nearby_chunks(self):
+        data = make_dump(2)
+        edited = data[:100000] + b"INSERT INTO customers VALUES (42);" + data[100000:]
+        
+        original = set(content_defined_chunks(io.BytesIO(data), MIN_SIZE, AVG_SIZE, MAX_SIZE))
+        changed = list(content_defined_chunks(io.BytesIO(edited), MIN_SIZE, AVG_SIZE, MAX_SIZE))
+        
+        shared = sum(1 for chunk in changed if chunk in original)
+        assert shared >= len(changed) - 3
+    
+    def test_cut_points_match_scalar_hash(self):
+        rng = random.Random(8)
+        boundary_mask = ((1 << 8) - 1) << 56
+        for size in (0, 100, 5000, 70000, 200000):
+            data = bytearray(rng.randbytes(size))
+            for min_size, max_size in ((1, 64), (64, 1024), (1000, 150000)):
+                expected = scalar_cut_point(data, min_size, max_size, boundary_mask)
+                assert _find_cut_point(data, min_size, max_size, boundary_mask) == expected
+    
+    def test_invalid_sizes_rejected(self):
+        with pytest.raises(ValueError):
+            list(content_defined_chunks(io.BytesIO(b"data"), 4096, 1024, 16384))
+
+
+class TestChunkStoreService:
+    """Test cases for ChunkStoreService with a local filesystem backend"""
+    
+    @pytest.fixture
+    def chunk_store(self, db_session, tmp_path):
+        store = ChunkStoreService(db_session, backends={"local": LocalChunkBackend(tmp_path / "chunks")})
+        store.min_size, store.avg_size, store.max_size = MIN_SIZE, AVG_SIZE, MAX_SIZE
+        return store
+    
+    @pytest.fixture
+    def encryption_key(self, db_session, test_tenant):
+        return BackupService(db_session).generate_encryption_key(str(test_tenant.id))
+    
+    def write_dump(self, tmp_path: Path, name: str, data: bytes) -> Path:
+        path = tmp_path / name
+        path.write_bytes(data)
+        return path
+    
+    def test_second_backup_reuses_chunks(self, chunk_store, db_session, test_tenant, encryption_key, tmp_path):
+        tenant_id = str(test_tenant.id)
+        day_one = make_dump(3)
+        day_two = day_one[:150000] + b"UPDATE invoices SET total = 10;" + day_one[150000:]
+        
+        first = chunk_store.store_file(tenant_id, self.write_dump(tmp_path, "day1.sql", day_one), encryption_key)
+        db_session.commit()
+        second = chunk_store.store_file(tenant_id, self.write_dump(tmp_path, "day2.sql", day_two), encryption_key)
+        db_session.commit()
+        
+        assert first["reused_chunks"] == 0
+        assert second["reused_chunks"] >= second["chunk_count"] - 3
+        assert second["bytes_uploaded"] < first["bytes_uploaded"] / 4
+        
+        shared_hash = second["chunks"][0][0]
+        chunk = db_session.query(BackupChunk).filter(
+            BackupChunk.tenant_id == test_tenant.id,
+            BackupChunk.chunk_hash == shared_hash
+        ).first()
+        assert chunk.ref_count == 2
+    
+    def test_restore_reassembles_dump(self, chunk_store, db_session, test_tenant, encryption_key, tmp_path):
+        tenant_id = str(test_tenant.id)
+        data = make_dump(4)
+        manifest = chunk_store.store_file(tenant_id, self.write_dump(tmp_path, "dump.sql", data), encryption_key)
+        db_session.commit()
+        
+        output = chunk_store.restore_file(tenant_id, manifest, encryption_key, tmp_path / "restored.sql", "local")
+        
+        assert output.read_bytes() == data
+    
+    def test_verify_manifest_detects_corruption(self, chunk_store, db_session, test_tenant, encryption_key, tmp_path):
+        tenant_id = str(test_tenant.id)
+        manifest = chunk_store.store_file(tenant_id, self.write_dump(tmp_path, "dump.sql", make_dump(5)), encryption_key)
+        db_session.commit()
+        
+        assert chunk_store.verify_manifest(tenant_id, manifest, encryption_key, "local")["is_valid"]
+        
+        backend = chunk_store.backends["local"]
+        backend.put(chunk_store._chunk_key(tenant_id, manifest["chunks"][0][0]), b"corrupted")
+        
+        full = chunk_store.verify_manifest(tenant_id, manifest, encryption_key, "local", mode=IntegrityCheckMode.FULL)
+        metadata = chunk_store.verify_manifest(tenant_id, manifest, encryption_key, "local", mode=IntegrityCheckMode.METADATA)
+        
+        assert full["is_valid"] is False
+        assert metadata["is_valid"] is True
+        assert metadata["bytes_transferred"] == 0
+    
+    def test_garbage_collect_removes_released_chunks(self, chunk_store, db_session, test_tenant, encryption_key, tmp_path):
+        tenant_id = str(test_tenant.id)
+        manifest = chunk_store.store_file(tenant_id, self.write_dump(tmp_path, "dump.sql", make_dump(6)), encryption_key)
+        db_session.commit()
+        
+        released = chunk_store.release_manifest(tenant_id, manifest)
+        db_session.commit()
+        
+        # Released chunks are kept for the grace period
+        assert chunk_store.garbage_collect(grace_hours=24)["deleted_chunks"] == 0
+        
+        result = chunk_store.garbage_collect(grace_hours=0)
+        
+        assert released == len({chunk_hash for chunk_hash, _ in manifest["chunks"]})
+        assert result["deleted_chunks"] == released
+        assert db_session.query(BackupChunk).filter(BackupChunk.tenant_id == test_tenant.id).count() == 0
+        assert not list((tmp_path / "chunks").rglob("*" + manifest["chunks"][0][0]))
+
+
+class TestChunkedTenantBackup:
+    """Test cases for deduplicated backups through BackupService"""
+    
+    @pytest.fixture
+    def backup_service(self, db_session, tmp_path):
+        service = BackupService(db_session)
+        service._chunk_store = ChunkStoreService(db_session, backends={"local": LocalChunkBackend(tmp_path / "chunks")})
+        service._chunk_store.min_size, service._chunk_store.avg_size, service._chunk_store.max_size = MIN_SIZE, AVG_SIZE, MAX_SIZE
+        return service
+    
+    def test_backup_expire_and_collect(self, backup_service, db_session, test_tenant, tmp_path):
+        tenant_id = str(test_tenant.id)
+        dump_path = tmp_path / "tenant.sql"
+        dump_path.write_bytes(make_dump(7))
+        
+        with patch('app.services.backup_service.settings.backup_dedup_enabled', True), \
+             patch.object(backup_service, 'create_tenant_sql_dump', return_value=dump_path):
+            result = backup_service.backup_tenant(tenant_id)
+        
+        backup = db_session.query(BackupLog).filter(BackupLog.id == result["backup_id"]).first()
+        assert backup.status == BackupStatus.COMPLETED
+        assert backup.get_chunk_manifest()["chunk_count"] == result["dedup"]["chunk_count"]
+        assert backup_service.verify_backup_integrity(result["backup_id"], "local")
+        
+        backup.completed_at = datetime.now(timezone.utc) - timedelta(days=40)
+        db_session.commit()
+        
+        expiry = backup_service.expire_chunked_backups(retention_days=30)
+        collection = backup_service.chunk_store.garbage_collect(grace_hours=0)
+        
+        db_session.refresh(backup)
+        assert expiry["expired_backups"] == 1
+        assert collection["deleted_chunks"] == expiry["released_chunks"]
+        assert backup.get_chunk_manifest() is None
+        assert backup.storage_locations == []
+
+    def test_failed_upload_leaves_no_chunks(self, backup_service, db_session, test_tenant, tmp_path):
+        tenant_id = str(test_tenant.id)
+        day_one = make_dump(9)
+        day_two = make_dump(10, size=64 * 1024) + day_one
+        dump_path = tmp_path / "tenant.sql"
+        
+        with patch('app.services.backup_service.settings.backup_dedup_enabled', True), \
+             patch.object(backup_service, 'create_tenant_sql_dump', return_value=dump_path):
+            dump_path.write_bytes(day_one)
+            backup_service.backup_tenant(tenant_id)
+            ref_counts = dict(
+                db_session.query(BackupChunk.chunk_hash, BackupChunk.ref_count)
+                .filter(BackupChunk.tenant_id == test_tenant.id)
+                .all()
+            )
+            stored_files = sorted(path for path in (tmp_path / "chunks").rglob("*") if path.is_file())
+            
+            # The second dump starts with new chunks; the upload fails after two of them
+            backup_service.chunk_store.backends = {"local": FailingChunkBackend(tmp_path / "chunks", fail_after=2)}
+            dump_path.write_bytes(day_two)
+            with pytest.raises(Exception, match="connection reset"):
+                backup_service.backup_tenant(tenant_id)
+        
+        db_session.expire_all()
+        assert dict(
+            db_session.query(BackupChunk.chunk_hash, BackupChunk.ref_count)
+            .filter(BackupChunk.tenant_id == test_tenant.id)
+            .all()
+        ) == ref_counts
+        assert sorted(path for path in (tmp_path / "chunks").rglob("*") if path.is_file()) == stored_files
+        
+        failed = db_session.query(BackupLog).filter(
+            BackupLog.tenant_id == test_tenant.id,
+            BackupLog.status == BackupStatus.FAILED
+        ).one()
+        assert "connection reset" in failed.error_message
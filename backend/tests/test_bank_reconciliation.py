@@ -3,6 +3,7 @@ Unit tests for bank reconciliation system
 """
 
 import pytest
+import random
 from decimal import Decimal
 from datetime import datetime, timedelta
 from uuid import uuid4
@@ -16,7 +17,7 @@ from app.schemas.bank_reconciliation import (
     BankAccountCreate, BankStatementImportRequest, BankTransactionCreate,
     BankReconciliationCreate, BankReconciliationItemCreate
 )
-from app.services.bank_reconciliation_service import BankReconciliationService
+from app.services.bank_reconciliation_service import BankReconciliationService, _MatchRecord
 from app.core.exceptions import ValidationError, NotFoundError
 
 
@@ -160,6 +161,56 @@ class TestBankReconciliationService:
         assert check_payment.credit_amount == Decimal('0.00')
         assert check_payment.balance_after == Decimal('8500.00')
     
+    def test_import_statement_mixed_formats_and_bad_rows(self, bank_reconciliation_service, sample_bank_account, sample_tenant):
+        """Test vectorized parsing across date formats, single amount column and row errors"""
+        csv_content = """Date,Description,Amount,Balance
+16/01/2024,Salary,"1,250.50",11250.50
+2024.01.17,Rent,-3000,8250.50
+not a date,Broken row,-10,8240.50
+2024-01-18,Zero line,0,8250.50
+2024-01-15,Opening deposit,$10000.00,10000.00
+2024-01-19,Bad amount,1.2.3,8250.50"""
+        
+        import_request = BankStatementImportRequest(
+            bank_account_id=sample_bank_account.id,
+            file_format="csv",
+            has_header=True,
+            column_mapping={
+                "date_column": 0,
+                "description_column": 1,
+                "amount_column": 2,
+                "balance_column": 3
+            }
+        )
+        
+        result = bank_reconciliation_service.import_bank_statement(
+            sample_tenant.id,
+            csv_content.encode('utf-8'),
+            import_request
+        )
+        
+        assert result["total_transactions"] == 6
+        assert result["processed_transactions"] == 3
+        assert result["failed_transactions"] == 2
+        assert result["errors"][0].startswith("Row 3: unrecognized date")
+        assert result["errors"][1].startswith("Row 6: invalid amount")
+        
+        transactions = {
+            t.description: t
+            for t in bank_reconciliation_service.db.query(BankTransaction).filter(
+                BankTransaction.statement_id == result["statement_id"]
+            )
+        }
+        assert set(transactions) == {"Salary", "Rent", "Opening deposit"}
+        assert transactions["Salary"].credit_amount == Decimal('1250.50')
+        assert transactions["Salary"].transaction_date.day == 16
+        assert transactions["Rent"].debit_amount == Decimal('3000.00')
+        
+        # Balances come from the earliest and latest imported rows by date
+        statement = bank_reconciliation_service.db.get(BankStatement, result["statement_id"])
+        assert statement.opening_balance == Decimal('0.00')
+        assert statement.closing_balance == Decimal('8250.50')
+    
     def test_error_handling_invalid_file_format(self, bank_reconciliation_service, sample_bank_account, sample_tenant):
         """Test error handling for invalid file format"""
         from pydantic import ValidationError as PydanticValidationError
@@ -203,4 +254,100 @@ class TestBankReconciliationService:
             elif i == 3:  # "-500.00"
                 assert amount == Decimal('-500.00')
             else:  # Empty, None, or invalid
-                assert amount == Decimal('0.00')
\ No newline at end of file
+                assert amount == Decimal('0.00')
+
+
+def make_match_record(amount, day, reference=None, name=None, is_credit=True, transaction_type=None):
+    return _MatchRecord(
+        id=uuid4(),
+        amount=Decimal(amount),
+        day=day,
+        reference=reference,
+        name=name,
+        is_credit=is_credit,
+        is_debit=not is_credit,
+        transaction_type=transaction_type
+    )
+
+
+class TestTransactionMatcher:
+    """Test indexed candidate matching between bank and book transactions"""
+    
+    @pytest.fixture
+    def bank_reconciliation_service(self, db_session):
+        return BankReconciliationService(db_session)
+    
+    def test_assignment_is_one_to_one(self, bank_reconciliation_service):
+        """Test that two bank lines cannot both be matched to the same book transaction"""
+        day = datetime(2024, 1, 15).toordinal()
+        book = make_match_record("500.00", day, reference="inv-1", transaction_type="receipt")
+        exact = make_match_record("500.00", day, reference="inv-1")
+        close = make_match_record("500.00", day + 1)
+        
+        suggestions = bank_reconciliation_service._match_records([close, exact], [book], 0.01, 3)
+        assigned = bank_reconciliation_service._assign_matches(suggestions)
+        
+        assert len(suggestions) == 2
+        assert len(assigned) == 1
+        assert assigned[0].bank_transaction_id == exact.id
+    
+    def test_indexed_matching_at_scale(self, bank_reconciliation_service):
+        """Test candidate matching at 10k x 10k keeps assignments one-to-one"""
+        rng = random.Random(7)
+        first_day = datetime(2024, 1, 1).toordinal()
+        
+        book_records = []
+        bank_records = []
+        for i in range(10000):
+            amount = Decimal(rng.randint(1000, 10000000)) / 100
+            day = first_day + rng.randint(0, 365)
+            reference = f"ref-{i}"
+            book_records.append(make_match_record(amount, day, reference, f"customer {i % 500}", False, "receipt"))
+            bank_records.append(make_match_record(amount, day + rng.randint(-2, 2), reference if i % 3 else None))
+        
+        suggestions = bank_reconciliation_service._match_records(bank_records, book_records, 0.01, 3)
+        assigned = bank_reconciliation_service._assign_matches(suggestions)
+        
+        assert len(assigned) == len(bank_records)
+        assert len({s.book_transaction_id for s in assigned}) == len(assigned)
+        
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_exhaustive_scoring(self, bank_reconciliation_service, seed):
+        """Test indexed candidates give the same suggestions, in the same order, as scoring every pair"""
+        rng = random.Random(seed)
+        first_day = datetime(2024, 1, 1).toordinal()
+        references = ["inv-1", "inv-12", "inv-123", "1", "12", "a", "abc-9", "x9", None]
+        names = ["acme", "acme ltd", "ac", "bolt co", "c", "tehran trading", "trading", None]
+        
+        def random_record():
+            return make_match_record(
+                Decimal(rng.choice([0, 50, 91, 95, 100, 105, 109, 110, 300])) + Decimal(rng.randint(0, 3)) / 100,
+                first_day + rng.randint(0, 25),
+                rng.choice(references),
+                rng.choice(names),
+                rng.random() < 0.5,
+                rng.choice(["receipt", "payment", None])
+            )
+        
+        bank_records = [random_record() for _ in range(80)]
+        book_records = [random_record() for _ in range(100)]
+        amount_tolerance = rng.choice([0.01, 1, 10])
+        date_tolerance_days = rng.choice([1, 3, 10])
+        
+        exhaustive = []
+        for bank in bank_records:
+            for book in book_records:
+                score, reasons = bank_reconciliation_service._calculate_match_score(
+                    bank, book, Decimal(str(amount_tolerance)), date_tolerance_days
+                )
+                if score >= 0.5:
+                    exhaustive.append((bank.id, book.id, Decimal(str(score)), reasons))
+        exhaustive.sort(key=lambda match: match[2], reverse=True)
+        
+        indexed = [
+            (s.bank_transaction_id, s.book_transaction_id, s.confidence_score, s.match_reasons)
+            for s in bank_reconciliation_service._match_records(
+                bank_records, book_records, amount_tolerance, date_tolerance_days
+            )
+        ]
+        assert indexed == exhaustive
@@ -7,6 +7,9 @@ import pytest
 from unittest.mock import Mock, patch, MagicMock
 from pathlib import Path
 import tempfile
+import hashlib
+import os
+import threading
 from datetime import datetime, timezone
 from botocore.exceptions import ClientError
 
@@ -18,6 +21,15 @@ from app.services.cloud_storage_service import (
 )
 
 
+def configure_transfer_settings(mock_settings, threshold=64 * 1024 * 1024, chunk_size=32 * 1024 * 1024,
+                                concurrency=8, retry_attempts=2):
+    """Transfer settings the service reads when it is constructed or uploads"""
+    mock_settings.storage_multipart_threshold = threshold
+    mock_settings.storage_multipart_chunk_size = chunk_size
+    mock_settings.storage_upload_max_concurrency = concurrency
+    mock_settings.storage_upload_retry_attempts = retry_attempts
+
+
 class TestCloudStorageConfiguration:
     """Test cloud storage configuration and initialization"""
     
@@ -32,6 +44,7 @@ class TestCloudStorageConfiguration:
             mock.cloudflare_r2_secret_key = "test_r2_secret"
             mock.cloudflare_r2_bucket = "hesaabplus-backups"
             mock.cloudflare_r2_endpoint = "https://test.r2.cloudflarestorage.com"
+            configure_transfer_settings(mock)
             yield mock
     
     @patch('boto3.client')
@@ -84,6 +97,7 @@ class TestCloudStorageConfiguration:
             mock_settings.cloudflare_r2_secret_key = None
             mock_settings.cloudflare_r2_bucket = None
             mock_settings.cloudflare_r2_endpoint = None
+            configure_transfer_settings(mock_settings)
             
             service = CloudStorageService()
             
@@ -329,6 +343,184 @@ class TestFailoverStrategies:
             assert "R2 upload failed" in result["errors"][0]
 
 
+class FakeMultipartClient:
+    """In-memory stand-in for the S3 multipart API"""
+    
+    def __init__(self, fail_part=None, fail_times=None):
+        self.parts = {}
+        self.fail_part = fail_part
+        self.fail_times = fail_times
+        self.upload_part_calls = 0
+        self.completed_body = None
+        self.aborted_uploads = []
+        self.lock = threading.Lock()
+    
+    def create_multipart_upload(self, **kwargs):
+        return {"UploadId": "upload-1"}
+    
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        with self.lock:
+            self.upload_part_calls += 1
+            failing = PartNumber == self.fail_part and self.fail_times != 0
+            if failing and self.fail_times:
+                self.fail_times -= 1
+        if failing:
+            raise Exception("connection reset")
+        etag = hashlib.md5(Body).hexdigest()
+        with self.lock:
+            self.parts[PartNumber] = (etag, Body)
+        return {"ETag": etag}
+    
+    def get_paginator(self, operation_name):
+        paginator = Mock()
+        paginator.paginate.return_value = [{
+            "Parts": [{"PartNumber": number, "ETag": etag} for number, (etag, _) in self.parts.items()]
+        }]
+        return paginator
+    
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.completed_body = b"".join(self.parts[part["PartNumber"]][1] for part in MultipartUpload["Parts"])
+    
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted_uploads.append(UploadId)
+
+
+class TestConcurrentUploads:
+    """Test concurrent dual-provider uploads"""
+    
+    @pytest.fixture
+    def multipart_service(self, tmp_path):
+        """Service that uses multipart uploads for every file, with small parts"""
+        with patch('app.services.cloud_storage_service.settings') as mock_settings, \
+             patch('app.services.cloud_storage_service.MULTIPART_MIN_PART_SIZE', 4), \
+             patch('boto3.client'):
+            mock_settings.backblaze_b2_bucket = "securesyntax"
+            mock_settings.cloudflare_r2_bucket = "hesaabplus-backups"
+            configure_transfer_settings(mock_settings, threshold=1, chunk_size=4, concurrency=2)
+            
+            service = CloudStorageService()
+            service.b2_client = FakeMultipartClient()
+            service.r2_client = FakeMultipartClient()
+            service.upload_state_dir = tmp_path / "uploads"
+            yield service
+    
+    def test_upload_to_both_small_file(self):
+        """Test small files are uploaded to both providers through the single-object path"""
+        service = CloudStorageService()
+        service.upload_to_b2 = Mock(return_value="s3://securesyntax/test.txt")
+        service.upload_to_r2 = Mock(side_effect=Exception("R2 unavailable"))
+        
+        with tempfile.NamedTemporaryFile() as temp_file:
+            temp_path = Path(temp_file.name)
+            temp_path.write_text("test content")
+            
+            results = service.upload_to_both(temp_path, "test.txt")
+        
+        assert results["backblaze_b2"]["location"] == "s3://securesyntax/test.txt"
+        assert results["backblaze_b2"]["bytes"] == len("test content")
+        assert results["cloudflare_r2"]["location"] is None
+        assert "R2 unavailable" in results["cloudflare_r2"]["error"]
+    
+    def test_shared_reader_uploads_same_parts_to_both(self, multipart_service, tmp_path):
+        """Test each part is read once and sent to both providers"""
+        content = os.urandom(4 * 5 + 3)
+        source = tmp_path / "archive.tar.gz.enc"
+        source.write_bytes(content)
+        
+        results = multipart_service.upload_to_both(source, "disaster_recovery/archive.tar.gz.enc")
+        
+        assert results["backblaze_b2"]["location"] == "s3://securesyntax/disaster_recovery/archive.tar.gz.enc"
+        assert results["cloudflare_r2"]["location"] == "s3://hesaabplus-backups/disaster_recovery/archive.tar.gz.enc"
+        assert multipart_service.b2_client.completed_body == content
+        assert multipart_service.r2_client.completed_body == content
+        assert multipart_service.b2_client.upload_part_calls == 6
+        
+        # Upload state is removed once both providers have completed
+        assert not multipart_service._upload_state_path("disaster_recovery/archive.tar.gz.enc").exists()
+        
+        metrics = multipart_service.get_transfer_metrics()
+        assert metrics["backblaze_b2"]["bytes_uploaded"] == len(content)
+        assert metrics["cloudflare_r2"]["uploads"] == 1
+    
+    def test_failed_part_is_retried_from_completed_parts(self, multipart_service, tmp_path):
+        """Test a provider whose part fails resumes its upload without re-sending stored parts"""
+        content = os.urandom(4 * 8)
+        source = tmp_path / "archive.tar.gz.enc"
+        source.write_bytes(content)
+        multipart_service.r2_client.fail_part = 5
+        multipart_service.r2_client.fail_times = 1
+        
+        results = multipart_service.upload_to_both(source, "archive.tar.gz.enc")
+        
+        assert results["backblaze_b2"]["location"] == "s3://securesyntax/archive.tar.gz.enc"
+        assert results["cloudflare_r2"]["location"] == "s3://hesaabplus-backups/archive.tar.gz.enc"
+        assert multipart_service.r2_client.completed_body == content
+        # Eight parts plus the one failed attempt; the retry only sent the missing part
+        assert multipart_service.r2_client.upload_part_calls == 9
+        assert multipart_service.r2_client.aborted_uploads == []
+        assert not multipart_service._upload_state_path("archive.tar.gz.enc").exists()
+    
+    def test_interrupted_upload_resumes_from_completed_parts(self, multipart_service, tmp_path):
+        """Test a provider that keeps failing resumes on the next upload without re-uploading the other"""
+        content = os.urandom(4 * 8)
+        source = tmp_path / "archive.tar.gz.enc"
+        source.write_bytes(content)
+        multipart_service.r2_client.fail_part = 5
+        
+        results = multipart_service.upload_to_both(source, "archive.tar.gz.enc")
+        
+        assert results["backblaze_b2"]["location"] is not None
+        assert results["cloudflare_r2"]["location"] is None
+        assert "part 5 failed" in results["cloudflare_r2"]["error"]
+        # The unfinished upload is kept for the next attempt
+        assert multipart_service.r2_client.aborted_uploads == []
+        assert multipart_service._upload_state_path("archive.tar.gz.enc").exists()
+        
+        # Retry after the provider recovers
+        multipart_service.r2_client.fail_part = None
+        multipart_service.b2_client.upload_part_calls = 0
+        multipart_service.r2_client.upload_part_calls = 0
+        already_uploaded = len(multipart_service.r2_client.parts)
+        
+        results = multipart_service.upload_to_both(source, "archive.tar.gz.enc")
+        
+        assert results["cloudflare_r2"]["location"] == "s3://hesaabplus-backups/archive.tar.gz.enc"
+        assert multipart_service.r2_client.completed_body == content
+        assert multipart_service.r2_client.upload_part_calls == 8 - already_uploaded
+        assert multipart_service.b2_client.upload_part_calls == 0
+        assert not multipart_service._upload_state_path("archive.tar.gz.enc").exists()
+    
+    def test_changed_file_aborts_stale_uploads(self, multipart_service, tmp_path):
+        """Test uploads left for another version of the file are aborted instead of resumed"""
+        source = tmp_path / "archive.tar.gz.enc"
+        source.write_bytes(os.urandom(4 * 3))
+        multipart_service.r2_client.fail_part = 2
+        multipart_service.upload_to_both(source, "archive.tar.gz.enc")
+        
+        content = os.urandom(4 * 4)
+        source.write_bytes(content)
+        multipart_service.r2_client.fail_part = None
+        
+        results = multipart_service.upload_to_both(source, "archive.tar.gz.enc")
+        
+        assert multipart_service.r2_client.aborted_uploads == ["upload-1"]
+        assert results["backblaze_b2"]["location"] is not None
+        assert multipart_service.b2_client.completed_body == content
+        assert multipart_service.r2_client.completed_body == content
+    
+    def test_read_error_keeps_uploads_for_resume(self, multipart_service, tmp_path):
+        """Test an exception while reading the source leaves the started uploads resumable"""
+        source = tmp_path / "archive.tar.gz.enc"
+        source.write_bytes(os.urandom(4 * 3))
+        
+        with patch("builtins.open", side_effect=OSError("disk error")):
+            with pytest.raises(OSError):
+                multipart_service.upload_to_both(source, "archive.tar.gz.enc")
+        
+        assert multipart_service.b2_client.aborted_uploads == []
+        assert multipart_service._upload_state_path("archive.tar.gz.enc").exists()
+
+
 class TestDownloadFailover:
     """Test download failover functionality"""
     
@@ -615,6 +807,7 @@ class TestIntegrationScenarios:
             mock_settings.cloudflare_r2_secret_key = "test_r2_secret"
             mock_settings.cloudflare_r2_bucket = "hesaabplus-backups"
             mock_settings.cloudflare_r2_endpoint = "https://test.r2.cloudflarestorage.com"
+            configure_transfer_settings(mock_settings)
             
             with patch('boto3.client') as mock_boto3:
                 mock_b2_client = Mock()
@@ -21,7 +21,7 @@ from app.models.product import Product
 from app.models.invoice import Invoice, InvoiceType, InvoiceStatus
 from app.models.invoice import InvoiceItem
 from app.models.installment import Installment, InstallmentStatus
-from app.models.backup import DataExportLog, ExportFormat, ExportType, ExportStatus, ExportSchedule
+from app.models.backup import DataExportLog, DataExportSlice, ExportFormat, ExportType, ExportStatus, ExportSchedule
 from app.services.data_export_service import DataExportService
 from app.tasks.data_export_tasks import create_data_export, cleanup_expired_exports
 
@@ -314,6 +314,107 @@ class TestDataExportService:
                 if test_temp_dir.exists():
                     shutil.rmtree(test_temp_dir)
     
+    def test_create_data_export_streams_into_archive(self, test_db: Session, sample_tenant: Tenant, sample_user: User, sample_customer: Customer, sample_product: Product):
+        """Test that streamed exports write readable entries and a matching checksum"""
+        export_service = DataExportService(test_db)
+        export_service.batch_size = 1
+        
+        with patch.object(export_service, 'temp_dir') as mock_temp_dir:
+            test_temp_dir = Path(tempfile.mkdtemp())
+            mock_temp_dir.__truediv__ = lambda self, other: test_temp_dir / other
+            mock_temp_dir.mkdir = MagicMock()
+            
+            try:
+                result = export_service.create_data_export(
+                    tenant_id=str(sample_tenant.id),
+                    user_id=str(sample_user.id),
+                    export_format=ExportFormat.JSON,
+                    export_type=ExportType.MANUAL,
+                    tables=["customers", "products", "invoices"]
+                )
+                
+                archive_path = test_temp_dir / f"{result['export_name']}.zip"
+                assert result["checksum"] == export_service.calculate_checksum(archive_path)
+                assert result["compressed_size"] == archive_path.stat().st_size
+                
+                with zipfile.ZipFile(archive_path, 'r') as zipf:
+                    assert zipf.testzip() is None
+                    assert result["file_size"] == sum(info.file_size for info in zipf.infolist())
+                    
+                    for exported in result["exported_files"]:
+                        content = json.loads(zipf.read(exported["file"]))
+                        assert content["table"] == exported["table"]
+                        assert content["record_count"] == exported["records"] == len(content["data"])
+                    
+                    customers = json.loads(zipf.read(f"{result['export_name']}_customers.json"))
+                    assert customers["data"][0]["name"] == sample_customer.name
+            
+            finally:
+                import shutil
+                if test_temp_dir.exists():
+                    shutil.rmtree(test_temp_dir)
+    
+    def test_parallel_export_matches_single_pass(self, test_db: Session, sample_tenant: Tenant, sample_user: User):
+        """Test that slices exported and assembled separately give the same archive contents"""
+        for i in range(7):
+            test_db.add(Customer(tenant_id=sample_tenant.id, name=f"Sliced Customer {i}", email=f"sliced{i}@test.com"))
+        test_db.commit()
+        
+        export_service = DataExportService(test_db)
+        
+        with patch.object(export_service, 'temp_dir') as mock_temp_dir:
+            test_temp_dir = Path(tempfile.mkdtemp())
+            mock_temp_dir.__truediv__ = lambda self, other: test_temp_dir / other
+            mock_temp_dir.mkdir = MagicMock()
+            
+            try:
+                for export_format in (ExportFormat.CSV, ExportFormat.JSON):
+                    plan = export_service.create_parallel_export(
+                        tenant_id=str(sample_tenant.id),
+                        user_id=str(sample_user.id),
+                        export_format=export_format,
+                        export_type=ExportType.MANUAL,
+                        tables=["customers"],
+                        slice_rows=3
+                    )
+                    
+                    assert len(plan["slice_ids"]) == 3
+                    assert plan["estimated_records"] == 7
+                    assert export_service.get_export_progress(plan["export_id"])["progress_percentage"] == 0
+                    
+                    for slice_id in plan["slice_ids"]:
+                        export_service.export_slice(slice_id)
+                    
+                    # A re-delivered slice is skipped from its checkpoint
+                    assert export_service.export_slice(plan["slice_ids"][0])["resumed"] is True
+                    assert export_service.get_export_progress(plan["export_id"])["progress_percentage"] == 100
+                    
+                    result = export_service.assemble_parallel_export(plan["export_id"])
+                    
+                    archive_path = test_temp_dir / f"{result['export_name']}.zip"
+                    assert result["checksum"] == export_service.calculate_checksum(archive_path)
+                    assert result["total_records"] == 7
+                    assert not (test_temp_dir / f"{result['export_name']}_parts").exists()
+                    
+                    with zipfile.ZipFile(archive_path, 'r') as zipf:
+                        content = zipf.read(f"{result['export_name']}_customers.{export_format.value}").decode('utf-8')
+                    
+                    if export_format == ExportFormat.CSV:
+                        lines = content.strip().splitlines()
+                        assert len(lines) == 8
+                        assert lines[0].startswith("id,")
+                    else:
+                        document = json.loads(content)
+                        assert document["record_count"] == len(document["data"]) == 7
+                    
+                    slices = test_db.query(DataExportSlice).filter(DataExportSlice.export_id == plan["export_id"]).all()
+                    assert all(export_slice.status == ExportStatus.COMPLETED for export_slice in slices)
+            
+            finally:
+                import shutil
+                if test_temp_dir.exists():
+                    shutil.rmtree(test_temp_dir)
+    
     def test_list_tenant_exports(self, test_db: Session, sample_tenant: Tenant, sample_user: User):
         """Test listing tenant exports"""
         export_service = DataExportService(test_db)
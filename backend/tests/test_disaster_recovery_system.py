@@ -51,8 +51,11 @@ class TestDisasterRecoveryService:
         """Mock cloud storage service"""
         with patch('app.services.disaster_recovery_service.CloudStorageService') as mock:
             mock_instance = Mock()
-            mock_instance.upload_to_b2.return_value = "s3://securesyntax/disaster_recovery/test_backup.tar.gz.enc"
-            mock_instance.upload_to_r2.return_value = "s3://hesaabplus-backups/disaster_recovery/test_backup.tar.gz.enc"
+            mock_instance.upload_to_both.return_value = {
+                "backblaze_b2": {"location": "s3://securesyntax/disaster_recovery/test_backup.tar.gz.enc", "error": None, "throughput_mbps": 50.0},
+                "cloudflare_r2": {"location": "s3://hesaabplus-backups/disaster_recovery/test_backup.tar.gz.enc", "error": None, "throughput_mbps": 80.0}
+            }
+            mock_instance.describe_uploaded_object.return_value = {}
             mock_instance.test_connectivity.return_value = {
                 "backblaze_b2": {"available": True, "error": None},
                 "cloudflare_r2": {"available": True, "error": None}
@@ -251,8 +254,7 @@ class TestDisasterRecoveryService:
             assert len(result["storage_locations"]) > 0
             
             # Verify cloud uploads were called
-            mock_cloud_storage.upload_to_b2.assert_called_once()
-            mock_cloud_storage.upload_to_r2.assert_called_once()
+            mock_cloud_storage.upload_to_both.assert_called_once()
     
     def test_list_disaster_recovery_backups(self, disaster_recovery_service, db_session):
         """Test listing disaster recovery backups"""
@@ -299,14 +301,14 @@ class TestDisasterRecoveryService:
         db_session.add(backup)
         db_session.commit()
         
-        # Mock download and checksum calculation
-        with patch('app.services.disaster_recovery_service.DisasterRecoveryService.calculate_checksum', return_value="test_checksum"), \
-             patch('pathlib.Path.unlink'):
-            
-            is_valid = disaster_recovery_service.verify_disaster_recovery_backup(str(backup.id), "backblaze_b2")
-            
-            assert is_valid is True
-            mock_cloud_storage.download_from_b2.assert_called_once()
+        # Mock streamed verification of the stored object
+        mock_cloud_storage.verify_object_integrity.return_value = {"mode": "full", "is_valid": True}
+        
+        is_valid = disaster_recovery_service.verify_disaster_recovery_backup(str(backup.id), "backblaze_b2")
+        
+        assert is_valid is True
+        mock_cloud_storage.verify_object_integrity.assert_called_once()
+        mock_cloud_storage.download_from_b2.assert_not_called()
 
 
 class TestDisasterRecoveryTasks:
@@ -580,8 +582,11 @@ class TestDisasterRecoveryIntegration:
             mock_subprocess.return_value.stderr = ""
             
             mock_cloud_storage = Mock()
-            mock_cloud_storage.upload_to_b2.return_value = "s3://securesyntax/test_backup.tar.gz.enc"
-            mock_cloud_storage.upload_to_r2.return_value = "s3://hesaabplus-backups/test_backup.tar.gz.enc"
+            mock_cloud_storage.upload_to_both.return_value = {
+                "backblaze_b2": {"location": "s3://securesyntax/test_backup.tar.gz.enc", "error": None, "throughput_mbps": 50.0},
+                "cloudflare_r2": {"location": "s3://hesaabplus-backups/test_backup.tar.gz.enc", "error": None, "throughput_mbps": 80.0}
+            }
+            mock_cloud_storage.describe_uploaded_object.return_value = {}
             mock_cloud_storage_class.return_value = mock_cloud_storage
             
             # Mock file operations
@@ -651,8 +656,11 @@ class TestDisasterRecoveryIntegration:
             
             # Mock storage service with B2 failure, R2 success
             mock_cloud_storage = Mock()
-            mock_cloud_storage.upload_to_b2.side_effect = Exception("B2 upload failed")
-            mock_cloud_storage.upload_to_r2.return_value = "s3://hesaabplus-backups/test_backup.tar.gz.enc"
+            mock_cloud_storage.upload_to_both.return_value = {
+                "backblaze_b2": {"location": None, "error": "B2 upload failed", "throughput_mbps": None},
+                "cloudflare_r2": {"location": "s3://hesaabplus-backups/test_backup.tar.gz.enc", "error": None, "throughput_mbps": 80.0}
+            }
+            mock_cloud_storage.describe_uploaded_object.return_value = {}
             mock_cloud_storage_class.return_value = mock_cloud_storage
             
             # Mock file operations
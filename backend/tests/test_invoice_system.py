@@ -7,6 +7,7 @@ from decimal import Decimal
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 import uuid
+from unittest.mock import patch
 
 from app.models.tenant import Tenant
 from app.models.user import User
@@ -737,4 +738,99 @@ class TestInvoiceService:
         
         # Try to get private invoice publicly - should return None
         public_access = service.get_public_invoice(private_invoice.qr_code_token or "fake_token")
-        assert public_access is None
\ No newline at end of file
+        assert public_access is None
+    
+    def test_create_invoices_bulk(self, db_session: Session, setup_test_data):
+        """Test bulk invoice creation with per-row errors"""
+        data = setup_test_data
+        service = InvoiceService(db_session)
+        
+        general_row = {
+            "customer_id": str(data['customer1'].id),
+            "invoice_type": "GENERAL",
+            "items": [
+                {
+                    "product_id": str(data['general_product'].id),
+                    "description": "General Product",
+                    "quantity": "2.000",
+                    "unit_price": "100.00",
+                    "tax_rate": "9.00"
+                },
+                {"description": "Custom Service", "quantity": "1.000", "unit_price": "50.00", "tax_rate": "9.00"}
+            ]
+        }
+        gold_row = InvoiceCreate(
+            customer_id=data['customer2'].id,
+            invoice_type=InvoiceTypeEnum.GOLD,
+            gold_price_at_creation=Decimal('1000000.00'),
+            items=[
+                InvoiceItemCreate(
+                    product_id=data['gold_product'].id,
+                    description="Gold Ring",
+                    quantity=Decimal('1.000'),
+                    unit_price=Decimal('5000000.00'),
+                    weight=Decimal('10.500'),
+                    labor_fee=Decimal('500000.00')
+                )
+            ]
+        )
+        
+        existing = service.create_invoice(data['tenant'].id, InvoiceCreate.parse_obj(general_row))
+        
+        results = service.create_invoices_bulk(data['tenant'].id, [
+            general_row,
+            {**general_row, "customer_id": str(uuid.uuid4())},
+            {**general_row, "items": []},
+            gold_row,
+            {**general_row, "items": [{**general_row["items"][0], "product_id": str(uuid.uuid4())}]},
+            general_row
+        ])
+        
+        assert [result.index for result in results] == [0, 1, 2, 3, 4, 5]
+        assert results[1].error == "Customer not found"
+        assert "items" in results[2].error
+        assert "not found" in results[4].error
+        assert [result.error for result in (results[0], results[3], results[5])] == [None, None, None]
+        
+        # Numbers continue after existing invoices, one block per type
+        sequence = int(existing.invoice_number.rsplit("-", 1)[1])
+        assert results[0].invoice_number == existing.invoice_number[:-4] + f"{sequence + 1:04d}"
+        assert results[5].invoice_number == existing.invoice_number[:-4] + f"{sequence + 2:04d}"
+        assert results[3].invoice_number.startswith("GOLD-")
+        
+        invoice = service.get_invoice(data['tenant'].id, results[0].invoice_id)
+        assert len(invoice.items) == 2
+        assert invoice.total_amount == Decimal('272.50')
+        assert invoice.status == InvoiceStatus.DRAFT
+        assert invoice.qr_code_token is not None
+        
+        gold_invoice = service.get_invoice(data['tenant'].id, results[3].invoice_id)
+        assert gold_invoice.total_gold_weight == Decimal('10.500')
+        
+        assert db_session.query(Invoice).filter(Invoice.tenant_id == data['tenant'].id).count() == 4
+    
+    def test_create_invoices_bulk_with_differing_optional_fields(self, db_session: Session, setup_test_data):
+        """Test rows that set different optional fields are still inserted in one batch"""
+        data = setup_test_data
+        service = InvoiceService(db_session)
+        
+        row = {
+            "customer_id": str(data['customer1'].id),
+            "invoice_type": "GENERAL",
+            "items": [{"description": "Custom Service", "quantity": "1.000", "unit_price": "50.00"}]
+        }
+        
+        with patch("app.services.invoice_service.logger") as mock_logger:
+            results = service.create_invoices_bulk(data['tenant'].id, [
+                row,
+                {**row, "is_shareable": False, "due_date": "2030-01-01T00:00:00+00:00"}
+            ])
+        
+        # No fallback to row by row inserts
+        mock_logger.warning.assert_not_called()
+        assert [result.error for result in results] == [None, None]
+        
+        private_invoice = service.get_invoice(data['tenant'].id, results[1].invoice_id)
+        assert private_invoice.qr_code_token is None
+        assert private_invoice.due_date is not None
+        assert private_invoice.invoice_date is not None
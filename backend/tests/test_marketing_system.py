@@ -4,6 +4,7 @@ Comprehensive tests for marketing and communication system
 
 import pytest
 from datetime import datetime, timedelta
+from decimal import Decimal
 from uuid import uuid4
 from unittest.mock import patch, MagicMock
 from sqlalchemy.orm import Session
@@ -16,6 +17,8 @@ from app.models.marketing import (
 from app.models.customer import Customer, CustomerStatus, CustomerType
 from app.models.tenant import Tenant
 from app.services.marketing_service import MarketingService
+from app.services.notification_dispatch_service import NotificationDispatcher, MockTransport, EMAIL, SMS
+from app.services.segment_membership_service import SegmentMembershipService
 from app.tasks.marketing_tasks import (
     process_marketing_campaign, send_bulk_sms, refresh_dynamic_segments,
     process_scheduled_campaigns, update_campaign_delivery_status
@@ -217,6 +220,29 @@ class TestMarketingCampaignManagement:
         assert stats["status"] == "running"
         assert stats["target_count"] > 0
         assert "recipient_breakdown" in stats
+    
+    @patch('app.services.marketing_service.CUSTOMER_INSERT_CHUNK_SIZE', 3)
+    def test_recipients_inserted_in_keyset_chunks(self, db_session: Session, test_tenant: Tenant, test_customers: list):
+        """Test recipients are copied from customers in several INSERT ... SELECT chunks"""
+        marketing_service = MarketingService(db_session)
+        
+        campaign = marketing_service.create_campaign(
+            tenant_id=str(test_tenant.id),
+            name="Chunked Campaign",
+            message="Chunked insert test",
+            campaign_type=CampaignType.MIXED
+        )
+        
+        recipients = db_session.query(CampaignRecipient).filter(
+            CampaignRecipient.campaign_id == campaign.id
+        ).all()
+        
+        assert campaign.target_customer_count == len(test_customers)
+        assert sorted(recipient.customer_id for recipient in recipients) == sorted(customer.id for customer in test_customers)
+        for recipient in recipients:
+            assert recipient.status == "pending"
+            assert recipient.recipient_email is not None
+            assert recipient.recipient_phone is not None
 
 
 class TestCustomerSegmentation:
@@ -380,6 +406,124 @@ class TestCustomerSegmentation:
             assert customer.tenant_id == test_tenant.id
 
 
+class TestIncrementalSegments:
+    """Test segment membership maintained from customer changes"""
+    
+    def _member_ids(self, db_session: Session, segment: CustomerSegment) -> set:
+        return {
+            customer_id for customer_id, in db_session.query(SegmentCustomer.customer_id).filter(
+                SegmentCustomer.segment_id == segment.id
+            )
+        }
+    
+    def test_customer_change_updates_membership(self, db_session: Session, test_tenant: Tenant, test_customers: list):
+        """Test a committed customer change re-evaluates only that customer"""
+        marketing_service = MarketingService(db_session)
+        
+        segment = marketing_service.create_segment(
+            tenant_id=str(test_tenant.id),
+            name="Big Spenders in Tehran",
+            segmentation_type=SegmentationType.AUTOMATIC,
+            filter_criteria={"min_total_purchases": 5000.0, "city": "Tehran"}
+        )
+        assert segment.customer_count == 0
+        
+        customer = test_customers[0]
+        customer.total_purchases = Decimal("6000")
+        customer.city = "Tehran"
+        db_session.commit()
+        
+        db_session.refresh(segment)
+        assert self._member_ids(db_session, segment) == {customer.id}
+        assert segment.customer_count == 1
+        
+        customer.city = "Shiraz"
+        db_session.commit()
+        
+        db_session.refresh(segment)
+        assert self._member_ids(db_session, segment) == set()
+        assert segment.customer_count == 0
+    
+    def test_unrelated_change_does_not_touch_segments(self, db_session: Session, test_tenant: Tenant, test_customers: list):
+        """Test changes to fields no criteria read skip segment evaluation"""
+        marketing_service = MarketingService(db_session)
+        marketing_service.create_segment(
+            tenant_id=str(test_tenant.id),
+            name="Individuals",
+            segmentation_type=SegmentationType.AUTOMATIC,
+            filter_criteria={"customer_type": "INDIVIDUAL"}
+        )
+        
+        with patch.object(SegmentMembershipService, 'update_customers') as mock_update:
+            test_customers[0].name = "Renamed Customer"
+            db_session.commit()
+        
+        mock_update.assert_not_called()
+    
+    def test_sweep_expires_aged_purchases(self, db_session: Session, test_tenant: Tenant, test_customers: list):
+        """Test the daily sweep drops members whose last purchase left the window"""
+        marketing_service = MarketingService(db_session)
+        
+        segment = marketing_service.create_segment(
+            tenant_id=str(test_tenant.id),
+            name="Recent Buyers",
+            segmentation_type=SegmentationType.DYNAMIC,
+            filter_criteria={"last_purchase_days": 30}
+        )
+        
+        recent, older = test_customers[0], test_customers[1]
+        recent.last_purchase_at = datetime.utcnow() - timedelta(days=1)
+        older.last_purchase_at = datetime.utcnow() - timedelta(days=20)
+        db_session.commit()
+        
+        db_session.refresh(segment)
+        assert self._member_ids(db_session, segment) == {recent.id, older.id}
+        
+        # Fifteen days later the older purchase is 35 days old
+        changes = SegmentMembershipService(db_session).sweep_time_windows(
+            segment, now=datetime.utcnow() + timedelta(days=15)
+        )
+        db_session.commit()
+        
+        db_session.refresh(segment)
+        assert changes == {"added": 0, "removed": 1}
+        assert self._member_ids(db_session, segment) == {recent.id}
+        assert segment.customer_count == 1
+    
+    def test_sweep_ignores_segment_edits(self, db_session: Session, test_tenant: Tenant, test_customers: list):
+        """Test an edit between sweeps does not narrow the next sweep's boundary slice"""
+        marketing_service = MarketingService(db_session)
+        start = datetime.utcnow()
+        
+        segment = marketing_service.create_segment(
+            tenant_id=str(test_tenant.id),
+            name="Recent Buyers",
+            segmentation_type=SegmentationType.DYNAMIC,
+            filter_criteria={"last_purchase_days": 30}
+        )
+        
+        older = test_customers[1]
+        older.last_purchase_at = start - timedelta(days=20)
+        db_session.commit()
+        
+        membership = SegmentMembershipService(db_session)
+        membership.sweep_time_windows(segment, now=start + timedelta(days=5))
+        db_session.commit()
+        
+        # The purchase ages out on day 10, before an edit to the segment on day 12
+        segment.description = "Bought in the last month"
+        segment.last_updated_at = start + timedelta(days=12)
+        db_session.commit()
+        
+        changes = membership.sweep_time_windows(segment, now=start + timedelta(days=15))
+        db_session.commit()
+        
+        db_session.refresh(segment)
+        assert changes == {"added": 0, "removed": 1}
+        assert self._member_ids(db_session, segment) == set()
+        assert segment.time_window_swept_at is not None
+
+
 class TestCommunicationPreferences:
     """Test communication preference management"""
     
@@ -596,6 +740,61 @@ class TestMarketingTasks:
         assert "failed_count" in result
         assert "success_rate" in result
     
+    @patch('app.tasks.marketing_tasks.CAMPAIGN_DISPATCH_CHUNK_SIZE', 4)
+    def test_process_marketing_campaign_in_chunks(self, db_session: Session, test_tenant: Tenant, test_customers: list):
+        """Test campaigns are sent one chunk per task without resending claimed recipients"""
+        marketing_service = MarketingService(db_session)
+        
+        campaign = marketing_service.create_campaign(
+            tenant_id=str(test_tenant.id),
+            name="Chunked Task Campaign",
+            message="Chunked task test",
+            campaign_type=CampaignType.EMAIL,
+            subject="Chunked"
+        )
+        campaign.start_campaign()
+        
+        # A recipient claimed by a run that died before recording its outcome
+        interrupted = db_session.query(CampaignRecipient).filter(
+            CampaignRecipient.campaign_id == campaign.id
+        ).first()
+        interrupted.status = "sending"
+        db_session.commit()
+        
+        sent_to = []
+        
+        class RecordingTransport(MockTransport):
+            def send(self, message):
+                sent_to.append(message.recipient)
+                return super().send(message)
+        
+        def make_dispatcher():
+            return NotificationDispatcher(
+                transport_factories={EMAIL: lambda: RecordingTransport(EMAIL), SMS: lambda: RecordingTransport(SMS)},
+                rate_limits={EMAIL: 0, SMS: 0}
+            )
+        
+        with patch('app.tasks.marketing_tasks.NotificationDispatcher', side_effect=make_dispatcher), \
+             patch.object(process_marketing_campaign, 'delay') as mock_delay:
+            result = process_marketing_campaign(str(campaign.id))
+            runs = 1
+            
+            # Follow the chain of chunk tasks
+            while mock_delay.call_count == runs:
+                result = process_marketing_campaign(*mock_delay.call_args.args)
+                runs += 1
+        
+        assert runs == 3  # Chunks of 4, 4 and 1
+        assert result["completed"] is True
+        assert result["sent_count"] == 9
+        assert result["failed_count"] == 1
+        assert len(sent_to) == len(set(sent_to)) == 9
+        assert interrupted.recipient_email not in sent_to
+        
+        db_session.expire_all()
+        assert db_session.get(MarketingCampaign, campaign.id).status == CampaignStatus.COMPLETED
+        assert db_session.get(CampaignRecipient, interrupted.id).status == "failed"
+    
     @patch('app.services.notification_service.SMSService.send_sms')
     def test_send_bulk_sms_task(self, mock_sms, db_session: Session, test_tenant: Tenant, test_customers: list):
         """Test bulk SMS sending task"""
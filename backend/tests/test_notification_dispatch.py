@@ -0,0 +1,213 @@
+"""
+Tests for batched notification dispatch against local SMTP and SMS stand-ins
+"""
+
+import json
+import socketserver
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.notification_dispatch_service import (
+    DispatchMessage, HTTPSMSTransport, NotificationDispatcher, RateLimiter, SMTPTransport, EMAIL, SMS
+)
+
+
+class LocalSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept messages, counting connections and deliveries"""
+    
+    def handle(self):
+        self.server.connections += 1
+        self.wfile.write(b"220 localhost ready\r\n")
+        
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            
+            if command.startswith(("EHLO", "HELO")):
+                self.wfile.write(b"250 localhost\r\n")
+            elif command.startswith("RCPT TO:<FAIL"):
+                self.wfile.write(b"550 No such user\r\n")
+            elif command == "DATA":
+                self.wfile.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.server.delivered += 1
+                self.wfile.write(b"250 OK\r\n")
+            elif command == "QUIT":
+                self.wfile.write(b"221 Bye\r\n")
+                return
+            else:
+                self.wfile.write(b"250 OK\r\n")
+
+
+class LocalSMSHandler(BaseHTTPRequestHandler):
+    """SMS gateway stand-in that keeps connections alive and hands out message ids"""
+    
+    protocol_version = "HTTP/1.1"
+    
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+    
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.delivered += 1
+        
+        status = 500 if payload["phone"].startswith("000") else 200
+        body = json.dumps({"message_id": f"sms-{payload['phone']}"}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def smtp_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), LocalSMTPHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.delivered = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sms_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), LocalSMSHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.delivered = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_dispatcher(smtp_server, sms_server, **options):
+    smtp_host, smtp_port = smtp_server.server_address
+    sms_url = "http://%s:%d/send" % sms_server.server_address
+    
+    return NotificationDispatcher(
+        transport_factories={
+            EMAIL: lambda: SMTPTransport(smtp_host, smtp_port, use_tls=False),
+            SMS: lambda: HTTPSMSTransport(sms_url, "test-key")
+        },
+        batch_sizes=options.get("batch_sizes", {EMAIL: 10, SMS: 25}),
+        concurrency=options.get("concurrency", {EMAIL: 2, SMS: 4}),
+        rate_limits=options.get("rate_limits", {EMAIL: 0, SMS: 0}),
+        progress_interval=options.get("progress_interval", 0),
+        rate_limit_key_prefix=options.get("rate_limit_key_prefix", f"test_notification_rate:{uuid.uuid4()}")
+    )
+
+
+class TestNotificationDispatcher:
+    """Test cases for NotificationDispatcher"""
+    
+    def test_batches_reuse_one_connection(self, smtp_server, sms_server):
+        messages = [
+            DispatchMessage(f"email-{i}", EMAIL, f"user{i}@example.com", "Body", "Subject") for i in range(30)
+        ] + [
+            DispatchMessage(f"sms-{i}", SMS, f"0912{i:07d}", "Body") for i in range(100)
+        ]
+        
+        results = make_dispatcher(smtp_server, sms_server).dispatch(messages)
+        
+        assert len(results) == 130
+        assert all(result.success for result in results)
+        assert smtp_server.delivered == 30
+        assert smtp_server.connections == 3  # One per batch of 10
+        assert sms_server.delivered == 100
+        assert sms_server.connections == 4  # One keep-alive session per batch of 25
+        
+        by_key = {result.key: result for result in results}
+        assert by_key["sms-5"].provider_id == "sms-09120000005"
+    
+    def test_failures_are_reported_per_message(self, smtp_server, sms_server):
+        messages = [
+            DispatchMessage("ok-email", EMAIL, "user@example.com", "Body", "Subject"),
+            DispatchMessage("bad-email", EMAIL, "fail@example.com", "Body", "Subject"),
+            DispatchMessage("ok-sms", SMS, "09120000001", "Body"),
+            DispatchMessage("bad-sms", SMS, "0000000000", "Body")
+        ]
+        
+        results = {result.key: result for result in make_dispatcher(smtp_server, sms_server).dispatch(messages)}
+        
+        assert results["ok-email"].success
+        assert not results["bad-email"].success
+        assert results["ok-sms"].success
+        assert results["bad-sms"].error == "SMS API error: 500"
+    
+    def test_unreachable_provider_fails_whole_batch(self, sms_server):
+        dispatcher = NotificationDispatcher(
+            transport_factories={EMAIL: lambda: SMTPTransport("127.0.0.1", 1, use_tls=False, timeout=1)},
+            batch_sizes={EMAIL: 10},
+            concurrency={EMAIL: 1},
+            rate_limits={EMAIL: 0}
+        )
+        
+        results = dispatcher.dispatch(
+            DispatchMessage(i, EMAIL, f"user{i}@example.com", "Body", "Subject") for i in range(3)
+        )
+        
+        assert [result.success for result in results] == [False, False, False]
+    
+    def test_progress_is_throttled(self, smtp_server, sms_server):
+        updates = []
+        dispatcher = make_dispatcher(
+            smtp_server, sms_server, batch_sizes={EMAIL: 10, SMS: 1}, progress_interval=60
+        )
+        
+        dispatcher.dispatch(
+            [DispatchMessage(i, SMS, f"0912{i:07d}", "Body") for i in range(20)],
+            on_progress=lambda done, total: updates.append((done, total))
+        )
+        
+        # Twenty batches complete, but only the final update is inside a 60 second interval
+        assert updates == [(20, 20)]
+    
+    @pytest.mark.redis
+    def test_rate_limiter_spaces_out_sends(self):
+        limiter = RateLimiter(rate_per_second=20, key=f"test_notification_rate:{uuid.uuid4()}")
+        
+        start_time = time.monotonic()
+        for _ in range(30):
+            limiter.acquire()
+        elapsed = time.monotonic() - start_time
+        
+        # A burst of 20 is allowed, the remaining 10 wait for tokens at 20 per second
+        assert elapsed >= 0.45
+    
+    @pytest.mark.redis
+    def test_rate_limit_is_shared_between_dispatchers(self, smtp_server, sms_server):
+        key_prefix = f"test_notification_rate:{uuid.uuid4()}"
+        dispatchers = [
+            make_dispatcher(smtp_server, sms_server, rate_limits={EMAIL: 0, SMS: 20}, rate_limit_key_prefix=key_prefix)
+            for _ in range(2)
+        ]
+        messages = [
+            [DispatchMessage(f"{worker}-{i}", SMS, f"0912{i:07d}", "Body") for i in range(15)]
+            for worker in range(2)
+        ]
+        
+        start_time = time.monotonic()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(lambda work: work[0].dispatch(work[1]), zip(dispatchers, messages)))
+        elapsed = time.monotonic() - start_time
+        
+        assert all(result.success for batch in results for result in batch)
+        # Separate buckets would let each dispatcher send its 15 at once; one shared bucket
+        # allows a burst of 20 and makes the other 10 wait for tokens at 20 per second
+        assert elapsed >= 0.45
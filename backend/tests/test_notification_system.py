@@ -20,6 +20,7 @@ from app.models.notification import (
     NotificationType, NotificationStatus
 )
 from app.services.notification_service import NotificationService, EmailService, SMSService
+from app.services.notification_dispatch_service import NotificationDispatcher, MockTransport, EMAIL, SMS
 from app.tasks.notification_tasks import (
     send_email, send_sms, send_invoice_notification,
     send_payment_confirmation, send_installment_reminders,
@@ -221,6 +222,67 @@ class TestNotificationService:
         assert len(installments) >= 1
         assert installment in installments
     
+    def test_create_installment_reminders(self, notification_service, installment, tenant, db_session):
+        """Test queueing installment reminders in bulk"""
+        notification_service.create_template(
+            tenant_id=tenant.id,
+            name="Installment Reminder",
+            template_type=NotificationType.SMS,
+            subject=None,
+            body="{customer_name} - {{ company_name }} - {days_until_due}",
+            trigger_event="installment_reminder"
+        )
+        
+        created = notification_service.create_installment_reminders(days_ahead=5)
+        
+        assert created >= 1
+        notifications = db_session.query(NotificationLog).filter(
+            NotificationLog.reference_id == installment.id
+        ).all()
+        assert len(notifications) == 1
+        assert notifications[0].body == "احمد محمدی - Test Business - 5"
+        assert notifications[0].recipient_phone == "+989123456789"
+        
+        queue_item = db_session.query(NotificationQueue).filter(
+            NotificationQueue.notification_log_id == notifications[0].id
+        ).first()
+        assert queue_item is not None
+        
+        # A second run on the same day does not remind again
+        notification_service.create_installment_reminders(days_ahead=5)
+        assert db_session.query(NotificationLog).filter(
+            NotificationLog.reference_id == installment.id
+        ).count() == 1
+    
+    def test_create_overdue_notices(self, notification_service, installment, db_session):
+        """Test overdue notices are only queued on milestone days"""
+        installment.due_date = datetime.utcnow() - timedelta(days=16, hours=2)
+        installment.status = InstallmentStatus.OVERDUE
+        db_session.commit()
+        
+        notification_service.create_overdue_notices()
+        
+        assert db_session.query(NotificationLog).filter(
+            NotificationLog.reference_id == installment.id
+        ).count() == 0
+        
+        installment.due_date = datetime.utcnow() - timedelta(days=15, hours=2)
+        db_session.commit()
+        
+        notification_service.create_overdue_notices()
+        
+        notification = db_session.query(NotificationLog).filter(
+            NotificationLog.reference_id == installment.id
+        ).first()
+        assert notification is not None
+        assert notification.reference_type == "overdue"
+        assert "15 روز" in notification.body
+        
+        queue_item = db_session.query(NotificationQueue).filter(
+            NotificationQueue.notification_log_id == notification.id
+        ).first()
+        assert queue_item.priority == 2
+    
     def test_get_overdue_installments(self, notification_service, installment, db_session):
         """Test getting overdue installments"""
         # Make installment overdue
@@ -315,6 +377,41 @@ class TestNotificationService:
         assert notification.error_message == error_message
         assert notification.retry_count == 1
 
+    def test_dispatch_notifications(self, notification_service, db_session, tenant):
+        """Test batched dispatch writes statuses and queue state back in bulk"""
+        delivered = notification_service.create_notification_log(
+            tenant_id=tenant.id,
+            notification_type=NotificationType.EMAIL,
+            recipient_email="test@example.com",
+            subject="Test",
+            body="Test message"
+        )
+        undeliverable = notification_service.create_notification_log(
+            tenant_id=tenant.id,
+            notification_type=NotificationType.SMS,
+            body="Test message"
+        )
+        dispatcher = NotificationDispatcher(
+            transport_factories={EMAIL: lambda: MockTransport(EMAIL), SMS: lambda: MockTransport(SMS)},
+            rate_limits={EMAIL: 0, SMS: 0}
+        )
+        
+        outcome = notification_service.dispatch_notifications([delivered, undeliverable], dispatcher)
+        
+        assert outcome == {"sent": 1, "failed": 1}
+        db_session.refresh(delivered)
+        db_session.refresh(undeliverable)
+        assert delivered.status == NotificationStatus.SENT
+        assert delivered.sent_at is not None
+        assert undeliverable.status == NotificationStatus.FAILED
+        assert undeliverable.error_message == "No recipient address"
+        assert undeliverable.retry_count == 1
+        
+        queued_ids = [item.notification_log_id for item in db_session.query(NotificationQueue).all()]
+        assert queued_ids == [undeliverable.id]
+        queue_item = db_session.query(NotificationQueue).first()
+        assert queue_item.attempts == 1
+
 
 class TestEmailService:
     """Test email service functionality"""
@@ -512,57 +609,35 @@ class TestNotificationTasks:
     
     def test_send_installment_reminders_task(self, mock_db_session):
         """Test send_installment_reminders task"""
-        # Mock installments
-        mock_installments = [Mock(), Mock()]
-        for i, installment in enumerate(mock_installments):
-            installment.id = uuid4()
-        
         # Mock notification service
         with patch('app.tasks.notification_tasks.NotificationService') as mock_service_class:
             mock_service = Mock()
-            mock_service.get_due_installment_reminders.return_value = mock_installments
-            mock_service.send_installment_reminder.return_value = Mock(id=uuid4())
+            mock_service.create_installment_reminders.return_value = 2
             mock_service_class.return_value = mock_service
             
-            # Mock database query for recent reminders
-            mock_db_session.query.return_value.filter.return_value.first.return_value = None
-            
-            # Mock send_sms task
+            # Reminders are queued, not sent one task at a time
             with patch('app.tasks.notification_tasks.send_sms') as mock_send_sms:
-                mock_send_sms.delay.return_value = Mock()
-                
                 result = send_installment_reminders(days_ahead=3)
                 
                 assert result["status"] == "success"
                 assert result["reminders_sent"] == 2
-                assert mock_send_sms.delay.call_count == 2
+                mock_service.create_installment_reminders.assert_called_once_with(3)
+                mock_send_sms.delay.assert_not_called()
     
     def test_send_overdue_notices_task(self, mock_db_session):
         """Test send_overdue_notices task"""
-        # Mock overdue installments
-        mock_installments = [Mock(), Mock()]
-        for i, installment in enumerate(mock_installments):
-            installment.id = uuid4()
-            installment.days_overdue = 3  # Trigger notice
-        
         # Mock notification service
         with patch('app.tasks.notification_tasks.NotificationService') as mock_service_class:
             mock_service = Mock()
-            mock_service.get_overdue_installments.return_value = mock_installments
-            mock_service.send_overdue_notice.return_value = Mock(id=uuid4())
+            mock_service.create_overdue_notices.return_value = 2
             mock_service_class.return_value = mock_service
             
-            # Mock database query for recent notices
-            mock_db_session.query.return_value.filter.return_value.first.return_value = None
-            
-            # Mock send_sms task
             with patch('app.tasks.notification_tasks.send_sms') as mock_send_sms:
-                mock_send_sms.delay.return_value = Mock()
-                
                 result = send_overdue_notices()
                 
                 assert result["status"] == "success"
                 assert result["notices_sent"] == 2
+                mock_send_sms.delay.assert_not_called()
     
     def test_process_notification_queue_task(self, mock_db_session):
         """Test process_notification_queue task"""
@@ -576,21 +651,16 @@ class TestNotificationTasks:
         with patch('app.tasks.notification_tasks.NotificationService') as mock_service_class:
             mock_service = Mock()
             mock_service.get_pending_notifications.return_value = mock_notifications
+            mock_service.dispatch_notifications.return_value = {"sent": 1, "failed": 1}
             mock_service_class.return_value = mock_service
             
-            # Mock task delays
-            with patch('app.tasks.notification_tasks.send_email') as mock_send_email, \
-                 patch('app.tasks.notification_tasks.send_sms') as mock_send_sms:
+            result = process_notification_queue(batch_size=50)
                 
-                mock_send_email.delay.return_value = Mock()
-                mock_send_sms.delay.return_value = Mock()
-                
-                result = process_notification_queue(batch_size=50)
-                
-                assert result["status"] == "success"
-                assert result["processed"] == 2
-                mock_send_email.delay.assert_called_once()
-                mock_send_sms.delay.assert_called_once()
+            assert result["status"] == "success"
+            assert result["processed"] == 2
+            assert result["sent"] == 1
+            assert result["failed"] == 1
+            mock_service.dispatch_notifications.assert_called_once_with(mock_notifications)
     
     def test_send_bulk_sms_campaign_task(self, mock_db_session):
         """Test send_bulk_sms_campaign task"""
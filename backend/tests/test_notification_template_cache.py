@@ -0,0 +1,85 @@
+"""
+Tests for the compiled notification template cache
+"""
+
+from unittest.mock import patch
+from uuid import uuid4
+
+from app.models.notification import NotificationTemplate, NotificationType
+from app.services import notification_template_cache
+from app.services.notification_template_cache import TemplateCache
+
+
+def make_template(tenant_id=None, body="سلام {customer_name}", subject="فاکتور {invoice_number}", version=1):
+    return NotificationTemplate(
+        id=uuid4(),
+        tenant_id=tenant_id or uuid4(),
+        name="Reminder",
+        template_type=NotificationType.SMS,
+        subject=subject,
+        body=body,
+        version=version
+    )
+
+
+class TestTemplateCache:
+    """Test cases for TemplateCache"""
+    
+    def test_renders_legacy_placeholders_and_jinja(self):
+        cache = TemplateCache()
+        template = make_template(body="{customer_name} - {{ company_name|upper }} - {unknown}")
+        
+        rendered = cache.render(template, {"customer_name": "احمد", "company_name": "gold", "invoice_number": "INV-1"})
+        
+        assert rendered["subject"] == "فاکتور INV-1"
+        # Variables that were not supplied stay as placeholders, as before
+        assert rendered["body"] == "احمد - GOLD - {unknown}"
+    
+    def test_compiles_once_per_version(self):
+        cache = TemplateCache()
+        template = make_template()
+        
+        with patch.object(
+            notification_template_cache, "compile_template_text",
+            wraps=notification_template_cache.compile_template_text
+        ) as mock_compile:
+            for _ in range(100):
+                cache.render(template, {"customer_name": "احمد", "invoice_number": "INV-1"})
+            assert mock_compile.call_count == 2  # Subject and body
+            
+            template.body = "درود {customer_name}"
+            template.version = 2
+            rendered = cache.render(template, {"customer_name": "احمد", "invoice_number": "INV-1"})
+            assert mock_compile.call_count == 4
+        
+        assert rendered["body"] == "درود احمد"
+    
+    def test_invalid_jinja_falls_back_to_placeholders(self):
+        cache = TemplateCache()
+        template = make_template(body="{customer_name} {% broken")
+        
+        rendered = cache.render(template, {"customer_name": "احمد", "invoice_number": "INV-1"})
+        
+        assert rendered["body"] == "احمد {% broken"
+    
+    def test_sandbox_blocks_unsafe_attributes(self):
+        cache = TemplateCache()
+        template = make_template(body="{{ customer_name.__class__.__mro__ }}")
+        
+        rendered = cache.render(template, {"customer_name": "احمد", "invoice_number": "INV-1"})
+        
+        assert "object" not in rendered["body"]
+    
+    def test_least_recently_used_tenants_are_evicted(self):
+        cache = TemplateCache(max_tenants=2)
+        first, second, third = make_template(), make_template(), make_template()
+        
+        cache.get(first)
+        cache.get(second)
+        cache.get(first)
+        cache.get(third)
+        
+        assert set(cache._tenants) == {first.tenant_id, third.tenant_id}
+        
+        cache.invalidate(first.tenant_id)
+        assert set(cache._tenants) == {third.tenant_id}
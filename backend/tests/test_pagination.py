@@ -0,0 +1,128 @@
+"""
+Tests for keyset pagination and count modes on list endpoints
+"""
+
+import pytest
+from decimal import Decimal
+
+from app.core.exceptions import ValidationError
+from app.core.pagination import decode_cursor, encode_cursor
+from app.models.customer import Customer
+from app.models.product import Product
+from app.schemas.customer import CustomerSearchRequest
+from app.schemas.product import ProductSearchRequest
+from app.services.customer_service import CustomerService
+from app.services.product_service import ProductService
+
+
+class TestCursor:
+    """Test cursor encoding"""
+    
+    def test_round_trip(self):
+        cursor = encode_cursor("selling_price:desc", Decimal("12.50"), None)
+        assert decode_cursor(cursor, "selling_price:desc") == (Decimal("12.50"), None)
+    
+    def test_rejects_other_sort_order(self):
+        cursor = encode_cursor("name:asc", "Ring", None)
+        with pytest.raises(ValidationError):
+            decode_cursor(cursor, "name:desc")
+    
+    def test_rejects_garbage(self):
+        with pytest.raises(ValidationError):
+            decode_cursor("not-a-cursor", "name:asc")
+
+
+class TestKeysetPagination:
+    """Test walking lists page by page with cursors"""
+    
+    def test_customer_pages_follow_cursor(self, db_session, test_tenant):
+        # Duplicate sort values make the id tie-breaker matter
+        db_session.add_all([
+            Customer(tenant_id=test_tenant.id, name=f"Customer {index % 3}") for index in range(7)
+        ])
+        db_session.commit()
+        
+        service = CustomerService(db_session)
+        seen = []
+        cursor = None
+        while True:
+            page = service.search_customers_page(
+                CustomerSearchRequest(sort_by="name", sort_order="asc", per_page=3, cursor=cursor, count="none"),
+                test_tenant.id
+            )
+            assert page.total is None
+            seen.extend(page.items)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        
+        assert len(seen) == 7
+        assert len({customer.id for customer in seen}) == 7
+        assert [customer.name for customer in seen] == sorted(customer.name for customer in seen)
+    
+    def test_null_sort_values_are_paged(self, db_session, test_tenant):
+        db_session.add_all([
+            Product(tenant_id=test_tenant.id, name=f"Item {index}", selling_price=Decimal("5"),
+                    manufacturer=None if index % 2 else f"Maker {index}")
+            for index in range(6)
+        ])
+        db_session.commit()
+        
+        service = ProductService(db_session)
+        for sort_order in ("asc", "desc"):
+            seen = []
+            cursor = None
+            while True:
+                page = service.search_products_page(test_tenant.id, ProductSearchRequest(
+                    sort_by="manufacturer", sort_order=sort_order, page_size=4, cursor=cursor
+                ))
+                assert page.total == 6
+                seen.extend(product.id for product in page.items)
+                cursor = page.next_cursor
+                if cursor is None:
+                    break
+            
+            assert len(seen) == 6
+            assert len(set(seen)) == 6
+    
+    def test_estimated_count(self, db_session, test_tenant):
+        db_session.add_all([Customer(tenant_id=test_tenant.id, name=f"Estimate {index}") for index in range(3)])
+        db_session.commit()
+        
+        page = CustomerService(db_session).search_customers_page(
+            CustomerSearchRequest(count="estimated"), test_tenant.id
+        )
+        assert isinstance(page.total, int)
+        assert len(page.items) == 3
+    
+    def test_relevance_sort_rejects_cursor(self, db_session, test_tenant):
+        cursor = encode_cursor("name:asc", "Ring", None)
+        with pytest.raises(ValidationError):
+            ProductService(db_session).search_products_page(
+                test_tenant.id, ProductSearchRequest(query="ring", sort_by="relevance", cursor=cursor)
+            )
+    
+    def test_api_returns_next_cursor(self, client, auth_headers, db_session, test_tenant):
+        db_session.add_all([
+            Product(tenant_id=test_tenant.id, name=f"Product {index}", selling_price=Decimal("1"))
+            for index in range(3)
+        ])
+        db_session.commit()
+        
+        response = client.get("/api/products/?page_size=2&count=none", headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] is None
+        assert data["next_cursor"]
+        
+        response = client.get(
+            "/api/products/", params={"page_size": 2, "cursor": data["next_cursor"]}, headers=auth_headers
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 3
+        assert len(data["products"]) == 1
+        assert data["next_cursor"] is None
+        
+        response = client.get("/api/products/?cursor=broken", headers=auth_headers)
+        assert response.status_code == 400
@@ -0,0 +1,120 @@
+"""
+Tests for batch invoice PDF rendering
+"""
+
+import os
+import uuid
+import zipfile
+from io import BytesIO
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.customer import Customer
+from app.services.invoice_service import InvoiceService
+from app.services.pdf_batch_service import PDFBatchRenderer
+from app.services.pdf_cache_service import PDFCache
+from tests.conftest import benchmark
+
+
+def create_invoices(db_session, tenant_id, count):
+    customer = Customer(tenant_id=tenant_id, name="Batch Customer")
+    db_session.add(customer)
+    db_session.commit()
+    
+    row = {
+        "customer_id": str(customer.id),
+        "invoice_type": "GENERAL",
+        "items": [
+            {"description": f"Item {index}", "quantity": "1.000", "unit_price": "100.00", "tax_rate": "9.00"}
+            for index in range(5)
+        ]
+    }
+    results = InvoiceService(db_session).create_invoices_bulk(tenant_id, [row] * count)
+    return [str(result.invoice_id) for result in results]
+
+
+@pytest.fixture(autouse=True)
+def isolated_pdf_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.services.pdf_service.get_pdf_cache", lambda: PDFCache(root=tmp_path / "pdf-cache"))
+
+
+class TestPDFBatchRenderer:
+    """Test batch rendering into archives and combined documents"""
+    
+    def test_render_to_zip_reports_missing_invoices(self, db_session, test_tenant):
+        invoice_ids = create_invoices(db_session, test_tenant.id, 3)
+        missing_id = str(uuid.uuid4())
+        output = BytesIO()
+        
+        summary = PDFBatchRenderer(db_session, workers=1, chunk_size=2).render_to_zip(
+            invoice_ids + [missing_id], output
+        )
+        
+        assert summary["successful"] == 3
+        assert summary["errors"] == [{"invoice_id": missing_id, "error": "Invoice not found"}]
+        with zipfile.ZipFile(BytesIO(output.getvalue())) as archive:
+            names = archive.namelist()
+            assert len(names) == 3
+            assert all(archive.read(name).startswith(b"%PDF") for name in names)
+    
+    def test_second_batch_is_served_from_cache(self, db_session, test_tenant):
+        invoice_ids = create_invoices(db_session, test_tenant.id, 2)
+        renderer = PDFBatchRenderer(db_session, workers=1)
+        
+        assert renderer.render_to_cache(invoice_ids)["cache_hits"] == 0
+        assert renderer.render_to_cache(invoice_ids)["cache_hits"] == 2
+    
+    def test_render_to_pdf_combines_invoices(self, db_session, test_tenant):
+        invoice_ids = create_invoices(db_session, test_tenant.id, 2)
+        output = BytesIO()
+        
+        summary = PDFBatchRenderer(db_session, workers=1).render_to_pdf(invoice_ids, output)
+        
+        assert summary["successful"] == 2
+        assert output.getvalue().startswith(b"%PDF")
+    
+    def test_process_pool_renders_invoices(self, db_session, test_tenant, monkeypatch):
+        # Spawned workers don't see the patched cache, so they read the setting from the environment
+        monkeypatch.setenv("PDF_CACHE_ENABLED", "false")
+        invoice_ids = create_invoices(db_session, test_tenant.id, 3)
+        output = BytesIO()
+        
+        summary = PDFBatchRenderer(db_session, workers=2, chunk_size=1).render_to_zip(invoice_ids, output)
+        
+        assert summary["workers"] == 2
+        assert summary["successful"] == 3
+        with zipfile.ZipFile(BytesIO(output.getvalue())) as archive:
+            assert all(archive.read(name).startswith(b"%PDF") for name in archive.namelist())
+    
+    def test_daemonic_process_renders_with_billiard_pool(self, db_session, test_tenant, monkeypatch):
+        # As in a Celery prefork child, where multiprocessing may not start a pool
+        monkeypatch.setenv("PDF_CACHE_ENABLED", "false")
+        monkeypatch.setattr("multiprocessing.current_process", lambda: SimpleNamespace(daemon=True))
+        invoice_ids = create_invoices(db_session, test_tenant.id, 3)
+        
+        summary = PDFBatchRenderer(db_session, workers=2, chunk_size=1).render_to_cache(invoice_ids)
+        
+        assert summary["workers"] == 2
+        assert summary["successful"] == 3
+
+
+@pytest.mark.slow
+@benchmark
+class TestPDFBatchBenchmark:
+    """Serial versus process pool rendering throughput"""
+    
+    INVOICE_COUNT = int(os.environ.get("PDF_BATCH_BENCHMARK_INVOICES", "500"))
+    
+    def test_process_pool_throughput(self, db_session, test_tenant, monkeypatch):
+        # Measure rendering, not cache hits; spawned workers read the setting from the environment
+        monkeypatch.setattr("app.services.pdf_service.get_pdf_cache", lambda: None)
+        monkeypatch.setenv("PDF_CACHE_ENABLED", "false")
+        invoice_ids = create_invoices(db_session, test_tenant.id, self.INVOICE_COUNT)
+        workers = os.cpu_count() or 1
+        
+        # Throughput of each run is logged by the renderer; see it with --log-cli-level=INFO
+        serial = PDFBatchRenderer(db_session, workers=1).render_to_zip(invoice_ids, BytesIO(), include_qr=False)
+        parallel = PDFBatchRenderer(db_session, workers=workers).render_to_zip(invoice_ids, BytesIO(), include_qr=False)
+        
+        assert serial["successful"] == parallel["successful"] == self.INVOICE_COUNT
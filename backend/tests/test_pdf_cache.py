@@ -0,0 +1,102 @@
+"""
+Tests for the rendered invoice PDF cache
+"""
+
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.services.chunk_store_service import LocalChunkBackend
+from app.services.pdf_cache_service import PDFCache, pdf_cache_key, pdf_storage_key
+
+
+def make_row(updated_at=None):
+    return SimpleNamespace(id=uuid4(), created_at=datetime(2024, 1, 1), updated_at=updated_at)
+
+
+def make_invoice():
+    return SimpleNamespace(
+        id=uuid4(),
+        tenant_id=uuid4(),
+        created_at=datetime(2024, 1, 1),
+        updated_at=datetime(2024, 1, 2),
+        items=[make_row(datetime(2024, 1, 2))],
+        customer=make_row(datetime(2024, 1, 1)),
+        template_id=None,
+        template=None,
+        branding_id=None,
+        branding=None,
+        qr_code_token="token-1"
+    )
+
+
+class TestPDFCacheKey:
+    """Test cases for pdf_cache_key"""
+    
+    def test_key_is_stable_for_unchanged_invoice(self):
+        invoice = make_invoice()
+        
+        assert pdf_cache_key(invoice) == pdf_cache_key(invoice)
+    
+    def test_key_changes_with_content_and_options(self):
+        invoice = make_invoice()
+        original = pdf_cache_key(invoice, include_qr=True, company_info={"name": "A"})
+        
+        assert pdf_cache_key(invoice, include_qr=False, company_info={"name": "A"}) != original
+        assert pdf_cache_key(invoice, include_qr=True, company_info={"name": "B"}) != original
+        assert pdf_cache_key(invoice, include_qr=True, company_info={"name": "A"}, locale="en") != original
+        
+        invoice.items[0].updated_at += timedelta(seconds=1)
+        assert pdf_cache_key(invoice, include_qr=True, company_info={"name": "A"}) != original
+    
+    def test_key_follows_branding_version(self):
+        invoice = make_invoice()
+        invoice.branding = make_row(datetime(2024, 1, 1))
+        invoice.branding_id = invoice.branding.id
+        original = pdf_cache_key(invoice)
+        
+        invoice.branding.updated_at = datetime(2024, 2, 1)
+        
+        assert pdf_cache_key(invoice) != original
+
+
+class TestPDFCache:
+    """Test cases for PDFCache"""
+    
+    def test_put_and_get(self, tmp_path):
+        cache = PDFCache(root=tmp_path, max_bytes=1024)
+        key = pdf_storage_key(uuid4(), "ab" * 32)
+        
+        assert cache.get(key) is None
+        cache.put(key, b"%PDF-1.4 one")
+        
+        assert cache.get(key) == b"%PDF-1.4 one"
+    
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = PDFCache(root=tmp_path, max_bytes=250)
+        tenant_id = uuid4()
+        keys = [pdf_storage_key(tenant_id, f"{index:02d}" * 32) for index in range(3)]
+        
+        for age, key in zip((300, 200), keys[:2]):
+            cache.put(key, b"x" * 100)
+            stamp = datetime.now().timestamp() - age
+            os.utime(tmp_path / key, (stamp, stamp))
+        
+        # Reading the oldest entry makes the other one least recently used
+        assert cache.get(keys[0]) is not None
+        cache.put(keys[2], b"x" * 100)
+        
+        assert cache.get(keys[0]) is not None
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[2]) is not None
+    
+    def test_local_miss_is_filled_from_remote(self, tmp_path):
+        remote = LocalChunkBackend(tmp_path / "remote")
+        key = pdf_storage_key(uuid4(), "cd" * 32)
+        PDFCache(root=tmp_path / "worker-1", max_bytes=1024, remote=remote).put(key, b"%PDF-1.4 shared")
+        
+        other_worker = PDFCache(root=tmp_path / "worker-2", max_bytes=1024, remote=remote)
+        
+        assert other_worker.get(key) == b"%PDF-1.4 shared"
+        assert (tmp_path / "worker-2" / key).exists()
@@ -459,6 +459,62 @@ class TestProductSearch:
         assert data["page_size"] == 2
         assert data["total"] == 4
         assert data["total_pages"] == 2
+    
+    def test_lookup_by_code(self, client: TestClient, auth_headers, sample_products):
+        """Test exact barcode/SKU lookup for scanned codes"""
+        ring = sample_products[0]
+        response = client.put(f"/api/products/{ring['id']}", json={"barcode": "6260000000017"}, headers=auth_headers)
+        assert response.status_code == 200
+        
+        response = client.get("/api/products/lookup?code=6260000000017", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["id"] == ring["id"]
+        
+        response = client.get("/api/products/lookup?code=SN001", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["name"] == "Silver Necklace"
+        
+        # Exact match only, no partial matches
+        response = client.get("/api/products/lookup?code=SN00", headers=auth_headers)
+        assert response.status_code == 404
+        
+        response = client.post(
+            "/api/products/lookup",
+            json={"codes": ["GB22K001", "UNKNOWN", "6260000000017", "GB22K001"]},
+            headers=auth_headers
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert set(data["products"]) == {"GB22K001", "6260000000017"}
+        assert data["products"]["GB22K001"]["name"] == "Gold Bracelet 22K"
+        assert data["missing"] == ["UNKNOWN"]
+    
+    def test_lookup_cache_follows_product_changes(self, client: TestClient, auth_headers, sample_products):
+        """Test cached lookups are dropped when products change"""
+        necklace = sample_products[1]
+        
+        response = client.get("/api/products/lookup?code=SN001", headers=auth_headers)
+        assert response.json()["stock_quantity"] == 3
+        
+        response = client.post(
+            f"/api/products/{necklace['id']}/stock/adjust",
+            json={"quantity": 4, "reason": "Restock"},
+            headers=auth_headers
+        )
+        assert response.status_code == 200
+        
+        response = client.get("/api/products/lookup?code=SN001", headers=auth_headers)
+        assert response.json()["stock_quantity"] == 7
+        
+        # Renamed code no longer resolves, new one does
+        response = client.put(f"/api/products/{necklace['id']}", json={"sku": "SN002"}, headers=auth_headers)
+        assert response.status_code == 200
+        assert client.get("/api/products/lookup?code=SN001", headers=auth_headers).status_code == 404
+        assert client.get("/api/products/lookup?code=SN002", headers=auth_headers).json()["id"] == necklace["id"]
+        
+        # Deleted products are no longer found
+        client.delete(f"/api/products/{necklace['id']}", headers=auth_headers)
+        assert client.get("/api/products/lookup?code=SN002", headers=auth_headers).status_code == 404
 
 
 class TestStockManagement:
@@ -8,6 +8,7 @@ from io import BytesIO
 import base64
 
 from app.services.qr_service import QRCodeService
+from app.services.qr_asset_cache import QRAssetCache
 
 
 class TestQRCodeService:
@@ -15,7 +16,10 @@ class TestQRCodeService:
     
     def setup_method(self):
         """Setup test fixtures"""
-        self.qr_service = QRCodeService(base_url="https://test.hesaabplus.com")
+        # A fresh in-process cache per test, so every test renders its QR codes and mocks see the calls
+        cache = QRAssetCache()
+        cache._redis = Mock(side_effect=Exception("Redis unavailable"))
+        self.qr_service = QRCodeService(base_url="https://test.hesaabplus.com", cache=cache)
     
     def test_qr_service_initialization(self):
         """Test QR service initialization"""
@@ -237,4 +241,48 @@ class TestQRCodeService:
         for token in special_tokens:
             qr_bytes = self.qr_service.generate_invoice_qr_code(token)
             assert isinstance(qr_bytes, bytes)
-            assert len(qr_bytes) > 0
\ No newline at end of file
+            assert len(qr_bytes) > 0
+
+
+class TestQRAssetCache:
+    """Test cases for the encoded QR image cache"""
+    
+    def setup_method(self):
+        self.cache = QRAssetCache(max_entries=2)
+        # Keep these tests to the in-process tier
+        self.cache._redis = Mock(side_effect=Exception("Redis unavailable"))
+        self.qr_service = QRCodeService(base_url="https://test.hesaabplus.com", cache=self.cache)
+    
+    def test_repeated_qr_code_is_rendered_once(self):
+        first = self.qr_service.generate_invoice_qr_code("cached-token", size=6)
+        
+        with patch('qrcode.QRCode') as mock_qr:
+            second = self.qr_service.generate_invoice_qr_code("cached-token", size=6)
+            base64_url = self.qr_service.generate_qr_code_base64("cached-token", size=6)
+        
+        mock_qr.assert_not_called()
+        assert second == first
+        assert base64_url == "data:image/png;base64," + base64.b64encode(first).decode('utf-8')
+    
+    def test_variants_are_cached_separately(self):
+        png_bytes = self.qr_service.generate_invoice_qr_code("variant-token", format="PNG")
+        svg_bytes = self.qr_service.generate_invoice_qr_code("variant-token", format="SVG")
+        
+        assert png_bytes.startswith(b'\x89PNG\r\n\x1a\n')
+        assert b"<svg" in svg_bytes
+        assert self.qr_service.generate_qr_code_base64("variant-token", format="SVG").startswith(
+            "data:image/svg+xml;base64,"
+        )
+    
+    def test_least_recently_used_entry_is_evicted(self):
+        for token in ("token-a", "token-b"):
+            self.qr_service.generate_invoice_qr_code(token)
+        self.qr_service.generate_invoice_qr_code("token-a")
+        self.qr_service.generate_invoice_qr_code("token-c")
+        
+        key_a, key_b = (
+            self.cache.key(f"https://test.hesaabplus.com/public/invoice/{token}", 10, 4, "PNG")
+            for token in ("token-a", "token-b")
+        )
+        assert self.cache.get(key_a) is not None
+        assert self.cache.get(key_b) is None
@@ -7,6 +7,7 @@ import os
 import pytest
 import tempfile
 import gzip
+import hashlib
 from pathlib import Path
 from datetime import datetime, timezone
 from unittest.mock import Mock, patch, MagicMock
@@ -23,9 +24,11 @@ from app.models.tenant import Tenant, SubscriptionType
 from app.models.backup import BackupLog, RestoreLog, BackupType, BackupStatus
 from app.services.restore_service import RestoreService
 from app.services.backup_service import BackupService
+from app.services.cloud_storage_service import IntegrityCheckMode
 from app.tasks.restore_tasks import (
     validate_backup_integrity_task, restore_single_tenant_task,
-    restore_multiple_tenants_task, restore_all_tenants_task
+    restore_multiple_tenants_task, restore_all_tenants_task,
+    restore_tenant_lane_task
 )
 
 
@@ -93,38 +96,27 @@ class TestRestoreService:
     
     def test_validate_backup_integrity_success(self, restore_service, test_backup):
         """Test successful backup integrity validation"""
-        import tempfile
+        with patch.object(restore_service.cloud_storage, 'stream_object_checksum') as mock_stream:
         
-        with patch.object(restore_service.cloud_storage, 'download_from_b2') as mock_download, \
-             patch.object(restore_service.backup_service, 'calculate_checksum') as mock_checksum:
-            
-            # Mock download to create the actual file
-            def mock_download_func(storage_location, local_path):
-                # Create the file that the download would create
-                with open(local_path, 'w') as f:
-                    f.write("test backup content for validation")
-                return local_path
-            
-            mock_download.side_effect = mock_download_func
-            mock_checksum.return_value = test_backup.checksum
+            # Stored object hashes to the recorded checksum
+            mock_stream.return_value = (test_backup.checksum, 524288)
             
             result = restore_service.validate_backup_integrity(str(test_backup.id), "backblaze_b2")
             
             assert result["is_valid"] is True
             assert result["backup_id"] == str(test_backup.id)
             assert result["storage_provider"] == "backblaze_b2"
+            assert result["verification_mode"] == "full"
             assert result["expected_checksum"] == test_backup.checksum
             assert result["actual_checksum"] == test_backup.checksum
             assert result["file_size"] > 0
     
     def test_validate_backup_integrity_failure(self, restore_service, test_backup):
         """Test backup integrity validation failure"""
-        with patch.object(restore_service.cloud_storage, 'download_from_b2') as mock_download, \
-             patch.object(restore_service.backup_service, 'calculate_checksum') as mock_checksum:
+        with patch.object(restore_service.cloud_storage, 'stream_object_checksum') as mock_stream:
             
-            # Mock successful download but checksum mismatch
-            mock_download.return_value = Path("/tmp/test_backup.enc")
-            mock_checksum.return_value = "different_checksum"
+            # Stored object hashes to a different checksum
+            mock_stream.return_value = ("different_checksum", 524288)
             
             result = restore_service.validate_backup_integrity(str(test_backup.id), "backblaze_b2")
             
@@ -132,6 +124,80 @@ class TestRestoreService:
             assert result["expected_checksum"] == test_backup.checksum
             assert result["actual_checksum"] == "different_checksum"
     
+    def test_validate_backup_integrity_metadata_mode(self, restore_service, test_backup):
+        """Test metadata validation uses a single HEAD request and no download"""
+        test_backup.storage_locations = [{
+            **test_backup.storage_locations[0],
+            "size": 524288,
+            "etag": "etag-123"
+        }]
+        restore_service.db.commit()
+        
+        with patch.object(restore_service.cloud_storage, 'head_object') as mock_head, \
+             patch.object(restore_service.cloud_storage, 'stream_object_checksum') as mock_stream:
+            
+            mock_head.return_value = {"size": 524288, "etag": "etag-123", "checksum_sha256": None, "metadata": {}}
+            
+            result = restore_service.validate_backup_integrity(
+                str(test_backup.id), "backblaze_b2", mode=IntegrityCheckMode.METADATA
+            )
+            
+            assert result["is_valid"] is True
+            assert result["verification_mode"] == "metadata"
+            assert result["bytes_transferred"] == 0
+            mock_head.assert_called_once()
+            mock_stream.assert_not_called()
+            
+            # A truncated object is caught from its size alone
+            mock_head.return_value = {"size": 1024, "etag": "etag-123", "checksum_sha256": None, "metadata": {}}
+            result = restore_service.validate_backup_integrity(
+                str(test_backup.id), "backblaze_b2", mode=IntegrityCheckMode.METADATA
+            )
+            assert result["is_valid"] is False
+    
+    def test_validate_backup_integrity_sampled_mode(self, restore_service, test_backup):
+        """Test sampled validation range-reads parts and checks them against recorded part checksums"""
+        parts = [b"a" * 4, b"b" * 4, b"c" * 4, b"d" * 2]
+        content = b"".join(parts)
+        test_backup.compressed_size = len(content)
+        test_backup.backup_metadata = {
+            "integrity": {
+                "part_size": 4,
+                "part_checksums": [hashlib.sha256(part).hexdigest() for part in parts]
+            }
+        }
+        restore_service.db.commit()
+        
+        def range_func(provider, key, start, end):
+            return content[start:end + 1]
+        
+        with patch.object(restore_service.cloud_storage, 'head_object') as mock_head, \
+             patch.object(restore_service.cloud_storage, 'get_object_range') as mock_range, \
+             patch.object(restore_service.cloud_storage, 'stream_object_checksum') as mock_stream:
+            
+            mock_head.return_value = {"size": len(content), "etag": "etag", "checksum_sha256": None, "metadata": {}}
+            mock_range.side_effect = range_func
+            
+            result = restore_service.validate_backup_integrity(
+                str(test_backup.id), "backblaze_b2", mode=IntegrityCheckMode.SAMPLED
+            )
+            
+            assert result["is_valid"] is True
+            assert result["verification_mode"] == "sampled"
+            assert mock_range.call_count == 3
+            assert result["bytes_transferred"] < len(content)
+            # The last part is always sampled so truncation is detected
+            assert any(call.args[2] == 12 for call in mock_range.call_args_list)
+            mock_stream.assert_not_called()
+            
+            # Corruption inside a sampled part fails validation
+            corrupted = content[:12] + b"XX"
+            mock_range.side_effect = lambda provider, key, start, end: corrupted[start:end + 1]
+            result = restore_service.validate_backup_integrity(
+                str(test_backup.id), "backblaze_b2", mode=IntegrityCheckMode.SAMPLED
+            )
+            assert result["is_valid"] is False
+    
     def test_validate_backup_not_found(self, restore_service):
         """Test validation with non-existent backup"""
         fake_backup_id = str(uuid4())
@@ -582,6 +648,71 @@ class TestRestoreService:
         
         restore_points = restore_service.get_available_restore_points(str(test_tenant.id), "backblaze_b2")
         assert len(restore_points) == 0
+    
+    def test_plan_tenant_restores_priority_and_lanes(self, restore_service, db_session):
+        """Test restore plan orders by tier then archive size and bounds concurrency"""
+        free_tenant = Tenant(id=uuid4(), name="Free", email="free@example.com",
+                             subscription_type=SubscriptionType.FREE, is_active=True)
+        pro_small = Tenant(id=uuid4(), name="Pro Small", email="pro-small@example.com",
+                           subscription_type=SubscriptionType.PRO, is_active=True)
+        pro_large = Tenant(id=uuid4(), name="Pro Large", email="pro-large@example.com",
+                           subscription_type=SubscriptionType.PRO, is_active=True)
+        db_session.add_all([free_tenant, pro_small, pro_large])
+        db_session.commit()
+        
+        sizes = {free_tenant.id: 1024, pro_small.id: 2048, pro_large.id: 50 * 1024 * 1024}
+        pairs = []
+        for tenant in (free_tenant, pro_small, pro_large):
+            backup = BackupLog(
+                id=uuid4(), backup_type=BackupType.TENANT_DAILY, tenant_id=tenant.id,
+                backup_name=f"backup_{tenant.name}", status=BackupStatus.COMPLETED,
+                compressed_size=sizes[tenant.id],
+                storage_locations=[{"provider": "backblaze_b2", "location": "s3://bucket/key"}]
+            )
+            db_session.add(backup)
+            pairs.append({"tenant_id": str(tenant.id), "backup_id": str(backup.id)})
+        db_session.commit()
+        
+        with patch.object(restore_service, 'estimate_restore_throughput', return_value=1024 * 1024):
+            plan = restore_service.plan_tenant_restores(pairs, "backblaze_b2", max_concurrency=2)
+        
+        ordered = [item["tenant_id"] for item in plan["restores"]]
+        assert ordered == [str(pro_small.id), str(pro_large.id), str(free_tenant.id)]
+        assert plan["max_concurrency"] == 2
+        assert {item["lane"] for item in plan["restores"]} == {0, 1}
+        assert plan["estimated_total_seconds"] < plan["estimated_serial_seconds"]
+        assert plan["unavailable_in_storage"] == []
+    
+    def test_restore_batch_status(self, restore_service, db_session, test_tenant, test_backup):
+        """Test queued batch restores are reported with per-tenant progress"""
+        pairs = [{"tenant_id": str(test_tenant.id), "backup_id": str(test_backup.id)}]
+        plan = restore_service.plan_tenant_restores(pairs, "backblaze_b2", max_concurrency=4)
+        batch_id = str(uuid4())
+        
+        lanes = restore_service.create_restore_batch(plan, str(uuid4()), batch_id)
+        
+        assert len(lanes) == 1
+        assert lanes[0][0]["tenant_id"] == str(test_tenant.id)
+        
+        report = restore_service.get_restore_batch_status(batch_id)
+        
+        assert report["status"] == "in_progress"
+        assert report["total_tenants"] == 1
+        assert report["pending_restores"] == 1
+        assert report["restore_results"][0]["current_step"] == "queued"
+        assert report["restore_results"][0]["progress_percentage"] == 0
+
+    def test_restore_batch_creation_is_idempotent(self, restore_service, db_session, test_tenant, test_backup):
+        """Test a retried orchestration reuses the restore logs already queued for its batch"""
+        pairs = [{"tenant_id": str(test_tenant.id), "backup_id": str(test_backup.id)}]
+        plan = restore_service.plan_tenant_restores(pairs, "backblaze_b2", max_concurrency=4)
+        batch_id = str(uuid4())
+        
+        first_lanes = restore_service.create_restore_batch(plan, str(uuid4()), batch_id)
+        retried_lanes = restore_service.create_restore_batch(plan, str(uuid4()), batch_id)
+        
+        assert retried_lanes == first_lanes
+        assert db_session.query(RestoreLog).filter(RestoreLog.batch_id == batch_id).count() == 1
 
 
 class TestRestoreTasks:
@@ -715,5 +846,32 @@ class TestRestoreTasks:
             )
 
 
+    def test_restore_tenant_lane_task_continues_after_failure(self, mock_db_session):
+        """Test a failed tenant does not stop the rest of its lane"""
+        with patch('app.tasks.restore_tasks.RestoreService') as mock_service_class, \
+             patch('app.tasks.restore_tasks.current_task') as mock_current_task:
+            
+            mock_current_task.update_state = Mock()
+            mock_db_session.query.return_value.filter.return_value.first.return_value = None
+            
+            mock_service = Mock()
+            mock_service_class.return_value = mock_service
+            mock_service.restore_single_tenant.side_effect = [
+                Exception("Download failed"),
+                {"status": "success"}
+            ]
+            
+            lane = [
+                {"tenant_id": "tenant-1", "backup_id": "backup-1", "restore_log_id": "restore-1"},
+                {"tenant_id": "tenant-2", "backup_id": "backup-2", "restore_log_id": "restore-2"}
+            ]
+            
+            results = restore_tenant_lane_task(lane, "backblaze_b2", "admin-123")
+            
+            assert [r["status"] for r in results] == ["failed", "success"]
+            assert "Download failed" in results[0]["error"]
+            assert mock_service.restore_single_tenant.call_count == 2
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
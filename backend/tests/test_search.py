@@ -0,0 +1,155 @@
+"""
+Tests for normalized trigram search over customers, products and invoices
+"""
+
+import os
+import pytest
+from decimal import Decimal
+from sqlalchemy import text
+
+from app.models.customer import Customer
+from app.models.product import Product
+from app.models.invoice import Invoice, InvoiceType
+from app.models.search import normalize_search_text, search_terms
+from app.schemas.customer import CustomerSearchRequest
+from app.schemas.product import ProductSearchRequest
+from app.schemas.invoice import InvoiceFilter
+from app.services.customer_service import CustomerService
+from app.services.product_service import ProductService
+from app.services.invoice_service import InvoiceService
+from tests.conftest import benchmark
+
+
+class TestSearchNormalization:
+    """Test Persian/Arabic text normalization"""
+    
+    def test_arabic_letters_fold_to_persian(self):
+        assert normalize_search_text("علي كريمي") == normalize_search_text("علی کریمی")
+        assert normalize_search_text("مدرسة") == "مدرسه"
+    
+    def test_digits_and_joiners(self):
+        assert normalize_search_text("۰۹۱۲ ٣٤٥") == "0912 345"
+        assert normalize_search_text("می‌خواهم") == "میخواهم"
+        assert normalize_search_text("طـــلا") == "طلا"
+    
+    def test_query_terms(self):
+        assert search_terms("  Gold   RING ") == ["gold", "ring"]
+        assert search_terms("") == []
+
+
+class TestServiceSearch:
+    """Test services search through the generated search_text columns"""
+    
+    def test_customer_search_is_normalized(self, db_session, test_tenant):
+        ali = Customer(tenant_id=test_tenant.id, name="علي كريمي", phone="۰۹۱۲۳۴۵۶۷۸۹")
+        other = Customer(tenant_id=test_tenant.id, name="Sara Ahmadi", business_name="Golden Store")
+        db_session.add_all([ali, other])
+        db_session.commit()
+        
+        service = CustomerService(db_session)
+        
+        customers, total = service.search_customers(CustomerSearchRequest(query="علی کریمی"), test_tenant.id)
+        assert total == 1
+        assert customers[0].id == ali.id
+        
+        customers, total = service.search_customers(CustomerSearchRequest(query="09123"), test_tenant.id)
+        assert [customer.id for customer in customers] == [ali.id]
+        
+        # Words may match different fields, in any order
+        customers, total = service.search_customers(CustomerSearchRequest(query="store sara"), test_tenant.id)
+        assert [customer.id for customer in customers] == [other.id]
+    
+    def test_like_wildcards_are_literal(self, db_session, test_tenant):
+        db_session.add(Customer(tenant_id=test_tenant.id, name="Reza"))
+        db_session.commit()
+        
+        customers, total = CustomerService(db_session).search_customers(
+            CustomerSearchRequest(query="%"), test_tenant.id
+        )
+        assert total == 0
+    
+    def test_product_search_ranked_by_relevance(self, db_session, test_tenant):
+        ring = Product(tenant_id=test_tenant.id, name="Gold ring", sku="RG-100", selling_price=Decimal("10"))
+        chain = Product(
+            tenant_id=test_tenant.id, name="Chain", description="Matches a gold ring set",
+            sku="CH-200", selling_price=Decimal("10")
+        )
+        db_session.add_all([chain, ring])
+        db_session.commit()
+        
+        products, total = ProductService(db_session).search_products(
+            test_tenant.id, ProductSearchRequest(query="gold ring", sort_by="relevance")
+        )
+        assert total == 2
+        assert products[0].id == ring.id
+        
+        products, total = ProductService(db_session).search_products(
+            test_tenant.id, ProductSearchRequest(query="rg-1")
+        )
+        assert [product.id for product in products] == [ring.id]
+    
+    def test_invoice_search_by_number_or_customer(self, db_session, test_tenant, test_customer):
+        other_customer = Customer(tenant_id=test_tenant.id, name="محمد رضايي")
+        db_session.add(other_customer)
+        db_session.flush()
+        
+        first = Invoice(
+            tenant_id=test_tenant.id, customer_id=test_customer.id, invoice_number="INV-۰۰۴۲",
+            invoice_type=InvoiceType.GENERAL, total_amount=Decimal("100")
+        )
+        second = Invoice(
+            tenant_id=test_tenant.id, customer_id=other_customer.id, invoice_number="INV-0043",
+            invoice_type=InvoiceType.GENERAL, total_amount=Decimal("100")
+        )
+        db_session.add_all([first, second])
+        db_session.commit()
+        
+        service = InvoiceService(db_session)
+        
+        invoices, total = service.get_invoices(test_tenant.id, InvoiceFilter(search="inv-0042"))
+        assert [invoice.id for invoice in invoices] == [first.id]
+        
+        invoices, total = service.get_invoices(test_tenant.id, InvoiceFilter(search="رضایی"))
+        assert [invoice.id for invoice in invoices] == [second.id]
+
+
+@pytest.mark.slow
+@benchmark
+class TestSearchBenchmark:
+    """Trigram index versus sequential ILIKE scans on a large customer table"""
+    
+    # Raise SEARCH_BENCHMARK_ROWS (e.g. to 1000000) to compare the two at scale
+    ROW_COUNT = int(os.environ.get("SEARCH_BENCHMARK_ROWS", "10000"))
+    
+    def test_trigram_search_at_scale(self, db_session, test_tenant):
+        db_session.execute(text("""
+            INSERT INTO customers (id, tenant_id, name, email, phone, country, customer_type, status,
+                                   credit_limit, total_debt, total_gold_debt, total_purchases,
+                                   preferred_contact_method, email_notifications, sms_notifications,
+                                   created_at, updated_at, is_active)
+            SELECT gen_random_uuid(), :tenant_id,
+                   'مشتری ' || n || ' ' || md5(n::text),
+                   'customer' || n || '@example.com',
+                   '0912' || lpad(n::text, 7, '0'),
+                   'Iran', 'INDIVIDUAL', 'ACTIVE', 0, 0, 0, 0, 'phone', true, true, now(), now(), true
+            FROM generate_series(1, :row_count) AS n
+        """), {"tenant_id": test_tenant.id, "row_count": self.ROW_COUNT})
+        db_session.commit()
+        db_session.execute(text("ANALYZE customers"))
+        
+        service = CustomerService(db_session)
+        needle = str(self.ROW_COUNT // 2)
+        
+        customers, total = service.search_customers(CustomerSearchRequest(query=f"customer{needle}@"), test_tenant.id)
+        
+        ilike_total = db_session.execute(text(
+            "SELECT count(*) FROM customers WHERE tenant_id = :tenant_id AND "
+            "(name ILIKE :term OR email ILIKE :term OR phone ILIKE :term OR mobile ILIKE :term OR business_name ILIKE :term)"
+        ), {"tenant_id": test_tenant.id, "term": f"%customer{needle}@%"}).scalar()
+        
+        plan = "\n".join(row[0] for row in db_session.execute(text(
+            "EXPLAIN SELECT id FROM customers WHERE search_text LIKE :term"
+        ), {"term": f"%customer{needle}@%"}))
+        
+        assert total == ilike_total == 1
+        assert "idx_customer_search_trgm" in plan
@@ -0,0 +1,198 @@
+"""
+Tests for atomic stock movements and the stock ledger
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+
+from app.core.database import SessionLocal
+from app.core.exceptions import BusinessLogicError
+from app.models.product import Product
+from app.models.stock_movement import StockMovement, StockMovementType
+from app.schemas.product import (
+    ProductUpdate, StockAdjustmentRequest, StockMovementBatchRequest, StockReservationRequest
+)
+from app.services.product_service import ProductService
+from tests.conftest import benchmark
+
+logger = logging.getLogger(__name__)
+
+
+def reserve_one(tenant_id, product_id) -> bool:
+    """Reserve one unit in a session of its own, as a concurrent request would"""
+    session = SessionLocal()
+    try:
+        ProductService(session).reserve_stock(tenant_id, product_id, StockReservationRequest(quantity=1))
+        return True
+    except BusinessLogicError:
+        return False
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def stocked_product(db_session, test_tenant):
+    product = Product(tenant_id=test_tenant.id, name="Ring", selling_price=Decimal("10"), stock_quantity=30)
+    db_session.add(product)
+    db_session.commit()
+    return product
+
+
+class TestStockLedger:
+    """Test stock movements and their ledger rows"""
+    
+    def test_movements_are_recorded(self, db_session, test_tenant, stocked_product):
+        service = ProductService(db_session)
+        
+        service.reserve_stock(test_tenant.id, stocked_product.id, StockReservationRequest(
+            quantity=5, reason="Order", reference_type="invoice"
+        ))
+        service.fulfill_stock(test_tenant.id, stocked_product.id, 3)
+        product = service.release_stock(test_tenant.id, stocked_product.id, 2)
+        
+        assert (product.stock_quantity, product.reserved_quantity) == (27, 0)
+        
+        movements = service.get_stock_movements(test_tenant.id, stocked_product.id)
+        assert [(movement.movement_type, movement.quantity, movement.stock_after, movement.reserved_after)
+                for movement in reversed(movements)] == [
+            (StockMovementType.RESERVE, 5, 30, 5),
+            (StockMovementType.FULFILL, 3, 27, 2),
+            (StockMovementType.RELEASE, 2, 27, 0)
+        ]
+        assert movements[-1].reference_type == "invoice"
+    
+    def test_refused_movement_changes_nothing(self, db_session, test_tenant, stocked_product):
+        service = ProductService(db_session)
+        
+        with pytest.raises(BusinessLogicError, match="Cannot release more than reserved"):
+            service.release_stock(test_tenant.id, stocked_product.id, 1)
+        
+        assert db_session.query(StockMovement).count() == 0
+    
+    def test_batch_is_all_or_nothing(self, db_session, test_tenant, stocked_product):
+        other = Product(tenant_id=test_tenant.id, name="Chain", selling_price=Decimal("10"), stock_quantity=2)
+        db_session.add(other)
+        db_session.commit()
+        
+        service = ProductService(db_session)
+        with pytest.raises(BusinessLogicError, match="Insufficient stock"):
+            service.apply_stock_movements(test_tenant.id, StockMovementBatchRequest(movements=[
+                {"product_id": stocked_product.id, "movement_type": "reserve", "quantity": 4},
+                {"product_id": other.id, "movement_type": "reserve", "quantity": 3}
+            ]))
+        
+        assert service.get_product(test_tenant.id, stocked_product.id).reserved_quantity == 0
+        assert db_session.query(StockMovement).count() == 0
+        
+        products = service.apply_stock_movements(test_tenant.id, StockMovementBatchRequest(
+            reference_type="invoice",
+            movements=[
+                {"product_id": stocked_product.id, "movement_type": "reserve", "quantity": 4},
+                {"product_id": other.id, "movement_type": "reserve", "quantity": 2},
+                {"product_id": stocked_product.id, "movement_type": "adjust", "quantity": -6}
+            ]
+        ))
+        
+        assert [(product.name, product.stock_quantity, product.reserved_quantity) for product in products] == [
+            ("Ring", 24, 4), ("Chain", 2, 2)
+        ]
+        assert db_session.query(StockMovement).filter(StockMovement.reference_type == "invoice").count() == 3
+
+
+class TestStockConcurrency:
+    """Test parallel reservations against the same product"""
+    
+    def test_parallel_reservations_do_not_oversell(self, db_session, test_tenant, stocked_product):
+        attempts = 90
+        
+        with ThreadPoolExecutor(max_workers=15) as executor:
+            outcomes = list(executor.map(lambda _: reserve_one(test_tenant.id, stocked_product.id), range(attempts)))
+        
+        db_session.expire_all()
+        product = db_session.query(Product).get(stocked_product.id)
+        assert outcomes.count(True) == 30
+        assert product.reserved_quantity == 30
+        assert product.stock_quantity == 30
+        assert db_session.query(StockMovement).filter(StockMovement.product_id == product.id).count() == 30
+
+
+@pytest.mark.slow
+@benchmark
+class TestStockBenchmark:
+    """Reservation throughput with many sessions contending for one product"""
+    
+    RESERVATIONS = int(os.environ.get("STOCK_BENCHMARK_RESERVATIONS", "1000"))
+    
+    def test_reservation_throughput(self, db_session, test_tenant):
+        product = Product(tenant_id=test_tenant.id, name="Ring", selling_price=Decimal("10"),
+                          stock_quantity=self.RESERVATIONS)
+        db_session.add(product)
+        db_session.commit()
+        
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=15) as executor:
+            outcomes = list(executor.map(lambda _: reserve_one(test_tenant.id, product.id), range(self.RESERVATIONS)))
+        elapsed = time.perf_counter() - started
+        logger.info(f"{self.RESERVATIONS} reservations in {elapsed:.2f}s ({self.RESERVATIONS / elapsed:.0f}/s)")
+        
+        assert all(outcomes)
+
+
+class TestLowStockFlag:
+    """Test the maintained low stock flag and its transition events"""
+    
+    @pytest.fixture
+    def events(self, monkeypatch):
+        emitted = []
+        monkeypatch.setattr(
+            "app.services.stock_ledger_service.enqueue_webhook_event",
+            lambda db, tenant_id, event_type, payload: emitted.append((event_type, payload["available_quantity"])) or 1
+        )
+        return emitted
+    
+    def test_flag_follows_stock_and_emits_on_crossing(self, db_session, test_tenant, events):
+        product = Product(tenant_id=test_tenant.id, name="Ring", selling_price=Decimal("10"),
+                          stock_quantity=10, min_stock_level=4)
+        db_session.add(product)
+        db_session.commit()
+        assert product.is_low_stock is False
+        
+        service = ProductService(db_session)
+        service.reserve_stock(test_tenant.id, product.id, StockReservationRequest(quantity=5))
+        assert events == []
+        
+        product = service.reserve_stock(test_tenant.id, product.id, StockReservationRequest(quantity=1))
+        assert product.is_low_stock is True
+        assert events == [("product.low_stock", 4)]
+        
+        alerts = service.get_low_stock_alerts(test_tenant.id)
+        assert [alert.product_id for alert in alerts] == [product.id]
+        
+        product = service.adjust_stock(test_tenant.id, product.id, StockAdjustmentRequest(quantity=10))
+        assert product.is_low_stock is False
+        assert events[-1] == ("product.restocked", 14)
+        assert service.get_low_stock_alerts(test_tenant.id) == []
+    
+    def test_threshold_change_emits(self, db_session, test_tenant, events):
+        product = Product(tenant_id=test_tenant.id, name="Chain", selling_price=Decimal("10"), stock_quantity=3)
+        db_session.add(product)
+        db_session.commit()
+        
+        product = ProductService(db_session).update_product(
+            test_tenant.id, product.id, ProductUpdate(min_stock_level=5)
+        )
+        assert product.is_low_stock is True
+        assert events == [("product.low_stock", 3)]
+    
+    def test_services_are_never_low(self, db_session, test_tenant):
+        product = Product(tenant_id=test_tenant.id, name="Repair", selling_price=Decimal("10"),
+                          is_service=True, stock_quantity=0, min_stock_level=1)
+        db_session.add(product)
+        db_session.commit()
+        
+        assert product.is_low_stock is False
@@ -0,0 +1,118 @@
+"""
+Tests for the local storage object inventory
+"""
+
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import Mock
+
+from app.models.backup import StorageObject, StorageProvider
+from app.services.cloud_storage_service import CloudStorageService
+from app.services.storage_inventory_service import StorageInventoryService
+
+
+class FakeListingStorage:
+    """Stands in for CloudStorageService.iter_objects with fixed bucket listings"""
+    
+    def __init__(self, listings):
+        self.listings = listings
+    
+    def iter_objects(self, storage_provider, prefix=""):
+        for key, size in self.listings.get(storage_provider, []):
+            yield {
+                "key": key,
+                "size": size,
+                "etag": f"etag-{key}-{size}",
+                "last_modified": datetime.now(timezone.utc)
+            }
+
+
+class TestStorageInventoryService:
+    """Test cases for StorageInventoryService"""
+    
+    @pytest.fixture
+    def inventory(self, db_session):
+        return StorageInventoryService(db_session)
+    
+    def test_record_upload_and_delete(self, inventory, db_session):
+        inventory.record_upload("backblaze_b2", "tenant_a.sql.gz.enc", 1024)
+        inventory.record_upload("backblaze_b2", "tenant_a.sql.gz.enc", 2048, etag="abc")
+        db_session.commit()
+        
+        rows = db_session.query(StorageObject).filter(StorageObject.object_key == "tenant_a.sql.gz.enc").all()
+        assert len(rows) == 1
+        assert rows[0].size == 2048
+        assert rows[0].etag == "abc"
+        
+        inventory.record_delete("backblaze_b2", "tenant_a.sql.gz.enc")
+        db_session.commit()
+        
+        assert db_session.query(StorageObject).count() == 0
+    
+    def test_usage_and_redundancy(self, inventory, db_session):
+        inventory.record_upload("backblaze_b2", "both.enc", 100)
+        inventory.record_upload("cloudflare_r2", "both.enc", 100)
+        inventory.record_upload("backblaze_b2", "b2_only.enc", 50)
+        db_session.commit()
+        
+        usage = inventory.get_usage()
+        redundancy = inventory.get_redundancy()
+        
+        assert usage["backblaze_b2"]["object_count"] == 2
+        assert usage["backblaze_b2"]["total_size"] == 150
+        assert usage["cloudflare_r2"]["object_count"] == 1
+        assert redundancy["redundant"] == ["both.enc"]
+        assert redundancy["b2_only"] == ["b2_only.enc"]
+        assert redundancy["r2_only"] == []
+    
+    def test_reconcile_adds_updates_and_removes(self, inventory, db_session):
+        inventory.record_upload("backblaze_b2", "kept.enc", 10)
+        inventory.record_upload("backblaze_b2", "changed.enc", 10)
+        inventory.record_upload("backblaze_b2", "gone.enc", 10)
+        db_session.commit()
+        
+        storage = FakeListingStorage({
+            "backblaze_b2": [("kept.enc", 10), ("changed.enc", 20), ("new.enc", 30)]
+        })
+        
+        result = inventory.reconcile(storage, "backblaze_b2")
+        
+        assert result["added"] == 1
+        assert result["removed"] == 1
+        assert result["updated"] == 2  # kept.enc gains its ETag from the listing
+        keys = {
+            row.object_key: row.size
+            for row in db_session.query(StorageObject).filter(StorageObject.provider == StorageProvider.BACKBLAZE_B2)
+        }
+        assert keys == {"kept.enc": 10, "changed.enc": 20, "new.enc": 30}
+
+
+class TestCloudStorageInventory:
+    """Test cases for CloudStorageService reading from the inventory"""
+    
+    def test_usage_served_from_inventory(self, db_session):
+        cloud_storage = CloudStorageService(db_session)
+        cloud_storage.b2_client = Mock()
+        cloud_storage.r2_client = None
+        
+        cloud_storage.inventory.record_upload("backblaze_b2", "backup.enc", 4096)
+        db_session.commit()
+        
+        usage = cloud_storage.get_storage_usage()
+        
+        assert usage["backblaze_b2"]["available"] is True
+        assert usage["backblaze_b2"]["object_count"] == 1
+        assert usage["backblaze_b2"]["total_size"] == 4096
+        assert usage["cloudflare_r2"]["available"] is False
+        cloud_storage.b2_client.list_objects_v2.assert_not_called()
+        cloud_storage.b2_client.get_paginator.assert_not_called()
+    
+    def test_delete_removes_inventory_row(self, db_session):
+        cloud_storage = CloudStorageService(db_session)
+        cloud_storage.b2_client = Mock()
+        
+        cloud_storage.inventory.record_upload("backblaze_b2", "backup.enc", 4096)
+        assert cloud_storage.delete_from_b2("s3://securesyntax/backup.enc")
+        db_session.commit()
+        
+        assert db_session.query(StorageObject).count() == 0
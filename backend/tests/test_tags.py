@@ -0,0 +1,129 @@
+"""
+Tests for the tenant tag dictionary and tag filters
+"""
+
+from decimal import Decimal
+
+from app.models.customer import Customer
+from app.models.product import Product
+from app.models.tag import TagEntityType
+from app.schemas.customer import CustomerSearchRequest
+from app.schemas.product import ProductSearchRequest
+from app.services.customer_service import CustomerService
+from app.services.product_service import ProductService
+from app.services.tag_dictionary_service import TagDictionaryService
+
+
+class TestTagCounts:
+    """Test usage counts following tagged records"""
+    
+    def counts(self, db_session, tenant_id, entity_type=TagEntityType.CUSTOMER):
+        return dict(TagDictionaryService(db_session).get_tag_counts(tenant_id, entity_type))
+    
+    def test_counts_follow_customer_changes(self, db_session, test_tenant):
+        vip = Customer(tenant_id=test_tenant.id, name="Ali", tags=["vip", "wholesale"])
+        regular = Customer(tenant_id=test_tenant.id, name="Sara", tags=["vip"])
+        db_session.add_all([vip, regular])
+        db_session.commit()
+        assert self.counts(db_session, test_tenant.id) == {"vip": 2, "wholesale": 1}
+        
+        regular.add_tag("new")
+        vip.remove_tag("wholesale")
+        db_session.commit()
+        assert self.counts(db_session, test_tenant.id) == {"vip": 2, "new": 1}
+        
+        # Soft-deleted customers stop counting
+        vip.is_active = False
+        db_session.commit()
+        assert self.counts(db_session, test_tenant.id) == {"vip": 1, "new": 1}
+        
+        db_session.delete(regular)
+        db_session.commit()
+        assert self.counts(db_session, test_tenant.id) == {}
+    
+    def test_deleting_unloaded_record_decrements(self, db_session, test_tenant):
+        customer = Customer(tenant_id=test_tenant.id, name="Ali", tags=["vip"])
+        db_session.add(customer)
+        db_session.commit()
+        
+        db_session.expire(customer, ["tags", "is_active"])
+        db_session.delete(customer)
+        db_session.commit()
+        
+        assert self.counts(db_session, test_tenant.id) == {}
+    
+    def test_overlong_tags_are_not_counted(self, db_session, test_tenant):
+        customer = Customer(tenant_id=test_tenant.id, name="Ali", tags=["vip", "x" * 300])
+        db_session.add(customer)
+        db_session.commit()
+        
+        assert self.counts(db_session, test_tenant.id) == {"vip": 1}
+        assert customer.tags[1] == "x" * 300
+    
+    def test_rolled_back_changes_are_not_counted(self, db_session, test_tenant):
+        db_session.add(Customer(tenant_id=test_tenant.id, name="Ali", tags=["vip"]))
+        db_session.flush()
+        db_session.rollback()
+        
+        assert self.counts(db_session, test_tenant.id) == {}
+    
+    def test_get_all_tags(self, db_session, test_tenant):
+        db_session.add_all([
+            Customer(tenant_id=test_tenant.id, name="Ali", tags=["vip", "gold"]),
+            Customer(tenant_id=test_tenant.id, name="Sara", tags=["gold"])
+        ])
+        db_session.commit()
+        
+        result = CustomerService(db_session).get_all_tags(test_tenant.id)
+        assert result["tags"] == ["gold", "vip"]
+        assert result["tag_counts"] == {"gold": 2, "vip": 1}
+    
+    def test_suggest_tags(self, db_session, test_tenant, client, auth_headers):
+        db_session.add_all([
+            Product(tenant_id=test_tenant.id, name="Ring", selling_price=Decimal("1"), tags=["gold", "gift"]),
+            Product(tenant_id=test_tenant.id, name="Chain", selling_price=Decimal("1"), tags=["gold"]),
+            Product(tenant_id=test_tenant.id, name="Coin", selling_price=Decimal("1"), tags=["silver"])
+        ])
+        db_session.commit()
+        
+        suggestions = TagDictionaryService(db_session).suggest_tags(test_tenant.id, TagEntityType.PRODUCT, "g")
+        assert [tuple(row) for row in suggestions] == [("gold", 2), ("gift", 1)]
+        
+        response = client.get("/api/products/tags/suggest?prefix=si", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["tags"] == [{"name": "silver", "usage_count": 1}]
+
+
+class TestTagFilters:
+    """Test matching all or any of the requested tags"""
+    
+    def test_customer_tag_match(self, db_session, test_tenant):
+        db_session.add_all([
+            Customer(tenant_id=test_tenant.id, name="Both", tags=["vip", "gold"]),
+            Customer(tenant_id=test_tenant.id, name="Vip", tags=["vip"]),
+            Customer(tenant_id=test_tenant.id, name="None", tags=[])
+        ])
+        db_session.commit()
+        
+        service = CustomerService(db_session)
+        customers, _ = service.search_customers(
+            CustomerSearchRequest(tags=["vip", "gold"], tag_match="all"), test_tenant.id
+        )
+        assert {customer.name for customer in customers} == {"Both"}
+        
+        customers, _ = service.search_customers(
+            CustomerSearchRequest(tags=["vip", "gold"], tag_match="any"), test_tenant.id
+        )
+        assert {customer.name for customer in customers} == {"Both", "Vip"}
+    
+    def test_product_tag_match(self, db_session, test_tenant):
+        db_session.add_all([
+            Product(tenant_id=test_tenant.id, name="Ring", selling_price=Decimal("1"), tags=["gold"]),
+            Product(tenant_id=test_tenant.id, name="Coin", selling_price=Decimal("1"), tags=["silver"])
+        ])
+        db_session.commit()
+        
+        products, _ = ProductService(db_session).search_products(
+            test_tenant.id, ProductSearchRequest(tags=["gold", "silver"], tag_match="any")
+        )
+        assert {product.name for product in products} == {"Ring", "Coin"}